@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional, List
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Dict, Any
 import os
+import json
 import logging
 from core.analyzers.github_analyzer import (
     analyze_and_store_repo, 
@@ -17,13 +19,22 @@ from models.schema import (
     AnalysisResponse,
     PaginatedResponse
 )
-from core.services.chatgpt import analyze_code_quality_with_chatgpt
+from core.services.chatgpt import stream_code_quality_with_chatgpt
 from core.analyzers.code_issue_analyzer import analyze_repository_files
 from core.analyzers.supabase_file_analyzer import analyze_repository_files_from_supabase
+from core.services.blob_store import BlobStore
+from core.services.pack_store import is_pack
+from core.services.paging import MAX_PAGE_SIZE, SortedIndex, decode_cursor, encode_cursor, indexes, parse_list
+from core.services.repo_store import RepoStore
+from core.services.responses import FastJSONResponse, model_response, ndjson_response
+from core.services.shared_cache import cache, repo_scope
 
 router = APIRouter(prefix="/api/repos", tags=["Repository Analysis"])
 logger = logging.getLogger(__name__)
 
+# Model scorings are kept until the repository is re-analyzed or this many seconds pass
+SCORING_CACHE_TTL = float(os.getenv("SCORING_CACHE_TTL", "86400"))
+
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_repository(body: AnalyzeRequest):
     """Analyze a GitHub repository for code quality metrics (without storage)."""
@@ -31,7 +42,8 @@ async def analyze_repository(body: AnalyzeRequest):
         result = await analyze_repo(
             str(body.repo_url), 
             window_days=body.window_days, 
-            max_commits=body.max_commits
+            max_commits=body.max_commits,
+            backend=body.backend
         )
         
         if "error" in result:
@@ -40,7 +52,8 @@ async def analyze_repository(body: AnalyzeRequest):
                 status_code = 400 if "Rate limit" in result["error"] else 500
                 raise HTTPException(status_code=status_code, detail=result)
         
-        return AnalysisResponse(**result)
+        # Shaped like AnalysisResponse without validating the whole analysis again
+        return model_response(AnalysisResponse, result)
         
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
@@ -54,14 +67,16 @@ async def analyze_repository(body: AnalyzeRequest):
 @router.post("/analyze-and-store", response_model=AnalysisResponse)
 async def analyze_and_store_repository(body: AnalyzeWithStorageRequest):
     """Analyze a GitHub repository and store results in database with file extraction for vector embedding."""
-    print(f"DEBUG: API route - received request: {body}")
+    logger.debug("analyze-and-store request: %s", body)
     try:
         result = await analyze_and_store_repo(
             str(body.repo_url),
             user_id=body.user_id,
             window_days=body.window_days,
             max_commits=body.max_commits,
-            download_zipball=body.download_zipball
+            download_zipball=body.download_zipball,
+            review_files=body.review_files,
+            backend=body.backend
         )
         
         if "error" in result:
@@ -70,7 +85,8 @@ async def analyze_and_store_repository(body: AnalyzeWithStorageRequest):
                 status_code = 400 if "Rate limit" in result["error"] else 500
                 raise HTTPException(status_code=status_code, detail=result)
         
-        return AnalysisResponse(**result)
+        # Shaped like AnalysisResponse without validating the whole analysis again
+        return model_response(AnalysisResponse, result)
         
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
@@ -142,13 +158,11 @@ async def get_user_analyses(user_id: str, limit: int = 50, offset: int = 0):
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        result = supabase.table("repos").select("*").eq("user_id", user_id).order(
-            "analysis_date", desc=True
-        ).range(offset, offset + limit - 1).execute()
+        analyses = RepoStore(supabase).list_repos(user_id=user_id, order_by="analysis_date", limit=limit, offset=offset)
         
         return PaginatedResponse(
-            analyses=result.data,
-            count=len(result.data),
+            analyses=analyses,
+            count=len(analyses),
             limit=limit,
             offset=offset
         )
@@ -165,13 +179,11 @@ async def get_repositories(limit: int = 50, offset: int = 0):
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        result = supabase.table("repos").select("*").order(
-            "created_at", desc=True
-        ).range(offset, offset + limit - 1).execute()
+        repositories = RepoStore(supabase).list_repos(limit=limit, offset=offset)
         
         return PaginatedResponse(
-            repositories=result.data,
-            count=len(result.data),
+            repositories=repositories,
+            count=len(repositories),
             limit=limit,
             offset=offset
         )
@@ -188,13 +200,15 @@ async def get_repo(repo_id: str):
         raise HTTPException(status_code=500, detail="Database not configured")
     
     try:
-        result = supabase.table("repos").select("*").eq("id", repo_id).execute()
+        repo = RepoStore(supabase).load_repo(repo_id)
         
-        if result.data:
-            return {"repo": result.data[0]}
+        if repo:
+            return {"repo": repo}
         else:
             raise HTTPException(status_code=404, detail="Repository not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get repository: {str(e)}")
 
@@ -208,12 +222,12 @@ async def get_repo_files(repo_id: str, limit: int = 100, offset: int = 0):
     
     try:
         # Get the repository to access file metadata
-        repo_result = supabase.table("repos").select("file_metadata").eq("id", repo_id).execute()
+        repo = RepoStore(supabase).load_repo(repo_id, ["file_metadata"])
         
-        if not repo_result.data:
+        if not repo:
             raise HTTPException(status_code=404, detail="Repository not found")
         
-        file_metadata = repo_result.data[0].get("file_metadata", [])
+        file_metadata = repo.get("file_metadata") or []
         
         # Apply pagination to the file metadata
         paginated_files = file_metadata[offset:offset + limit]
@@ -228,85 +242,202 @@ async def get_repo_files(repo_id: str, limit: int = 100, offset: int = 0):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get files: {str(e)}")
 
-@router.get("/{repo_id}/scoring")
-async def get_repo_scoring(repo_id: str):
-    """Get ChatGPT-powered scoring for a repository."""
+def attach_file_scoring(scoring_result: Dict[str, Any], repo_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach stored file analysis, score issues and per-file entries to a scoring result."""
+    file_metadata = repo_data.get("file_metadata", [])
+    file_analysis_data = repo_data.get("file_analysis", [])
+    score_issues_data = repo_data.get("score_issues", {})
+
+    # Attach file analysis data to response
+    scoring_result['file_analysis'] = file_analysis_data
+    scoring_result['score_issues'] = score_issues_data
+
+    # Map issues to score categories for each score
+    if score_issues_data:
+        for score in scoring_result.get('scores', []):
+            score_name = score.get('title', '')
+            if score_name in ['Quality', 'Security', 'Style']:
+                # Map to category
+                category_key = 'Security' if score_name == 'Security' else ('Quality' if score_name == 'Quality' else 'Style')
+                if category_key in score_issues_data:
+                    score['issues'] = score_issues_data[category_key][:5]  # Top 5 issues
+
+    # Populate files array from file_metadata if not already populated
+    if 'files' not in scoring_result or not scoring_result['files']:
+        files = []
+        logger.debug("Populating files array from %d file metadata entries", len(file_metadata))
+        for file in file_metadata[:50]:  # Limit to 50 files
+            name = file.get('name', '')
+            if not name:
+                # Try to extract name from path
+                path = file.get('relative_path', file.get('path', ''))
+                name = path.split('/')[-1] if path else 'unknown'
+
+            files.append({
+                "name": name,
+                "path": file.get('relative_path', file.get('path', '')),
+                "score": 0,  # Default score
+                "issues": [],
+                "aiPercentage": file.get('ai_percentage', 0),
+                "originality": file.get('originality'),
+                "quality": file.get('llm_quality', 0)
+            })
+        scoring_result['files'] = files
+        logger.debug("Populated %d files for scoring response", len(files))
+    else:
+        logger.debug("Files already in scoring_result: %d", len(scoring_result.get('files', [])))
+
+    return scoring_result
+
+def get_repo_for_scoring(repo_id: str) -> Dict[str, Any]:
+    """Load a repository row and check that it has analysis data to score."""
     from core.services.supabase import supabase
-    
+
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
-    
+
+    # Get the repository data
+    repo_data = RepoStore(supabase).load_repo(
+        repo_id, ["raw_analysis", "file_metadata", "file_analysis", "score_issues"]
+    )
+
+    if not repo_data:
+        raise HTTPException(status_code=404, detail="Repository not found")
+
+    if not repo_data.get("raw_analysis"):
+        raise HTTPException(status_code=400, detail="No analysis data available for this repository")
+
+    return repo_data
+
+def score_repo(repo_id: str, repo_data: Dict[str, Any]) -> Dict[str, Any]:
+    """ChatGPT scoring for a stored analysis; the default scoring used when the model fails is not cached."""
+    fallback = []
+
+    def score():
+        events = stream_code_quality_with_chatgpt(
+            repo_data["raw_analysis"], repo_data.get("file_metadata", []), repo_data.get("file_analysis", [])
+        )
+        for event in events:
+            if event["event"] == "result":
+                if event.get("fallback"):
+                    fallback.append(event["data"])
+                    return None
+                return event["data"]
+
+    scoring_result = cache.get_or_load("scoring", repo_scope(repo_id), "scoring", score, ttl=SCORING_CACHE_TTL)
+    return scoring_result if scoring_result is not None else fallback[0]
+
+@router.get("/{repo_id}/scoring")
+async def get_repo_scoring(repo_id: str):
+    """Get ChatGPT-powered scoring for a repository."""
     try:
-        # Get the repository data
-        repo_result = supabase.table("repos").select("*").eq("id", repo_id).execute()
-        
-        if not repo_result.data:
-            raise HTTPException(status_code=404, detail="Repository not found")
-        
-        repo_data = repo_result.data[0]
-        
-        # Extract analysis data
-        raw_analysis = repo_data.get("raw_analysis", {})
-        file_metadata = repo_data.get("file_metadata", [])
-        file_analysis_data = repo_data.get("file_analysis", [])
-        score_issues_data = repo_data.get("score_issues", {})
-        
-        if not raw_analysis:
-            raise HTTPException(status_code=400, detail="No analysis data available for this repository")
-        
+        repo_data = get_repo_for_scoring(repo_id)
+
         # Get ChatGPT scoring
-        scoring_result = analyze_code_quality_with_chatgpt(raw_analysis, file_metadata)
-        
-        # Attach file analysis data to response
-        scoring_result['file_analysis'] = file_analysis_data
-        scoring_result['score_issues'] = score_issues_data
-        
-        # Map issues to score categories for each score
-        if score_issues_data:
-            for score in scoring_result.get('scores', []):
-                score_name = score.get('title', '')
-                if score_name in ['Quality', 'Security', 'Style']:
-                    # Map to category
-                    category_key = 'Security' if score_name == 'Security' else ('Quality' if score_name == 'Quality' else 'Style')
-                    if category_key in score_issues_data:
-                        score['issues'] = score_issues_data[category_key][:5]  # Top 5 issues
-        
-        # Populate files array from file_metadata if not already populated
-        if 'files' not in scoring_result or not scoring_result['files']:
-            files = []
-            logger.info(f"Populating files array from {len(file_metadata)} file metadata entries")
-            for file in file_metadata[:50]:  # Limit to 50 files
-                name = file.get('name', '')
-                if not name:
-                    # Try to extract name from path
-                    path = file.get('relative_path', file.get('path', ''))
-                    name = path.split('/')[-1] if path else 'unknown'
-                
-                files.append({
-                    "name": name,
-                    "path": file.get('relative_path', file.get('path', '')),
-                    "score": 0,  # Default score
-                    "issues": [],
-                    "aiPercentage": 0,
-                    "quality": 0
-                })
-            scoring_result['files'] = files
-            logger.info(f"Populated {len(files)} files for scoring response")
-        else:
-            logger.info(f"Files already in scoring_result: {len(scoring_result.get('files', []))}")
-        
-        return scoring_result
+        scoring_result = score_repo(repo_id, repo_data)
+
+        return FastJSONResponse(attach_file_scoring(scoring_result, repo_data))
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get scoring: {str(e)}")
 
+@router.get("/{repo_id}/scoring/stream")
+async def stream_repo_scoring(repo_id: str):
+    """
+    Stream ChatGPT-powered scoring for a repository as server-sent events.
+
+    Emits a ``field`` event for each scoring field as soon as it is validated
+    (overall_score and scores arrive first), followed by a ``result`` event with
+    the complete scoring in the same shape as GET /{repo_id}/scoring.
+    """
+    try:
+        repo_data = get_repo_for_scoring(repo_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get scoring: {str(e)}")
+
+    def event_stream():
+        # Runs in the threadpool; closing the response closes this generator and the completion
+        events = stream_code_quality_with_chatgpt(
+            repo_data["raw_analysis"], repo_data.get("file_metadata", []), repo_data.get("file_analysis", [])
+        )
+        for event in events:
+            if event["event"] == "result":
+                payload = attach_file_scoring(event["data"], repo_data)
+                if event.get("fallback"):
+                    payload["fallback"] = True
+            else:
+                payload = {"field": event["field"], "value": event["value"]}
+            yield f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def issue_lines(issues_result: Dict[str, Any]):
+    """The NDJSON lines of an issues result: its totals, then each issue."""
+    yield {key: value for key, value in issues_result.items() if key != 'issues'}
+    for issues in (issues_result.get('issues') or {}).values():
+        yield from issues
+
+async def load_issues(repo_id: str) -> Dict[str, Any]:
+    """The issues of a repository's stored files, analyzed once per analysis of the repository."""
+    from core.services.supabase import supabase
+    
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    
+    # Get the repository data
+    repo_data = RepoStore(supabase).load_repo(repo_id, ["file_metadata", "file_storage_base_path"])
+    
+    if not repo_data:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    file_metadata = repo_data.get("file_metadata") or []
+    file_storage_base_path = repo_data.get("file_storage_base_path")
+    
+    if not file_metadata:
+        return {
+            "total_issues": 0,
+            "issues": {},
+            "message": "No file metadata available for this repository"
+        }
+    
+    # Check if files are stored in Supabase or locally
+    if not file_storage_base_path:
+        raise HTTPException(status_code=404, detail="Repository files storage path not found")
+    
+    async def analyze():
+        # Try Supabase first, then local filesystem
+        if file_storage_base_path.startswith('repos/'):
+            # The local backend packs each snapshot's files: one mapped file instead of a download per blob
+            pack_path = BlobStore().pack_path(file_storage_base_path)
+            if pack_path and is_pack(pack_path):
+                return analyze_repository_files(file_metadata, pack_path)
+            # Files are in Supabase storage
+            return await analyze_repository_files_from_supabase(file_metadata, file_storage_base_path)
+        # Files are on local filesystem
+        if not os.path.exists(file_storage_base_path):
+            raise HTTPException(status_code=404, detail="Repository files not found on disk")
+        return analyze_repository_files(file_metadata, file_storage_base_path)
+    
+    # The stored files only change with a new analysis, which invalidates the repository's scope
+    return await cache.get_or_load_async("issues", repo_scope(repo_id), "all", analyze)
+
 @router.get("/repos/{repo_id}/issues")
-async def get_code_issues(repo_id: str, category: str = None):
+async def get_code_issues(repo_id: str, category: str = None, format: str = "json"):
     """
     Get detailed code issues for a repository with line numbers and code snippets.
     
+    With ``format=ndjson`` the response is streamed as newline-delimited JSON:
+    a first line with ``total_issues`` and ``summary``, then one issue per line.
+    For one page at a time, use GET /repos/{repo_id}/issues/page.
+    
     Returns issues categorized by:
     - Quality: Missing type hints, complex functions, duplicate code
     - Security: Vulnerabilities, hardcoded secrets, unsafe operations
@@ -314,42 +445,8 @@ async def get_code_issues(repo_id: str, category: str = None):
     - Originality: Potential AI-generated code patterns
     - Team: Contribution balance issues
     """
-    from core.services.supabase import supabase
-    
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Database not configured")
-    
     try:
-        # Get the repository data
-        repo_result = supabase.table("repos").select("*").eq("id", repo_id).execute()
-        
-        if not repo_result.data:
-            raise HTTPException(status_code=404, detail="Repository not found")
-        
-        repo_data = repo_result.data[0]
-        file_metadata = repo_data.get("file_metadata", [])
-        file_storage_base_path = repo_data.get("file_storage_base_path")
-        
-        if not file_metadata:
-            return {
-                "total_issues": 0,
-                "issues": {},
-                "message": "No file metadata available for this repository"
-            }
-        
-        # Check if files are stored in Supabase or locally
-        if not file_storage_base_path:
-            raise HTTPException(status_code=404, detail="Repository files storage path not found")
-        
-        # Try Supabase first, then local filesystem
-        if file_storage_base_path.startswith('repos/'):
-            # Files are in Supabase storage
-            issues_result = await analyze_repository_files_from_supabase(file_metadata, file_storage_base_path)
-        else:
-            # Files are on local filesystem
-            if not os.path.exists(file_storage_base_path):
-                raise HTTPException(status_code=404, detail="Repository files not found on disk")
-            issues_result = analyze_repository_files(file_metadata, file_storage_base_path)
+        issues_result = await load_issues(repo_id)
         
         # Filter by category if specified
         if category:
@@ -357,13 +454,79 @@ async def get_code_issues(repo_id: str, category: str = None):
                 category: issues_result['issues'].get(category, [])
             }
             issues_result['summary'] = {
-                category: issues_result['summary'].get(category, {'total': 0, 'errors': 0, 'warnings': 0, 'info': 0})
+                category: issues_result.get('summary', {}).get(category, {'total': 0, 'errors': 0, 'warnings': 0, 'info': 0})
             }
         
-        return issues_result
+        if format == "ndjson":
+            return ndjson_response(issue_lines(issues_result))
+        return FastJSONResponse(issues_result)
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error analyzing repository files: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze repository files: {str(e)}")
+
+# Listing order of severities; errors first
+SEVERITY_RANK = {"error": 0, "high": 0, "warning": 1, "medium": 1}
+
+def issue_extension(issue: Dict[str, Any]) -> str:
+    return os.path.splitext(issue.get("path") or issue.get("file") or "")[1].lower()
+
+def build_issue_index(issues_result: Dict[str, Any]) -> SortedIndex:
+    """All issues bucketed by (category, severity, extension), errors first, then by path and line."""
+    issues = [
+        dict(issue, category=issue.get("category") or category)
+        for category, category_issues in (issues_result.get("issues") or {}).items()
+        for issue in category_issues
+    ]
+    return SortedIndex(
+        issues,
+        key=lambda i: (SEVERITY_RANK.get(str(i.get("severity", "")).lower(), 2), i.get("path") or "",
+                       i.get("line") or 0),
+        bucket=lambda i: (str(i["category"]).lower(), str(i.get("severity", "info")).lower(), issue_extension(i)),
+        path=lambda i: i.get("path") or "",
+    )
+
+@router.get("/repos/{repo_id}/issues/page")
+async def get_code_issues_page(repo_id: str, category: Optional[str] = None, severity: Optional[str] = None,
+                               path_prefix: Optional[str] = None, extension: Optional[str] = None,
+                               limit: int = 50, cursor: Optional[str] = None):
+    """
+    One page of a repository's code issues, errors first, then by path and line.
+    
+    ``category``, ``severity`` and ``extension`` take comma-separated values
+    (e.g. ``severity=error,warning``, ``extension=.py``). Pass the returned
+    ``next_cursor`` as ``cursor`` for the following page; it is ``null`` on the
+    last one. ``total`` counts the issues matching the filters.
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    categories, severities, extensions = parse_list(category), parse_list(severity), parse_list(extension)
+    
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        
+        async def build():
+            return build_issue_index(await load_issues(repo_id))
+        
+        index = await indexes.get_or_build_async("issues", repo_id, build)
+        issues, next_key, total = index.page(
+            lambda b: ((categories is None or b[0] in categories) and (severities is None or b[1] in severities)
+                       and (extensions is None or b[2] in extensions)),
+            limit, after=after, path_prefix=path_prefix,
+        )
+        return FastJSONResponse({
+            "issues": issues,
+            "next_cursor": encode_cursor(next_key) if next_key else None,
+            "total": total,
+            "limit": limit,
+        })
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error paging repository issues: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to get issues: {str(e)}")
@@ -3,8 +3,13 @@ API route to get repository files directly from database with quality scores
 """
 from fastapi import APIRouter, HTTPException
 from core.services.supabase import supabase
-from typing import List, Dict, Any
+from core.services.paging import MAX_PAGE_SIZE, SortedIndex, decode_cursor, encode_cursor, indexes, parse_list
+from core.services.repo_store import RepoStore
+from core.services.responses import FastJSONResponse
+from core.services.shared_cache import cache, repo_scope
+from typing import List, Dict, Any, Optional
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/repos", tags=["Repository Files"])
@@ -37,6 +42,68 @@ def calculate_file_quality_score(file_metadata: Dict, all_issues: Dict) -> int:
     # Ensure score doesn't go below 0
     return max(0, min(100, score))
 
+def build_files_list(repo_id: str) -> Dict[str, Any]:
+    """The files of a repository with quality scores from its stored issues."""
+    repo = RepoStore(supabase).load_repo(repo_id, ["file_metadata", "file_analysis", "score_issues"])
+    
+    if not repo:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    
+    file_metadata = repo.get("file_metadata") or []
+    
+    # Get all issues for scoring
+    all_issues = {}
+    try:
+        # Try to get issues from file_analysis or score_issues
+        file_analysis = repo.get("file_analysis") or []
+        score_issues = repo.get("score_issues") or {}
+        
+        logger.debug("File analysis entries: %d, Score issues: %s", len(file_analysis), list(score_issues))
+        
+        # Merge issues by category
+        for category in ['quality', 'security', 'style']:
+            category_issues = []
+            
+            # Check file_analysis
+            for analysis in file_analysis:
+                issues_list = analysis.get('issues', [])
+                if issues_list:
+                    category_issues.extend(issues_list)
+            
+            # Check score_issues (case-insensitive)
+            for key, issues in score_issues.items():
+                if key.lower() == category:
+                    category_issues.extend(issues)
+            
+            all_issues[category] = category_issues
+            logger.debug("Category %s: %d issues", category, len(category_issues))
+            
+    except Exception as e:
+        logger.warning("Could not load issues for scoring: %s", e, exc_info=True)
+    
+    files = []
+    for file in file_metadata:
+        # Calculate quality score
+        quality_score = calculate_file_quality_score(file, all_issues)
+        
+        # Extract filename from path
+        file_path = file.get('relative_path', file.get('path', ''))
+        file_name = file_path.split('/')[-1] if file_path else 'unknown'
+        
+        files.append({
+            "name": file_name,
+            "path": file_path,
+            "score": quality_score,
+            "issues": [],
+            "aiPercentage": file.get("ai_percentage", 0),
+            "originality": file.get("originality"),
+            "quality": quality_score
+        })
+    
+    logger.debug("Generated quality scores for %d files", len(files))
+    return {"files": files, "count": len(files)}
+
+
 @router.get("/{repo_id}/files/list")
 async def get_repo_files_list(repo_id: str):
     """Get list of all files in a repository with quality scores"""
@@ -44,68 +111,114 @@ async def get_repo_files_list(repo_id: str):
         raise HTTPException(status_code=500, detail="Supabase not configured")
     
     try:
-        result = supabase.table("repos").select("*").eq("id", repo_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Repository not found")
-        
-        repo = result.data[0]
-        file_metadata = repo.get("file_metadata", [])
+        # Recomputed only after the repository is written (see RepoStore)
+        return FastJSONResponse(
+            cache.get_or_load("files_list", repo_scope(repo_id), "all", lambda: build_files_list(repo_id))
+        )
         
-        # Get all issues for scoring
-        all_issues = {}
-        try:
-            # Try to get issues from file_analysis or score_issues
-            file_analysis = repo.get("file_analysis", [])
-            score_issues = repo.get("score_issues", {})
-            
-            logger.info(f"File analysis entries: {len(file_analysis)}, Score issues: {list(score_issues.keys())}")
-            
-            # Merge issues by category
-            for category in ['quality', 'security', 'style']:
-                category_issues = []
-                
-                # Check file_analysis
-                for analysis in file_analysis:
-                    issues_list = analysis.get('issues', [])
-                    if issues_list:
-                        category_issues.extend(issues_list)
-                
-                # Check score_issues (case-insensitive)
-                for key, issues in score_issues.items():
-                    if key.lower() == category:
-                        category_issues.extend(issues)
-                
-                all_issues[category] = category_issues
-                logger.info(f"Category {category}: {len(category_issues)} issues")
-                
-        except Exception as e:
-            logger.warning(f"Could not load issues for scoring: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+    except Exception as e:
+        logger.error("Error getting repo files: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Sort orders of the paged file listing: worst score first, best first, or by path
+FILE_SORTS = {
+    "score": lambda f: (f.get("score") or 0, f.get("path") or ""),
+    "-score": lambda f: (-(f.get("score") or 0), f.get("path") or ""),
+    "path": lambda f: (f.get("path") or "",),
+}
+
+def build_file_index(files_list: Dict[str, Any], sort: str) -> SortedIndex:
+    return SortedIndex(
+        files_list.get("files") or [],
+        key=FILE_SORTS[sort],
+        bucket=lambda f: os.path.splitext(f.get("path") or "")[1].lower(),
+        path=lambda f: f.get("path") or "",
+    )
+
+@router.get("/{repo_id}/files/page")
+async def get_repo_files_page(repo_id: str, sort: str = "score", path_prefix: Optional[str] = None,
+                              extension: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None):
+    """
+    One page of a repository's files with quality scores.
+    
+    ``sort`` is ``score`` (lowest first), ``-score`` or ``path``; ``extension``
+    takes comma-separated values (e.g. ``.py,.ts``). Pass the returned
+    ``next_cursor`` as ``cursor`` for the following page; it is ``null`` on the
+    last one. ``total`` counts the files matching the filters.
+    """
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Supabase not configured")
+    if sort not in FILE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(FILE_SORTS)}")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    extensions = parse_list(extension)
+    
+    try:
+        after = decode_cursor(cursor) if cursor else None
         
-        files = []
-        for file in file_metadata:
-            # Calculate quality score
-            quality_score = calculate_file_quality_score(file, all_issues)
-            
-            # Extract filename from path
-            file_path = file.get('relative_path', file.get('path', ''))
-            file_name = file_path.split('/')[-1] if file_path else 'unknown'
-            
-            files.append({
-                "name": file_name,
-                "path": file_path,
-                "score": quality_score,
-                "issues": [],
-                "aiPercentage": 0,
-                "quality": quality_score
-            })
+        def build():
+            files_list = cache.get_or_load("files_list", repo_scope(repo_id), "all", lambda: build_files_list(repo_id))
+            return build_file_index(files_list, sort)
         
-        logger.info(f"Generated quality scores for {len(files)} files")
-        return {"files": files, "count": len(files)}
+        index = indexes.get_or_build(f"files:{sort}", repo_id, build)
+        files, next_key, total = index.page(lambda ext: extensions is None or ext in extensions,
+                                            limit, after=after, path_prefix=path_prefix)
+        return FastJSONResponse({
+            "files": files,
+            "next_cursor": encode_cursor(next_key) if next_key else None,
+            "total": total,
+            "limit": limit,
+        })
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting repo files: {e}")
+        logger.error("Error paging repo files: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/{repo_id}/files/review")
+async def review_repo_files(repo_id: str, max_files: int = 200, concurrency: int = 4, max_batch_tokens: int = 6000):
+    """
+    Run the batched per-file LLM review for a repository's stored files.
+
+    Writes ai_percentage, originality and llm_quality back into file_metadata.
+    Files whose content was reviewed before are served from the content-hash cache.
+    """
+    from core.services.file_review import get_review_provider, review_stored_files
+
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Supabase not configured")
+
+    provider = get_review_provider()
+    if provider is None:
+        raise HTTPException(status_code=503, detail="No file review provider configured")
+
+    try:
+        store = RepoStore(supabase)
+        repo = store.load_repo(repo_id, ["file_metadata"])
+
+        if not repo:
+            raise HTTPException(status_code=404, detail="Repository not found")
+
+        file_metadata = repo.get("file_metadata") or []
+        run = await review_stored_files(
+            file_metadata, provider,
+            max_files=max_files, concurrency=concurrency, max_batch_tokens=max_batch_tokens
+        )
+
+        if run["stats"]["updated"]:
+            store.update_field(repo_id, "file_metadata", file_metadata)
+
+        logger.info(f"Reviewed files for {repo_id}: {run['stats']}")
+        return {"stats": run["stats"]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reviewing repo files: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
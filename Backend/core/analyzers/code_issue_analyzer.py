@@ -6,13 +6,94 @@ Analyzes stored repository files and returns specific issues with line numbers.
 import os
 import ast
 import re
+import time
+from bisect import bisect_right
+from itertools import compress, count
+from operator import sub
 from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass
 import logging
 
+from core.services import metrics, tracing
+from core.services.metrics import ANALYZER_RULE_SECONDS, timed
+from core.services.pack_store import PackStore, is_pack
+
 logger = logging.getLogger(__name__)
 
+NON_ASCII_RE = re.compile(rb'[^\x00-\x7f]')
+CARRIAGE_RETURN_RE = re.compile(rb'\r')
+
+# Line patterns as (text, ASCII buffer) pairs, for Lines. Each starts with a
+# literal, so the regex engine skips ahead to candidates instead of visiting
+# every line. Whitespace is what str.strip() removes: \s in a str pattern is
+# str.isspace(), which for ASCII also takes in \x1c-\x1f.
+NEWLINE = (re.compile(r'\n'), re.compile(rb'\n'))
+TRAILING_SPACE_BEFORE_NEWLINE = (re.compile(r' \n'), re.compile(rb' \n'))
+WHITESPACE_LINE_AFTER_NEWLINE = (re.compile(r'\n[^\S\n]+$', re.M),
+                                 re.compile(rb'\n[ \t\r\x0b\x0c\x1c-\x1f]+$', re.M))
+CONSOLE_STATEMENT = (re.compile(r'console\.(?:log|error)'), re.compile(rb'console\.(?:log|error)'))
+
+
+class Lines:
+    """
+    The lines of a file, over its text or over an ASCII buffer (bytes, or a
+    memoryview from a PackStore), whose bytes are the text character for character.
+
+    Rules find lines by regex scans over the whole buffer and by the line
+    lengths, and only the lines a rule reports are sliced out (and decoded).
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.text = isinstance(data, str)
+        self._starts: Optional[List[int]] = None
+        self._spans: Optional[List[int]] = None
+
+    def starts(self) -> List[int]:
+        """Offset of the first character of each line."""
+        if self._starts is None:
+            newline = NEWLINE[0 if self.text else 1]
+            self._starts = [0, *(match.end() for match in newline.finditer(self.data))]
+        return self._starts
+
+    def spans(self) -> List[int]:
+        """Length of each line plus its newline."""
+        if self._spans is None:
+            starts = self.starts()
+            self._spans = list(map(sub, starts[1:] + [len(self.data) + 1], starts))
+        return self._spans
+
+    def __len__(self) -> int:
+        return len(self.starts())
+
+    def __getitem__(self, index: int) -> str:
+        starts = self.starts()
+        end = starts[index + 1] - 1 if index + 1 < len(starts) else len(self.data)
+        line = self.data[starts[index]:end]
+        return line if self.text else str(line, 'ascii')
+
+    def find(self, patterns: Tuple["re.Pattern", "re.Pattern"], offset: int = 0) -> List[int]:
+        """
+        0-based indices of the lines where a match of a (text, ASCII) pattern
+        pair starts, plus ``offset``, in order.
+        """
+        starts = self.starts()
+        indices: List[int] = []
+        for match in patterns[0 if self.text else 1].finditer(self.data):
+            index = bisect_right(starts, match.start()) - 1 + offset
+            if not indices or indices[-1] != index:
+                indices.append(index)
+        return indices
+
+    def longer_than(self, width: int) -> List[int]:
+        """0-based indices of the lines with more than ``width`` characters."""
+        return list(compress(count(), map((width + 1).__lt__, self.spans())))
+
+    def empty(self) -> List[int]:
+        """0-based indices of the empty lines."""
+        return list(compress(count(), map((1).__eq__, self.spans())))
+
 
 @dataclass
 class CodeIssue:
@@ -53,13 +134,15 @@ class CodeIssueAnalyzer:
         
         Args:
             file_path: Path to the file
-            file_content: Contents of the file
+            file_content: Contents of the file; for other than Python files, may
+                also be an ASCII buffer (see analyze_file_bytes)
             file_type: Type of file (python, javascript, etc.)
         
         Returns:
             List of CodeIssue objects
         """
         self.issues = []
+        start = time.perf_counter()
         
         if file_type is None:
             file_type = self._detect_file_type(file_path)
@@ -71,8 +154,31 @@ class CodeIssueAnalyzer:
         else:
             self._analyze_generic(file_path, file_content)
         
+        metrics.ANALYZER_FILE_SECONDS.labels(file_type).observe(time.perf_counter() - start)
         return self.issues
     
+    def analyze_file_bytes(self, file_path: str, data, file_type: str = None) -> List[CodeIssue]:
+        """
+        Analyze a file from its raw bytes (bytes or a memoryview, e.g. from a PackStore).
+        
+        Gives the same issues as ``analyze_file`` on the file read in text mode with
+        ``errors='ignore'``. Only Python files, for the AST, and non-ASCII files are
+        decoded; the line rules read any other file's buffer as it is, without a copy
+        unless its line endings need normalizing.
+        """
+        if file_type is None:
+            file_type = self._detect_file_type(file_path)
+        
+        if file_type == 'python' or NON_ASCII_RE.search(data):
+            return self.analyze_file(file_path, self._decode(data), file_type)
+        if CARRIAGE_RETURN_RE.search(data):
+            data = bytes(data).replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        return self.analyze_file(file_path, data, file_type)
+    
+    @staticmethod
+    def _decode(data) -> str:
+        return str(data, 'utf-8', 'ignore').replace('\r\n', '\n').replace('\r', '\n')
+    
     def _detect_file_type(self, file_path: str) -> str:
         """Detect file type from extension."""
         ext = os.path.splitext(file_path)[1].lower()
@@ -94,24 +200,27 @@ class CodeIssueAnalyzer:
         """Analyze Python code for issues."""
         try:
             lines = content.split('\n')
+            text = Lines(content)
             
             # Parse AST to analyze code structure
-            tree = ast.parse(content)
+            with ANALYZER_RULE_SECONDS.labels("python_parse").time():
+                tree = ast.parse(content)
             
             # Check for various issues
             self._check_missing_type_hints(tree, lines, file_path)
             self._check_complex_functions(tree, lines, file_path)
             self._check_missing_docstrings(tree, lines, file_path)
-            self._check_long_lines(lines, file_path)
+            self._check_long_lines(text, file_path)
             self._check_duplicate_code(tree, lines, file_path)
             self._check_security_issues(tree, lines, file_path)
-            self._check_style_issues(lines, file_path)
+            self._check_style_issues(text, file_path)
             
         except SyntaxError as e:
             logger.warning(f"Could not parse {file_path}: {str(e)}")
         except Exception as e:
             logger.error(f"Error analyzing {file_path}: {str(e)}")
     
+    @timed(ANALYZER_RULE_SECONDS, "missing_type_hints")
     def _check_missing_type_hints(self, tree: ast.AST, lines: List[str], file_path: str):
         """Check for missing type hints in functions."""
         for node in ast.walk(tree):
@@ -141,6 +250,7 @@ class CodeIssueAnalyzer:
                         suggestion="Add type hints: def function_name(param: type) -> return_type:"
                     ))
     
+    @timed(ANALYZER_RULE_SECONDS, "complex_functions")
     def _check_complex_functions(self, tree: ast.AST, lines: List[str], file_path: str):
         """Check for overly complex functions (high cyclomatic complexity)."""
         for node in ast.walk(tree):
@@ -173,6 +283,7 @@ class CodeIssueAnalyzer:
         
         return complexity
     
+    @timed(ANALYZER_RULE_SECONDS, "missing_docstrings")
     def _check_missing_docstrings(self, tree: ast.AST, lines: List[str], file_path: str):
         """Check for missing docstrings in classes and functions."""
         for node in ast.walk(tree):
@@ -204,21 +315,23 @@ class CodeIssueAnalyzer:
                         suggestion="Add a docstring describing the purpose and parameters"
                     ))
     
-    def _check_long_lines(self, lines: List[str], file_path: str):
+    @timed(ANALYZER_RULE_SECONDS, "long_lines")
+    def _check_long_lines(self, lines: Lines, file_path: str):
         """Check for lines that are too long."""
-        for i, line in enumerate(lines, start=1):
-            if len(line) > 120:
-                self.issues.append(CodeIssue(
-                    file_path=file_path,
-                    line_number=i,
-                    issue_type="line_too_long",
-                    severity="info",
-                    category="style",
-                    message=f"Line is too long ({len(line)} characters)",
-                    code_snippet=line[:150] + "..." if len(line) > 150 else line,
-                    suggestion="Break long lines into multiple lines for better readability"
-                ))
+        for index in lines.longer_than(120):
+            line = lines[index]
+            self.issues.append(CodeIssue(
+                file_path=file_path,
+                line_number=index + 1,
+                issue_type="line_too_long",
+                severity="info",
+                category="style",
+                message=f"Line is too long ({len(line)} characters)",
+                code_snippet=line[:150] + "..." if len(line) > 150 else line,
+                suggestion="Break long lines into multiple lines for better readability"
+            ))
     
+    @timed(ANALYZER_RULE_SECONDS, "duplicate_code")
     def _check_duplicate_code(self, tree: ast.AST, lines: List[str], file_path: str):
         """Check for duplicate code patterns."""
         # Simple duplicate detection based on function bodies
@@ -245,6 +358,7 @@ class CodeIssueAnalyzer:
                 else:
                     function_signatures[body_hash] = node.lineno
     
+    @timed(ANALYZER_RULE_SECONDS, "security")
     def _check_security_issues(self, tree: ast.AST, lines: List[str], file_path: str):
         """Check for common security vulnerabilities with better detection."""
         security_patterns = [
@@ -286,14 +400,27 @@ class CodeIssueAnalyzer:
                         suggestion=self._get_security_suggestion(issue_type)
                     ))
     
-    def _check_style_issues(self, lines: List[str], file_path: str):
+    @timed(ANALYZER_RULE_SECONDS, "style")
+    def _check_style_issues(self, lines: Lines, file_path: str):
         """Check for common style issues."""
-        for i, line in enumerate(lines, start=1):
+        # The scans match at the newline ending a line, so the last line's end and the first line are checked here
+        last = len(lines) - 1
+        trailing = set(lines.find(TRAILING_SPACE_BEFORE_NEWLINE))
+        if lines[last].endswith(' '):
+            trailing.add(last)
+        blank = set(lines.empty())
+        blank.update(lines.find(WHITESPACE_LINE_AFTER_NEWLINE, offset=1))
+        if not lines[0].strip():
+            blank.add(0)
+        extra_blank = {index for index in blank if index - 1 in blank}
+        
+        for index in sorted(trailing | extra_blank):
+            line = lines[index]
             # Check for trailing whitespace
-            if line and line[-1] == ' ':
+            if index in trailing:
                 self.issues.append(CodeIssue(
                     file_path=file_path,
-                    line_number=i,
+                    line_number=index + 1,
                     issue_type="trailing_whitespace",
                     severity="info",
                     category="style",
@@ -303,10 +430,10 @@ class CodeIssueAnalyzer:
                 ))
             
             # Check for too many blank lines
-            if i > 1 and not line.strip() and not lines[i-2].strip():
+            if index in extra_blank:
                 self.issues.append(CodeIssue(
                     file_path=file_path,
-                    line_number=i,
+                    line_number=index + 1,
                     issue_type="extra_blank_line",
                     severity="info",
                     category="style",
@@ -315,31 +442,35 @@ class CodeIssueAnalyzer:
                     suggestion="Use single blank lines to separate sections"
                 ))
     
-    def _analyze_javascript(self, file_path: str, content: str):
+    def _analyze_javascript(self, file_path: str, content):
         """Analyze JavaScript/TypeScript code for issues."""
-        lines = content.split('\n')
+        lines = Lines(content)
         
         # Check for console.log statements
-        for i, line in enumerate(lines, start=1):
-            if 'console.log' in line or 'console.error' in line:
-                self.issues.append(CodeIssue(
-                    file_path=file_path,
-                    line_number=i,
-                    issue_type="console_log",
-                    severity="warning",
-                    category="quality",
-                    message="Console statement left in code",
-                    code_snippet=line,
-                    suggestion="Remove console statements from production code"
-                ))
+        self._check_console_statements(lines, file_path)
         
         # Check for common JavaScript issues
         self._check_long_lines(lines, file_path)
         self._check_style_issues(lines, file_path)
     
-    def _analyze_generic(self, file_path: str, content: str):
+    @timed(ANALYZER_RULE_SECONDS, "console")
+    def _check_console_statements(self, lines: Lines, file_path: str):
+        """Check for console.log / console.error statements left in code."""
+        for index in lines.find(CONSOLE_STATEMENT):
+            self.issues.append(CodeIssue(
+                file_path=file_path,
+                line_number=index + 1,
+                issue_type="console_log",
+                severity="warning",
+                category="quality",
+                message="Console statement left in code",
+                code_snippet=lines[index],
+                suggestion="Remove console statements from production code"
+            ))
+    
+    def _analyze_generic(self, file_path: str, content):
         """Generic analysis for files without specific parsers."""
-        lines = content.split('\n')
+        lines = Lines(content)
         self._check_long_lines(lines, file_path)
         self._check_style_issues(lines, file_path)
     
@@ -385,13 +516,16 @@ class CodeIssueAnalyzer:
         return categorized
 
 
+@tracing.traced("code_issues.analyze_repository_files")
 def analyze_repository_files(file_metadata: List[Dict[str, Any]], repo_path: str) -> Dict[str, Any]:
     """
     Analyze all files in a repository for code issues.
     
     Args:
         file_metadata: List of file metadata from database
-        repo_path: Path to stored repository files
+        repo_path: Path to stored repository files: a directory, or a snapshot
+            pack (``*.pack``, see BlobStore.pack_path). Issues in a pack carry the
+            file's relative path, as for files analyzed from storage.
     
     Returns:
         Dictionary with categorized issues
@@ -399,24 +533,36 @@ def analyze_repository_files(file_metadata: List[Dict[str, Any]], repo_path: str
     analyzer = CodeIssueAnalyzer()
     all_issues = []
     
-    for file_info in file_metadata:
-        file_path = file_info.get('path', '')
-        file_extension = file_info.get('file_extension', '')
-        
-        # Construct full path
-        full_path = os.path.join(repo_path, file_path)
-        
-        if os.path.exists(full_path):
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                file_type = analyzer._detect_file_type(file_path)
-                issues = analyzer.analyze_file(full_path, content, file_type)
-                all_issues.extend(issues)
+    if is_pack(repo_path):
+        with PackStore(repo_path) as pack:
+            for file_info in file_metadata:
+                file_path = file_info.get('relative_path', file_info.get('path', ''))
+                data = pack.get(file_path)
+                if data is None:
+                    continue
+                try:
+                    all_issues.extend(analyzer.analyze_file_bytes(file_path, data))
+                except Exception as e:
+                    logger.warning("Could not analyze file %s in %s: %s", file_path, repo_path, e)
+                finally:
+                    data.release()
+    else:
+        for file_info in file_metadata:
+            file_path = file_info.get('path', '')
+            
+            # Construct full path
+            full_path = os.path.join(repo_path, file_path)
             
-            except Exception as e:
-                logger.warning(f"Could not analyze file {full_path}: {str(e)}")
+            if os.path.exists(full_path):
+                try:
+                    with open(full_path, 'rb') as f:
+                        content = f.read()
+                    
+                    issues = analyzer.analyze_file_bytes(full_path, content)
+                    all_issues.extend(issues)
+                
+                except Exception as e:
+                    logger.warning(f"Could not analyze file {full_path}: {str(e)}")
     
     # Categorize issues
     categorized = analyzer.categorize_issues(all_issues)
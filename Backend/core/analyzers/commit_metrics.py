@@ -0,0 +1,322 @@
+"""
+Vectorized commit metrics.
+
+Commit details are flattened into columnar arrays (author, additions, deletions,
+top-level directory and language codes per changed file) and the team and
+commit metrics are computed with NumPy group-bys.
+
+Results are bit-identical to the per-commit Python loops they replace (the
+reference in benchmarks/bench_commit_metrics.py): float sums are plain
+left-to-right additions on both sides, here through sequential kernels
+(np.bincount, np.add.accumulate) and there through explicit loops rather than
+builtin sum(), which uses compensated summation from Python 3.12. Logarithms go
+through math.log since np.log differs from libm in the last bit for some inputs.
+"""
+
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+EXT_LANGUAGE_MAP: Dict[str, str] = {
+    "js": "JavaScript", "jsx": "JavaScript", "ts": "TypeScript", "tsx": "TypeScript",
+    "py": "Python", "go": "Go", "rb": "Ruby", "java": "Java", "cs": "C#", "php": "PHP",
+    "rs": "Rust", "kt": "Kotlin", "swift": "Swift", "cpp": "C++", "c": "C",
+    "m": "Objective-C", "mm": "Objective-C++", "scala": "Scala", "dart": "Dart",
+}
+
+
+def commit_author(detail: Dict[str, Any]) -> str:
+    """Author key for a commit detail: GitHub login, then commit email."""
+    commit_obj = detail.get("commit") or {}
+    author_login = (detail.get("author") or {}).get("login")
+    return author_login or (commit_obj.get("author") or {}).get("email") or "unknown"
+
+
+def _top_dir(filename: Any) -> str:
+    if not isinstance(filename, str):
+        return "(root)"
+    i = filename.find("/")
+    return "(root)" if i == -1 else filename[:i]
+
+
+def path_language(filename: Any) -> str:
+    """Language bucket for a file path, by extension."""
+    if not isinstance(filename, str) or "." not in filename:
+        return "Other"
+    return EXT_LANGUAGE_MAP.get(filename.split(".")[-1].lower(), "Other")
+
+
+class CommitColumns:
+    """
+    Columnar buffer of commit details.
+
+    Author, directory and language strings are interned to integer codes that
+    stay stable across ``clear()``, so a buffer can be filled and drained in
+    chunks while codes keep referring to the same strings.
+    """
+
+    def __init__(self):
+        self.authors: List[str] = []
+        self.dirs: List[str] = []
+        self.languages: List[str] = []
+        self._author_codes: Dict[str, int] = {}
+        self._dir_codes: Dict[str, int] = {}
+        self._language_codes: Dict[str, int] = {}
+        # filename -> (dir code, language code); paths repeat heavily across commits
+        self._path_codes: Dict[Any, Tuple[int, int]] = {}
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop buffered rows, keeping the interned codes."""
+        self.commit_author = array("q")
+        self.commit_additions = array("q")
+        self.commit_deletions = array("q")
+        self.commit_file_count = array("q")
+        self.file_commit = array("q")
+        self.file_dir = array("q")
+        self.file_language = array("q")
+        self.file_weight = array("q")
+
+    def __len__(self) -> int:
+        return len(self.commit_author)
+
+    def _intern(self, codes: Dict[str, int], values: List[str], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def author_code(self, author: str) -> int:
+        return self._intern(self._author_codes, self.authors, author)
+
+    def add(self, detail: Dict[str, Any]) -> None:
+        """Append one commit detail (the GitHub commit JSON) to the buffer."""
+        commit_index = len(self.commit_author)
+        stats = detail.get("stats") or {}
+        files = detail.get("files") or []
+
+        self.commit_author.append(self.author_code(commit_author(detail)))
+        self.commit_additions.append(int(stats.get("additions", 0)))
+        self.commit_deletions.append(int(stats.get("deletions", 0)))
+        self.commit_file_count.append(len(files))
+
+        if not files:
+            return
+        path_codes = self._path_codes
+        add_dir = self.file_dir.append
+        add_language = self.file_language.append
+        add_weight = self.file_weight.append
+        for f in files:
+            filename = f.get("filename")
+            codes = path_codes.get(filename)
+            if codes is None:
+                codes = path_codes[filename] = (
+                    self._intern(self._dir_codes, self.dirs, _top_dir(filename)),
+                    self._intern(self._language_codes, self.languages, path_language(filename)),
+                )
+            add_dir(codes[0])
+            add_language(codes[1])
+            add_weight((int(f.get("additions", 0)) + int(f.get("deletions", 0))) or 1)
+        self.file_commit.extend(array("q", [commit_index]) * len(files))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Zero-copy NumPy views of the buffered columns."""
+        return {
+            name: np.frombuffer(getattr(self, name), dtype=np.int64) if len(getattr(self, name)) else np.zeros(0, dtype=np.int64)
+            for name in (
+                "commit_author", "commit_additions", "commit_deletions", "commit_file_count",
+                "file_commit", "file_dir", "file_language", "file_weight",
+            )
+        }
+
+
+def author_net_lines(columns: CommitColumns) -> np.ndarray:
+    """Net lines (additions - deletions) per author code."""
+    cols = columns.arrays()
+    net = cols["commit_additions"] - cols["commit_deletions"]
+    totals = np.zeros(len(columns.authors), dtype=np.int64)
+    np.add.at(totals, cols["commit_author"], net)
+    return totals
+
+
+def commit_compartmentalization(columns: CommitColumns) -> np.ndarray:
+    """
+    Compartmentalization (1 - normalized entropy of churn across top-level
+    directories) for every buffered commit that touched at least one file.
+    """
+    cols = columns.arrays()
+    file_counts = cols["commit_file_count"]
+    has_files = file_counts > 0
+    values = np.ones(len(file_counts), dtype=np.float64)
+
+    file_commit = cols["file_commit"]
+    if len(file_commit) == 0:
+        return values[has_files]
+
+    # Group files by (commit, dir), ordered by first appearance within each commit
+    keys = file_commit * max(1, len(columns.dirs)) + cols["file_dir"]
+    _, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first_index, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    pair = rank[inverse]
+    pair_commit = file_commit[first_index[order]]
+
+    pair_weight = np.bincount(pair, weights=cols["file_weight"], minlength=len(order))
+    commit_weight = np.bincount(file_commit, weights=cols["file_weight"], minlength=len(file_counts))
+    dirs_per_commit = np.bincount(pair_commit, minlength=len(file_counts))
+
+    probs = pair_weight / commit_weight[pair_commit]
+    logs = np.fromiter(map(math.log, probs.tolist()), dtype=np.float64, count=len(probs))
+    entropy = -np.bincount(pair_commit, weights=probs * logs, minlength=len(file_counts))
+
+    multi = has_files & (file_counts > 1) & (dirs_per_commit > 1)
+    if multi.any():
+        log_k = np.fromiter(map(math.log, dirs_per_commit[multi].tolist()), dtype=np.float64)
+        values[multi] = 1 - (entropy[multi] / log_k)
+    return values[has_files]
+
+
+def author_language_totals(columns: CommitColumns) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    Churn per (author, language), as {author code: [(language code, lines)]}
+    with languages in order of first appearance for that author.
+    """
+    cols = columns.arrays()
+    file_author = cols["commit_author"][cols["file_commit"]]
+    if len(file_author) == 0:
+        return {}
+
+    keys = file_author * max(1, len(columns.languages)) + cols["file_language"]
+    _, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    sums = np.bincount(inverse, weights=cols["file_weight"]).astype(np.int64)
+    pair_author = file_author[first_index]
+    pair_language = cols["file_language"][first_index]
+    order = np.lexsort((first_index, pair_author))
+
+    totals: Dict[int, List[Tuple[int, int]]] = {}
+    for author, language, total in zip(pair_author[order].tolist(), pair_language[order].tolist(), sums[order].tolist()):
+        totals.setdefault(author, []).append((language, total))
+    return totals
+
+
+def gini(values: np.ndarray) -> float:
+    """Gini coefficient of the positive values."""
+    arr = np.sort(np.asarray(values, dtype=np.float64))
+    arr = arr[arr > 0]
+    n = len(arr)
+    if n == 0:
+        return 0.0
+    s = float(np.add.accumulate(arr)[-1])
+    if s == 0:
+        return 0.0
+    cum = np.add.accumulate(arr)
+    weighted = float(np.add.accumulate(cum)[-1])
+    return (n + 1 - 2 * (weighted / s)) / n
+
+
+def top_share(values: np.ndarray, k: int = 3) -> float:
+    """Share of the total held by the k largest values."""
+    if len(values) == 0:
+        return 0.0
+    total = int(values.sum())
+    top = int(np.sort(values)[::-1][:k].sum())
+    return top / (total or 1)
+
+
+def median(values: np.ndarray) -> float:
+    """Median matching statistics.median."""
+    data = np.sort(values)
+    n = len(data)
+    if n % 2 == 1:
+        return float(data[n // 2])
+    i = n // 2
+    return (float(data[i - 1]) + float(data[i])) / 2
+
+
+class CommitAggregator:
+    """
+    Folds commit details into running metrics without keeping the payloads.
+
+    Details are buffered as columns and reduced every ``chunk_size`` commits, so
+    memory is bounded by the chunk plus the running state: per-author totals,
+    per-author language buckets and one float per commit for the exact
+    compartmentalization median. That last part is O(n), 8 bytes per commit
+    (bench_commit_memory.py asserts the bound); a bounded quantile sketch
+    would change the reported median.
+    """
+
+    def __init__(self, chunk_size: int = 1000):
+        self.chunk_size = chunk_size
+        self.columns = CommitColumns()
+        self.count = 0
+        self._net = np.zeros(0, dtype=np.int64)
+        self._languages: Dict[int, Dict[int, int]] = {}
+        self._ci_values = array("d")
+
+    def add(self, detail: Dict[str, Any]) -> None:
+        """Fold one commit detail in. The detail can be discarded afterwards."""
+        self.columns.add(detail)
+        self.count += 1
+        if len(self.columns) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Reduce buffered commits into the running state."""
+        columns = self.columns
+        if not len(columns):
+            return
+        chunk_net = author_net_lines(columns)
+        self._net = np.concatenate((self._net, np.zeros(len(chunk_net) - len(self._net), dtype=np.int64)))
+        self._net += chunk_net
+        for author, totals in author_language_totals(columns).items():
+            bucket = self._languages.setdefault(author, {})
+            for language, total in totals:
+                bucket[language] = bucket.get(language, 0) + total
+        self._ci_values.extend(commit_compartmentalization(columns).tolist())
+        columns.clear()
+
+    def result(self) -> Dict[str, Any]:
+        """The ``team`` and ``commits`` sections for everything folded so far."""
+        self.flush()
+        columns = self.columns
+        net = np.concatenate((self._net, np.zeros(len(columns.authors) - len(self._net), dtype=np.int64)))
+        ci_values = np.frombuffer(self._ci_values, dtype=np.float64) if len(self._ci_values) else np.zeros(0)
+        language_totals = {author: list(bucket.items()) for author, bucket in self._languages.items()}
+        return summarize_metrics(columns.authors, net, language_totals, columns.languages, ci_values, self.count)
+
+
+def compute_commit_metrics(details: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the ``team`` and ``commits`` sections of the analysis from commit details."""
+    aggregator = CommitAggregator()
+    for d in details:
+        aggregator.add(d)
+    return aggregator.result()
+
+
+def summarize_metrics(authors: List[str], net: np.ndarray, language_totals: Dict[int, List[Tuple[int, int]]],
+                      languages: List[str], ci_values: np.ndarray, commit_count: int) -> Dict[str, Any]:
+    """Assemble the API ``team`` / ``commits`` sections from aggregated arrays."""
+    totals = np.maximum(net, 0)
+    median_ci = median(ci_values) if len(ci_values) else 1.0
+    mean_ci = (float(np.add.accumulate(ci_values)[-1]) / len(ci_values)) if len(ci_values) else 1.0
+
+    return {
+        "team": {
+            "giniContribution": gini(totals),
+            "topContributorsShare": top_share(totals) if len(totals) else 0.0,
+            "contributions": [{"author": a, "netLines": int(v)} for a, v in zip(authors, net.tolist())],
+            "perAuthorLanguage": [
+                {"author": a, "languages": {languages[l]: t for l, t in language_totals.get(code, [])}}
+                for code, a in enumerate(authors)
+            ],
+        },
+        "commits": {
+            "count": commit_count,
+            "medianCompartmentalization": median_ci,
+            "meanCompartmentalization": mean_ci,
+        },
+    }
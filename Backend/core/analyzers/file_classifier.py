@@ -0,0 +1,295 @@
+"""
+Classification of repository files before they are downloaded, stored or analyzed.
+
+Two stages:
+
+- ``classify_path`` uses listing metadata only (path, size and the repository's
+  ``.gitattributes``), so ignored, vendored, generated, minified-by-name and
+  binary-by-extension files are dropped before any download.
+- ``classify_content`` sniffs downloaded bytes before upload: NUL bytes in the
+  first KB mean binary, and line-length statistics or a "generated" header in
+  the first lines catch minified bundles and generated code with ordinary names.
+
+Both return a skip reason, or None for files worth storing.
+
+Path rules match whole path components, so ``env/`` no longer matches
+``src/environment/`` and ``.env`` no longer matches ``.envrc``. ``env/`` and
+``venv/`` are only skipped as virtualenvs: at the repository root, or where the
+listing shows a ``pyvenv.cfg`` or ``bin/activate`` inside them. They also match
+compound suffixes such as ``.min.js``, which ``os.path.splitext`` reduces to ``.js``.
+"""
+
+import codecs
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+# Bytes sniffed for NUL bytes and encoding
+SNIFF_BYTES = 1024
+
+# Bytes of a file, and lines of its head, examined for minified or generated content
+SAMPLE_BYTES = 64 * 1024
+HEADER_LINES = 5
+
+# Linguist's threshold: minified JS/CSS averages more than 110 characters per line
+MINIFIED_MEAN_LINE_LENGTH = 110
+MINIFIABLE_EXTENSIONS = {'.js', '.mjs', '.cjs', '.css', '.scss', '.less', '.json', '.svg', '.html'}
+
+MAX_FILE_SIZE = 100 * 1024 * 1024
+
+# Directories skipped wherever they appear in a path
+IGNORED_DIRS = {'.git', '__pycache__', '.pytest_cache', '.mypy_cache', '.venv', '.tox', '.idea'}
+# Virtualenv names that are also ordinary package names (``src/env/config.py``), skipped only at the root
+ROOT_VIRTUALENV_DIRS = {'venv', 'env'}
+# Files that mark their directory as a virtualenv root
+VIRTUALENV_MARKERS = ('pyvenv.cfg', 'bin/activate')
+VENDORED_DIRS = {'node_modules', 'bower_components', 'vendor', 'third_party', 'thirdparty', 'jspm_packages'}
+
+IGNORED_FILES = {'.DS_Store', 'Thumbs.db', '.gitignore', '.gitattributes'}
+GENERATED_FILES = {
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'npm-shrinkwrap.json', 'Pipfile.lock',
+    'poetry.lock', 'composer.lock', 'Gemfile.lock', 'Cargo.lock', 'go.sum', 'uv.lock',
+}
+MINIFIED_SUFFIXES = ('.min.js', '.min.css', '-min.js', '-min.css', '.min.mjs', '.bundle.js', '.chunk.js')
+GENERATED_SUFFIXES = ('.map', '.pb.go', '_pb2.py', '_pb2_grpc.py', '.designer.cs', '.g.dart', '.freezed.dart')
+
+BINARY_EXTENSIONS = {
+    '.exe', '.dll', '.so', '.dylib', '.bin', '.app', '.deb', '.rpm', '.msi',
+    '.zip', '.tar', '.gz', '.rar', '.7z', '.bz2', '.xz', '.zst',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.ico', '.webp',
+    '.mp3', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.webm', '.wav',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.db', '.sqlite', '.sqlite3', '.mdb', '.accdb',
+    '.pyc', '.pyo', '.class', '.jar', '.war', '.ear',
+    '.o', '.obj', '.lib', '.a', '.wasm', '.npy', '.pkl',
+}
+
+# Explicit generator markers, only inside a comment line: docstrings and comments
+# that merely mention generation ("Keys are auto-generated from ...") do not count
+GENERATED_HEADER_RE = re.compile(
+    rb'^[ \t]*(?:#|//|/\*|\*|<!--|--|;).*?'
+    rb'(?:@generated\b|\bcode generated\b.*\bdo not edit\b|\bgenerated by django\b'
+    rb'|\bthis file (?:is|was) (?:auto-?)?generated\b)',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+AttributeValue = Union[bool, str]
+
+
+def _translate(pattern: str) -> str:
+    """A gitattributes glob as a regex: ``*`` and ``?`` stay within one path component, ``**`` spans several."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+
+class GitAttributes:
+    """
+    Attributes from the repository's ``.gitattributes`` files, following git's
+    matching rules: patterns without a slash match the file name at any depth
+    below the file's directory, other patterns match the path relative to it,
+    later lines override earlier ones and deeper files override shallower ones.
+    """
+
+    def __init__(self):
+        # (directory, compiled pattern, match basename only, attributes)
+        self._rules: List[Tuple[str, "re.Pattern", bool, Dict[str, Optional[AttributeValue]]]] = []
+
+    def add(self, path: str, text: str) -> None:
+        """Add the rules of the ``.gitattributes`` at ``path`` (relative to the repository root)."""
+        directory = os.path.dirname(path)
+        rules = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#') or line.startswith('[attr]'):
+                continue
+            pattern, *fields = line.split()
+            if pattern.endswith('/'):
+                # git does not apply attributes to directory patterns
+                continue
+            attributes: Dict[str, Optional[AttributeValue]] = {}
+            for field in fields:
+                if field.startswith('-'):
+                    attributes[field[1:]] = False
+                elif field.startswith('!'):
+                    attributes[field[1:]] = None
+                elif '=' in field:
+                    name, value = field.split('=', 1)
+                    attributes[name] = value
+                else:
+                    attributes[field] = True
+            basename_only = '/' not in pattern
+            regex = re.compile(_translate(pattern.lstrip('/')) + r'\Z')
+            rules.append((directory, regex, basename_only, attributes))
+        self._rules.extend(rules)
+        # Shallower files first, so deeper files override them; the sort is stable within a file
+        self._rules.sort(key=lambda rule: rule[0].count('/') + bool(rule[0]))
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def attributes(self, path: str) -> Dict[str, AttributeValue]:
+        """Attributes set for ``path``; unset and unspecified attributes are left out."""
+        result: Dict[str, Optional[AttributeValue]] = {}
+        for directory, regex, basename_only, attributes in self._rules:
+            if directory:
+                if not path.startswith(directory + '/'):
+                    continue
+                relative = path[len(directory) + 1:]
+            else:
+                relative = path
+            subject = relative.rsplit('/', 1)[-1] if basename_only else relative
+            if regex.match(subject):
+                result.update(attributes)
+        return {name: value for name, value in result.items() if value is not None}
+
+    def flag(self, path: str, name: str) -> Optional[bool]:
+        """A boolean attribute such as linguist-generated: True, False, or None if unspecified."""
+        value = self.attributes(path).get(name)
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return value
+        return value.lower() in ('true', '1', 'yes')
+
+
+def is_gitattributes(path: str) -> bool:
+    return os.path.basename(path) == '.gitattributes'
+
+
+def virtualenv_roots(paths: Iterable[str]) -> Set[str]:
+    """Directories of a listing that contain a ``pyvenv.cfg`` or ``bin/activate``."""
+    roots = set()
+    for path in paths:
+        for marker in VIRTUALENV_MARKERS:
+            if path.endswith('/' + marker):
+                roots.add(path[:-len(marker) - 1])
+    return roots
+
+
+def classify_path(path: str, size: Optional[int] = None,
+                  attributes: Optional[GitAttributes] = None,
+                  virtualenvs: Optional[Set[str]] = None) -> Optional[str]:
+    """
+    Skip reason for a file from its listing metadata, or None to keep it.
+    ``virtualenvs`` are the listing's ``virtualenv_roots``, skipped wherever they are.
+    """
+    if not path:
+        return "pattern_match"
+    parts = path.split('/')
+    name = parts[-1]
+    lowered = name.lower()
+
+    if any(part in IGNORED_DIRS for part in parts[:-1]) or name in IGNORED_FILES:
+        return "pattern_match"
+    if len(parts) > 1 and parts[0] in ROOT_VIRTUALENV_DIRS:
+        return "pattern_match"
+    if virtualenvs and any('/'.join(parts[:i]) in virtualenvs for i in range(1, len(parts))):
+        return "pattern_match"
+    if name == '.env' or name.startswith('.env.'):
+        return "pattern_match"
+
+    if size is not None and size > MAX_FILE_SIZE:
+        return "file_too_large"
+
+    if attributes:
+        # .gitattributes overrides the built-in rules in both directions
+        vendored = attributes.flag(path, 'linguist-vendored')
+        generated = attributes.flag(path, 'linguist-generated')
+        if vendored:
+            return "vendored"
+        if generated:
+            return "generated"
+    else:
+        vendored = generated = None
+
+    if vendored is None and any(part in VENDORED_DIRS for part in parts[:-1]):
+        return "vendored"
+    if generated is None and (name in GENERATED_FILES or lowered.endswith(GENERATED_SUFFIXES)):
+        return "generated"
+    if generated is None and lowered.endswith(MINIFIED_SUFFIXES):
+        return "minified"
+
+    if os.path.splitext(lowered)[1] in BINARY_EXTENSIONS:
+        return "binary_file"
+    return None
+
+
+def sniff_encoding(head: bytes) -> Optional[str]:
+    """
+    Encoding of a file from its first bytes: "utf-8", "utf-8-sig", "unknown" for
+    text that is not UTF-8 (e.g. Latin-1), or None for binary data. Like git, any
+    NUL byte means binary, which includes UTF-16/32 text.
+    """
+    head = head[:SNIFF_BYTES]
+    if b'\0' in head:
+        return None
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is fine
+        if e.start < len(head) - 3 or e.reason != 'unexpected end of data':
+            return "unknown"
+    return "utf-8"
+
+
+def is_minified(content: bytes, path: str = "") -> bool:
+    """Whether text looks minified: few, very long lines."""
+    extension = os.path.splitext(path.lower())[1]
+    if path and extension not in MINIFIABLE_EXTENSIONS:
+        return False
+    sample = content[:SAMPLE_BYTES]
+    lines = sample.count(b'\n') + 1
+    return len(sample) > 1024 and len(sample) / lines > MINIFIED_MEAN_LINE_LENGTH
+
+
+def has_generated_header(content: bytes) -> bool:
+    head = b'\n'.join(content[:SNIFF_BYTES].split(b'\n', HEADER_LINES)[:HEADER_LINES])
+    return bool(GENERATED_HEADER_RE.search(head))
+
+
+def classify_content(path: str, content: bytes, attributes: Optional[GitAttributes] = None) -> Optional[str]:
+    """Skip reason for a file from its downloaded content, or None to keep it."""
+    if sniff_encoding(content) is None:
+        return "binary_content"
+    # An explicit linguist-generated=false keeps files the heuristics would drop
+    if attributes and attributes.flag(path, 'linguist-generated') is False:
+        return None
+    if is_minified(content, path):
+        return "minified"
+    if has_generated_header(content):
+        return "generated"
+    return None
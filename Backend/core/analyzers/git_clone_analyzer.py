@@ -0,0 +1,428 @@
+"""
+Local git clone analysis backend.
+
+Clones the repository bare into a temporary directory under a size cap and
+streams ``git log --numstat`` into the same CommitAggregator used by the REST
+backend, so a whole history costs one clone instead of one API call per
+commit. The clone also serves as the file source for ingestion through
+``git ls-tree`` and ``git cat-file --batch``.
+"""
+
+import asyncio
+import base64
+import codecs
+import contextlib
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from core.analyzers.commit_metrics import CommitAggregator, path_language
+from core.analyzers.github_analyzer import (
+    GITHUB_APP_ID,
+    GITHUB_APP_INSTALLATION_ID,
+    GITHUB_APP_PRIVATE_KEY,
+    GITHUB_TOKEN,
+    GitHubAPIError,
+    generate_installation_token,
+    parse_repo
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_CLONE_BYTES = int(os.getenv("GIT_CLONE_MAX_BYTES", str(1024 * 1024 * 1024)))
+CLONE_TIMEOUT = float(os.getenv("GIT_CLONE_TIMEOUT", "300"))
+
+# Marks the start of each commit record in the log output
+RECORD_START = "\x1e"
+FIELD_SEP = "\x1f"
+LOG_FORMAT = f"--format={RECORD_START}%H{FIELD_SEP}%ae"
+
+NOREPLY_EMAIL = re.compile(r"^(?:\d+\+)?([A-Za-z0-9-]+)@users\.noreply\.github\.com$")
+
+GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0", "LC_ALL": "C"}
+
+
+class GitCloneError(GitHubAPIError):
+    pass
+
+
+def clone_url(owner: str, repo: str) -> str:
+    """HTTPS clone URL for a GitHub repository. It never carries credentials, see ``auth_env``."""
+    return f"https://github.com/{owner}/{repo}.git"
+
+
+def clone_token() -> Optional[str]:
+    """The installation token or GITHUB_TOKEN, if credentials are configured."""
+    if GITHUB_APP_ID and GITHUB_APP_PRIVATE_KEY and GITHUB_APP_INSTALLATION_ID:
+        return generate_installation_token()
+    return GITHUB_TOKEN or None
+
+
+def auth_env(token: Optional[str]) -> Dict[str, str]:
+    """
+    GIT_ENV plus an Authorization header for github.com requests.
+
+    The header is passed as configuration through the environment, so the
+    token appears neither in any process's argv nor in the clone's
+    ``.git/config``.
+    """
+    if not token:
+        return GIT_ENV
+    credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+    return {
+        **GIT_ENV,
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.https://github.com/.extraheader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+    }
+
+
+def _unquote_path(path: str) -> str:
+    """Undo git's C-style quoting of unusual paths."""
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        raw = codecs.escape_decode(path[1:-1].encode("utf-8", "surrogateescape"))[0]
+        return raw.decode("utf-8", "replace")
+    return path
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def commit_detail(sha: str, email: str) -> Dict[str, Any]:
+    """An empty commit detail shaped like the REST commit JSON the aggregator reads."""
+    match = NOREPLY_EMAIL.match(email)
+    return {
+        "sha": sha,
+        "commit": {"author": {"email": email}},
+        # GitHub noreply addresses carry the login, which the REST backend uses as author key
+        "author": {"login": match.group(1)} if match else None,
+        "stats": {"additions": 0, "deletions": 0},
+        "files": [],
+    }
+
+
+class NumstatParser:
+    """Incremental parser for ``git log --numstat`` output in LOG_FORMAT."""
+
+    def __init__(self):
+        self._current: Optional[Dict[str, Any]] = None
+
+    def feed_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """Consume one output line; returns the previous commit once a new one starts."""
+        line = line.rstrip("\n")
+        if line.startswith(RECORD_START):
+            done = self._current
+            sha, _, email = line[1:].partition(FIELD_SEP)
+            self._current = commit_detail(sha, email)
+            return done
+        if not line or self._current is None:
+            return None
+        parts = line.split("\t", 2)
+        if len(parts) != 3:
+            return None
+        added, deleted, path = parts
+        # Binary files report "-" for both counts
+        additions = int(added) if added.isdigit() else 0
+        deletions = int(deleted) if deleted.isdigit() else 0
+        self._current["files"].append({"filename": _unquote_path(path), "additions": additions, "deletions": deletions})
+        stats = self._current["stats"]
+        stats["additions"] += additions
+        stats["deletions"] += deletions
+        return None
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """Return the last commit, if any."""
+        done, self._current = self._current, None
+        return done
+
+
+class GitClone:
+    """A bare clone on local disk."""
+
+    def __init__(self, path: str, env: Dict[str, str] = GIT_ENV):
+        self.path = path
+        # Used by commands that reach the remote (the deepening fetch)
+        self.env = env
+        self._cat_file: Optional[asyncio.subprocess.Process] = None
+        self._cat_file_lock = asyncio.Lock()
+
+    @classmethod
+    async def clone(cls, url: str, dest: str, since: Optional[str] = None, max_bytes: int = MAX_CLONE_BYTES,
+                    timeout: float = CLONE_TIMEOUT, env: Dict[str, str] = GIT_ENV) -> "GitClone":
+        """
+        Bare-clone the default branch of ``url`` into ``dest``, with ``env``
+        (see ``auth_env``) for the commands that fetch.
+
+        With ``since`` the history is cut at that date and deepened by one
+        commit, so the oldest commits in the window still diff against their
+        real parents.
+        """
+        args = ["clone", "--bare", "--single-branch", "--no-tags", "--quiet"]
+        try:
+            if since:
+                try:
+                    await _run_capped([*args, f"--shallow-since={since}", url, dest], dest, max_bytes, timeout, env)
+                except GitCloneError as e:
+                    if "no commits selected" not in str(e):
+                        raise
+                    # Nothing in the window; the tip is still needed as a file source
+                    await _run_capped([*args, "--depth=1", url, dest], dest, max_bytes, timeout, env)
+                    return cls(dest, env)
+                clone = cls(dest, env)
+                if os.path.exists(os.path.join(dest, "shallow")):
+                    await clone.git("fetch", "--quiet", "--deepen=1", "origin", timeout=timeout)
+                return clone
+            await _run_capped([*args, url, dest], dest, max_bytes, timeout, env)
+            return cls(dest, env)
+        except FileNotFoundError:
+            raise GitCloneError("git executable not found")
+
+    async def git(self, *args: str, timeout: float = CLONE_TIMEOUT) -> bytes:
+        """Run a git command against the clone and return its stdout."""
+        proc = await asyncio.create_subprocess_exec(
+            "git", f"--git-dir={self.path}", *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=self.env
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise GitCloneError(f"git {args[0]} timed out after {timeout}s")
+        if proc.returncode != 0:
+            raise GitCloneError(f"git {args[0]} failed: {stderr.decode('utf-8', 'replace').strip()}")
+        return stdout
+
+    async def iter_commit_details(self, since: Optional[str] = None,
+                                  max_commits: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream commit details (author, stats, per-file numstat) newest first.
+
+        Merge commits are diffed against their first parent, as the REST
+        commit endpoint does.
+        """
+        args = ["log", "--no-renames", "--numstat", "--diff-merges=first-parent", LOG_FORMAT]
+        if since:
+            args.append(f"--since={since}")
+        if max_commits:
+            args.append(f"--max-count={max_commits}")
+        proc = await asyncio.create_subprocess_exec(
+            "git", "-c", "core.quotepath=off", f"--git-dir={self.path}", *args, "HEAD",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=GIT_ENV, limit=1024 * 1024
+        )
+        parser = NumstatParser()
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                detail = parser.feed_line(line.decode("utf-8", "replace"))
+                if detail is not None:
+                    yield detail
+            last = parser.finish()
+            if last is not None:
+                yield last
+            stderr = await proc.stderr.read()
+            if await proc.wait() != 0:
+                message = stderr.decode("utf-8", "replace").strip()
+                # An empty repository has no HEAD to log
+                if "does not have any commits" not in message and "unknown revision" not in message:
+                    raise GitCloneError(f"git log failed: {message}")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+    async def list_files(self, ref: str = "HEAD") -> List[Dict[str, Any]]:
+        """Regular files at ``ref``, shaped like Contents API file entries."""
+        try:
+            output = await self.git("ls-tree", "-r", "-l", "-z", "--full-tree", ref)
+        except GitCloneError as e:
+            if "Not a valid object name" in str(e):
+                return []
+            raise
+        files = []
+        for entry in output.split(b"\0"):
+            if not entry:
+                continue
+            meta, _, path = entry.partition(b"\t")
+            mode, obj_type, sha, size = meta.split()
+            # Skip submodules (commit) and symlinks
+            if obj_type != b"blob" or mode == b"120000":
+                continue
+            files.append({
+                "type": "file",
+                "path": path.decode("utf-8", "replace"),
+                "sha": sha.decode(),
+                "size": int(size),
+            })
+        return files
+
+    async def _request_blob(self, sha: str) -> int:
+        """Ask the ``git cat-file --batch`` process for a blob; returns its size. Hold the lock."""
+        if self._cat_file is None:
+            self._cat_file = await asyncio.create_subprocess_exec(
+                "git", f"--git-dir={self.path}", "cat-file", "--batch",
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, env=GIT_ENV
+            )
+        proc = self._cat_file
+        proc.stdin.write(f"{sha}\n".encode())
+        await proc.stdin.drain()
+        header = (await proc.stdout.readline()).decode().split()
+        if len(header) != 3 or header[1] != "blob":
+            raise GitCloneError(f"Blob not found in clone: {sha}")
+        return int(header[2])
+
+    async def read_blob(self, sha: str) -> bytes:
+        """Read one blob through a long-lived ``git cat-file --batch`` process."""
+        async with self._cat_file_lock:
+            size = await self._request_blob(sha)
+            data = await self._cat_file.stdout.readexactly(size + 1)
+            return data[:-1]
+
+    async def stream_blob(self, sha: str, chunk_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+        """Read one blob in chunks; the batch process is held until the blob is consumed."""
+        async with self._cat_file_lock:
+            remaining = await self._request_blob(sha)
+            proc = self._cat_file
+            complete = False
+            try:
+                while remaining:
+                    chunk = await proc.stdout.readexactly(min(chunk_size, remaining))
+                    remaining -= len(chunk)
+                    yield chunk
+                await proc.stdout.readexactly(1)
+                complete = True
+            finally:
+                if not complete:
+                    # An abandoned read leaves the rest of the blob in the pipe; drop the process
+                    if proc.returncode is None:
+                        proc.kill()
+                        await proc.wait()
+                    self._cat_file = None
+
+    async def close(self) -> None:
+        if self._cat_file is not None and self._cat_file.returncode is None:
+            self._cat_file.stdin.close()
+            await self._cat_file.wait()
+        self._cat_file = None
+
+
+async def _run_capped(args: List[str], dest: str, max_bytes: int, timeout: float,
+                      env: Dict[str, str] = GIT_ENV) -> None:
+    """Run ``git <args>``, killing it if ``dest`` grows past max_bytes or it exceeds the timeout."""
+    proc = await asyncio.create_subprocess_exec(
+        "git", *args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE, env=env
+    )
+    stderr_task = asyncio.create_task(proc.stderr.read())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while proc.returncode is None:
+            try:
+                await asyncio.wait_for(proc.wait(), 0.2)
+            except asyncio.TimeoutError:
+                pass
+            if proc.returncode is None:
+                if loop.time() > deadline:
+                    raise GitCloneError(f"git clone timed out after {timeout}s")
+                size = await asyncio.to_thread(_dir_size, dest)
+                if size > max_bytes:
+                    raise GitCloneError(f"Repository exceeds the clone size cap of {max_bytes} bytes")
+        stderr = await stderr_task
+        if proc.returncode != 0:
+            raise GitCloneError(f"git clone failed: {stderr.decode('utf-8', 'replace').strip()}")
+        # Small clones can finish between polls
+        if await asyncio.to_thread(_dir_size, dest) > max_bytes:
+            raise GitCloneError(f"Repository exceeds the clone size cap of {max_bytes} bytes")
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        if not stderr_task.done():
+            stderr_task.cancel()
+
+
+@contextlib.asynccontextmanager
+async def cloned_repo(owner: str, repo: str, since: Optional[str] = None,
+                      url: Optional[str] = None, **kwargs) -> AsyncIterator[GitClone]:
+    """Clone into a temporary directory that is removed on exit; GitHub credentials are sent unless ``url`` is given."""
+    # Generating an installation token is a blocking HTTP request
+    env = GIT_ENV if url else auth_env(await asyncio.to_thread(clone_token))
+    with tempfile.TemporaryDirectory(prefix="vibecheck-clone-") as tmp:
+        clone = await GitClone.clone(url or clone_url(owner, repo), os.path.join(tmp, "repo.git"), since=since,
+                                     env=env, **kwargs)
+        try:
+            yield clone
+        finally:
+            await clone.close()
+
+
+def repo_languages(files: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Bytes per language from a file listing, largest first, like the languages endpoint."""
+    languages: Dict[str, int] = {}
+    for f in files:
+        language = path_language(f["path"])
+        if language != "Other":
+            languages[language] = languages.get(language, 0) + f["size"]
+    return dict(sorted(languages.items(), key=lambda item: item[1], reverse=True))
+
+
+async def analyze_clone(clone: GitClone, owner: str, repo: str, since: str, max_commits: int) -> Dict[str, Any]:
+    """Same result shape as analyze_repo, computed from a local clone."""
+    languages = repo_languages(await clone.list_files())
+
+    aggregator = CommitAggregator()
+    async for detail in clone.iter_commit_details(since, max_commits):
+        aggregator.add(detail)
+
+    if aggregator.count == 0:
+        return {
+            "repo": f"{owner}/{repo}",
+            "backend": "git",
+            "error": "No commits found in the specified time window",
+            "languages": languages,
+            "team": {"contributions": [], "giniContribution": 0.0, "topContributorsShare": 0.0, "perAuthorLanguage": []},
+            "commits": {"count": 0, "medianCompartmentalization": 1.0, "meanCompartmentalization": 1.0}
+        }
+
+    metrics = aggregator.result()
+    return {
+        "repo": f"{owner}/{repo}",
+        "backend": "git",
+        "limits": {"since": since, "max_commits": max_commits, "truncated": aggregator.count >= max_commits},
+        "languages": languages,
+        "team": metrics["team"],
+        "commits": metrics["commits"],
+    }
+
+
+async def analyze_repo_git(repo_url: str, window_days: int = 3650, max_commits: int = 500) -> Dict[str, Any]:
+    """Analyze a GitHub repository from a local clone instead of per-commit REST calls."""
+    owner, repo = parse_repo(repo_url)
+    since = (datetime.utcnow() - timedelta(days=window_days)).isoformat() + "Z"
+
+    try:
+        async with cloned_repo(owner, repo, since) as clone:
+            return await analyze_clone(clone, owner, repo, since, max_commits)
+    except GitCloneError as e:
+        return {
+            "repo": f"{owner}/{repo}",
+            "error": f"Git clone error: {str(e)}"
+        }
+    except Exception as e:
+        return {
+            "repo": f"{owner}/{repo}",
+            "error": f"Unexpected error: {str(e)}"
+        }
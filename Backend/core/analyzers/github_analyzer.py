@@ -1,20 +1,23 @@
 import os
 import math
+import logging
 import asyncio
-import statistics
+import contextlib
+import functools
 import time
-import jwt
 import zipfile
 import tempfile
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Any, Optional
+from typing import AsyncIterator, Dict, List, Tuple, Any, Optional
 from dataclasses import dataclass
 
 import httpx
-from dotenv import load_dotenv
+
+from core.services.env import load_env
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # GitHub App configuration
 GITHUB_APP_ID = os.getenv("GITHUB_APP_ID")
@@ -24,26 +27,48 @@ GITHUB_APP_INSTALLATION_ID = os.getenv("GITHUB_APP_INSTALLATION_ID")
 # Fallback to personal token
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
+# REST API root; pointed at a local mock by the end-to-end benchmarks
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# Largest object Supabase storage accepts
+STORAGE_MAX_BYTES = 50 * 1024 * 1024
+
 # Import shared Supabase client
 from core.services.supabase import supabase
+from core.analyzers.file_classifier import GitAttributes, classify_content, classify_path, is_gitattributes, virtualenv_roots
+from core.services.blob_store import BlobStore, blob_storage_path
+from core.services.repo_store import RepoStore
+from core.services.download_scheduler import (
+    DOWNLOAD_CONCURRENCY,
+    PRIORITY_SOURCE,
+    ByteBudget,
+    ScheduleStats,
+    blob_priority,
+    order_blobs,
+    run_ordered,
+    spool
+)
+from core.services.upload_pipeline import UploadPipeline
+from core.services import metrics, tracing
+from core.services.log_setup import sample
+
+logger = logging.getLogger(__name__)
+
 
 def get_auth_headers() -> Dict[str, str]:
     """Get authentication headers for GitHub API."""
-    print(f"DEBUG: get_auth_headers - GITHUB_APP_ID: {bool(GITHUB_APP_ID)}, GITHUB_APP_PRIVATE_KEY: {bool(GITHUB_APP_PRIVATE_KEY)}, GITHUB_APP_INSTALLATION_ID: {bool(GITHUB_APP_INSTALLATION_ID)}")
-    print(f"DEBUG: get_auth_headers - GITHUB_TOKEN: {bool(GITHUB_TOKEN)}")
-    
     if GITHUB_APP_ID and GITHUB_APP_PRIVATE_KEY and GITHUB_APP_INSTALLATION_ID:
         # Use GitHub App
-        print("DEBUG: Using GitHub App authentication")
+        logger.debug("Using GitHub App authentication", extra=sample(1000))
         token = generate_installation_token()
         return {"Authorization": f"Bearer {token}"}
     elif GITHUB_TOKEN:
         # Use personal token
-        print("DEBUG: Using personal token authentication")
+        logger.debug("Using personal token authentication", extra=sample(1000))
         return {"Authorization": f"Bearer {GITHUB_TOKEN}"}
     else:
         # No authentication
-        print("DEBUG: No authentication available")
+        logger.debug("No GitHub authentication available", extra=sample(1000))
         return {}
 
 def generate_installation_token() -> str:
@@ -62,11 +87,12 @@ def generate_installation_token() -> str:
         "iss": GITHUB_APP_ID  # Issuer (App ID)
     }
     
-    # Generate JWT
+    # Generate JWT (PyJWT and its crypto backend are only loaded for GitHub App auth)
+    import jwt
     jwt_token = jwt.encode(payload, private_key, algorithm="RS256")
     
     # Exchange JWT for installation token
-    url = f"https://api.github.com/app/installations/{GITHUB_APP_INSTALLATION_ID}/access_tokens"
+    url = f"{GITHUB_API_URL}/app/installations/{GITHUB_APP_INSTALLATION_ID}/access_tokens"
     headers = {"Authorization": f"Bearer {jwt_token}", "Accept": "application/vnd.github.v3+json"}
     
     response = httpx.post(url, headers=headers)
@@ -103,6 +129,22 @@ def parse_repo(url: str) -> Tuple[str, str]:
     return owner, repo
 
 
+def github_endpoint(url: str) -> str:
+    """Endpoint class of a GitHub URL for metrics labels (``commits``, ``contents``, ...)."""
+    if not url.startswith(GITHUB_API_URL):
+        return "raw"
+    parts = url[len(GITHUB_API_URL):].split("?", 1)[0].strip("/").split("/")
+    if parts[0] == "app":
+        return "app_token"
+    if parts[0] != "repos" or len(parts) < 3:
+        return "other"
+    if len(parts) == 3:
+        return "repo"
+    if parts[3] == "commits" and len(parts) > 4:
+        return "commit"
+    return parts[3]
+
+
 def parse_rate_limit_headers(response: httpx.Response) -> RateLimitInfo:
     """Parse GitHub rate limit headers from response."""
     remaining = int(response.headers.get("X-RateLimit-Remaining", "0"))
@@ -111,12 +153,71 @@ def parse_rate_limit_headers(response: httpx.Response) -> RateLimitInfo:
     return RateLimitInfo(remaining=remaining, reset_time=reset_time, limit=limit)
 
 
-async def make_github_request(client: httpx.AsyncClient, url: str, params: Optional[Dict] = None, max_retries: int = 3) -> httpx.Response:
+class RateBudget:
+    """
+    Request budget shared by every GitHub call made for one analysis.
+
+    Caps the number of requests in flight and tracks the remaining rate limit
+    from response headers. When the remaining count reaches ``reserve`` it
+    waits for the reset, or raises RateLimitExceeded if the reset is further
+    away than ``max_wait`` seconds.
+    """
+
+    def __init__(self, max_concurrency: int = 8, reserve: int = 5, max_wait: float = 60.0):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.remaining: Optional[int] = None
+        self.reset_time = 0
+        self.requests = 0
+
+    async def __aenter__(self) -> "RateBudget":
+        await self._semaphore.acquire()
+        if self.remaining is not None and self.remaining <= self.reserve:
+            wait = self.reset_time - time.time()
+            if wait > self.max_wait:
+                self._semaphore.release()
+                raise RateLimitExceeded(f"Rate limit budget exhausted. Reset at {self.reset_time}")
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.remaining = None
+        if self.remaining is not None:
+            # Count the request before it is sent so concurrent callers see it
+            self.remaining -= 1
+        self.requests += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._semaphore.release()
+
+    def update(self, response: httpx.Response) -> None:
+        """Refresh the remaining count from a response's rate limit headers."""
+        if "X-RateLimit-Remaining" not in response.headers:
+            return
+        rate_info = parse_rate_limit_headers(response)
+        if self.remaining is None or rate_info.reset_time != self.reset_time or rate_info.remaining < self.remaining:
+            self.remaining = rate_info.remaining
+            self.reset_time = rate_info.reset_time
+
+
+async def make_github_request(client: httpx.AsyncClient, url: str, params: Optional[Dict] = None, max_retries: int = 3,
+                              budget: Optional[RateBudget] = None) -> httpx.Response:
     """Make a GitHub API request with rate limit handling and retry logic."""
     for attempt in range(max_retries):
         try:
             headers = get_auth_headers()
-            response = await client.get(url, params=params, headers=headers)
+            endpoint = github_endpoint(url)
+            # The span includes any wait for the rate budget
+            with tracing.span(f"github.{endpoint}", url=url, attempt=attempt + 1) as request_span:
+                async with budget or contextlib.nullcontext():
+                    with metrics.GITHUB_LATENCY.labels(endpoint).time():
+                        response = await client.get(url, params=params, headers=headers)
+                request_span.set("status", response.status_code)
+            metrics.GITHUB_REQUESTS.labels(endpoint, response.status_code).inc()
+            if "X-RateLimit-Remaining" in response.headers:
+                metrics.GITHUB_RATE_LIMIT_REMAINING.set(int(response.headers["X-RateLimit-Remaining"]))
+            if budget is not None:
+                budget.update(response)
             
             # Check rate limits
             rate_info = parse_rate_limit_headers(response)
@@ -132,7 +233,7 @@ async def make_github_request(client: httpx.AsyncClient, url: str, params: Optio
             
         except (httpx.ConnectTimeout, httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout) as e:
             if attempt < max_retries - 1:
-                print(f"DEBUG: Request timeout (attempt {attempt + 1}/{max_retries}), retrying in 2 seconds...")
+                logger.warning("Request timeout (attempt %d/%d), retrying in 2 seconds: %s", attempt + 1, max_retries, url)
                 await asyncio.sleep(2)
                 continue
             else:
@@ -141,9 +242,11 @@ async def make_github_request(client: httpx.AsyncClient, url: str, params: Optio
             if e.response.status_code == 403:
                 raise RateLimitExceeded("Rate limit exceeded")
             raise GitHubAPIError(f"HTTP error: {e.response.status_code}")
+        except GitHubAPIError:
+            raise
         except Exception as e:
             if "handshake operation timed out" in str(e) and attempt < max_retries - 1:
-                print(f"DEBUG: SSL handshake timeout (attempt {attempt + 1}/{max_retries}), retrying in 3 seconds...")
+                logger.warning("SSL handshake timeout (attempt %d/%d), retrying in 3 seconds: %s", attempt + 1, max_retries, url)
                 await asyncio.sleep(3)
                 continue
             else:
@@ -152,112 +255,112 @@ async def make_github_request(client: httpx.AsyncClient, url: str, params: Optio
     raise GitHubAPIError("Max retries exceeded")
 
 
-async def get_repo_languages(client: httpx.AsyncClient, owner: str, repo: str) -> Dict[str, int]:
+@tracing.traced("github.get_repo_languages")
+async def get_repo_languages(client: httpx.AsyncClient, owner: str, repo: str,
+                             budget: Optional[RateBudget] = None) -> Dict[str, int]:
     """Get repository languages."""
-    url = f"https://api.github.com/repos/{owner}/{repo}/languages"
-    response = await make_github_request(client, url)
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/languages"
+    response = await make_github_request(client, url, budget=budget)
     return response.json()
 
 
-async def get_commits(client: httpx.AsyncClient, owner: str, repo: str, since: str, max_commits: int) -> List[Dict[str, Any]]:
-    """Get repository commits with pagination."""
-    commits = []
-    page = 1
-    per_page = min(100, max_commits)  # GitHub max is 100 per page
-    
-    while len(commits) < max_commits:
-        url = f"https://api.github.com/repos/{owner}/{repo}/commits"
-        params = {
-            "since": since,
-            "per_page": per_page,
-            "page": page
-        }
-        
-        response = await make_github_request(client, url, params)
-        batch = response.json()
-        
-        if not batch:  # No more commits
-            break
-            
-        commits.extend(batch)
-        
-        if len(batch) < per_page:  # Last page
+def last_page_number(response: httpx.Response) -> Optional[int]:
+    """Page number of the rel="last" link, if the response has one."""
+    last_url = response.links.get("last", {}).get("url")
+    if not last_url:
+        return None
+    page = httpx.URL(last_url).params.get("page")
+    return int(page) if page and page.isdigit() else None
+
+
+async def fetch_paginated(client: httpx.AsyncClient, url: str, params: Optional[Dict] = None,
+                          max_items: Optional[int] = None, per_page: int = 100,
+                          budget: Optional[RateBudget] = None) -> List[Dict[str, Any]]:
+    """
+    Fetch a paginated GitHub list endpoint.
+
+    The first page's Link header gives the number of pages; the remaining pages
+    (up to what max_items needs) are then fetched concurrently under the rate
+    budget and returned in page order.
+    """
+    per_page = min(per_page, max_items) if max_items else per_page
+    base_params = dict(params or {}, per_page=per_page)
+
+    first = await make_github_request(client, url, dict(base_params, page=1), budget=budget)
+    items = first.json()
+    last_page = last_page_number(first)
+    if not items or len(items) < per_page or last_page is None:
+        return items[:max_items] if max_items else items
+
+    if max_items:
+        last_page = min(last_page, math.ceil(max_items / per_page))
+
+    async def fetch_page(page: int) -> List[Dict[str, Any]]:
+        response = await make_github_request(client, url, dict(base_params, page=page), budget=budget)
+        return response.json()
+
+    tasks = [asyncio.ensure_future(fetch_page(page)) for page in range(2, last_page + 1)]
+    try:
+        pages = await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed page fails the listing; stop the others instead of leaving them on the budget
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    for batch in pages:
+        items.extend(batch)
+        # The list can shrink while paging; a short page is the real end
+        if len(batch) < per_page:
             break
-            
-        page += 1
-        
-        # Small delay to be respectful
-        await asyncio.sleep(0.1)
-    
-    return commits[:max_commits]
+    return items[:max_items] if max_items else items
 
 
-async def get_commit_details(client: httpx.AsyncClient, owner: str, repo: str, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Get detailed commit information with concurrency control."""
+@tracing.traced("github.get_commits")
+async def get_commits(client: httpx.AsyncClient, owner: str, repo: str, since: str, max_commits: int,
+                      budget: Optional[RateBudget] = None) -> List[Dict[str, Any]]:
+    """Get repository commits with pagination."""
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits"
+    return await fetch_paginated(client, url, {"since": since}, max_items=max_commits, budget=budget)
+
+
+async def iter_commit_details(client: httpx.AsyncClient, owner: str, repo: str, commits: List[Dict[str, Any]],
+                              batch_size: int = 10, request_delay: float = 0.1, batch_delay: float = 0.5,
+                              budget: Optional[RateBudget] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield detailed commit information in commit order, one batch at a time.
+
+    Only the current batch of full commit payloads (patches included) is held,
+    so callers that fold each detail into an aggregator use memory independent
+    of the number of commits.
+    """
     semaphore = asyncio.Semaphore(3)  # Limit concurrent requests
     
     async def fetch_commit(commit: Dict[str, Any]) -> Dict[str, Any]:
         async with semaphore:
             sha = commit["sha"]
-            url = f"https://api.github.com/repos/{owner}/{repo}/commits/{sha}"
-            response = await make_github_request(client, url)
+            url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{sha}"
+            response = await make_github_request(client, url, budget=budget)
             # Small delay to be gentle on GitHub API
-            await asyncio.sleep(0.1)
+            if request_delay:
+                await asyncio.sleep(request_delay)
             return response.json()
     
     # Process commits in batches to avoid overwhelming the API
-    details = []
-    batch_size = 10
-    
     for i in range(0, len(commits), batch_size):
         batch = commits[i:i + batch_size]
         batch_details = await asyncio.gather(*[fetch_commit(c) for c in batch])
-        details.extend(batch_details)
+        while batch_details:
+            yield batch_details.pop(0)
         
         # Small delay between batches
-        if i + batch_size < len(commits):
-            await asyncio.sleep(0.5)
-    
-    return details
-
-
-def gini(values: List[float]) -> float:
-    arr = sorted([v for v in values if v > 0])
-    n = len(arr)
-    if n == 0:
-        return 0.0
-    s = sum(arr)
-    if s == 0:
-        return 0.0
-    cum = 0.0
-    weighted = 0.0
-    for v in arr:
-        cum += v
-        weighted += cum
-    return (n + 1 - 2 * (weighted / s)) / n
-
-
-def top_dir(path: str) -> str:
-    i = path.find("/")
-    return "(root)" if i == -1 else path[:i]
-
-
-def compartmentalization(files: List[Dict[str, Any]]) -> float:
-    # files: [{filename, additions, deletions}]
-    if not files or len(files) == 1:
-        return 1.0
-    by_dir: Dict[str, int] = {}
-    for f in files:
-        w = (int(f.get("additions", 0)) + int(f.get("deletions", 0))) or 1
-        d = top_dir(f["filename"]) if isinstance(f.get("filename"), str) else "(root)"
-        by_dir[d] = by_dir.get(d, 0) + w
-    vals = list(by_dir.values())
-    total = sum(vals) or 1
-    probs = [v / total for v in vals]
-    if len(probs) <= 1:
-        return 1.0
-    H = -sum(p * math.log(p) for p in probs if p > 0)
-    return 1 - (H / math.log(len(probs)))
+        if batch_delay and i + batch_size < len(commits):
+            await asyncio.sleep(batch_delay)
+
+
+async def get_commit_details(client: httpx.AsyncClient, owner: str, repo: str, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get detailed commit information with concurrency control."""
+    return [detail async for detail in iter_commit_details(client, owner, repo, commits)]
 
 
 # COMMENTED OUT: Old zipball approach - replaced with Contents API for better file size handling
@@ -278,7 +381,7 @@ def compartmentalization(files: List[Dict[str, Any]]) -> float:
 
 async def get_repo_contents_recursive(client: httpx.AsyncClient, owner: str, repo: str, ref: str = "main", path: str = "") -> List[Dict[str, Any]]:
     """Recursively get all repository contents using GitHub Contents API."""
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}" if path else f"https://api.github.com/repos/{owner}/{repo}/contents"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}" if path else f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents"
     headers = get_auth_headers()
     headers["Accept"] = "application/vnd.github+json"
     
@@ -320,13 +423,39 @@ async def download_file_content(client: httpx.AsyncClient, file_info: Dict[str,
     headers = get_auth_headers()
     
     try:
-        response = await client.get(url, headers=headers)
+        with metrics.GITHUB_LATENCY.labels("raw").time():
+            response = await client.get(url, headers=headers)
+        metrics.GITHUB_REQUESTS.labels("raw", response.status_code).inc()
         response.raise_for_status()
+        metrics.FILE_BYTES.labels("downloaded").inc(len(response.content))
         return response.content
     except httpx.HTTPStatusError as e:
         raise GitHubAPIError(f"Failed to download file {file_info['path']}: {e.response.status_code}")
 
 
+async def stream_file_content(client: httpx.AsyncClient, file_info: Dict[str, Any],
+                              chunk_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+    """Download file content in chunks, so large files never sit in memory whole."""
+    url = file_info["download_url"]
+    headers = get_auth_headers()
+    
+    start = time.perf_counter()
+    size = 0
+    async with client.stream("GET", url, headers=headers) as response:
+        metrics.GITHUB_REQUESTS.labels("raw", response.status_code).inc()
+        if response.status_code >= 400:
+            raise GitHubAPIError(f"Failed to download file {file_info['path']}: {response.status_code}")
+        downloaded = metrics.FILE_BYTES.labels("downloaded")
+        async for chunk in response.aiter_bytes(chunk_size):
+            downloaded.inc(len(chunk))
+            size += len(chunk)
+            yield chunk
+    end = time.perf_counter()
+    metrics.GITHUB_LATENCY.labels("raw").observe(end - start)
+    # Recorded afterwards: a generator cannot hold the current span across its yields
+    tracing.record_span("github.raw", start, end, path=file_info["path"], bytes=size)
+
+
 # COMMENTED OUT: Old zipball extraction approach - replaced with Contents API
 # async def extract_and_store_files(zipball_data: bytes, repo_id: str, user_id: str, ref: str = "main") -> Dict[str, Any]:
 #     """Extract zipball and store individual files for vector embedding preparation."""
@@ -462,133 +591,260 @@ async def download_file_content(client: httpx.AsyncClient, file_info: Dict[str,
 #         raise StorageError(f"File extraction and storage failed: {str(e)}")
 
 
-async def extract_and_store_files_contents_api(client: httpx.AsyncClient, owner: str, repo: str, repo_id: str, user_id: str, ref: str = "main") -> Dict[str, Any]:
-    """Extract and store individual files using GitHub Contents API for better file size handling."""
+@tracing.traced("extract_and_store_files")
+async def extract_and_store_files_contents_api(client: httpx.AsyncClient, owner: str, repo: str, repo_id: str, user_id: str, ref: str = "main",
+                                               clone=None) -> Dict[str, Any]:
+    """
+    Extract and store individual files using GitHub Contents API for better file size handling.
+
+    Contents are stored once per git blob SHA (see core.services.blob_store); blobs that
+    are already stored are neither downloaded nor uploaded again. A reference on each
+    blob is taken before it is reused or uploaded, and the ones the snapshot does not
+    use are given back. The analysis base path identifies the snapshot whose manifest
+    maps paths to blobs.
+
+    When a local ``clone`` (git_clone_analyzer.GitClone) is given, the file list
+    and contents are read from it instead of the API.
+    """
     if not supabase:
         raise StorageError("Supabase client not initialized")
     
-    print(f"DEBUG: extract_and_store_files_contents_api - repo_id: {repo_id}, user_id: {user_id}, ref: {ref}")
+    logger.info("Extracting files for %s/%s at %s (repo %s, user %s)", owner, repo, ref, repo_id, user_id)
     
-    # Create timestamp for this extraction
+    # Create timestamp for this extraction; the base path is the snapshot id
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     base_path = f"repos/{user_id}/{repo_id}/{ref}_{timestamp}"
     
+    store = BlobStore()
     stored_files = []
     file_metadata = []
     skipped_files = []
+    manifest: Dict[str, str] = {}
+    dedup = {"blobs_reused": 0, "blobs_uploaded": 0, "bytes_uploaded": 0}
+    # One entry per reference taken; those the recorded snapshot does not use are released
+    held: List[str] = []
+    snapshot_recorded = False
     
     try:
         # Get all repository files recursively
-        print(f"DEBUG: Getting repository contents for {owner}/{repo}")
-        all_files = await get_repo_contents_recursive(client, owner, repo, ref)
-        print(f"DEBUG: Found {len(all_files)} files in repository")
+        if clone is not None:
+            all_files = await clone.list_files()
+        else:
+            with tracing.span("get_repo_contents_recursive") as list_span:
+                all_files = await get_repo_contents_recursive(client, owner, repo, ref)
+                list_span.set("files", len(all_files))
+        logger.debug("Found %d files in %s/%s", len(all_files), owner, repo)
+        
+        # .gitattributes files (linguist-generated / linguist-vendored) are read before classifying
+        attributes = GitAttributes()
+        for file_info in all_files:
+            if is_gitattributes(file_info["path"]):
+                try:
+                    if clone is not None:
+                        text = await clone.read_blob(file_info["sha"])
+                    else:
+                        text = await download_file_content(client, file_info)
+                    attributes.add(file_info["path"], text.decode("utf-8", errors="ignore"))
+                except Exception as e:
+                    logger.warning("Could not read %s: %s", file_info["path"], e)
+        
+        # Classify on metadata first, then group paths by blob SHA
+        virtualenvs = virtualenv_roots(file_info["path"] for file_info in all_files)
+        blobs: Dict[str, List[Dict[str, Any]]] = {}
+        for file_info in all_files:
+            relative_path = file_info["path"]
+            file_size = file_info.get("size", 0)
+            
+            reason = classify_path(relative_path, file_size, attributes, virtualenvs)
+            if not reason and file_size > STORAGE_MAX_BYTES:
+                reason = "supabase_size_limit"
+            if reason:
+                logger.debug("Skipping file (%s): %s", reason, relative_path, extra=sample(100))
+                skipped = {"path": relative_path, "reason": reason}
+                if reason in ("file_too_large", "supabase_size_limit"):
+                    skipped["size_bytes"] = file_size
+                elif reason == "binary_file":
+                    skipped["extension"] = os.path.splitext(relative_path)[1].lower()
+                skipped_files.append(skipped)
+                continue
+            
+            # Entries without a SHA are keyed by path until their content is hashed
+            blobs.setdefault(file_info.get("sha") or f"path:{relative_path}", []).append(file_info)
         
-        # Process files with concurrency control - reduced for stability
-        semaphore = asyncio.Semaphore(2)  # Limit concurrent downloads
+        # One batched call references every known blob before any download, so a
+        # concurrent garbage collection cannot delete a blob this snapshot reuses
+        acquired = await asyncio.to_thread(store.acquire, [sha for sha in blobs if not sha.startswith("path:")])
+        held.extend(acquired)
+        existing = [sha for sha, stored in acquired.items() if stored]
+        logger.debug("%d of %d blobs already stored", len(existing), len(blobs))
         
-        async def process_file(file_info: Dict[str, Any]) -> None:
-            async with semaphore:
+        def record_paths(sha: str, infos: List[Dict[str, Any]], size: int) -> None:
+            storage_path = blob_storage_path(sha)
+            public_url = store.public_url(sha)
+            for file_info in infos:
                 relative_path = file_info["path"]
-                file_size = file_info.get("size", 0)
+                file_ext = os.path.splitext(relative_path)[1].lower()
+                content_type = get_content_type(file_ext)
+                manifest[relative_path] = sha
                 
-                print(f"DEBUG: Processing file: {relative_path}, size: {file_size} bytes")
+                stored_files.append({
+                    "path": relative_path,
+                    "storage_path": storage_path,
+                    "public_url": public_url,
+                    "size": size,
+                    "extension": file_ext,
+                    "content_type": content_type
+                })
                 
-                # Skip certain files/directories
-                if should_skip_file(relative_path):
-                    print(f"DEBUG: Skipping file based on pattern: {relative_path}")
-                    skipped_files.append({"path": relative_path, "reason": "pattern_match"})
-                    return
+                file_metadata.append({
+                    "relative_path": relative_path,
+                    "storage_path": storage_path,
+                    "public_url": public_url,
+                    "size_bytes": size,
+                    "file_extension": file_ext,
+                    "content_type": content_type,
+                    "blob_sha": sha
+                })
+        
+        for sha in existing:
+            infos = blobs.pop(sha)
+            record_paths(sha, infos, infos[0].get("size", 0))
+            dedup["blobs_reused"] += 1
+        
+        # Fetch in priority order (source first, smallest first) with in-flight bytes capped;
+        # uploads run on the pipeline's worker pool
+        ordered = order_blobs(blobs)
+        budget = ByteBudget()
+        schedule = ScheduleStats(budget, sum(1 for _, infos in ordered if blob_priority(infos)[0] == PRIORITY_SOURCE))
+        submitted = []
+        
+        def uploaded(source: bool, reserved: int, content, future: asyncio.Future) -> None:
+            content.close()
+            budget.release(reserved)
+            if source:
+                schedule.source_done(future.result().ok)
+        
+        async def process_blob(uploads: UploadPipeline, item: Tuple[str, List[Dict[str, Any]]]) -> None:
+            sha, infos = item
+            file_info = infos[0]
+            relative_path = file_info["path"]
+            source = blob_priority(infos)[0] == PRIORITY_SOURCE
+            reserved = await budget.acquire(file_info.get("size", 0))
+            content = None
+            handed_off = False
+            reused = False
+            
+            logger.debug("Processing file: %s, size: %s bytes", relative_path, file_info.get("size", 0), extra=sample(100))
+            
+            try:
+                # Large files are spooled to a temporary file in chunks
+                with tracing.span("download_blob", path=relative_path, size=file_info.get("size", 0)):
+                    if clone is not None:
+                        content = await spool(clone.stream_blob(file_info["sha"]))
+                    else:
+                        content = await spool(stream_file_content(client, file_info))
+                metrics.FILES.labels("downloaded", "").inc()
                 
-                # Handle file size limits according to GitHub API documentation
-                if file_size > 100 * 1024 * 1024:  # 100MB limit
-                    print(f"DEBUG: Skipping file due to size (>100MB): {relative_path} ({file_size} bytes)")
-                    skipped_files.append({"path": relative_path, "reason": "file_too_large", "size_bytes": file_size})
+                # Size check for entries listed without a size
+                if content.size > STORAGE_MAX_BYTES:
+                    logger.debug("Skipping file due to Supabase size limit: %s (%d bytes)", relative_path, content.size)
+                    for info in infos:
+                        skipped_files.append({"path": info["path"], "reason": "supabase_size_limit", "size_bytes": content.size})
                     return
                 
-                # Skip binary files (check by extension)
-                file_ext = os.path.splitext(relative_path)[1].lower()
-                if is_binary_file(file_ext):
-                    print(f"DEBUG: Skipping binary file: {relative_path}")
-                    skipped_files.append({"path": relative_path, "reason": "binary_file", "extension": file_ext})
+                # Content sniffing before upload: binary data, minified bundles, generated code
+                reason = classify_content(relative_path, content.head, attributes)
+                if reason:
+                    logger.debug("Skipping file after download (%s): %s", reason, relative_path, extra=sample(100))
+                    for info in infos:
+                        skipped_files.append({"path": info["path"], "reason": reason, "size_bytes": content.size})
                     return
                 
-                try:
-                    # Download file content
-                    file_content = await download_file_content(client, file_info)
-                    
-                    # Small delay between GitHub API requests
-                    await asyncio.sleep(0.1)
-                    
-                    # Additional size check for Supabase (50MB limit)
-                    if len(file_content) > 50 * 1024 * 1024:
-                        print(f"DEBUG: Skipping file due to Supabase size limit: {relative_path} ({len(file_content)} bytes)")
-                        skipped_files.append({"path": relative_path, "reason": "supabase_size_limit", "size_bytes": len(file_content)})
+                if sha.startswith("path:"):
+                    sha = await asyncio.to_thread(content.git_sha)
+                if sha not in acquired:
+                    # Hashed just now, or being garbage-collected when the batch was acquired
+                    late = await asyncio.to_thread(store.acquire, [sha])
+                    if sha not in late:
+                        logger.debug("Skipping blob being garbage-collected: %s", relative_path)
+                        for info in infos:
+                            skipped_files.append({"path": info["path"], "reason": "blob_collected", "size_bytes": content.size})
                         return
-                    
-                    # Determine content type
-                    content_type = get_content_type(file_ext)
-                    
-                    # Create storage path
-                    storage_path = f"{base_path}/{relative_path}"
-                    
-                    # Upload file to Supabase storage
-                    result = supabase.storage.from_("repo-files").upload(
-                        path=storage_path,
-                        file=file_content,
-                        file_options={"content-type": content_type}
-                    )
-                    
-                    if isinstance(result, dict) and result.get("error"):
-                        print(f"Warning: Failed to upload {relative_path}: {result['error']}")
-                        skipped_files.append({"path": relative_path, "reason": "upload_failed", "error": result['error']})
-                        return
-                    elif hasattr(result, 'data') and result.data is None:
-                        print(f"Warning: Failed to upload {relative_path}: No data returned")
-                        skipped_files.append({"path": relative_path, "reason": "upload_failed", "error": "No data returned"})
+                    held.append(sha)
+                    if late[sha]:
+                        record_paths(sha, infos, content.size)
+                        dedup["blobs_reused"] += 1
+                        reused = True
                         return
-                    
-                    # Get public URL for the file
-                    public_url = supabase.storage.from_("repo-files").get_public_url(storage_path)
-                    
-                    # Small delay between file uploads to be gentle on APIs
-                    await asyncio.sleep(0.2)
-                    
-                    stored_files.append({
-                        "path": relative_path,
-                        "storage_path": storage_path,
-                        "public_url": public_url,
-                        "size": len(file_content),
-                        "extension": file_ext,
-                        "content_type": content_type
-                    })
-                    
-                    file_metadata.append({
-                        "relative_path": relative_path,
-                        "storage_path": storage_path,
-                        "public_url": public_url,
-                        "size_bytes": len(file_content),
-                        "file_extension": file_ext,
-                        "content_type": content_type
-                    })
-                    
-                except Exception as e:
-                    error_msg = str(e)
-                    if "handshake operation timed out" in error_msg:
-                        print(f"DEBUG: SSL timeout for file {relative_path}, will retry later")
-                        skipped_files.append({"path": relative_path, "reason": "ssl_timeout", "error": error_msg})
-                    else:
-                        print(f"DEBUG: Error processing file {relative_path}: {error_msg}")
-                        skipped_files.append({"path": relative_path, "reason": "processing_failed", "error": error_msg})
+                
+                # Upload the blob once for every path that shares it; the content and its
+                # share of the budget are released once the upload completes
+                content_type = get_content_type(os.path.splitext(relative_path)[1].lower())
+                future = await uploads.submit(blob_storage_path(sha), content.data, content_type)
+                future.add_done_callback(functools.partial(uploaded, source, reserved, content))
+                content = None
+                handed_off = True
+                submitted.append((sha, infos, content_type, future))
+                
+            except Exception as e:
+                error_msg = str(e)
+                if "handshake operation timed out" in error_msg:
+                    logger.warning("SSL timeout for file %s, will retry later", relative_path, extra=sample(20))
+                    reason = "ssl_timeout"
+                else:
+                    logger.warning("Error processing file %s: %s", relative_path, error_msg, extra=sample(20))
+                    reason = "processing_failed"
+                for info in infos:
+                    skipped_files.append({"path": info["path"], "reason": reason, "error": error_msg})
+            finally:
+                # Skipped or failed before reaching the pipeline
+                if content is not None:
+                    content.close()
+                if not handed_off:
+                    budget.release(reserved)
+                    if source:
+                        schedule.source_done(reused)
         
-        # Process files in batches to avoid overwhelming the API
-        batch_size = 10
-        for i in range(0, len(all_files), batch_size):
-            batch = all_files[i:i + batch_size]
-            await asyncio.gather(*[process_file(file_info) for file_info in batch])
-            
-            # Delay between batches to be gentle on APIs
-            if i + batch_size < len(all_files):
-                await asyncio.sleep(2)
+        with tracing.span("download_and_upload", blobs=len(ordered)):
+            async with UploadPipeline(store.storage()) as uploads:
+                await run_ordered(ordered, lambda item: process_blob(uploads, item), DOWNLOAD_CONCURRENCY)
+        
+        # The pipeline has drained; register the uploaded blobs in one batched upsert
+        uploaded_rows = []
+        for sha, infos, content_type, future in submitted:
+            result = future.result()
+            if not result.ok:
+                for info in infos:
+                    skipped_files.append({"path": info["path"], "reason": "upload_failed", "error": result.error})
+                continue
+            uploaded_rows.append(BlobStore.blob_row(sha, result.size, content_type))
+            record_paths(sha, infos, result.size)
+            dedup["blobs_uploaded"] += 1
+            dedup["bytes_uploaded"] += result.size
+        await asyncio.to_thread(store.register, uploaded_rows)
+        upload_stats = uploads.stats()
+        schedule_stats = schedule.to_dict()
+        logger.info("Uploaded %d blobs (%d bytes) at %s files/s, %s bytes/s, %d reused, %d skipped",
+                    upload_stats["files"], upload_stats["bytes"], upload_stats["files_per_s"],
+                    upload_stats["bytes_per_s"], dedup["blobs_reused"], len(skipped_files))
+        
+        await asyncio.to_thread(store.record_snapshot, base_path, repo_id, user_id, ref, manifest)
+        snapshot_recorded = True
+        try:
+            unused = Counter(held)
+            unused.subtract(set(manifest.values()))
+            await asyncio.to_thread(store.release, list(unused.elements()))
+            dedup.update(await asyncio.to_thread(store.collect_garbage, repo_id))
+        except Exception as e:
+            logger.warning("Blob garbage collection failed: %s", e)
+        
+        for skipped in skipped_files:
+            metrics.FILES.labels("skipped", skipped["reason"]).inc()
+        metrics.FILES.labels("uploaded", "").inc(dedup["blobs_uploaded"])
+        metrics.FILES.labels("reused", "").inc(dedup["blobs_reused"])
+        metrics.FILE_BYTES.labels("uploaded").inc(dedup["bytes_uploaded"])
+        metrics.record_cache("blob_store", hit=True, count=dedup["blobs_reused"])
+        metrics.record_cache("blob_store", hit=False, count=dedup["blobs_uploaded"])
         
         return {
             "base_path": base_path,
@@ -596,58 +852,22 @@ async def extract_and_store_files_contents_api(client: httpx.AsyncClient, owner:
             "files": stored_files,
             "file_metadata": file_metadata,
             "skipped_files": skipped_files,
-            "skipped_count": len(skipped_files)
+            "skipped_count": len(skipped_files),
+            "dedup": dedup,
+            "uploads": upload_stats,
+            "scheduling": schedule_stats
         }
         
     except Exception as e:
-        print(f"DEBUG: File extraction and storage exception: {str(e)}")
+        logger.warning("File extraction and storage failed: %s", e)
+        if held and not snapshot_recorded:
+            try:
+                await asyncio.to_thread(store.release, held)
+            except Exception as release_error:
+                logger.warning("Could not release blob references: %s", release_error)
         raise StorageError(f"File extraction and storage failed: {str(e)}")
 
 
-def is_binary_file(file_ext: str) -> bool:
-    """Determine if a file extension indicates a binary file."""
-    binary_extensions = {
-        '.exe', '.dll', '.so', '.dylib', '.bin', '.app', '.deb', '.rpm', '.msi',
-        '.zip', '.tar', '.gz', '.rar', '.7z', '.bz2', '.xz',
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.ico', '.webp',
-        '.mp3', '.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.webm',
-        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-        '.woff', '.woff2', '.ttf', '.otf', '.eot',
-        '.db', '.sqlite', '.sqlite3', '.mdb', '.accdb',
-        '.pyc', '.pyo', '.class', '.jar', '.war', '.ear',
-        '.o', '.obj', '.lib', '.a', '.dylib', '.so',
-        '.map', '.min.js', '.min.css'
-    }
-    return file_ext.lower() in binary_extensions
-
-
-def should_skip_file(relative_path: str) -> bool:
-    """Determine if a file should be skipped based on its path."""
-    if not relative_path:
-        return True
-        
-    skip_patterns = [
-        '.git/',
-        'node_modules/',
-        '__pycache__/',
-        '.pytest_cache/',
-        '.venv/',
-        'venv/',
-        'env/',
-        '.env',
-        '.DS_Store',
-        'Thumbs.db',
-        '.gitignore',
-        '.gitattributes',
-        'package-lock.json',
-        'yarn.lock',
-        'Pipfile.lock',
-        'poetry.lock'
-    ]
-    
-    return any(pattern in relative_path for pattern in skip_patterns)
-
-
 def get_content_type(file_ext: str) -> str:
     """Get content type based on file extension."""
     content_types = {
@@ -695,21 +915,25 @@ def get_content_type(file_ext: str) -> str:
     return content_types.get(file_ext, 'text/plain')
 
 
+@tracing.traced("save_repo_to_database")
 def save_repo_to_database(owner: str, repo: str, repo_data: Dict[str, Any], 
                          analysis_result: Dict[str, Any], file_storage_info: Dict[str, Any], 
-                         user_id: str, window_days: int, max_commits: int) -> str:
-    """Save repository and analysis data to consolidated repos table."""
-    print(f"DEBUG: save_repo_to_database - owner: {owner}, repo: {repo}, user_id: {user_id}")
-    print(f"DEBUG: repo_data: {repo_data}")
-    print(f"DEBUG: analysis_result keys: {list(analysis_result.keys()) if analysis_result else 'None'}")
+                         user_id: str, window_days: int, max_commits: int, repo_id: str,
+                         file_analysis_data: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """
+    Save repository and analysis data to the consolidated repos table in one write
+    at the end of the pipeline (see core.services.repo_store). Returns the number
+    of requests made and bytes written.
+    """
+    logger.debug("Saving %s/%s for user %s, analysis keys: %s", owner, repo, user_id,
+                 analysis_result.keys() if analysis_result else None)
     
     if not supabase:
         raise DatabaseError("Supabase client not initialized")
     
     try:
-        # Prepare file metadata for JSONB storage
-        file_metadata = file_storage_info.get("file_metadata", [])
-        print(f"DEBUG: file_metadata: {file_metadata}")
+        file_storage_info = file_storage_info or {}
+        file_analysis_data = file_analysis_data or {}
         
         # Create consolidated repository record
         repo_insert = {
@@ -727,40 +951,40 @@ def save_repo_to_database(owner: str, repo: str, repo_data: Dict[str, Any],
             "size_bytes": repo_data.get("size", 0),
             "window_days": window_days,
             "max_commits": max_commits,
-            "languages": analysis_result.get("languages", {}),
-            "team_data": analysis_result.get("team", {}),
-            "commits_data": analysis_result.get("commits", {}),
-            "raw_analysis": analysis_result,
             "file_storage_base_path": file_storage_info.get("base_path"),
             "file_count": file_storage_info.get("file_count", 0),
             "files_ready_for_embedding": file_storage_info.get("file_count", 0) > 0,
-            "file_metadata": file_metadata
+            "score_issues": file_analysis_data.get("score_issues", {})
         }
         
-        # Upsert the repository (update if exists, insert if new)
-        repo_result = supabase.table("repos").upsert(
-            repo_insert, 
-            on_conflict="full_name"
-        ).execute()
-        
-        if repo_result.data:
-            return repo_result.data[0]["id"]
-        else:
-            raise DatabaseError("Failed to save repository")
+        # Per-file arrays go to chunk rows; the row itself is upserted once
+        skipped_files = (analysis_result.get("file_storage") or {}).get("skipped_files", [])
+        return RepoStore().save_repo(repo_id, repo_insert, analysis_result, {
+            "file_metadata": file_storage_info.get("file_metadata", []),
+            "file_analysis": file_analysis_data.get("file_analyses", []),
+            "skipped_files": skipped_files
+        })
             
     except Exception as e:
         raise DatabaseError(f"Database operation failed: {str(e)}")
 
 
+@tracing.traced("github.get_repo_info")
 async def get_repo_info(client: httpx.AsyncClient, owner: str, repo: str) -> Dict[str, Any]:
     """Get basic repository information from GitHub."""
-    url = f"https://api.github.com/repos/{owner}/{repo}"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}"
     response = await make_github_request(client, url)
     return response.json()
 
 
-async def analyze_repo(repo_url: str, window_days: int = 3650, max_commits: int = 500) -> Dict[str, Any]:
-    """Analyze a GitHub repository using REST API with proper error handling."""
+@tracing.traced("analyze_repo")
+async def analyze_repo(repo_url: str, window_days: int = 3650, max_commits: int = 500,
+                       backend: str = "api") -> Dict[str, Any]:
+    """Analyze a GitHub repository using REST API (or a local clone with backend="git") with proper error handling."""
+    if backend == "git":
+        from core.analyzers.git_clone_analyzer import analyze_repo_git
+        return await analyze_repo_git(repo_url, window_days, max_commits)
+
     owner, repo = parse_repo(repo_url)
     since = (datetime.utcnow() - timedelta(days=window_days)).isoformat() + "Z"
 
@@ -769,11 +993,13 @@ async def analyze_repo(repo_url: str, window_days: int = 3650, max_commits: int
 
     try:
         async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+            budget = RateBudget()
+
             # Get languages
-            languages = await get_repo_languages(client, owner, repo)
+            languages = await get_repo_languages(client, owner, repo, budget=budget)
             
-            # Get commits
-            commits = await get_commits(client, owner, repo, since, max_commits)
+            # Get commits; only the SHAs are needed to fetch details
+            commits = [{"sha": c["sha"]} for c in await get_commits(client, owner, repo, since, max_commits, budget=budget)]
             
             if not commits:
                 return {
@@ -784,8 +1010,12 @@ async def analyze_repo(repo_url: str, window_days: int = 3650, max_commits: int
                     "commits": {"count": 0, "medianCompartmentalization": 1.0, "meanCompartmentalization": 1.0}
                 }
             
-            # Get commit details
-            details = await get_commit_details(client, owner, repo, commits)
+            # Fold commit details into the aggregator as they arrive (numpy is loaded on first analysis)
+            from core.analyzers.commit_metrics import CommitAggregator
+            aggregator = CommitAggregator()
+            with tracing.span("get_commit_details", commits=len(commits)):
+                async for detail in iter_commit_details(client, owner, repo, commits, budget=budget):
+                    aggregator.add(detail)
             
     except RateLimitExceeded as e:
         return {
@@ -804,71 +1034,28 @@ async def analyze_repo(repo_url: str, window_days: int = 3650, max_commits: int
             "error": f"Unexpected error: {str(e)}"
         }
 
-    # Process the data
-    author_net: Dict[str, int] = {}
-    ci_values: List[float] = []
-    ext_map: Dict[str, str] = {
-        "js": "JavaScript", "jsx": "JavaScript", "ts": "TypeScript", "tsx": "TypeScript",
-        "py": "Python", "go": "Go", "rb": "Ruby", "java": "Java", "cs": "C#", "php": "PHP",
-        "rs": "Rust", "kt": "Kotlin", "swift": "Swift", "cpp": "C++", "c": "C",
-        "m": "Objective-C", "mm": "Objective-C++", "scala": "Scala", "dart": "Dart",
-    }
-    per_author_lang: Dict[str, Dict[str, int]] = {}
-
-    for d in details:
-        commit_obj = d.get("commit") or {}
-        author_login = (d.get("author") or {}).get("login")
-        author = author_login or (commit_obj.get("author") or {}).get("email") or "unknown"
-
-        stats = d.get("stats") or {}
-        adds = int(stats.get("additions", 0))
-        dels = int(stats.get("deletions", 0))
-        author_net[author] = author_net.get(author, 0) + (adds - dels)
-
-        files = d.get("files") or []
-        if files:
-            ci_values.append(compartmentalization(files))
-        lang_bucket = per_author_lang.get(author, {})
-        for f in files:
-            filename = f.get("filename", "")
-            ext = filename.split(".")[-1].lower() if "." in filename else ""
-            lang = ext_map.get(ext, "Other")
-            weight = (int(f.get("additions", 0)) + int(f.get("deletions", 0))) or 1
-            lang_bucket[lang] = lang_bucket.get(lang, 0) + weight
-        per_author_lang[author] = lang_bucket
-
-    totals = [max(0, v) for v in author_net.values()]
-    top3_share = (sum(sorted(totals, reverse=True)[:3]) / (sum(totals) or 1)) if totals else 0.0
-    median_ci = statistics.median(ci_values) if ci_values else 1.0
-    mean_ci = (sum(ci_values) / len(ci_values)) if ci_values else 1.0
+    commit_metrics = aggregator.result()
 
     return {
         "repo": f"{owner}/{repo}",
+        "backend": "api",
         "limits": {"since": since, "max_commits": max_commits, "truncated": len(commits) >= max_commits},
         "languages": languages,
-        "team": {
-            "giniContribution": gini(totals),
-            "topContributorsShare": top3_share,
-            "contributions": [{"author": k, "netLines": v} for k, v in author_net.items()],
-            "perAuthorLanguage": [{"author": a, "languages": l} for a, l in per_author_lang.items()],
-        },
-        "commits": {
-            "count": len(details),
-            "medianCompartmentalization": median_ci,
-            "meanCompartmentalization": mean_ci,
-        },
+        "team": commit_metrics["team"],
+        "commits": commit_metrics["commits"],
     }
 
 
+@tracing.traced("analyze_and_store_repo")
 async def analyze_and_store_repo(repo_url: str, user_id: str, window_days: int = 3650, 
-                                max_commits: int = 500, download_zipball: bool = True) -> Dict[str, Any]:
+                                max_commits: int = 500, download_zipball: bool = True,
+                                review_files: bool = False, backend: str = "api") -> Dict[str, Any]:
     """Analyze a GitHub repository and store results in database with file extraction for vector embedding."""
-    print(f"DEBUG: Starting analyze_and_store_repo with repo_url: {repo_url}, user_id: {user_id}")
+    logger.info("Analyzing and storing %s for user %s (backend=%s)", repo_url, user_id, backend)
     try:
         owner, repo = parse_repo(repo_url)
-        print(f"DEBUG: Parsed repo - owner: {owner}, repo: {repo}")
     except Exception as e:
-        print(f"DEBUG: Error parsing repo URL: {e}")
+        logger.warning("Error parsing repo URL %s: %s", repo_url, e)
         raise
     since = (datetime.utcnow() - timedelta(days=window_days)).isoformat() + "Z"
 
@@ -876,16 +1063,23 @@ async def analyze_and_store_repo(repo_url: str, user_id: str, window_days: int =
     limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
 
     try:
-        async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async with httpx.AsyncClient(timeout=timeout, limits=limits) as client, contextlib.AsyncExitStack() as stack:
             # Get basic repo info
-            print(f"DEBUG: Getting repo info for {owner}/{repo}")
             repo_data = await get_repo_info(client, owner, repo)
-            print(f"DEBUG: Repo data: {repo_data}")
+            logger.debug("Repo info for %s/%s: default branch %s, %s KB", owner, repo,
+                         repo_data.get("default_branch"), repo_data.get("size"))
             
             # Perform analysis
-            print(f"DEBUG: Starting analysis for {repo_url}")
-            analysis_result = await analyze_repo(repo_url, window_days, max_commits)
-            print(f"DEBUG: Analysis result: {analysis_result}")
+            clone = None
+            if backend == "git":
+                # One clone serves both the commit analysis and file ingestion
+                from core.analyzers.git_clone_analyzer import analyze_clone, cloned_repo
+                clone = await stack.enter_async_context(cloned_repo(owner, repo, since))
+                analysis_result = await analyze_clone(clone, owner, repo, since, max_commits)
+            else:
+                analysis_result = await analyze_repo(repo_url, window_days, max_commits)
+            logger.debug("Analysis of %s/%s returned keys: %s", owner, repo,
+                         analysis_result.keys() if analysis_result else None)
             
             # Check if analysis was successful
             if not analysis_result:
@@ -894,16 +1088,19 @@ async def analyze_and_store_repo(repo_url: str, user_id: str, window_days: int =
             if "error" in analysis_result:
                 return analysis_result
             
-            # Save to database first to get repo_id
-            repo_id = save_repo_to_database(owner, repo, repo_data, analysis_result, {}, user_id, window_days, max_commits)
+            # The row is written once at the end; storage paths need its id now
+            try:
+                with tracing.span("resolve_repo_id"):
+                    repo_id = await asyncio.to_thread(RepoStore().resolve_repo_id, f"{owner}/{repo}")
+            except Exception as e:
+                raise DatabaseError(f"Database operation failed: {str(e)}")
             
             file_storage_info = None
             if download_zipball:
-                print(f"DEBUG: File download enabled, starting file extraction...")
                 try:
                     # Use Contents API instead of zipball for better file size handling
                     file_storage_info = await extract_and_store_files_contents_api(
-                        client, owner, repo, repo_id, user_id, repo_data.get("default_branch", "main")
+                        client, owner, repo, repo_id, user_id, repo_data.get("default_branch", "main"), clone=clone
                     )
                     
                     analysis_result["file_storage"] = {
@@ -911,7 +1108,10 @@ async def analyze_and_store_repo(repo_url: str, user_id: str, window_days: int =
                         "file_count": file_storage_info["file_count"],
                         "files_ready_for_embedding": True,
                         "skipped_files": file_storage_info.get("skipped_files", []),
-                        "skipped_count": file_storage_info.get("skipped_count", 0)
+                        "skipped_count": file_storage_info.get("skipped_count", 0),
+                        "dedup": file_storage_info.get("dedup"),
+                        "uploads": file_storage_info.get("uploads"),
+                        "scheduling": file_storage_info.get("scheduling")
                     }
                     
                 except (GitHubAPIError, StorageError) as e:
@@ -919,9 +1119,7 @@ async def analyze_and_store_repo(repo_url: str, user_id: str, window_days: int =
                     analysis_result["warning"] = f"Failed to download/extract files: {str(e)}"
                     file_storage_info = {"base_path": None, "file_count": 0, "file_metadata": []}
                 except Exception as e:
-                    import traceback
-                    print(f"DEBUG: Unexpected error during file extraction: {e}")
-                    print(f"DEBUG: Traceback: {traceback.format_exc()}")
+                    logger.exception("Unexpected error during file extraction for %s/%s", owner, repo)
                     analysis_result["warning"] = f"Failed to download/extract files: {str(e)}"
                     file_storage_info = {"base_path": None, "file_count": 0, "file_metadata": []}
             
@@ -930,29 +1128,30 @@ async def analyze_and_store_repo(repo_url: str, user_id: str, window_days: int =
             if file_storage_info and file_storage_info.get("file_count", 0) > 0:
                 try:
                     from core.analyzers.simple_file_analyzer import analyze_repository_files
-                    print(f"DEBUG: Starting file analysis for {file_storage_info['file_count']} files")
+                    logger.debug("Starting file analysis for %d files", file_storage_info["file_count"])
                     file_analysis_data = await analyze_repository_files(file_storage_info.get("file_metadata", []))
-                    print(f"DEBUG: File analysis complete")
                 except Exception as e:
-                    print(f"DEBUG: File analysis failed: {e}")
+                    logger.warning("File analysis failed for %s/%s: %s", owner, repo, e)
             
-            # Update the repository record with file storage info
-            if file_storage_info:
-                update_data = {
-                    "file_storage_base_path": file_storage_info.get("base_path"),
-                    "file_count": file_storage_info.get("file_count", 0),
-                    "files_ready_for_embedding": file_storage_info.get("file_count", 0) > 0,
-                    "file_metadata": file_storage_info.get("file_metadata", [])
-                }
-                
-                # Add file analysis data if available
-                if file_analysis_data:
-                    update_data.update({
-                        "file_analysis": file_analysis_data.get("file_analyses", []),
-                        "score_issues": file_analysis_data.get("score_issues", {})
-                    })
-                
-                supabase.table("repos").update(update_data).eq("id", repo_id).execute()
+            # Per-file LLM review writes ai_percentage / originality / llm_quality into file_metadata
+            if review_files and file_storage_info and file_storage_info.get("file_count", 0) > 0:
+                from core.services.file_review import get_review_provider, review_stored_files
+                provider = get_review_provider()
+                if provider:
+                    try:
+                        review_run = await review_stored_files(file_storage_info.get("file_metadata", []), provider)
+                        analysis_result["file_review"] = review_run["stats"]
+                    except Exception as e:
+                        logger.warning("File review failed for %s/%s: %s", owner, repo, e)
+            
+            # Write the repository row and its per-file arrays once
+            db_write = await asyncio.to_thread(
+                save_repo_to_database, owner, repo, repo_data, analysis_result, file_storage_info,
+                user_id, window_days, max_commits, repo_id, file_analysis_data
+            )
+            logger.info("Stored analysis of %s/%s in %d requests, %d bytes", owner, repo,
+                        db_write["requests"], db_write["bytes_written"])
+            analysis_result["db_write"] = db_write
             
             analysis_result["repo_id"] = repo_id
             analysis_result["stored_in_db"] = True
@@ -4,6 +4,9 @@ from typing import List, Dict, Any, Optional
 import httpx
 import asyncio
 
+from core.services import tracing
+
+@tracing.traced("simple_file_analyzer.analyze_file")
 async def analyze_file_content(file_url: str, file_path: str, file_type: str = "python") -> Dict[str, Any]:
     """Simple file analyzer that fetches and analyzes file content."""
     try:
@@ -81,6 +84,7 @@ async def analyze_file_content(file_url: str, file_path: str, file_type: str = "
             'metrics': {'lines_of_code': 0, 'cyclomatic_complexity': 0}
         }
 
+@tracing.traced("simple_file_analyzer.analyze_repository_files")
 async def analyze_repository_files(file_metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze all files in repository."""
     results = []
@@ -4,6 +4,7 @@ Since files are stored in Supabase Storage, we need to download them first.
 """
 
 from core.analyzers.code_issue_analyzer import CodeIssueAnalyzer
+from core.services import tracing
 from core.services.supabase import supabase
 from typing import Dict, List, Any
 import logging
@@ -11,6 +12,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@tracing.traced("code_issues.analyze_repository_files")
 async def analyze_repository_files_from_supabase(file_metadata: List[Dict[str, Any]], base_path: str) -> Dict[str, Any]:
     """
     Analyze repository files stored in Supabase Storage.
@@ -48,18 +50,18 @@ async def analyze_repository_files_from_supabase(file_metadata: List[Dict[str, A
             file_data = supabase.storage.from_("repo-files").download(storage_path)
             
             if file_data:
-                # Convert bytes to string for analysis
-                try:
-                    content = file_data.decode('utf-8')
-                except UnicodeDecodeError:
-                    # Skip binary files
-                    logger.warning(f"Skipping binary file: {file_path}")
-                    continue
+                if not file_data.isascii():
+                    try:
+                        file_data.decode('utf-8')
+                    except UnicodeDecodeError:
+                        # Skip binary files
+                        logger.warning(f"Skipping binary file: {file_path}")
+                        continue
                 
-                # Analyze the file
+                # Analyze the file, read like a snapshot pack (see BlobStore.pack_path)
                 try:
                     file_type = analyzer._detect_file_type(file_path)
-                    issues = analyzer.analyze_file(file_path, content, file_type)
+                    issues = analyzer.analyze_file_bytes(file_path, file_data, file_type)
                     logger.info(f"Analyzed {file_path}: Found {len(issues)} issues")
                     all_issues.extend(issues)
                 except Exception as e:
@@ -0,0 +1,267 @@
+"""
+Content-addressed file storage shared across analyses.
+
+File contents are stored once under ``blobs/{sha[:2]}/{sha}``, keyed by the git
+blob SHA the Contents and Trees APIs (and ``git ls-tree``) already return. Each
+analysis records a snapshot manifest mapping paths to blob SHAs. The snapshot id
+is the analysis base path ``repos/{user}/{repo_id}/{ref}_{timestamp}``. Blobs carry a
+reference count (one per snapshot that contains them), and garbage collection
+removes old snapshots and then the blobs no snapshot references any more.
+
+Reference counts only change inside the database, through the functions below,
+so concurrent analyses and collections never overwrite each other's counts.
+An analysis takes its references (``acquire``) before it decides to reuse or
+upload a blob, and gives back the ones it did not use. Collection first claims
+unreferenced rows (``ref_count = -1``), then removes their objects and only then
+deletes the rows: a claimed blob cannot be acquired, and a row inserted after
+the delete belongs to an upload that started after the object was removed.
+
+Tables:
+
+    blobs           (sha text primary key, storage_path text, size_bytes bigint,
+                     content_type text, ref_count int not null default 0,
+                     stored boolean not null default true, created_at timestamptz)
+    repo_snapshots  (id text primary key, repo_id uuid, user_id uuid, ref text,
+                     file_count int, manifest jsonb, created_at timestamptz)
+
+Functions (called through ``rpc``; LocalClient implements the same ones):
+
+    acquire_blobs(shas text[]) returns table (sha text, stored boolean)
+        insert into blobs (sha, storage_path, ref_count, stored)
+        select s, 'blobs/' || left(s, 2) || '/' || s, 1, false from unnest(shas) s
+        on conflict (sha) do update set ref_count = blobs.ref_count + 1 where blobs.ref_count >= 0
+        returning blobs.sha, blobs.stored
+
+    adjust_blob_refs(shas text[], delta int) returns table (sha text)
+        update blobs set ref_count = greatest(0, ref_count + delta)
+        where sha = any(shas) and ref_count >= 0 returning blobs.sha
+
+    claim_unreferenced_blobs(shas text[]) returns table (sha text)
+        update blobs set ref_count = -1 where sha = any(shas) and ref_count = 0 returning blobs.sha
+"""
+
+import hashlib
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.services import tracing
+from core.services.pack_store import PACK_SUFFIX, pack_paths, write_pack
+from core.services.supabase import supabase
+from core.services.upload_pipeline import local_public_url, public_url_prefix
+
+logger = logging.getLogger(__name__)
+
+BUCKET = "repo-files"
+BLOBS_TABLE = "blobs"
+SNAPSHOTS_TABLE = "repo_snapshots"
+
+# Rows per .in_() query; keeps the request URL well under PostgREST limits
+QUERY_BATCH = 200
+
+# Snapshots kept per repository by garbage collection
+SNAPSHOTS_TO_KEEP = int(os.getenv("SNAPSHOTS_TO_KEEP", "3"))
+
+
+def blob_storage_path(sha: str) -> str:
+    return f"blobs/{sha[:2]}/{sha}"
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA git assigns to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _batches(items: List[str], size: int = QUERY_BATCH) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BlobStore:
+    """Blob storage plus the blobs / repo_snapshots tables."""
+
+    def __init__(self, client=None, bucket: str = BUCKET):
+        self.client = client or supabase
+        self.bucket = bucket
+        self._url_prefix: Optional[str] = None
+
+    def storage(self):
+        """The storage bucket, for handing to an UploadPipeline."""
+        return self.client.storage.from_(self.bucket)
+
+    @tracing.traced("blob_store.acquire")
+    def acquire(self, shas: Iterable[str]) -> Dict[str, bool]:
+        """
+        Take one reference on each blob, creating rows for unknown SHAs.
+
+        Returns ``{sha: stored}`` for the blobs now referenced; only stored
+        blobs may be used without uploading them. SHAs being garbage-collected
+        are left out and can be acquired again once collection has finished.
+        """
+        acquired: Dict[str, bool] = {}
+        for batch in _batches(sorted(set(shas))):
+            rows = self.client.rpc("acquire_blobs", {"shas": batch}).execute().data or []
+            acquired.update((row["sha"], row.get("stored") is not False) for row in rows)
+        return acquired
+
+    def put(self, sha: str, content: bytes, content_type: str) -> str:
+        """Upload a blob and register it, holding one reference on it. Returns its storage path."""
+        path = blob_storage_path(sha)
+        if sha not in self.acquire([sha]):
+            raise RuntimeError(f"Blob {sha} is being garbage-collected")
+        try:
+            result = self.storage().upload(
+                path=path,
+                file=content,
+                file_options={"content-type": content_type}
+            )
+            if isinstance(result, dict) and result.get("error"):
+                raise RuntimeError(result["error"])
+        except Exception as e:
+            # Another analysis uploaded the same content first
+            if "already exists" not in str(e) and "Duplicate" not in str(e):
+                self.release([sha])
+                raise
+        self.register([self.blob_row(sha, len(content), content_type)])
+        return path
+
+    @staticmethod
+    def blob_row(sha: str, size: int, content_type: str) -> Dict[str, Any]:
+        return {
+            "sha": sha,
+            "storage_path": blob_storage_path(sha),
+            "size_bytes": size,
+            "content_type": content_type,
+            "stored": True,
+        }
+
+    @tracing.traced("blob_store.register")
+    def register(self, rows: List[Dict[str, Any]]) -> None:
+        """Mark acquired blobs as uploaded (see ``blob_row``) with batched upserts; reference counts are kept."""
+        for i in range(0, len(rows), QUERY_BATCH):
+            self.client.table(BLOBS_TABLE).upsert(rows[i:i + QUERY_BATCH], on_conflict="sha").execute()
+
+    def public_url(self, sha: str) -> str:
+        # Built locally from the bucket's URL prefix instead of one client call per file
+        if self._url_prefix is None:
+            self._url_prefix = public_url_prefix(self.storage())
+        return local_public_url(self._url_prefix, blob_storage_path(sha))
+
+    @tracing.traced("blob_store.release")
+    def release(self, shas: Iterable[str]) -> int:
+        """
+        Drop one reference per occurrence of each SHA, then delete the blobs
+        no longer referenced. Returns the number of blobs deleted.
+        """
+        by_count: Dict[int, List[str]] = {}
+        for sha, count in Counter(shas).items():
+            by_count.setdefault(count, []).append(sha)
+        for count, count_shas in by_count.items():
+            for batch in _batches(sorted(count_shas)):
+                self.client.rpc("adjust_blob_refs", {"shas": batch, "delta": -count}).execute()
+
+        unique = sorted(sha for count_shas in by_count.values() for sha in count_shas)
+        deleted = 0
+        for batch in _batches(unique):
+            claimed = [row["sha"] for row in
+                       self.client.rpc("claim_unreferenced_blobs", {"shas": batch}).execute().data or []]
+            if not claimed:
+                continue
+            # Objects go before rows, so a new row always means a new upload
+            self.storage().remove([blob_storage_path(sha) for sha in claimed])
+            self.client.table(BLOBS_TABLE).delete().in_("sha", claimed).eq("ref_count", -1).execute()
+            deleted += len(claimed)
+        return deleted
+
+    @tracing.traced("blob_store.record_snapshot")
+    def record_snapshot(self, snapshot_id: str, repo_id: str, user_id: str, ref: str,
+                        manifest: Dict[str, str]) -> None:
+        """
+        Store the path -> blob SHA manifest of one analysis; the caller holds a
+        reference on each blob. On the local backend the files are also packed
+        (see pack_path).
+        """
+        self.client.table(SNAPSHOTS_TABLE).insert({
+            "id": snapshot_id,
+            "repo_id": str(repo_id),
+            "user_id": str(user_id),
+            "ref": ref,
+            "file_count": len(manifest),
+            "manifest": manifest,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+        }).execute()
+        self._write_pack(snapshot_id, manifest)
+
+    def pack_path(self, snapshot_id: str) -> Optional[str]:
+        """
+        The local backend's pack of a snapshot's text files (core.services.pack_store),
+        which the issues analysis reads in place of one blob per file. None on Supabase.
+        """
+        packs_dir = getattr(self.client, "packs_dir", None)
+        if not packs_dir:
+            return None
+        path = os.path.normpath(os.path.join(packs_dir, snapshot_id + PACK_SUFFIX))
+        return path if path.startswith(os.path.normpath(packs_dir) + os.sep) else None
+
+    def _write_pack(self, snapshot_id: str, manifest: Dict[str, str]) -> None:
+        pack_path = self.pack_path(snapshot_id)
+        if pack_path is None:
+            return
+        storage = self.storage()
+
+        def text_files():
+            for path, sha in sorted(manifest.items()):
+                content = storage.download(blob_storage_path(sha))
+                if not content.isascii():
+                    try:
+                        content.decode("utf-8")
+                    except UnicodeDecodeError:
+                        # Left out like the issues analysis of stored files leaves out binary files
+                        continue
+                yield path, content
+
+        try:
+            os.makedirs(os.path.dirname(pack_path), exist_ok=True)
+            write_pack(pack_path, text_files())
+        except Exception as e:
+            # Without a pack the issues analysis reads the blobs
+            logger.warning("Could not pack snapshot %s: %s", snapshot_id, e)
+
+    def _remove_pack(self, snapshot_id: str) -> None:
+        pack_path = self.pack_path(snapshot_id)
+        if pack_path is None:
+            return
+        for path in pack_paths(pack_path):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    @tracing.traced("blob_store.collect_garbage")
+    def collect_garbage(self, repo_id: str, keep: int = SNAPSHOTS_TO_KEEP) -> Dict[str, int]:
+        """
+        Drop all but the newest ``keep`` snapshots of a repository, then delete
+        blobs whose reference count reached zero.
+        """
+        keep = max(1, keep)
+        snapshots = (
+            self.client.table(SNAPSHOTS_TABLE).select("id,manifest")
+            .eq("repo_id", str(repo_id)).order("created_at", desc=True).execute().data or []
+        )
+        expired = snapshots[keep:]
+        removed = 0
+        released: List[str] = []
+        for snapshot in expired:
+            # Only the collection that deleted the snapshot releases its references
+            if not self.client.table(SNAPSHOTS_TABLE).delete().eq("id", snapshot["id"]).execute().data:
+                continue
+            removed += 1
+            self._remove_pack(snapshot["id"])
+            released.extend(set((snapshot.get("manifest") or {}).values()))
+        deleted = self.release(released)
+
+        if removed:
+            logger.info("Blob GC for repo %s: removed %d snapshots and %d blobs", repo_id, removed, deleted)
+        return {"snapshots_removed": removed, "blobs_removed": deleted}
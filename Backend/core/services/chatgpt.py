@@ -1,19 +1,105 @@
 import os
-import json
+import time
 import logging
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
-from dotenv import load_dotenv
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Deque, Dict, List, Any, Optional, Iterator, Tuple
+
+from core.services import metrics, tracing
+from core.services.env import load_env
+from core.services.json_stream import IncrementalJSONParser, JSONStreamError, StreamingModelValidator
+from core.services.prompt_builder import (
+    PromptBuild,
+    build_scoring_prompt,
+    count_tokens,
+    estimate_cost,
+    issue_counts_from_file_analysis
+)
+from models.schema import ScoringResult
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
-load_dotenv()
+load_env()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The OpenAI client, created (and the openai package imported) on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+@dataclass
+class LLMRequestRecord:
+    """Token, cost and latency accounting for a single LLM request."""
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    estimated_prompt_tokens: int
+    token_budget: int
+    files_included: int
+    files_total: int
+    cost_usd: float
+    latency_ms: float
+    first_token_ms: Optional[float]
+    usage_source: str  # 'api' when reported by OpenAI, 'local' when counted locally
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# Most recent LLM requests, newest last
+recent_llm_requests: Deque[LLMRequestRecord] = deque(maxlen=200)
+
+
+def record_llm_request(model: str, build: PromptBuild, completion_text: str, usage: Any,
+                       started: float, first_token_at: Optional[float]) -> LLMRequestRecord:
+    """Record tokens, cost and latency for a completed (or cancelled) request."""
+    if usage is not None:
+        prompt_tokens, completion_tokens, source = usage.prompt_tokens, usage.completion_tokens, "api"
+    else:
+        # Usage is only reported on the final chunk, which is skipped when the stream is cancelled
+        prompt_tokens, completion_tokens, source = build.prompt_tokens, count_tokens(completion_text, model), "local"
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    now = time.perf_counter()
+    record = LLMRequestRecord(
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        estimated_prompt_tokens=build.prompt_tokens,
+        token_budget=build.token_budget,
+        files_included=len(build.files_included),
+        files_total=build.files_total,
+        cost_usd=round(estimate_cost(model, prompt_tokens, completion_tokens), 6),
+        latency_ms=round((now - started) * 1000, 1),
+        first_token_ms=round((first_token_at - started) * 1000, 1) if first_token_at else None,
+        usage_source=source,
+    )
+    recent_llm_requests.append(record)
+    tracing.record_span("llm.completion", started, now, model=model, prompt_tokens=prompt_tokens,
+                        completion_tokens=completion_tokens, cost_usd=record.cost_usd,
+                        first_token_ms=record.first_token_ms or 0.0)
+    metrics.LLM_LATENCY.labels(model).observe(now - started)
+    if first_token_at:
+        metrics.LLM_FIRST_TOKEN.labels(model).observe(first_token_at - started)
+    metrics.LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    metrics.LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+    metrics.LLM_COST.labels(model).inc(record.cost_usd)
+    logger.info(
+        "LLM request: model=%s prompt_tokens=%d completion_tokens=%d cost_usd=%s latency_ms=%s files=%d/%d",
+        record.model, record.prompt_tokens, record.completion_tokens, record.cost_usd,
+        record.latency_ms, record.files_included, record.files_total
+    )
+    return record
 
 def clean_chatgpt_response(content: str) -> str:
     """
@@ -36,7 +122,7 @@ def clean_chatgpt_response(content: str) -> str:
         
         if start_idx > len(start_marker) - 1 and end_idx > start_idx:
             content = content[start_idx:end_idx].strip()
-            logger.info("Extracted JSON from markdown code block")
+            logger.debug("Extracted JSON from markdown code block")
     
     # Check for other markdown patterns
     elif content.startswith("```") and content.endswith("```"):
@@ -48,7 +134,7 @@ def clean_chatgpt_response(content: str) -> str:
         
         if start_idx > len(start_marker) - 1 and end_idx > start_idx:
             content = content[start_idx:end_idx].strip()
-            logger.info("Extracted JSON from generic markdown code block")
+            logger.debug("Extracted JSON from generic markdown code block")
     
     # Remove any remaining markdown artifacts
     content = content.replace("```json", "").replace("```", "").strip()
@@ -72,304 +158,142 @@ def clean_chatgpt_response(content: str) -> str:
     
     if json_start < json_end:
         content = '\n'.join(lines[json_start:json_end])
-        logger.info(f"Extracted JSON from lines {json_start} to {json_end}")
+        logger.debug("Extracted JSON from lines %d to %d", json_start, json_end)
     
     return content.strip()
 
-def analyze_code_quality_with_chatgpt(analysis_data: Dict[str, Any], file_metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
+SCORING_SYSTEM_PROMPT = (
+    "You are an expert code reviewer and software engineer. Analyze the provided repository data "
+    "and provide detailed scoring across multiple dimensions. Return your response as valid JSON."
+)
+
+
+def open_scoring_stream(prompt: str) -> Tuple[Any, str]:
+    """Open a streaming chat completion for the scoring prompt, trying models in order of preference."""
+    models_to_try = ["gpt-4o-mini"]
+
+    for model in models_to_try:
+        try:
+            logger.debug("Trying OpenAI API with model: %s", model)
+            stream = get_client().chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SCORING_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=2000,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            logger.debug("Successfully connected to OpenAI API with model: %s", model)
+            return stream, model
+        except Exception as e:
+            logger.warning("Failed to connect with model %s: %s", model, e)
+            if "model_not_found" in str(e) or "does not have access" in str(e):
+                continue
+            else:
+                raise e
+
+    raise Exception("No available OpenAI models found for this API key")
+
+
+def stream_code_quality_with_chatgpt(analysis_data: Dict[str, Any], file_metadata: List[Dict[str, Any]],
+                                     file_analysis: Optional[List[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
     """
-    Use ChatGPT to analyze code quality and provide scoring based on repository analysis data.
+    Stream ChatGPT scoring for a repository.
+
+    Yields a ``field`` event for every top-level field of the scoring JSON as soon as it
+    has been parsed and validated against ScoringResult, then a single ``result`` event
+    with the complete scoring. The completion is cancelled as soon as the JSON object is
+    complete or can no longer be valid; on failure the result is the default scoring.
+    Token counts, cost and latency of the request are attached to the result as ``usage``.
     """
     try:
-        logger.info("Starting ChatGPT analysis...")
-        
+        logger.debug("Starting ChatGPT analysis")
+
         # Check if API key is available
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             logger.error("OPENAI_API_KEY not found in environment variables")
             raise ValueError("OpenAI API key not configured")
-        
-        logger.info(f"OpenAI API key found: {api_key[:8]}...")
-        
-        # Prepare the analysis data for ChatGPT
-        logger.info("Preparing analysis data for ChatGPT...")
-        prompt_data = prepare_analysis_for_chatgpt(analysis_data, file_metadata)
-        logger.info(f"Prepared data keys: {list(prompt_data.keys())}")
-        
-        # Create the prompt for ChatGPT
-        logger.info("Creating scoring prompt...")
-        prompt = create_scoring_prompt(prompt_data)
-        logger.info(f"Prompt length: {len(prompt)} characters")
-        
-        # Log a sample of the prompt for debugging
-        logger.info(f"Prompt sample (first 500 chars): {prompt[:500]}...")
-        
-        # Call ChatGPT API - try different models in order of preference
-        models_to_try = ["gpt-4o-mini"]
-        response = None
-        
-        for model in models_to_try:
-            try:
-                logger.info(f"Trying OpenAI API with model: {model}")
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert code reviewer and software engineer. Analyze the provided repository data and provide detailed scoring across multiple dimensions. Return your response as valid JSON."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.3,
-                    max_tokens=2000
-                )
-                logger.info(f"Successfully connected to OpenAI API with model: {model}")
-                break
-            except Exception as e:
-                logger.warning(f"Failed to connect with model {model}: {str(e)}")
-                if "model_not_found" in str(e) or "does not have access" in str(e):
+
+        build = build_scoring_prompt(analysis_data, file_metadata, issue_counts_from_file_analysis(file_analysis))
+        logger.debug(
+            "Scoring prompt: %d tokens (budget %d), %d/%d files",
+            build.prompt_tokens, build.token_budget, len(build.files_included), build.files_total
+        )
+
+        started = time.perf_counter()
+        first_token_at = None
+        completion_parts: List[str] = []
+        usage = None
+
+        stream, model = open_scoring_stream(build.prompt)
+        parser = IncrementalJSONParser()
+        validator = StreamingModelValidator(ScoringResult)
+
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
                     continue
-                else:
-                    raise e
-        
-        if response is None:
-            raise Exception("No available OpenAI models found for this API key")
-        
-        logger.info("OpenAI API call successful")
-        logger.info(f"Response object type: {type(response)}")
-        logger.info(f"Response choices count: {len(response.choices) if hasattr(response, 'choices') else 'N/A'}")
-        
-        # Check if we have a valid response
-        if not hasattr(response, 'choices') or not response.choices:
-            logger.error("No choices in OpenAI response")
-            raise ValueError("Invalid response from OpenAI API")
-        
-        # Get the content
-        content = response.choices[0].message.content
-        logger.info(f"Response content length: {len(content)} characters")
-        logger.info(f"Response content sample (first 200 chars): {content[:200]}...")
-        
-        # Clean the response content before parsing
-        logger.info("Cleaning response content...")
-        cleaned_content = clean_chatgpt_response(content)
-        logger.info(f"Cleaned content length: {len(cleaned_content)} characters")
-        logger.info(f"Cleaned content sample (first 200 chars): {cleaned_content[:200]}...")
-        
-        # Parse the response
-        logger.info("Parsing JSON response...")
-        scoring_result = json.loads(cleaned_content)
-        logger.info("JSON parsing successful")
-        logger.info(f"Parsed result keys: {list(scoring_result.keys()) if isinstance(scoring_result, dict) else 'Not a dict'}")
-        
-        # Validate the response structure
-        required_keys = ['overall_score', 'scores', 'radar_data']
-        missing_keys = [key for key in required_keys if key not in scoring_result]
-        if missing_keys:
-            logger.warning(f"Missing required keys in response: {missing_keys}")
-        
-        logger.info("ChatGPT analysis completed successfully")
-        return scoring_result
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON parsing error: {str(e)}")
-        logger.error(f"Failed to parse cleaned content: {cleaned_content if 'cleaned_content' in locals() else 'Cleaned content not available'}")
-        logger.error(f"Original content: {content if 'content' in locals() else 'Content not available'}")
-        return get_default_scoring(analysis_data)
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                completion_parts.append(delta)
+
+                for key, value in parser.feed(delta):
+                    if validator.validate_member(key, value):
+                        yield {"event": "field", "field": key, "value": value}
+                    else:
+                        logger.warning("Dropping invalid field '%s': %s", key, validator.invalid[key])
+
+                if parser.done or parser.failed:
+                    break
+        finally:
+            # Cancel the completion; anything after the closing brace is not needed
+            stream.close()
+            record = record_llm_request(model, build, "".join(completion_parts), usage, started, first_token_at)
+
+        if parser.failed:
+            raise JSONStreamError(parser.error)
+        if not parser.done:
+            raise JSONStreamError("Response ended before the JSON object was complete")
+
+        scoring_result = validator.finalize().model_dump()
+        scoring_result["usage"] = record.to_dict()
+        logger.debug("ChatGPT analysis completed with model: %s", model)
+        yield {"event": "result", "data": scoring_result}
+
+    except JSONStreamError as e:
+        logger.error("JSON streaming error: %s", e)
+        yield {"event": "result", "data": get_default_scoring(analysis_data), "fallback": True}
     except Exception as e:
-        logger.error(f"Error in ChatGPT analysis: {str(e)}", exc_info=True)
-        logger.error(f"Error type: {type(e).__name__}")
+        logger.error("Error in ChatGPT analysis (%s): %s", type(e).__name__, e, exc_info=True)
         # Return default scoring if ChatGPT fails
-        return get_default_scoring(analysis_data)
+        yield {"event": "result", "data": get_default_scoring(analysis_data), "fallback": True}
 
-def prepare_analysis_for_chatgpt(analysis_data: Dict[str, Any], file_metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Prepare analysis data in a format suitable for ChatGPT processing."""
-    
-    logger.info("Preparing analysis data for ChatGPT...")
-    logger.info(f"Input analysis_data keys: {list(analysis_data.keys())}")
-    logger.info(f"File metadata count: {len(file_metadata)}")
-    
-    # Extract key metrics
-    languages = analysis_data.get("languages", {})
-    team_data = analysis_data.get("team", {})
-    commits_data = analysis_data.get("commits", {})
-    
-    logger.info(f"Languages data: {languages}")
-    logger.info(f"Team data keys: {list(team_data.keys())}")
-    logger.info(f"Commits data keys: {list(commits_data.keys())}")
-    
-    # Calculate some basic metrics
-    total_commits = commits_data.get("count", 0)
-    gini_contribution = team_data.get("giniContribution", 0)
-    top_contributors_share = team_data.get("topContributorsShare", 0)
-    median_compartmentalization = commits_data.get("medianCompartmentalization", 1.0)
-    
-    logger.info(f"Calculated metrics - commits: {total_commits}, gini: {gini_contribution}, top_contributors_share: {top_contributors_share}")
-    
-    # Get file information
-    file_count = len(file_metadata)
-    file_types = {}
-    for file_info in file_metadata:
-        ext = file_info.get("file_extension", "").lower()
-        if ext:
-            file_types[ext] = file_types.get(ext, 0) + 1
-    
-    logger.info(f"File count: {file_count}, file types: {file_types}")
-    
-    # Get top contributors
-    contributions = team_data.get("contributions", [])
-    top_contributors = sorted(contributions, key=lambda x: x.get("netLines", 0), reverse=True)[:5]
-    
-    logger.info(f"Contributions count: {len(contributions)}")
-    logger.info(f"Top contributors: {top_contributors}")
-    
-    prepared_data = {
-        "repository_info": {
-            "repo_name": analysis_data.get("repo", "Unknown"),
-            "total_commits": total_commits,
-            "file_count": file_count,
-            "languages": languages,
-            "file_types": file_types
-        },
-        "team_metrics": {
-            "gini_contribution": gini_contribution,
-            "top_contributors_share": top_contributors_share,
-            "top_contributors": top_contributors,
-            "total_contributors": len(contributions)
-        },
-        "code_metrics": {
-            "median_compartmentalization": median_compartmentalization,
-            "mean_compartmentalization": commits_data.get("meanCompartmentalization", 1.0)
-        },
-        "file_metadata": file_metadata[:20]  # Limit to first 20 files for context
-    }
-    
-    logger.info("Data preparation completed successfully")
-    return prepared_data
 
-def create_scoring_prompt(data: Dict[str, Any]) -> str:
-    """Create a detailed prompt for ChatGPT to analyze the repository."""
-    
-    logger.info("Creating scoring prompt...")
-    logger.info(f"Input data keys: {list(data.keys())}")
-    
-    repo_info = data["repository_info"]
-    team_metrics = data["team_metrics"]
-    code_metrics = data["code_metrics"]
-    
-    logger.info(f"Repository info: {repo_info}")
-    logger.info(f"Team metrics: {team_metrics}")
-    logger.info(f"Code metrics: {code_metrics}")
-    
-    prompt = f"""
-Analyze this GitHub repository and provide a comprehensive scoring across multiple dimensions. Here's the data:
-
-REPOSITORY: {repo_info['repo_name']}
-- Total commits: {repo_info['total_commits']}
-- File count: {repo_info['file_count']}
-- Languages: {json.dumps(repo_info['languages'], indent=2)}
-- File types: {json.dumps(repo_info['file_types'], indent=2)}
-
-TEAM METRICS:
-- Gini coefficient (contribution inequality): {team_metrics['gini_contribution']:.3f}
-- Top contributors share: {team_metrics['top_contributors_share']:.3f}
-- Total contributors: {team_metrics['total_contributors']}
-- Top contributors: {json.dumps(team_metrics['top_contributors'], indent=2)}
-
-CODE METRICS:
-- Median compartmentalization: {code_metrics['median_compartmentalization']:.3f}
-- Mean compartmentalization: {code_metrics['mean_compartmentalization']:.3f}
-
-Please provide a JSON response with the following structure:
-{{
-    "overall_score": <number 0-100>,
-    "ai_percentage": <estimated percentage of AI-generated code 0-100>,
-    "previous_score": <optional previous score for comparison>,
-    "scores": [
-        {{
-            "title": "Quality",
-            "score": <number 0-100>,
-            "color": "hsl(var(--quality))",
-            "description": "Code maintainability & complexity"
-        }},
-        {{
-            "title": "Security",
-            "score": <number 0-100>,
-            "color": "hsl(var(--security))",
-            "description": "Vulnerabilities & best practices"
-        }},
-        {{
-            "title": "Git Hygiene",
-            "score": <number 0-100>,
-            "color": "hsl(var(--git))",
-            "description": "Commit quality & PR practices"
-        }},
-        {{
-            "title": "Style",
-            "score": <number 0-100>,
-            "color": "hsl(var(--style))",
-            "description": "Consistency & conventions"
-        }},
-        {{
-            "title": "Originality",
-            "score": <number 0-100>,
-            "color": "hsl(var(--originality))",
-            "description": "Unique implementations"
-        }},
-        {{
-            "title": "Team Balance",
-            "score": <number 0-100>,
-            "color": "hsl(var(--team))",
-            "description": "Contribution distribution"
-        }}
-    ],
-    "radar_data": [
-        {{"category": "Quality", "score": <number>, "fullMark": 100}},
-        {{"category": "Security", "score": <number>, "fullMark": 100}},
-        {{"category": "Git", "score": <number>, "fullMark": 100}},
-        {{"category": "Style", "score": <number>, "fullMark": 100}},
-        {{"category": "Originality", "score": <number>, "fullMark": 100}},
-        {{"category": "Team", "score": <number>, "fullMark": 100}}
-    ],
-    "files": [
-        {{
-            "name": "<filename>",
-            "path": "<filepath>",
-            "ai_percentage": <estimated AI percentage>,
-            "quality": <quality score 0-100>,
-            "flags": ["<flag1>", "<flag2>"]
-        }}
-    ],
-    "analysis": "<detailed analysis text>",
-    "recommendations": ["<recommendation1>", "<recommendation2>", "<recommendation3>"]
-}}
-
-Scoring guidelines:
-- Quality: Based on code structure, maintainability, and complexity
-- Security: Based on potential vulnerabilities and security practices
-- Git Hygiene: Based on commit patterns, PR practices, and version control discipline
-- Style: Based on code consistency, naming conventions, and formatting
-- Originality: Based on unique implementations vs copy-paste patterns
-- Team Balance: Based on contribution distribution and collaboration patterns
-
-AI Percentage estimation:
-- Look for patterns that suggest AI-generated code (repetitive structures, generic variable names, etc.)
-- Consider the complexity and originality of implementations
-- Factor in the team's coding patterns and consistency
-
-Provide realistic scores based on the actual data provided. Be critical but fair in your assessment.
-"""
-    
-    logger.info(f"Prompt created successfully, length: {len(prompt)} characters")
-    return prompt
+def analyze_code_quality_with_chatgpt(analysis_data: Dict[str, Any], file_metadata: List[Dict[str, Any]],
+                                      file_analysis: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Use ChatGPT to analyze code quality and provide scoring based on repository analysis data.
+    """
+    scoring_result = None
+    for event in stream_code_quality_with_chatgpt(analysis_data, file_metadata, file_analysis):
+        if event["event"] == "result":
+            scoring_result = event["data"]
+    return scoring_result
 
 def get_default_scoring(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
     """Provide default scoring when ChatGPT analysis fails."""
     
     logger.warning("Using default scoring due to ChatGPT analysis failure")
-    logger.info(f"Analysis data keys for default scoring: {list(analysis_data.keys())}")
+    logger.debug("Analysis data keys for default scoring: %s", analysis_data.keys())
     
     # Calculate basic scores from available data
     languages = analysis_data.get("languages", {})
@@ -398,7 +322,8 @@ def get_default_scoring(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
     
     overall_score = int((quality_score + security_score + git_score + style_score + originality_score + team_score) / 6)
     
-    logger.info(f"Default scores calculated - Quality: {quality_score}, Security: {security_score}, Git: {git_score}, Style: {style_score}, Originality: {originality_score}, Team: {team_score}, Overall: {overall_score}")
+    logger.debug("Default scores calculated - Quality: %s, Security: %s, Git: %s, Style: %s, Originality: %s, Team: %s, Overall: %s",
+                 quality_score, security_score, git_score, style_score, originality_score, team_score, overall_score)
     
     return {
         "overall_score": overall_score,
@@ -475,8 +400,8 @@ def test_chatgpt_connection() -> bool:
         
         for model in models_to_try:
             try:
-                logger.info(f"Testing API connection with model: {model}")
-                response = client.chat.completions.create(
+                logger.debug("Testing API connection with model: %s", model)
+                response = get_client().chat.completions.create(
                     model=model,
                     messages=[
                         {
@@ -486,10 +411,10 @@ def test_chatgpt_connection() -> bool:
                     ],
                     max_tokens=10
                 )
-                logger.info(f"Successfully connected to OpenAI API with model: {model}")
+                logger.info("Successfully connected to OpenAI API with model: %s", model)
                 break
             except Exception as e:
-                logger.warning(f"Failed to connect with model {model}: {str(e)}")
+                logger.warning("Failed to connect with model %s: %s", model, e)
                 if "model_not_found" in str(e) or "does not have access" in str(e):
                     continue
                 else:
@@ -501,15 +426,15 @@ def test_chatgpt_connection() -> bool:
         
         content = response.choices[0].message.content
         cleaned_content = clean_chatgpt_response(content)
-        logger.info(f"API test response: {cleaned_content}")
+        logger.debug("API test response: %s", cleaned_content)
         
         if "successful" in cleaned_content.lower():
             logger.info("ChatGPT API connection test successful")
             return True
         else:
-            logger.warning(f"Unexpected API response: {content}")
+            logger.warning("Unexpected API response: %s", content)
             return False
             
     except Exception as e:
-        logger.error(f"ChatGPT API connection test failed: {str(e)}", exc_info=True)
+        logger.error("ChatGPT API connection test failed: %s", e, exc_info=True)
         return False
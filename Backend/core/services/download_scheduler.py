@@ -0,0 +1,244 @@
+"""
+Scheduling of file downloads during ingestion.
+
+Files are fetched in priority order instead of crawl order: source code first,
+then documentation and configuration, then everything else, smallest first
+within each class, so a single large asset no longer holds back the small files
+listed next to it. A fixed pool of fetchers pulls from that order, and a byte
+budget caps the content held between download and upload rather than the number
+of files. Files above ``STREAM_THRESHOLD`` are spooled to a temporary file in
+chunks and uploaded from disk, so they never sit in memory whole.
+"""
+
+import asyncio
+import collections
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from core.analyzers.file_classifier import SAMPLE_BYTES
+from core.services.blob_store import git_blob_sha
+
+logger = logging.getLogger(__name__)
+
+# Files fetched at a time
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))
+# Bytes downloaded but not yet uploaded, across all files in flight
+DOWNLOAD_BUDGET_BYTES = int(os.getenv("DOWNLOAD_BUDGET_BYTES", str(64 * 1024 * 1024)))
+# Files larger than this are spooled to disk and uploaded from there
+STREAM_THRESHOLD = int(os.getenv("DOWNLOAD_STREAM_THRESHOLD", str(1024 * 1024)))
+CHUNK_SIZE = 256 * 1024
+# Files larger than this are fetched after every smaller file, whatever their type
+LARGE_FILE_BYTES = 10 * 1024 * 1024
+
+SOURCE_EXTENSIONS = {
+    '.py', '.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx', '.java', '.c', '.cpp', '.cc', '.h', '.hpp',
+    '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala', '.dart', '.vue', '.svelte',
+    '.sql', '.sh', '.bash', '.zsh', '.html', '.css', '.scss', '.sass', '.less',
+}
+DOC_CONFIG_EXTENSIONS = {
+    '.md', '.rst', '.txt', '.json', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.xml', '.dockerfile',
+}
+DOC_CONFIG_FILES = {'Dockerfile', 'Makefile', 'requirements.txt', 'package.json', 'pyproject.toml', 'setup.py'}
+
+# Priority classes, in fetch order
+PRIORITY_SOURCE = 0
+PRIORITY_DOC_CONFIG = 1
+PRIORITY_OTHER = 2
+PRIORITY_LARGE = 3
+
+T = TypeVar("T")
+
+
+def file_priority(path: str, size: Optional[int]) -> Tuple[int, int]:
+    """Sort key for a file: its priority class, then its size."""
+    size = size or 0
+    if size > LARGE_FILE_BYTES:
+        return PRIORITY_LARGE, size
+    name = os.path.basename(path)
+    extension = os.path.splitext(name)[1].lower()
+    if extension in SOURCE_EXTENSIONS:
+        return PRIORITY_SOURCE, size
+    if extension in DOC_CONFIG_EXTENSIONS or name in DOC_CONFIG_FILES:
+        return PRIORITY_DOC_CONFIG, size
+    return PRIORITY_OTHER, size
+
+
+def blob_priority(infos: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Sort key for a blob: that of the best-placed path sharing it."""
+    return min(file_priority(info["path"], info.get("size")) for info in infos)
+
+
+def order_blobs(blobs: Dict[str, List[Dict[str, Any]]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Blobs (SHA -> file entries sharing it) in fetch order."""
+    return sorted(blobs.items(), key=lambda item: blob_priority(item[1]))
+
+
+class ByteBudget:
+    """
+    A semaphore counted in bytes. ``acquire(n)`` waits until ``n`` bytes are free;
+    requests larger than the whole budget are clamped to it, so they wait for
+    everything else to drain and then run alone. Waiters are served in FIFO order
+    so a large request is not starved by a stream of small ones.
+    """
+
+    def __init__(self, limit: int = DOWNLOAD_BUDGET_BYTES):
+        self.limit = max(1, limit)
+        self.available = self.limit
+        self.peak = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = collections.deque()
+
+    def clamp(self, size: int) -> int:
+        return min(max(size, 1), self.limit)
+
+    async def acquire(self, size: int) -> int:
+        """Reserve ``size`` bytes; returns the amount to pass back to ``release``."""
+        size = self.clamp(size)
+        if not self._waiters and size <= self.available:
+            self._take(size)
+            return size
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((size, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(size)
+            else:
+                self._waiters.remove((size, future))
+            raise
+        return size
+
+    def release(self, size: int) -> None:
+        self.available += size
+        while self._waiters and self._waiters[0][0] <= self.available:
+            size, future = self._waiters.popleft()
+            if not future.done():
+                self._take(size)
+                future.set_result(None)
+
+    def _take(self, size: int) -> None:
+        self.available -= size
+        self.peak = max(self.peak, self.limit - self.available)
+
+
+class SpooledContent:
+    """
+    Content of one downloaded file: bytes in memory up to ``threshold``, a temporary
+    file beyond it. ``head`` keeps the first ``SAMPLE_BYTES`` for content sniffing.
+    """
+
+    def __init__(self, threshold: int = STREAM_THRESHOLD):
+        self.threshold = threshold
+        self.size = 0
+        self.head = b""
+        self._buffer: List[bytes] = []
+        self._file = None
+        self.path: Optional[Path] = None
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if len(self.head) < SAMPLE_BYTES:
+            self.head += chunk[:SAMPLE_BYTES - len(self.head)]
+        self.size += len(chunk)
+        if self._file is None and self.size > self.threshold:
+            fd, name = tempfile.mkstemp(prefix="vibecheck-download-")
+            self._file = os.fdopen(fd, "wb")
+            self.path = Path(name)
+            self._file.writelines(self._buffer)
+            self._buffer = []
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.append(chunk)
+
+    def finish(self) -> "SpooledContent":
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif len(self._buffer) > 1:
+            self._buffer = [b"".join(self._buffer)]
+        return self
+
+    @property
+    def data(self) -> Union[bytes, Path]:
+        """What to upload: the bytes, or the path of the spooled file."""
+        if self.path is not None:
+            return self.path
+        return self._buffer[0] if self._buffer else b""
+
+    def git_sha(self) -> str:
+        if self.path is None:
+            return git_blob_sha(self.data)
+        digest = hashlib.sha1(b"blob %d\0" % self.size)
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            self.path = None
+        self._buffer = []
+
+
+async def spool(chunks: AsyncIterator[bytes], threshold: int = STREAM_THRESHOLD) -> SpooledContent:
+    """Collect an async stream of chunks, spilling to disk past ``threshold``."""
+    content = SpooledContent(threshold)
+    try:
+        async for chunk in chunks:
+            content.write(chunk)
+    except BaseException:
+        content.close()
+        raise
+    return content.finish()
+
+
+async def run_ordered(items: Iterable[T], worker: Callable[[T], Awaitable[None]], concurrency: int) -> None:
+    """Run ``worker`` over ``items`` with ``concurrency`` tasks, starting items in order."""
+    iterator = iter(items)
+
+    async def fetcher() -> None:
+        for item in iterator:
+            await worker(item)
+
+    await asyncio.gather(*[fetcher() for _ in range(max(1, concurrency))])
+
+
+class ScheduleStats:
+    """Time to the first stored source file, time until every source file is resolved, and the budget's peak."""
+
+    def __init__(self, budget: ByteBudget, source_files: int):
+        self.budget = budget
+        self._started = time.perf_counter()
+        self.first_source_s: Optional[float] = None
+        self.all_source_s: Optional[float] = 0.0 if not source_files else None
+        self._source_pending = source_files
+
+    def source_done(self, stored: bool) -> None:
+        """Record a source blob as stored, or as skipped or failed."""
+        elapsed = round(time.perf_counter() - self._started, 3)
+        if stored and self.first_source_s is None:
+            self.first_source_s = elapsed
+        self._source_pending -= 1
+        if self._source_pending == 0:
+            self.all_source_s = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget_bytes": self.budget.limit,
+            "peak_inflight_bytes": self.budget.peak,
+            "first_source_file_s": self.first_source_s,
+            "all_source_files_s": self.all_source_s,
+        }
@@ -0,0 +1,23 @@
+"""
+Loads the .env files once per process.
+
+Backend/.env is read first, then the project root's .env; variables already
+set in the environment are never overridden.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
+
+_loaded = False
+
+
+def load_env() -> None:
+    global _loaded
+    if not _loaded:
+        load_dotenv(os.path.join(BACKEND_DIR, ".env"))
+        load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
+        _loaded = True
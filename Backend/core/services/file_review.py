@@ -0,0 +1,371 @@
+"""
+Batched per-file LLM review.
+
+Packs several small files into one request up to a token limit, runs the
+batches under a concurrency cap, caches results by content hash and writes
+the per-file originality / quality fields back into file metadata.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from core.services import metrics, tracing
+from core.services.prompt_builder import PromptBuild, count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Extensions worth sending to the reviewer
+REVIEWABLE_EXTENSIONS = {
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.go', '.rs', '.rb', '.php', '.cs',
+    '.c', '.cpp', '.h', '.hpp', '.kt', '.scala', '.swift', '.dart', '.sh', '.sql'
+}
+
+REVIEW_SYSTEM_PROMPT = (
+    "You are an expert code reviewer. For every file you are given, estimate how much of it is "
+    "AI-generated and score its originality and quality. Return valid JSON only."
+)
+
+REVIEW_INSTRUCTIONS = (
+    'Return JSON of the form {"files": [{"path": "<path>", "ai_percentage": <0-100>, '
+    '"originality": <0-100>, "quality": <0-100>, "flags": ["<short flag>"]}]} '
+    "with exactly one entry per file below."
+)
+
+
+class FileReviewResult(BaseModel):
+    path: str
+    ai_percentage: float = Field(..., ge=0, le=100)
+    originality: float = Field(..., ge=0, le=100)
+    quality: float = Field(..., ge=0, le=100)
+    flags: List[str] = Field(default_factory=list)
+
+
+@dataclass
+class FileReviewInput:
+    """A file queued for review."""
+    path: str
+    content: str
+    content_hash: str
+    tokens: int
+
+    @classmethod
+    def from_content(cls, path: str, content: str, max_tokens: Optional[int] = None) -> "FileReviewInput":
+        content_hash = hashlib.sha256(content.encode("utf-8", errors="ignore")).hexdigest()
+        tokens = count_tokens(content)
+        if max_tokens and tokens > max_tokens:
+            # Keep the head of oversized files; the reviewer only needs a representative sample
+            content = content[:max(1, len(content) * max_tokens // tokens)]
+            tokens = count_tokens(content)
+        return cls(path=path, content=content, content_hash=content_hash, tokens=tokens)
+
+
+@dataclass
+class FileReview:
+    """Review outcome for a single file."""
+    path: str
+    content_hash: str
+    ai_percentage: float
+    originality: float
+    quality: float
+    flags: List[str] = field(default_factory=list)
+    cached: bool = False
+
+
+class ReviewCache:
+    """In-memory LRU cache of review results keyed by content hash."""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(content_hash)
+        if entry is None:
+            self.misses += 1
+            metrics.record_cache("file_review", hit=False)
+            return None
+        self._entries.move_to_end(content_hash)
+        self.hits += 1
+        metrics.record_cache("file_review", hit=True)
+        return entry
+
+    def peek(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry without affecting hit statistics."""
+        return self._entries.get(content_hash)
+
+    def set(self, content_hash: str, review: Dict[str, Any]) -> None:
+        self._entries[content_hash] = review
+        self._entries.move_to_end(content_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared cache for the process
+review_cache = ReviewCache()
+
+
+class ReviewProvider(ABC):
+    """Base class for per-file review backends."""
+
+    name = "base"
+
+    @abstractmethod
+    async def review_batch(self, files: List[FileReviewInput]) -> List[Dict[str, Any]]:
+        """Raw review entries (see REVIEW_INSTRUCTIONS) for one batch of files."""
+
+
+class OpenAIReviewProvider(ReviewProvider):
+    """Reviews a batch of files with a single chat completion."""
+
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self.model = model
+
+    async def review_batch(self, files: List[FileReviewInput]) -> List[Dict[str, Any]]:
+        prompt = build_review_prompt(files)
+        return await asyncio.to_thread(self._complete, prompt, files)
+
+    def _complete(self, prompt: str, files: List[FileReviewInput]) -> List[Dict[str, Any]]:
+        from core.services.chatgpt import get_client, record_llm_request
+
+        started = time.perf_counter()
+        response = get_client().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": REVIEW_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.2,
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content or ""
+        build = PromptBuild(
+            prompt=prompt,
+            prompt_tokens=count_tokens(prompt),
+            token_budget=0,
+            files_total=len(files),
+            files_included=[f.path for f in files],
+        )
+        record_llm_request(self.model, build, content, getattr(response, "usage", None), started, None)
+        return json.loads(content).get("files", [])
+
+
+class StubReviewProvider(ReviewProvider):
+    """
+    Offline provider for tests and benchmarks.
+
+    Scores are derived from the content hash so they are stable across runs;
+    ``latency`` simulates the round trip of a real request.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batch_tokens: List[int] = []
+
+    async def review_batch(self, files: List[FileReviewInput]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.batch_tokens.append(sum(f.tokens for f in files))
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            results = []
+            for f in files:
+                seed = int(f.content_hash[:8], 16)
+                results.append({
+                    "path": f.path,
+                    "ai_percentage": seed % 101,
+                    "originality": (seed >> 8) % 101,
+                    "quality": (seed >> 16) % 101,
+                    "flags": ["stub"],
+                })
+            return results
+        finally:
+            self.in_flight -= 1
+
+
+def get_review_provider() -> Optional[ReviewProvider]:
+    """Select the review provider from FILE_REVIEW_PROVIDER ('openai' or 'stub')."""
+    name = os.getenv("FILE_REVIEW_PROVIDER", "openai" if os.getenv("OPENAI_API_KEY") else "").lower()
+    if name == "stub":
+        return StubReviewProvider()
+    if name == "openai":
+        return OpenAIReviewProvider()
+    return None
+
+
+def build_review_prompt(files: List[FileReviewInput]) -> str:
+    """Build the user prompt for one batch of files."""
+    parts = [REVIEW_INSTRUCTIONS]
+    for f in files:
+        parts.append(f"=== FILE: {f.path} ===\n{f.content}")
+    return "\n\n".join(parts)
+
+
+def pack_batches(files: List[FileReviewInput], max_batch_tokens: int = 6000,
+                 max_files_per_batch: int = 20) -> List[List[FileReviewInput]]:
+    """
+    Pack files into batches of at most max_batch_tokens using first-fit decreasing.
+
+    Files larger than the limit are sent on their own.
+    """
+    overhead = count_tokens(REVIEW_INSTRUCTIONS)
+    batches: List[List[FileReviewInput]] = []
+    loads: List[int] = []
+    for f in sorted(files, key=lambda f: f.tokens, reverse=True):
+        # Path header and separators per file
+        cost = f.tokens + 8
+        for i, load in enumerate(loads):
+            if load + cost <= max_batch_tokens and len(batches[i]) < max_files_per_batch:
+                batches[i].append(f)
+                loads[i] += cost
+                break
+        else:
+            batches.append([f])
+            loads.append(overhead + cost)
+    return batches
+
+
+async def review_files(files: List[FileReviewInput], provider: ReviewProvider,
+                       max_batch_tokens: int = 6000, concurrency: int = 4,
+                       cache: Optional[ReviewCache] = None) -> Dict[str, Any]:
+    """
+    Review files in token-limited batches under a concurrency cap.
+
+    Returns ``{"reviews": {path: FileReview}, "stats": {...}}``. Files whose content
+    hash is already cached are not sent to the provider.
+    """
+    cache = review_cache if cache is None else cache
+    started = time.perf_counter()
+    reviews: Dict[str, FileReview] = {}
+    pending: List[FileReviewInput] = []
+
+    for f in files:
+        cached = cache.get(f.content_hash)
+        if cached is not None:
+            reviews[f.path] = FileReview(path=f.path, content_hash=f.content_hash, cached=True, **cached)
+        else:
+            pending.append(f)
+
+    # Identical content at several paths is reviewed once and the result copied
+    unique = {f.content_hash: f for f in pending}
+    batches = pack_batches(list(unique.values()), max_batch_tokens)
+    semaphore = asyncio.Semaphore(concurrency)
+    failed_batches = 0
+
+    async def run_batch(batch: List[FileReviewInput]) -> None:
+        nonlocal failed_batches
+        async with semaphore:
+            try:
+                results = await provider.review_batch(batch)
+            except Exception as e:
+                failed_batches += 1
+                logger.warning("File review batch of %d files failed: %s", len(batch), e)
+                return
+        by_path = {f.path: f for f in batch}
+        for raw in results or []:
+            try:
+                result = FileReviewResult.model_validate(raw)
+            except ValidationError as e:
+                logger.warning("Dropping invalid file review: %s", e.errors()[0].get('msg'))
+                continue
+            f = by_path.get(result.path)
+            if f is None:
+                continue
+            review = result.model_dump(exclude={"path"})
+            cache.set(f.content_hash, review)
+
+    await asyncio.gather(*[run_batch(batch) for batch in batches])
+
+    for f in pending:
+        cached = cache.peek(f.content_hash)
+        if cached is not None:
+            reviews[f.path] = FileReview(path=f.path, content_hash=f.content_hash, **cached)
+
+    elapsed = time.perf_counter() - started
+    reviewed_tokens = sum(f.tokens for f in unique.values())
+    stats = {
+        "provider": provider.name,
+        "files": len(files),
+        "reviewed": len(reviews),
+        "cache_hits": sum(1 for r in reviews.values() if r.cached),
+        "batches": len(batches),
+        "failed_batches": failed_batches,
+        "tokens": reviewed_tokens,
+        "elapsed_s": round(elapsed, 3),
+        "files_per_s": round(len(files) / elapsed, 1) if elapsed > 0 else None,
+    }
+    return {"reviews": reviews, "stats": stats}
+
+
+def apply_reviews_to_metadata(file_metadata: List[Dict[str, Any]], reviews: Dict[str, FileReview]) -> int:
+    """Write review fields back onto file metadata entries. Returns the number updated."""
+    updated = 0
+    for file_info in file_metadata:
+        path = file_info.get("relative_path") or file_info.get("path")
+        review = reviews.get(path)
+        if review is None:
+            continue
+        file_info.update({
+            "content_hash": review.content_hash,
+            "ai_percentage": review.ai_percentage,
+            "originality": review.originality,
+            "llm_quality": review.quality,
+            "review_flags": review.flags,
+        })
+        updated += 1
+    return updated
+
+
+@tracing.traced("file_review.review_stored_files")
+async def review_stored_files(file_metadata: List[Dict[str, Any]], provider: ReviewProvider,
+                              max_files: int = 200, max_file_bytes: int = 100 * 1024,
+                              max_file_tokens: int = 4000, **kwargs) -> Dict[str, Any]:
+    """Download reviewable files from storage, review them and write the results back."""
+    from core.services.supabase import supabase
+
+    candidates = [
+        f for f in file_metadata
+        if f.get("storage_path")
+        and (f.get("file_extension") or "").lower() in REVIEWABLE_EXTENSIONS
+        and 0 < (f.get("size_bytes") or 0) <= max_file_bytes
+    ][:max_files]
+
+    download_semaphore = asyncio.Semaphore(8)
+
+    async def load(file_info: Dict[str, Any]) -> Optional[FileReviewInput]:
+        async with download_semaphore:
+            try:
+                data = await asyncio.to_thread(supabase.storage.from_("repo-files").download, file_info["storage_path"])
+            except Exception as e:
+                logger.warning("Could not download %s for review: %s", file_info['storage_path'], e)
+                return None
+        path = file_info.get("relative_path") or file_info.get("path")
+        return FileReviewInput.from_content(path, data.decode("utf-8", errors="ignore"), max_file_tokens)
+
+    inputs = [f for f in await asyncio.gather(*[load(f) for f in candidates]) if f is not None]
+    run = await review_files(inputs, provider, **kwargs)
+    run["stats"]["updated"] = apply_reviews_to_metadata(file_metadata, run["reviews"])
+    return run
@@ -0,0 +1,175 @@
+"""
+Incremental JSON extraction and validation for streamed LLM responses.
+
+The parser consumes response text chunk by chunk, skips any preamble such as
+markdown fences or prose, and emits each top-level member of the first JSON
+object as soon as it is complete. The validator checks every member against a
+Pydantic model field so callers can surface partial results early and stop the
+stream once the object is complete or has clearly failed.
+"""
+
+import json
+import re
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+# Characters that can change parser state outside / inside a string literal
+_STRUCTURAL = re.compile(r'[{}\[\]",]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class JSONStreamError(ValueError):
+    """Raised when a streamed response can no longer produce a valid object."""
+    pass
+
+
+class IncrementalJSONParser:
+    """Streaming parser that yields top-level members of a JSON object."""
+
+    def __init__(self, max_preamble: int = 2000):
+        self.max_preamble = max_preamble
+        self.done = False
+        self.error: Optional[str] = None
+        self.result: Dict[str, Any] = {}
+
+        self._preamble = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member: List[str] = []
+        self._members = 0
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return any newly completed members."""
+        completed: List[Tuple[str, Any]] = []
+        if self.done or self.failed or not chunk:
+            return completed
+
+        pos = 0
+        if not self._started:
+            start = chunk.find('{')
+            if start == -1:
+                self._preamble += len(chunk)
+                if self._preamble > self.max_preamble:
+                    self.error = "No JSON object found in response"
+                return completed
+            self._started = True
+            self._depth = 1
+            pos = start + 1
+
+        segment_start = pos
+        length = len(chunk)
+        while pos < length:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    pos = length
+                    break
+                pos = match.end()
+                if match.group() == '\\':
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                pos = length
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._member.append(chunk[segment_start:pos - 1])
+                    self._complete_member(completed, closing=True)
+                    self.done = not self.failed
+                    return completed
+            elif char == ',' and self._depth == 1:
+                self._member.append(chunk[segment_start:pos - 1])
+                self._complete_member(completed)
+                if self.failed:
+                    return completed
+                segment_start = pos
+
+        self._member.append(chunk[segment_start:pos])
+        return completed
+
+    def _complete_member(self, completed: List[Tuple[str, Any]], closing: bool = False) -> None:
+        text = ''.join(self._member).strip()
+        self._member = []
+        if not text:
+            # Only ``{}`` closes on an empty member; like json.loads, reject ``{"a": 1,}`` and ``,,``
+            if not closing or self._members:
+                self.error = "Malformed JSON member: expected a member between commas"
+            return
+        self._members += 1
+        try:
+            parsed = json.loads('{' + text + '}')
+        except json.JSONDecodeError as e:
+            self.error = f"Malformed JSON member: {e.msg}"
+            return
+        for key, value in parsed.items():
+            self.result[key] = value
+            completed.append((key, value))
+
+
+class StreamingModelValidator:
+    """Validates streamed members against the fields of a Pydantic model."""
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.required = {name for name, field in model.model_fields.items() if field.is_required()}
+        self._adapters = {
+            name: TypeAdapter(Annotated[field.annotation, field])
+            for name, field in model.model_fields.items()
+        }
+        self.valid: Dict[str, Any] = {}
+        self.invalid: Dict[str, str] = {}
+
+    def validate_member(self, key: str, value: Any) -> bool:
+        """
+        Validate a single member as it arrives.
+
+        Invalid optional members are dropped and reported as False; an invalid
+        required member raises JSONStreamError so the caller can stop early.
+        """
+        adapter = self._adapters.get(key)
+        if adapter is None:
+            self.valid[key] = value
+            return True
+        try:
+            self.valid[key] = adapter.validate_python(value)
+        except ValidationError as e:
+            errors = e.errors()
+            message = errors[0].get("msg", str(e)) if errors else str(e)
+            self.invalid[key] = message
+            if key in self.required:
+                raise JSONStreamError(f"Invalid value for '{key}': {message}")
+            return False
+        return True
+
+    @property
+    def missing(self) -> List[str]:
+        return sorted(self.required - set(self.valid))
+
+    def finalize(self) -> BaseModel:
+        """Build the model from the valid members seen so far."""
+        if self.missing:
+            raise JSONStreamError(f"Missing required keys in response: {self.missing}")
+        return self.model.model_validate(self.valid)
@@ -0,0 +1,356 @@
+"""
+Self-hosted storage and database backend.
+
+``LocalClient`` implements the part of the supabase-py client the backend uses:
+``table(name)`` query builders (select/insert/upsert/update/delete with
+eq/neq/in_/order/range/limit filters) backed by SQLite, ``rpc(name, params)``
+for the database functions the backend defines (see core.services.blob_store),
+and ``storage.from_(bucket)`` backed by the filesystem (core.services.local_storage). Set
+``VIBECHECK_BACKEND=local`` to use it in place of Supabase
+(see core.services.supabase). Data lives under ``VIBECHECK_DATA_DIR``.
+
+Each table is stored as JSON documents keyed by the table's primary key, so
+rows keep exactly the shape the Supabase tables return. Tables are created on
+first use. Like the Postgres defaults, ``id`` (a uuid4) and ``created_at`` are
+filled in on insert when missing.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.services.local_storage import LocalStorage
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+VIBECHECK_DATA_DIR = os.getenv("VIBECHECK_DATA_DIR", os.path.join(PROJECT_ROOT, ".vibecheck"))
+
+# Tables whose primary key is not "id"
+PRIMARY_KEYS = {"blobs": "sha"}
+
+# Columns the routes filter or upsert on, indexed when the table is created
+INDEXED_COLUMNS = {
+    "repos": ["user_id", "full_name"],
+    "users": ["email"],
+    "repo_snapshots": ["repo_id"],
+    "repo_file_chunks": ["repo_id"],
+}
+
+
+class LocalBackendError(Exception):
+    pass
+
+
+@dataclass
+class LocalResponse:
+    """Mirrors postgrest's APIResponse."""
+    data: List[Dict[str, Any]]
+    count: Optional[int] = None
+
+
+def _column(name: str) -> str:
+    if not name.replace("_", "").isalnum():
+        raise LocalBackendError(f"Invalid column name: {name}")
+    return f"json_extract(doc, '$.{name}')"
+
+
+def _param(value: Any) -> Any:
+    # json_extract returns SQLite scalars; booleans come back as 0/1
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def _dumps(row: Dict[str, Any]) -> str:
+    return json.dumps(row, default=str)
+
+
+class LocalQuery:
+    def __init__(self, db: "LocalDatabase", table: str):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns: Optional[List[str]] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._where: List[Tuple[str, List[Any]]] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    # Operations
+
+    def select(self, columns: str = "*") -> "LocalQuery":
+        self._op = "select"
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        self._columns = None if "*" in names else names
+        return self
+
+    def insert(self, rows) -> "LocalQuery":
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False) -> "LocalQuery":
+        self._op, self._payload = "upsert", rows
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "LocalQuery":
+        self._op, self._payload = "update", values
+        return self
+
+    def delete(self) -> "LocalQuery":
+        self._op = "delete"
+        return self
+
+    # Filters and modifiers
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        self._where.append((f"{_column(column)} = ?", [_param(value)]))
+        return self
+
+    def neq(self, column: str, value: Any) -> "LocalQuery":
+        self._where.append((f"{_column(column)} IS NOT ?", [_param(value)]))
+        return self
+
+    def in_(self, column: str, values) -> "LocalQuery":
+        values = [_param(v) for v in values]
+        if not values:
+            self._where.append(("0", []))
+        else:
+            self._where.append((f"{_column(column)} IN ({', '.join('?' * len(values))})", values))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "LocalQuery":
+        self._order.append(f"{_column(column)} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, count: int) -> "LocalQuery":
+        self._limit = count
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._offset = start
+        self._limit = max(0, end - start + 1)
+        return self
+
+    def execute(self) -> LocalResponse:
+        return self._db.execute(self)
+
+
+class LocalRpc:
+    def __init__(self, db: "LocalDatabase", name: str, params: Dict[str, Any]):
+        self._db = db
+        self._name = name
+        self._params = params
+
+    def execute(self) -> LocalResponse:
+        return self._db.call(self._name, self._params)
+
+
+class LocalDatabase:
+    """SQLite document tables shared by all threads of the process."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        self._tables = set()
+
+    def _ensure_table(self, table: str) -> str:
+        if not table.replace("_", "").isalnum():
+            raise LocalBackendError(f"Invalid table name: {table}")
+        if table not in self._tables:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (pk TEXT PRIMARY KEY, doc TEXT NOT NULL)')
+            for column in INDEXED_COLUMNS.get(table, []):
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_{column}" ON "{table}" ({_column(column)})'
+                )
+            self._tables.add(table)
+        return f'"{table}"'
+
+    def execute(self, query: LocalQuery) -> LocalResponse:
+        with self._lock:
+            table = self._ensure_table(query._table)
+            self._conn.execute("BEGIN")
+            try:
+                data = getattr(self, f"_{query._op}")(table, query)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if query._op == "select" and query._columns is not None:
+            data = [{c: row.get(c) for c in query._columns} for row in data]
+        return LocalResponse(data=data)
+
+    def call(self, name: str, params: Dict[str, Any]) -> LocalResponse:
+        """Run a database function in one transaction, like a Postgres function called through PostgREST."""
+        function = getattr(self, f"_rpc_{name}", None)
+        if function is None:
+            raise LocalBackendError(f"Unknown function: {name}")
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                data = function(**params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return LocalResponse(data=data)
+
+    def _blob_docs(self, shas: List[str]) -> Dict[str, Dict[str, Any]]:
+        table = self._ensure_table("blobs")
+        found = {}
+        for i in range(0, len(shas), 500):
+            batch = shas[i:i + 500]
+            found.update((pk, json.loads(doc)) for pk, doc in self._conn.execute(
+                f"SELECT pk, doc FROM {table} WHERE pk IN ({', '.join('?' * len(batch))})", batch))
+        return found
+
+    def _write_blob(self, doc: Dict[str, Any]) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO "blobs" (pk, doc) VALUES (?, ?)', (doc["sha"], _dumps(doc)))
+
+    # Functions of core.services.blob_store; ref_count -1 marks a blob being deleted
+
+    def _rpc_acquire_blobs(self, shas: List[str]) -> List[Dict[str, Any]]:
+        docs = self._blob_docs(shas)
+        acquired = []
+        for sha in shas:
+            doc = docs.get(sha)
+            if doc is None:
+                doc = {"sha": sha, "storage_path": f"blobs/{sha[:2]}/{sha}", "ref_count": 1, "stored": False,
+                       "created_at": datetime.utcnow().isoformat() + "Z"}
+            elif (doc.get("ref_count") or 0) >= 0:
+                doc["ref_count"] = (doc.get("ref_count") or 0) + 1
+            else:
+                continue
+            self._write_blob(doc)
+            acquired.append({"sha": sha, "stored": doc.get("stored", True)})
+        return acquired
+
+    def _rpc_adjust_blob_refs(self, shas: List[str], delta: int) -> List[Dict[str, Any]]:
+        adjusted = []
+        for sha, doc in self._blob_docs(shas).items():
+            if (doc.get("ref_count") or 0) >= 0:
+                doc["ref_count"] = max(0, (doc.get("ref_count") or 0) + delta)
+                self._write_blob(doc)
+                adjusted.append({"sha": sha})
+        return adjusted
+
+    def _rpc_claim_unreferenced_blobs(self, shas: List[str]) -> List[Dict[str, Any]]:
+        claimed = []
+        for sha, doc in self._blob_docs(shas).items():
+            if (doc.get("ref_count") or 0) == 0:
+                doc["ref_count"] = -1
+                self._write_blob(doc)
+                claimed.append({"sha": sha})
+        return claimed
+
+    def _rows(self, table: str, query: LocalQuery, paged: bool = True) -> List[Tuple[str, Dict[str, Any]]]:
+        sql = f"SELECT pk, doc FROM {table}"
+        params: List[Any] = []
+        if query._where:
+            sql += " WHERE " + " AND ".join(clause for clause, _ in query._where)
+            for _, values in query._where:
+                params.extend(values)
+        if paged and query._order:
+            sql += " ORDER BY " + ", ".join(query._order)
+        if paged and query._limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([query._limit, query._offset])
+        return [(pk, json.loads(doc)) for pk, doc in self._conn.execute(sql, params)]
+
+    def _select(self, table: str, query: LocalQuery) -> List[Dict[str, Any]]:
+        return [doc for _, doc in self._rows(table, query)]
+
+    def _key(self, query: LocalQuery) -> str:
+        return PRIMARY_KEYS.get(query._table, "id")
+
+    def _with_defaults(self, query: LocalQuery, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        key = self._key(query)
+        if key == "id" and row.get("id") is None:
+            row["id"] = str(uuid.uuid4())
+        row.setdefault("created_at", datetime.utcnow().isoformat() + "Z")
+        if row.get(key) is None:
+            raise LocalBackendError(f"Row for {query._table} is missing its primary key {key}")
+        return row
+
+    def _insert(self, table: str, query: LocalQuery) -> List[Dict[str, Any]]:
+        rows = query._payload if isinstance(query._payload, list) else [query._payload]
+        inserted = []
+        for row in rows:
+            row = self._with_defaults(query, row)
+            try:
+                self._conn.execute(f"INSERT INTO {table} (pk, doc) VALUES (?, ?)",
+                                   (str(row[self._key(query)]), _dumps(row)))
+            except sqlite3.IntegrityError:
+                raise LocalBackendError(f"duplicate key value violates unique constraint on {query._table}")
+            inserted.append(row)
+        return inserted
+
+    def _upsert(self, table: str, query: LocalQuery) -> List[Dict[str, Any]]:
+        rows = query._payload if isinstance(query._payload, list) else [query._payload]
+        conflict = query._on_conflict or self._key(query)
+        written = []
+        for row in rows:
+            if conflict == self._key(query) and row.get(conflict) is not None:
+                match = self._conn.execute(f"SELECT pk, doc FROM {table} WHERE pk = ?", (str(row[conflict]),)).fetchone()
+            else:
+                match = self._conn.execute(
+                    f"SELECT pk, doc FROM {table} WHERE {_column(conflict)} = ?", (_param(row.get(conflict)),)
+                ).fetchone()
+            if match is None:
+                row = self._with_defaults(query, row)
+                self._conn.execute(f"INSERT INTO {table} (pk, doc) VALUES (?, ?)",
+                                   (str(row[self._key(query)]), _dumps(row)))
+                written.append(row)
+            elif not query._ignore_duplicates:
+                # Merge duplicates, keeping the existing primary key
+                merged = {**json.loads(match[1]), **row, self._key(query): json.loads(match[1])[self._key(query)]}
+                self._conn.execute(f"UPDATE {table} SET doc = ? WHERE pk = ?", (_dumps(merged), match[0]))
+                written.append(merged)
+        return written
+
+    def _update(self, table: str, query: LocalQuery) -> List[Dict[str, Any]]:
+        updated = []
+        for pk, doc in self._rows(table, query, paged=False):
+            doc.update(query._payload)
+            self._conn.execute(f"UPDATE {table} SET doc = ? WHERE pk = ?", (_dumps(doc), pk))
+            updated.append(doc)
+        return updated
+
+    def _delete(self, table: str, query: LocalQuery) -> List[Dict[str, Any]]:
+        rows = self._rows(table, query, paged=False)
+        self._conn.executemany(f"DELETE FROM {table} WHERE pk = ?", [(pk,) for pk, _ in rows])
+        return [doc for _, doc in rows]
+
+
+class LocalClient:
+    """Drop-in for the supabase client: SQLite tables plus filesystem storage."""
+
+    def __init__(self, data_dir: str = VIBECHECK_DATA_DIR, database: Optional[str] = None, latency: float = 0.0):
+        self.data_dir = data_dir
+        self.db = LocalDatabase(database or os.path.join(data_dir, "vibecheck.db"))
+        self.storage = LocalStorage(os.path.join(data_dir, "storage"), latency=latency)
+        # Snapshot packs for the issues analysis (see core.services.blob_store.BlobStore.pack_path)
+        self.packs_dir = os.path.join(data_dir, "packs")
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self.db, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> LocalRpc:
+        return LocalRpc(self.db, name, params or {})
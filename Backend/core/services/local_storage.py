@@ -0,0 +1,96 @@
+"""
+Filesystem stand-in for Supabase storage.
+
+``LocalStorage(root).from_(bucket)`` returns a bucket with the subset of the
+storage3 bucket API the backend uses (upload, download, remove,
+get_public_url), storing objects under ``{root}/{bucket}/{path}``. It is used to
+benchmark the upload pipeline without Supabase; ``latency`` adds a fixed delay
+per call to mimic a network round trip.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from typing import BinaryIO, Dict, List, Optional, Union
+from urllib.parse import quote
+
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", os.path.join(tempfile.gettempdir(), "vibecheck-storage"))
+
+
+class LocalStorageError(Exception):
+    """Storage error carrying an HTTP-like status, like storage3's StorageApiError."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class LocalStorageBucket:
+    def __init__(self, root: str, bucket: str, latency: float = 0.0):
+        self.root = os.path.abspath(root)
+        self.bucket = bucket
+        self.latency = latency
+        self.directory = os.path.join(self.root, bucket)
+
+    def _path(self, path: str) -> str:
+        full = os.path.normpath(os.path.join(self.directory, path.lstrip("/")))
+        if not full.startswith(self.directory + os.sep):
+            raise LocalStorageError(f"Invalid key: {path}", 400)
+        return full
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upload(self, path: str, file: Union[bytes, BinaryIO], file_options: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        self._wait()
+        full = self._path(path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(full), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(file, bytes):
+                    f.write(file)
+                else:
+                    shutil.copyfileobj(file, f)
+            # link() fails if the object exists, so concurrent uploads of one key resolve like storage does
+            os.link(tmp, full)
+        except FileExistsError:
+            raise LocalStorageError("The resource already exists", 409)
+        finally:
+            os.unlink(tmp)
+        return {"path": path, "Key": f"{self.bucket}/{path}"}
+
+    def download(self, path: str) -> bytes:
+        self._wait()
+        try:
+            with open(self._path(path), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise LocalStorageError("Object not found", 404)
+
+    def remove(self, paths: List[str]) -> List[Dict[str, str]]:
+        self._wait()
+        removed = []
+        for path in paths:
+            try:
+                os.unlink(self._path(path))
+                removed.append({"name": path})
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def get_public_url(self, path: str) -> str:
+        return f"file://{quote(self.directory)}/{quote(path, safe='/')}"
+
+
+class LocalStorage:
+    """Mimics ``supabase.storage``."""
+
+    def __init__(self, root: str = LOCAL_STORAGE_ROOT, latency: float = 0.0):
+        self.root = root
+        self.latency = latency
+
+    def from_(self, bucket: str) -> LocalStorageBucket:
+        return LocalStorageBucket(self.root, bucket, latency=self.latency)
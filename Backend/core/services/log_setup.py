@@ -0,0 +1,188 @@
+"""
+Logging configuration for the backend.
+
+``configure_logging()`` replaces ``logging.basicConfig``: loggers only put
+records on a queue (``QueueHandler``), and a ``QueueListener`` thread does the
+formatting and the console/file writes, so a request never waits on stdout or
+disk. When the queue is full records are dropped and counted rather than
+blocking the caller.
+
+Settings (environment):
+
+- ``LOG_LEVEL``: root level (default ``INFO``)
+- ``LOG_LEVELS``: per-logger levels, e.g.
+  ``core.analyzers.github_analyzer=DEBUG,httpx=WARNING``
+- ``LOG_FORMAT``: ``text`` (default) or ``json`` (one object per line)
+- ``LOG_FILE``: log file path (default ``backend.log``; empty disables it)
+- ``LOG_QUEUE_SIZE``: records buffered before dropping (default 10000)
+
+High-frequency events (one per file, per skip) are sampled at the call site:
+``logger.debug("Processing %s", path, extra=sample(100))`` emits the first
+call and then every 100th call from that line. Emitted records carry
+``sampled=<n>`` and ``suppressed=<count since the last one>``.
+
+Any other ``extra=`` keys and the current trace/span ids become fields of the
+JSON output.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from core.services import tracing
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+_INTERNAL_ATTRS = {"sample_every", "trace_id", "span_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def sample(every: int) -> Dict[str, int]:
+    """``extra=`` for a high-frequency log call: keep the first and then every ``every``-th record."""
+    return {"sample_every": every}
+
+
+def parse_levels(spec: Optional[str]) -> Dict[str, int]:
+    """``"a.b=DEBUG,c=warning"`` -> ``{"a.b": 10, "c": 30}``; malformed entries are ignored."""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, _, level = item.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if name.strip() and isinstance(value, int):
+            levels[name.strip()] = value
+    return levels
+
+
+class SamplingFilter(logging.Filter):
+    """Passes one in ``sample_every`` records per call site; records without it always pass."""
+
+    def __init__(self):
+        super().__init__()
+        self._counts: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, "sample_every", None)
+        if not every or every <= 1:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % every:
+            return False
+        record.sampled = every
+        record.suppressed = every - 1 if count else 0
+        return True
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the current trace and span ids; runs in the caller, before queueing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = tracing.current_span()
+        if current is not None:
+            record.trace_id = current.trace.trace_id
+            record.span_id = current.span_id
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` that drops (and counts) records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._tracebacks = logging.Formatter()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the args now (they may be mutated after the call) and render any
+        # traceback so frames are not kept alive; formatting happens on the listener.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = self._tracebacks.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with the ``extra=`` fields at the top level."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("trace_id", "span_id"):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in _INTERNAL_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None, levels: Optional[str] = None, fmt: Optional[str] = None,
+                      log_file: Optional[str] = None, queue_size: Optional[int] = None) -> NonBlockingQueueHandler:
+    """Route the root logger through a queue; arguments override the environment."""
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if (fmt or os.getenv("LOG_FORMAT", "text")).lower() == "json" \
+        else logging.Formatter(DEFAULT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    path = log_file if log_file is not None else os.getenv("LOG_FILE", "backend.log")
+    if path:
+        handlers.append(logging.FileHandler(path))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.getLevelName((level or os.getenv("LOG_LEVEL", "INFO")).upper()))
+    for name, value in parse_levels(levels if levels is not None else os.getenv("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(value)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return queue_handler
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
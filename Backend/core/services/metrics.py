@@ -0,0 +1,330 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms with labels, kept in plain Python objects:
+a labelled child is looked up once per label tuple and updated under its own
+lock, so recording a value costs about a microsecond and nothing runs until
+``GET /metrics`` renders the registry. The metrics for the whole pipeline are
+defined below; modules import and update them directly.
+
+The current HTTP route is kept in a context variable (set by the middleware
+in main.py) so database queries can be labelled by the route that made them;
+``asyncio.to_thread`` and tasks copy it along with the rest of the context.
+"""
+
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.services import tracing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="background")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def get(self, name: str) -> Optional["Metric"]:
+        return next((m for m in self._metrics if m.name == name), None)
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """The child for one combination of label values."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        return sorted(self._children.items())
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter."""
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+                for key, child in self._items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    """Observes the elapsed seconds of a ``with`` block."""
+
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _Histogram):
+        self.child = child
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _Histogram:
+        return _Histogram(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe on the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def timed(histogram: Histogram, *labels) -> Callable:
+    """Decorator observing each call's duration on ``histogram.labels(*labels)``."""
+    child = histogram.labels(*labels)
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# HTTP API
+HTTP_REQUESTS = Counter("vibecheck_http_requests_total", "HTTP requests served", ["route", "method", "status"])
+HTTP_LATENCY = Histogram("vibecheck_http_request_seconds", "HTTP request latency", ["route", "method"])
+
+# GitHub
+GITHUB_REQUESTS = Counter("vibecheck_github_requests_total", "GitHub requests by endpoint class and status",
+                          ["endpoint", "status"])
+GITHUB_LATENCY = Histogram("vibecheck_github_request_seconds", "GitHub request latency", ["endpoint"])
+GITHUB_RATE_LIMIT_REMAINING = Gauge("vibecheck_github_rate_limit_remaining",
+                                    "Remaining GitHub API requests reported by the last response")
+
+# File ingestion
+FILES = Counter("vibecheck_files_total", "Repository files by ingestion outcome (downloaded, uploaded, reused, skipped)",
+                ["outcome", "reason"])
+FILE_BYTES = Counter("vibecheck_file_bytes_total", "Bytes of repository file content", ["direction"])
+
+# Code issue analyzer
+ANALYZER_RULE_SECONDS = Histogram("vibecheck_analyzer_rule_seconds", "Time per analyzer rule per file", ["rule"],
+                                  buckets=FAST_BUCKETS)
+ANALYZER_FILE_SECONDS = Histogram("vibecheck_analyzer_file_seconds", "Analyzer time per file by language",
+                                  ["language"], buckets=FAST_BUCKETS)
+
+# LLM
+LLM_LATENCY = Histogram("vibecheck_llm_request_seconds", "LLM request latency", ["model"])
+LLM_FIRST_TOKEN = Histogram("vibecheck_llm_first_token_seconds", "Time to the first streamed token", ["model"])
+LLM_TOKENS = Counter("vibecheck_llm_tokens_total", "LLM tokens", ["model", "type"])
+LLM_COST = Counter("vibecheck_llm_cost_usd_total", "Estimated LLM cost in USD", ["model"])
+
+# Database
+DB_LATENCY = Histogram("vibecheck_db_query_seconds", "Database query latency", ["table", "operation", "route"])
+DB_ERRORS = Counter("vibecheck_db_errors_total", "Database queries that raised", ["table", "operation", "route"])
+
+# Caches; the hit ratio is hits / (hits + misses)
+CACHE_REQUESTS = Counter("vibecheck_cache_requests_total", "Cache lookups by result (hit or miss)",
+                         ["cache", "result"])
+
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    if count:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+DB_OPERATIONS = ("select", "insert", "upsert", "update", "delete")
+
+
+class _TimedQuery:
+    """A query builder whose ``execute()`` is timed under its table, operation and route."""
+
+    __slots__ = ("_query", "_table", "_operation")
+
+    def __init__(self, query, table: str, operation: str):
+        self._query = query
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        operation = name if name in DB_OPERATIONS else self._operation
+        if callable(attr):
+            @functools.wraps(attr)
+            def call(*args, **kwargs):
+                return _TimedQuery(attr(*args, **kwargs), self._table, operation)
+            return call
+        if hasattr(attr, "execute"):
+            # Builder properties such as ``not_``
+            return _TimedQuery(attr, self._table, operation)
+        return attr
+
+    def execute(self):
+        labels = (self._table, self._operation, current_route.get())
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"db.{self._operation}", table=self._table):
+                return self._query.execute()
+        except Exception:
+            DB_ERRORS.labels(*labels).inc()
+            raise
+        finally:
+            DB_LATENCY.labels(*labels).observe(time.perf_counter() - start)
+
+
+class InstrumentedClient:
+    """Wraps a supabase (or LocalClient) client so table queries are timed."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str) -> _TimedQuery:
+        return _TimedQuery(self._client.table(name), name, "select")
+
+    def from_(self, name: str) -> _TimedQuery:
+        return self.table(name)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_client(client):
+    return InstrumentedClient(client) if client is not None else None
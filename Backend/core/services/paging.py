@@ -0,0 +1,178 @@
+"""
+Cursor pagination over a repository's issues and files.
+
+``SortedIndex`` splits the items into buckets by their filterable fields
+(category, severity, extension, ...) and sorts each bucket by the listing's
+sort key once. A page selects the matching buckets, binary-searches each for
+the cursor and merges them lazily, so it costs O(buckets * log n + limit)
+whatever the repository's size. A path prefix is answered from a per-bucket
+path order instead, and then costs in proportion to the items under the prefix.
+
+Cursors are keyset cursors: the opaque encoding of the last returned item's
+sort key. A page continues after that key even if the repository was
+re-analyzed in between.
+
+Indexes are built per process and kept in ``indexes``, keyed by the
+repository's shared-cache generation, so a write (which bumps the
+generation, see core.services.shared_cache) makes every worker rebuild.
+"""
+
+import base64
+import heapq
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from core.services.shared_cache import SharedCache, cache as shared_cache, repo_scope
+
+# Built indexes kept per process
+INDEX_CACHE_ENTRIES = 32
+MAX_PAGE_SIZE = 500
+
+_first = itemgetter(0)
+
+
+def encode_cursor(key: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """The sort key in ``cursor``; ``ValueError`` if it was not made by ``encode_cursor``."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or not all(isinstance(part, (str, int, float)) for part in key):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+class SortedIndex:
+    """Items bucketed by ``bucket(item)`` and sorted by ``key(item)`` within each bucket."""
+
+    def __init__(self, items: Iterable[Any], key: Callable[[Any], Tuple], bucket: Callable[[Any], Hashable],
+                 path: Callable[[Any], str]):
+        grouped: Dict[Hashable, List[Tuple[Tuple, Any]]] = {}
+        for seq, item in enumerate(items):
+            # The position makes equal keys unique, so a cursor never skips or repeats an item
+            grouped.setdefault(bucket(item), []).append((key(item) + (seq,), item))
+        self._keys: Dict[Hashable, List[Tuple]] = {}
+        self._items: Dict[Hashable, List[Any]] = {}
+        self._paths: Dict[Hashable, List[str]] = {}
+        self._path_positions: Dict[Hashable, List[int]] = {}
+        for name, entries in grouped.items():
+            entries.sort(key=_first)
+            self._keys[name] = [k for k, _ in entries]
+            self._items[name] = [item for _, item in entries]
+            by_path = sorted(range(len(entries)), key=lambda i: path(entries[i][1]))
+            self._paths[name] = [path(entries[i][1]) for i in by_path]
+            self._path_positions[name] = by_path
+
+    def buckets(self) -> List[Hashable]:
+        return list(self._keys)
+
+    def page(self, match: Callable[[Hashable], bool], limit: int, after: Optional[Tuple] = None,
+             path_prefix: Optional[str] = None) -> Tuple[List[Any], Optional[Tuple], int]:
+        """
+        Up to ``limit`` items in the matching buckets sorted after ``after``:
+        the items, the key to continue from (``None`` on the last page) and the
+        number of items matching the filters.
+        """
+        selected = [name for name in self._keys if match(name)]
+        try:
+            if path_prefix:
+                rows, total = self._prefix_rows(selected, path_prefix, after, limit + 1)
+            else:
+                total = sum(len(self._keys[name]) for name in selected)
+                streams = [self._rows_after(name, after) for name in selected]
+                rows = []
+                for row in heapq.merge(*streams, key=_first):
+                    rows.append(row)
+                    if len(rows) > limit:
+                        break
+        except TypeError:
+            # A cursor from a different listing compares against keys of other types
+            raise ValueError("Invalid cursor")
+        next_key = rows[limit - 1][0] if len(rows) > limit else None
+        return [item for _, item in rows[:limit]], next_key, total
+
+    def _rows_after(self, name: Hashable, after: Optional[Tuple]):
+        keys, items = self._keys[name], self._items[name]
+        start = bisect_right(keys, after) if after is not None else 0
+        return ((keys[i], items[i]) for i in range(start, len(keys)))
+
+    def _prefix_rows(self, selected: List[Hashable], prefix: str, after: Optional[Tuple],
+                     count: int) -> Tuple[List[Tuple[Tuple, Any]], int]:
+        candidates = []
+        total = 0
+        for name in selected:
+            paths = self._paths[name]
+            lo = bisect_left(paths, prefix)
+            hi = bisect_left(paths, prefix + "\U0010ffff", lo)
+            total += hi - lo
+            keys, items = self._keys[name], self._items[name]
+            candidates.extend((keys[i], items[i]) for i in self._path_positions[name][lo:hi]
+                              if after is None or keys[i] > after)
+        return heapq.nsmallest(count, candidates, key=_first), total
+
+
+class IndexCache:
+    """Indexes built by this process, reused until their repository's cache generation changes."""
+
+    def __init__(self, cache: SharedCache = shared_cache, max_entries: int = INDEX_CACHE_ENTRIES):
+        self.cache = cache
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[Tuple, SortedIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, name: str, repo_id: str) -> Optional[Tuple]:
+        generation = self.cache.generation(repo_scope(repo_id))
+        # Without a generation a write could not be noticed, so nothing is kept
+        return (name, repo_id, generation) if generation is not None else None
+
+    def _get(self, key: Optional[Tuple]) -> Optional[SortedIndex]:
+        if key is None:
+            return None
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def _put(self, key: Optional[Tuple], index: SortedIndex) -> None:
+        if key is None:
+            return
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+
+    def get_or_build(self, name: str, repo_id: str, build: Callable[[], SortedIndex]) -> SortedIndex:
+        key = self._key(name, repo_id)
+        index = self._get(key)
+        if index is None:
+            index = build()
+            self._put(key, index)
+        return index
+
+    async def get_or_build_async(self, name: str, repo_id: str,
+                                 build: Callable[[], Awaitable[SortedIndex]]) -> SortedIndex:
+        key = self._key(name, repo_id)
+        index = self._get(key)
+        if index is None:
+            index = await build()
+            self._put(key, index)
+        return index
+
+
+def parse_list(value: Optional[str]) -> Optional[set]:
+    """A comma-separated filter as a set of lowercase values; ``None`` when not given."""
+    if not value:
+        return None
+    return {part.strip().lower() for part in value.split(",") if part.strip()}
+
+
+indexes = IndexCache()
@@ -0,0 +1,288 @@
+"""
+On-demand CPU and memory profiling for running workers.
+
+``SamplingProfiler`` samples the Python stack of every thread at a fixed
+interval from a daemon thread (``sys._current_frames``), so the workers keep
+serving requests while it runs and nothing is instrumented when it is off.
+A session runs either for a time window or until the next N requests matching
+a route template have completed; in request mode only samples taken while a
+matching request is in flight are kept. Results are collapsed stacks (one
+``frame;frame;frame count`` line per stack, for flamegraph.pl / speedscope)
+or speedscope's JSON file format.
+
+``MemoryTracker`` takes tracemalloc snapshots and diffs them against a
+baseline, grouped by line or by allocation traceback, to find what grows in
+long-running workers.
+
+Both are driven from the admin endpoints in main.py, which require
+``ADMIN_TOKEN``.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+MAX_DURATION = 300.0
+
+# Leaf frames of threads that are waiting rather than working (event loop idle, pool workers)
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+}
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_name(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """One profiling session at a time; ``track_request`` is called by the request middleware."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._done: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.samples: Counter = Counter()
+        self.interval = DEFAULT_INTERVAL
+        self.include_idle = False
+        self.route: Optional[str] = None
+        self.requests_wanted = 0
+        self.requests_done = 0
+        self.in_flight = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.sample_count = 0
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = DEFAULT_INTERVAL, route: Optional[str] = None, requests: int = 0,
+              include_idle: bool = False) -> None:
+        with self._lock:
+            if self._thread is not None:
+                raise ProfilerBusy("A profiling session is already running")
+            self.samples = Counter()
+            self.interval = max(interval, 0.001)
+            self.include_idle = include_idle
+            self.route = route
+            self.requests_wanted = requests
+            self.requests_done = 0
+            self.in_flight = 0
+            self.sample_count = 0
+            self._loop = asyncio.get_running_loop()
+            self._done = asyncio.Event()
+            self._stop.clear()
+            self.started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self.elapsed = time.perf_counter() - self.started
+
+    async def run_window(self, seconds: float, **options) -> None:
+        """Sample for ``seconds``."""
+        self.start(**options)
+        try:
+            await asyncio.sleep(min(seconds, MAX_DURATION))
+        finally:
+            self.stop()
+
+    async def run_requests(self, route: str, requests: int, timeout: float, **options) -> None:
+        """Sample until ``requests`` requests to ``route`` have completed, or ``timeout``."""
+        self.start(route=route, requests=requests, **options)
+        try:
+            await asyncio.wait_for(self._done.wait(), min(timeout, MAX_DURATION))
+        except asyncio.TimeoutError:
+            logger.info("Profiling stopped after %d/%d requests to %s", self.requests_done, requests, route)
+        finally:
+            self.stop()
+
+    def track_request(self, route: str) -> "_RequestTracker":
+        return _RequestTracker(self if self.route is not None and route == self.route else None)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if self.route is not None and self.in_flight == 0:
+                continue
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                leaf = frame.f_code
+                if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.samples[(names.get(thread_id, str(thread_id)), tuple(reversed(stack)))] += 1
+
+    def _request_finished(self) -> None:
+        self.requests_done += 1
+        if self.requests_done >= self.requests_wanted and self._done is not None:
+            self._loop.call_soon_threadsafe(self._done.set)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, root frame first, one line per distinct stack."""
+        lines = Counter()
+        for (thread, stack), count in self.samples.items():
+            lines[";".join([thread] + [_frame_name(code) for code in stack])] += count
+        return "\n".join(f"{stack} {count}" for stack, count in lines.most_common()) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """The samples in speedscope's file format, one sampled profile per thread."""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[Any, int] = {}
+        profiles: Dict[str, Dict[str, Any]] = {}
+        interval_ms = self.interval * 1000
+        for (thread, stack), count in self.samples.items():
+            ids = []
+            for code in stack:
+                if code not in index:
+                    index[code] = len(frames)
+                    frames.append({"name": getattr(code, "co_qualname", code.co_name),
+                                   "file": code.co_filename, "line": code.co_firstlineno})
+                ids.append(index[code])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "milliseconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(ids)
+            profile["weights"].append(count * interval_ms)
+            profile["endValue"] += count * interval_ms
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"vibecheck {self.route or 'window'} profile",
+            "exporter": "vibecheck-backend",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "duration_s": round(self.elapsed, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.sample_count,
+            "stacks": len(self.samples),
+            "route": self.route,
+            "requests": self.requests_done if self.route is not None else None,
+        }
+
+
+class _RequestTracker:
+    __slots__ = ("profiler",)
+
+    def __init__(self, profiler: Optional[SamplingProfiler]):
+        self.profiler = profiler
+
+    def __enter__(self) -> None:
+        if self.profiler is not None:
+            self.profiler.in_flight += 1
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.profiler is not None:
+            self.profiler.in_flight -= 1
+            self.profiler._request_finished()
+
+
+class MemoryTracker:
+    """tracemalloc snapshots diffed against a baseline."""
+
+    def __init__(self):
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.baseline_at = 0.0
+        self._started_tracing = False
+
+    def start(self, frames: int = 10) -> Dict[str, Any]:
+        """Start tracing (if needed) and take the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._started_tracing = True
+        self.baseline = self._snapshot()
+        self.baseline_at = time.time()
+        current, peak = tracemalloc.get_traced_memory()
+        return {"tracing": True, "frames": tracemalloc.get_traceback_limit(), "traced_bytes": current,
+                "peak_bytes": peak}
+
+    def stop(self) -> None:
+        self.baseline = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def diff(self, group_by: str = "lineno", top: int = 25, include: Optional[str] = None,
+             rebase: bool = False) -> Dict[str, Any]:
+        """Growth since the baseline, largest first; ``include`` keeps only frames from matching files."""
+        if self.baseline is None:
+            raise RuntimeError("No baseline snapshot; start memory tracking first")
+        snapshot = self._snapshot()
+        baseline = self.baseline
+        if include:
+            keep = (tracemalloc.Filter(True, include, all_frames=True),)
+            snapshot, baseline = snapshot.filter_traces(keep), baseline.filter_traces(keep)
+        stats = snapshot.compare_to(baseline, group_by)
+        result = {
+            "since_s": round(time.time() - self.baseline_at, 1),
+            "group_by": group_by,
+            "total_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [self._stat(stat, group_by) for stat in stats[:top]],
+        }
+        if rebase:
+            self.baseline = self._snapshot()
+            self.baseline_at = time.time()
+        return result
+
+    @staticmethod
+    def _stat(stat: tracemalloc.StatisticDiff, group_by: str) -> Dict[str, Any]:
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        return {
+            "location": frames[0] if frames else None,
+            "traceback": frames if group_by == "traceback" else None,
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+            "count": stat.count,
+        }
+
+
+profiler = SamplingProfiler()
+memory = MemoryTracker()
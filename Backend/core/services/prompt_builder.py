@@ -0,0 +1,284 @@
+"""
+Token-budgeted prompt assembly for repository scoring.
+
+Builds the scoring prompt from compact metric tables and a sample of files
+chosen by information value (size, language and issue density), counting
+tokens locally so the prompt never exceeds the configured budget.
+"""
+
+import math
+import os
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a local estimate
+    tiktoken = None
+
+# Default prompt budget for the scoring request (prompt tokens, excluding the system message)
+DEFAULT_PROMPT_TOKEN_BUDGET = int(os.getenv("SCORING_PROMPT_TOKEN_BUDGET", "3000"))
+
+# USD per 1M tokens (prompt, completion)
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+# Relative information value of a file by extension
+LANGUAGE_WEIGHTS: Dict[str, float] = {
+    '.py': 3.0, '.js': 3.0, '.jsx': 3.0, '.ts': 3.0, '.tsx': 3.0, '.go': 3.0, '.rs': 3.0,
+    '.java': 3.0, '.kt': 3.0, '.scala': 3.0, '.rb': 3.0, '.php': 3.0, '.cs': 3.0,
+    '.c': 3.0, '.cpp': 3.0, '.h': 2.0, '.hpp': 2.0, '.swift': 3.0, '.dart': 3.0,
+    '.sql': 2.0, '.sh': 2.0, '.html': 1.5, '.css': 1.0, '.scss': 1.0,
+    '.json': 0.5, '.yaml': 0.7, '.yml': 0.7, '.toml': 0.7, '.xml': 0.5,
+    '.md': 0.4, '.txt': 0.3,
+}
+DEFAULT_LANGUAGE_WEIGHT = 1.0
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+SCORING_RESPONSE_FORMAT = """Return JSON with this structure (scores are numbers 0-100):
+{
+"overall_score": <number>,
+"ai_percentage": <estimated percentage of AI-generated code>,
+"previous_score": <optional previous score for comparison>,
+"scores": [
+{"title": "Quality", "score": <number>, "color": "hsl(var(--quality))", "description": "Code maintainability & complexity"},
+{"title": "Security", "score": <number>, "color": "hsl(var(--security))", "description": "Vulnerabilities & best practices"},
+{"title": "Git Hygiene", "score": <number>, "color": "hsl(var(--git))", "description": "Commit quality & PR practices"},
+{"title": "Style", "score": <number>, "color": "hsl(var(--style))", "description": "Consistency & conventions"},
+{"title": "Originality", "score": <number>, "color": "hsl(var(--originality))", "description": "Unique implementations"},
+{"title": "Team Balance", "score": <number>, "color": "hsl(var(--team))", "description": "Contribution distribution"}
+],
+"radar_data": [
+{"category": "Quality", "score": <number>, "fullMark": 100},
+{"category": "Security", "score": <number>, "fullMark": 100},
+{"category": "Git", "score": <number>, "fullMark": 100},
+{"category": "Style", "score": <number>, "fullMark": 100},
+{"category": "Originality", "score": <number>, "fullMark": 100},
+{"category": "Team", "score": <number>, "fullMark": 100}
+],
+"files": [{"name": "<filename>", "path": "<filepath>", "ai_percentage": <number>, "quality": <number>, "flags": ["<flag>"]}],
+"analysis": "<detailed analysis text>",
+"recommendations": ["<recommendation1>", "<recommendation2>", "<recommendation3>"]
+}
+
+Scoring guidelines:
+- Quality: code structure, maintainability, and complexity
+- Security: potential vulnerabilities and security practices
+- Git Hygiene: commit patterns, PR practices, and version control discipline
+- Style: code consistency, naming conventions, and formatting
+- Originality: unique implementations vs copy-paste patterns
+- Team Balance: contribution distribution and collaboration patterns
+
+AI Percentage estimation: look for patterns that suggest AI-generated code (repetitive structures, generic names), and weigh the complexity and originality of implementations and the team's consistency.
+
+Provide realistic scores based on the actual data provided. Be critical but fair in your assessment."""
+
+
+@dataclass
+class PromptBuild:
+    """Result of assembling a prompt within a token budget."""
+    prompt: str
+    prompt_tokens: int
+    token_budget: int
+    files_total: int
+    files_included: List[str] = field(default_factory=list)
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+
+
+_encoding = None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count prompt tokens locally, using tiktoken when installed."""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text))
+    # BPE tokenizers emit roughly one token per short word or symbol, more for long identifiers
+    return sum(1 + len(piece) // 8 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a request from the model's per-token pricing."""
+    prompt_price, completion_price = MODEL_PRICING.get(model, MODEL_PRICING["gpt-4o-mini"])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def file_information_weight(file_info: Dict[str, Any], issue_count: int = 0) -> float:
+    """Weight a file by how much it tells the reviewer: size, language and issue density."""
+    size = max(0, int(file_info.get("size_bytes", file_info.get("size", 0)) or 0))
+    ext = (file_info.get("file_extension") or os.path.splitext(_file_path(file_info))[1]).lower()
+
+    language_weight = LANGUAGE_WEIGHTS.get(ext, DEFAULT_LANGUAGE_WEIGHT)
+    # Diminishing returns on size: a 100KB file is not 100x as informative as a 1KB one
+    size_weight = math.log2(2 + size / 1024)
+    # Issues per KB, so large files are not favoured just for having more lines
+    issue_density = issue_count / max(1.0, size / 1024)
+
+    return language_weight * size_weight * (1.0 + min(issue_density, 10.0))
+
+
+def sample_files(file_metadata: List[Dict[str, Any]], issue_counts: Optional[Dict[str, int]] = None,
+                 seed: str = "") -> List[Dict[str, Any]]:
+    """
+    Order files by weighted sampling without replacement.
+
+    Uses Efraimidis-Spirakis keys (u ** (1 / w)) so that high-value files tend to
+    come first while low-value ones still get a chance. The RNG is seeded from the
+    repository name so the same repository always produces the same prompt.
+    """
+    issue_counts = issue_counts or {}
+    rng = random.Random(zlib.crc32(seed.encode("utf-8")))
+    keyed = []
+    for file_info in file_metadata:
+        weight = file_information_weight(file_info, issue_counts.get(_file_path(file_info), 0))
+        keyed.append((rng.random() ** (1.0 / weight), file_info))
+    keyed.sort(key=lambda item: item[0], reverse=True)
+    return [file_info for _, file_info in keyed]
+
+
+def format_table(header: Iterable[str], rows: Iterable[Iterable[Any]]) -> str:
+    """Format rows as a dense pipe-separated table."""
+    lines = ["|".join(header)]
+    lines.extend("|".join(_format_cell(value) for value in row) for row in rows)
+    return "\n".join(lines)
+
+
+def build_scoring_prompt(analysis_data: Dict[str, Any], file_metadata: List[Dict[str, Any]],
+                         file_issue_counts: Optional[Dict[str, int]] = None,
+                         token_budget: Optional[int] = None) -> PromptBuild:
+    """Assemble the scoring prompt, filling the remaining token budget with sampled files."""
+    token_budget = token_budget or DEFAULT_PROMPT_TOKEN_BUDGET
+    repo_name = analysis_data.get("repo", "Unknown")
+
+    header = f"Analyze the GitHub repository {repo_name} and score it across multiple dimensions. Data tables are pipe-separated."
+    metrics = format_metrics_tables(analysis_data, file_metadata)
+    fixed_sections = [header, metrics, SCORING_RESPONSE_FORMAT]
+    section_tokens = {
+        "header": count_tokens(header),
+        "metrics": count_tokens(metrics),
+        "format": count_tokens(SCORING_RESPONSE_FORMAT),
+    }
+    # Section separators ("\n\n") are counted as one token each
+    used = sum(section_tokens.values()) + len(fixed_sections)
+
+    file_header = "FILES (sampled)\npath|ext|kb|issues"
+    file_rows: List[str] = []
+    files_included: List[str] = []
+    remaining = token_budget - used - count_tokens(file_header) - 1
+    misses = 0
+    if remaining > 0 and file_metadata:
+        for file_info in sample_files(file_metadata, file_issue_counts, seed=repo_name):
+            path = _file_path(file_info)
+            size_kb = (file_info.get("size_bytes", file_info.get("size", 0)) or 0) / 1024
+            issues = (file_issue_counts or {}).get(path, 0)
+            row = f"{path}|{file_info.get('file_extension', '')}|{size_kb:.1f}|{issues}"
+            row_tokens = count_tokens(row) + 1
+            if row_tokens > remaining:
+                # Try the next candidate: a shorter path may still fit
+                misses += 1
+                if misses >= 20:
+                    break
+                continue
+            file_rows.append(row)
+            files_included.append(path)
+            remaining -= row_tokens
+            if remaining < 8:
+                break
+
+    sections = [header, metrics]
+    if file_rows:
+        files_section = "\n".join([file_header] + file_rows)
+        section_tokens["files"] = count_tokens(files_section)
+        sections.append(files_section)
+    sections.append(SCORING_RESPONSE_FORMAT)
+
+    prompt = "\n\n".join(sections)
+    return PromptBuild(
+        prompt=prompt,
+        prompt_tokens=count_tokens(prompt),
+        token_budget=token_budget,
+        files_total=len(file_metadata),
+        files_included=files_included,
+        section_tokens=section_tokens,
+    )
+
+
+def format_metrics_tables(analysis_data: Dict[str, Any], file_metadata: List[Dict[str, Any]],
+                          max_rows: int = 8) -> str:
+    """Compact repository, team and code metrics into dense tables."""
+    languages = analysis_data.get("languages") or {}
+    team_data = analysis_data.get("team") or {}
+    commits_data = analysis_data.get("commits") or {}
+    contributions = team_data.get("contributions") or []
+
+    summary = format_table(["metric", "value"], [
+        ["commits", commits_data.get("count", 0)],
+        ["files", len(file_metadata)],
+        ["contributors", len(contributions)],
+        ["gini_contribution", team_data.get("giniContribution", 0)],
+        ["top3_share", team_data.get("topContributorsShare", 0)],
+        ["compartmentalization_median", commits_data.get("medianCompartmentalization", 1.0)],
+        ["compartmentalization_mean", commits_data.get("meanCompartmentalization", 1.0)],
+    ])
+
+    language_total = sum(languages.values()) or 1
+    top_languages = sorted(languages.items(), key=lambda item: item[1], reverse=True)[:max_rows]
+    language_table = format_table(["language", "pct"], [
+        [name, 100.0 * size / language_total] for name, size in top_languages
+    ])
+
+    file_types: Dict[str, int] = {}
+    for file_info in file_metadata:
+        ext = (file_info.get("file_extension") or "").lower()
+        if ext:
+            file_types[ext] = file_types.get(ext, 0) + 1
+    top_types = sorted(file_types.items(), key=lambda item: item[1], reverse=True)[:max_rows]
+    types_table = format_table(["ext", "files"], top_types)
+
+    top_contributors = sorted(contributions, key=lambda c: c.get("netLines", 0), reverse=True)[:5]
+    contributor_table = format_table(["author", "net_lines"], [
+        [c.get("author", "unknown"), c.get("netLines", 0)] for c in top_contributors
+    ])
+
+    sections = ["SUMMARY\n" + summary]
+    if top_languages:
+        sections.append("LANGUAGES\n" + language_table)
+    if top_types:
+        sections.append("FILE TYPES\n" + types_table)
+    if top_contributors:
+        sections.append("TOP CONTRIBUTORS\n" + contributor_table)
+    return "\n\n".join(sections)
+
+
+def issue_counts_from_file_analysis(file_analysis: Optional[List[Dict[str, Any]]]) -> Dict[str, int]:
+    """Map file paths to issue counts from stored per-file analysis results."""
+    counts: Dict[str, int] = {}
+    for analysis in file_analysis or []:
+        path = analysis.get("file_path")
+        if path:
+            counts[path] = counts.get(path, 0) + len(analysis.get("issues") or [])
+    return counts
+
+
+def _file_path(file_info: Dict[str, Any]) -> str:
+    return file_info.get("relative_path") or file_info.get("path") or ""
+
+
+def _format_cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}".rstrip("0").rstrip(".") if value else "0"
+    return str(value).replace("|", "/").replace("\n", " ")
@@ -0,0 +1,270 @@
+"""
+Persistence and read layer for analyzed repositories.
+
+``analyze_and_store_repo`` writes the repository row once, after the whole
+pipeline has run, in a compact form:
+
+- ``raw_analysis`` no longer repeats the languages, team and commits documents
+  stored in their own columns, nor the list of skipped files.
+- The per-file arrays (file_metadata, file_analysis and the skipped files) are
+  written to ``repo_file_chunks`` as fixed-size chunks in batched inserts, not
+  inline in the row.
+
+Chunks carry a generation id recorded in the row's ``chunked_fields``, so a
+re-analysis inserts the new chunks, switches the row to them and then deletes
+the old ones; readers never see a half-written set. ``load_repo`` reassembles
+the documents an endpoint asks for in the previous row shape, and reads rows
+written inline by earlier versions as they are.
+
+Reads through the deployment's client are cached in the shared cache
+(core.services.shared_cache) under the repository's scope, and every write
+invalidates that scope once it has committed.
+
+With ``REPO_STORAGE_ENCODING`` set (see storage_codec), the cold documents,
+``raw_analysis`` and each chunk's ``items``, are written compressed. Reads
+decode them transparently, and only for the columns and chunks an endpoint
+selected.
+
+Tables:
+
+    repos             (... existing columns ..., chunked_fields jsonb)
+    repo_file_chunks  (id uuid primary key, repo_id uuid, field text, generation text,
+                       chunk int, item_count int, items jsonb, created_at timestamptz)
+"""
+
+import json
+import logging
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.services import tracing
+from core.services.shared_cache import SharedCache, cache as shared_cache, repo_scope
+from core.services.storage_codec import REPO_STORAGE_ENCODING, decode, encode, resolve_encoding
+from core.services.supabase import supabase
+
+logger = logging.getLogger(__name__)
+
+REPOS_TABLE = "repos"
+CHUNKS_TABLE = "repo_file_chunks"
+
+# Items per chunk row, and the payload size at which a batched insert is sent
+CHUNK_ITEMS = int(os.getenv("REPO_CHUNK_ITEMS", "500"))
+INSERT_BATCH_BYTES = int(os.getenv("REPO_INSERT_BATCH_BYTES", str(2 * 1024 * 1024)))
+
+CHUNKED_FIELDS = ("file_metadata", "file_analysis", "skipped_files")
+
+# raw_analysis keys stored in their own columns
+ANALYSIS_COLUMNS = {"languages": "languages", "team": "team_data", "commits": "commits_data"}
+
+# Columns for repository listings, which leave out the per-file arrays
+LIST_COLUMNS = [
+    "id", "user_id", "owner", "name", "full_name", "description", "html_url", "clone_url",
+    "default_branch", "language", "stars_count", "forks_count", "size_bytes", "window_days",
+    "max_commits", "languages", "team_data", "commits_data", "raw_analysis", "file_storage_base_path",
+    "file_count", "files_ready_for_embedding", "score_issues", "chunked_fields", "analysis_date", "created_at",
+]
+
+
+def payload_size(payload: Any) -> int:
+    """Bytes of ``payload`` as JSON, as sent to the database."""
+    return len(json.dumps(payload, default=str).encode())
+
+
+def compact_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """raw_analysis without the documents stored elsewhere."""
+    compact = {key: value for key, value in analysis.items() if key not in ANALYSIS_COLUMNS}
+    if isinstance(compact.get("file_storage"), dict):
+        compact["file_storage"] = {k: v for k, v in compact["file_storage"].items() if k != "skipped_files"}
+    return compact
+
+
+def expand_analysis(row: Dict[str, Any], skipped_files: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+    """raw_analysis as analyze_repo returned it, from a compact row."""
+    compact = decode(row.get("raw_analysis"))
+    if not compact or not row.get("chunked_fields"):
+        return compact
+    analysis = dict(compact)
+    for key, column in ANALYSIS_COLUMNS.items():
+        if column in row:
+            analysis[key] = row[column]
+    if skipped_files is not None and isinstance(analysis.get("file_storage"), dict):
+        analysis["file_storage"] = {**analysis["file_storage"], "skipped_files": skipped_files}
+    return analysis
+
+
+class RepoStore:
+    """The repos table plus its repo_file_chunks."""
+
+    def __init__(self, client=None, chunk_items: int = CHUNK_ITEMS,
+                 encoding: Optional[str] = REPO_STORAGE_ENCODING, cache: Optional[SharedCache] = None):
+        self.client = client or supabase
+        self.chunk_items = max(1, chunk_items)
+        self.encoding = resolve_encoding(encoding)
+        # Cache keys are repository ids, which are only meaningful for the deployment's own database
+        self.cache = cache if cache is not None else (shared_cache if self.client is supabase else None)
+
+    def _invalidate(self, repo_id: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(repo_scope(str(repo_id)))
+
+    def resolve_repo_id(self, full_name: str) -> str:
+        """The id of the repository's existing row, or a new one for its first analysis."""
+        rows = self.client.table(REPOS_TABLE).select("id").eq("full_name", full_name).execute().data or []
+        return rows[0]["id"] if rows else str(uuid.uuid4())
+
+    def _write_chunks(self, repo_id: str, generation: str, arrays: Dict[str, List[Any]],
+                      stats: Dict[str, int]) -> None:
+        batch: List[Dict[str, Any]] = []
+        batch_bytes = 0
+
+        def flush() -> None:
+            nonlocal batch, batch_bytes
+            if batch:
+                self.client.table(CHUNKS_TABLE).insert(batch).execute()
+                stats["requests"] += 1
+                stats["chunk_bytes"] += batch_bytes
+                batch, batch_bytes = [], 0
+
+        for field, items in arrays.items():
+            for index, start in enumerate(range(0, len(items), self.chunk_items)):
+                part = items[start:start + self.chunk_items]
+                row = {
+                    "repo_id": str(repo_id),
+                    "field": field,
+                    "generation": generation,
+                    "chunk": index,
+                    "item_count": len(part),
+                    "items": encode(part, self.encoding),
+                }
+                size = payload_size(row)
+                if batch and batch_bytes + size > INSERT_BATCH_BYTES:
+                    flush()
+                batch.append(row)
+                batch_bytes += size
+                stats["chunk_rows"] += 1
+        flush()
+
+    @tracing.traced("repo_store.save_repo")
+    def save_repo(self, repo_id: str, row: Dict[str, Any], analysis: Dict[str, Any],
+                  arrays: Dict[str, List[Any]]) -> Dict[str, int]:
+        """
+        Write a repository's analysis: the per-file ``arrays`` (keyed by a name in
+        CHUNKED_FIELDS) as chunks, then the compact row in one upsert, then drop the
+        previous analysis' chunks. Returns the requests made and bytes written.
+        """
+        generation = uuid.uuid4().hex
+        stats = {"requests": 0, "row_bytes": 0, "chunk_rows": 0, "chunk_bytes": 0}
+        arrays = {field: list(items or []) for field, items in arrays.items()}
+        self._write_chunks(repo_id, generation, arrays, stats)
+
+        document = {
+            **row,
+            "id": str(repo_id),
+            **{column: analysis.get(key, {}) for key, column in ANALYSIS_COLUMNS.items()},
+            "raw_analysis": encode(compact_analysis(analysis), self.encoding),
+            "chunked_fields": {field: {"generation": generation, "count": len(items)} for field, items in arrays.items()},
+            # Inline copies written by earlier versions
+            "file_metadata": [],
+            "file_analysis": [],
+        }
+        result = self.client.table(REPOS_TABLE).upsert(document, on_conflict="full_name").execute()
+        stats["requests"] += 1
+        stats["row_bytes"] = payload_size(document)
+        if not result.data:
+            raise RuntimeError("Failed to save repository")
+
+        self._invalidate(repo_id)
+
+        self.client.table(CHUNKS_TABLE).delete().eq("repo_id", str(repo_id)).neq("generation", generation).execute()
+        stats["requests"] += 1
+        stats["bytes_written"] = stats["row_bytes"] + stats["chunk_bytes"]
+        return stats
+
+    def update_field(self, repo_id: str, field: str, items: List[Any]) -> None:
+        """Replace one per-file array (e.g. file_metadata after a review)."""
+        rows = self.client.table(REPOS_TABLE).select("chunked_fields").eq("id", repo_id).execute().data or []
+        chunked = (rows[0].get("chunked_fields") if rows else None) or {}
+        if field not in chunked:
+            self.client.table(REPOS_TABLE).update({field: items}).eq("id", repo_id).execute()
+            self._invalidate(repo_id)
+            return
+        generation = uuid.uuid4().hex
+        self._write_chunks(repo_id, generation, {field: items},
+                           {"requests": 0, "chunk_rows": 0, "chunk_bytes": 0})
+        chunked = {**chunked, field: {"generation": generation, "count": len(items)}}
+        self.client.table(REPOS_TABLE).update({"chunked_fields": chunked}).eq("id", repo_id).execute()
+        self._invalidate(repo_id)
+        (self.client.table(CHUNKS_TABLE).delete().eq("repo_id", str(repo_id)).eq("field", field)
+         .neq("generation", generation).execute())
+
+    def _read_chunks(self, repo_id: str, chunked: Dict[str, Dict[str, Any]],
+                     fields: Iterable[str]) -> Dict[str, List[Any]]:
+        wanted = [field for field in fields if field in chunked]
+        arrays: Dict[str, List[Any]] = {field: [] for field in wanted}
+        if not wanted:
+            return arrays
+        rows = (
+            self.client.table(CHUNKS_TABLE).select("field,generation,chunk,items")
+            .eq("repo_id", str(repo_id)).in_("field", wanted).order("chunk").execute().data or []
+        )
+        for row in rows:
+            field = row["field"]
+            if row["generation"] == chunked[field]["generation"]:
+                arrays[field].extend(decode(row["items"]) or [])
+        return arrays
+
+    @tracing.traced("repo_store.load_repo")
+    def load_repo(self, repo_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        A repository row in its full shape, or None if it does not exist. With
+        ``fields``, only those columns are read (and only those chunks fetched).
+        """
+        fields = list(fields) if fields is not None else None
+        if self.cache is None:
+            return self._load_repo(repo_id, fields)
+        key = ",".join(sorted(fields)) if fields is not None else "*"
+        return self.cache.get_or_load("repo_row", repo_scope(str(repo_id)), key,
+                                      lambda: self._load_repo(repo_id, fields))
+
+    def _load_repo(self, repo_id: str, fields: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        if fields is None:
+            columns = "*"
+        else:
+            needed = set(fields) | {"chunked_fields"}
+            if "raw_analysis" in needed:
+                needed.update(ANALYSIS_COLUMNS.values())
+            needed.discard("skipped_files")
+            columns = ",".join(sorted(needed))
+        rows = self.client.table(REPOS_TABLE).select(columns).eq("id", repo_id).execute().data or []
+        if not rows:
+            return None
+        row = rows[0]
+        chunked = row.get("chunked_fields") or {}
+        if not chunked:
+            return row
+
+        if fields is None:
+            wanted = list(CHUNKED_FIELDS)
+        else:
+            wanted = [field for field in fields if field in CHUNKED_FIELDS]
+            if "raw_analysis" in fields:
+                wanted.append("skipped_files")
+        arrays = self._read_chunks(repo_id, chunked, wanted)
+        for field in ("file_metadata", "file_analysis"):
+            if field in arrays:
+                row[field] = arrays[field]
+        if "raw_analysis" in row:
+            row["raw_analysis"] = expand_analysis(row, arrays.get("skipped_files"))
+        return row
+
+    def list_repos(self, user_id: Optional[str] = None, order_by: str = "created_at",
+                   limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Repository rows without their per-file arrays, newest first."""
+        query = self.client.table(REPOS_TABLE).select(",".join(LIST_COLUMNS))
+        if user_id is not None:
+            query = query.eq("user_id", user_id)
+        rows = query.order(order_by, desc=True).range(offset, offset + limit - 1).execute().data or []
+        for row in rows:
+            row["raw_analysis"] = expand_analysis(row)
+        return rows
@@ -0,0 +1,204 @@
+"""
+Fast response path for large JSON payloads.
+
+- ``FastJSONResponse`` renders with orjson when it is installed (falling back
+  to compact ``json.dumps``). It is the app's default response class; routes
+  with multi-MB payloads return it directly, which also skips FastAPI's
+  ``jsonable_encoder`` pass over the content.
+- ``model_response`` returns a dict in a response model's shape without
+  validating it again.
+- ``ndjson_response`` streams one JSON document per line, so clients can
+  start rendering before the last item is serialized.
+- ``CompressionMiddleware`` compresses responses of at least
+  ``COMPRESS_MIN_BYTES`` with brotli (when installed) or gzip, whichever the
+  client's ``Accept-Encoding`` prefers. Streamed bodies are compressed chunk
+  by chunk and flushed, so each chunk still reaches the client as it is sent.
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Dict, Iterable, Optional, Type
+
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent as they are
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Brotli's higher qualities cost far more CPU than they save on JSON
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Lines per chunk of an NDJSON stream
+NDJSON_CHUNK_LINES = 500
+
+# Streams that must reach the client unbuffered and unchanged
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes; values JSON has no type for are converted like ``default=str``."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(model: Type[BaseModel], data: Dict[str, Any], **kwargs) -> FastJSONResponse:
+    """
+    ``data`` restricted to ``model``'s fields, with their defaults filled in.
+    Only the required fields are checked; the values were built by our own code.
+    """
+    fields = model.model_fields
+    if any(field.is_required() and name not in data for name, field in fields.items()):
+        # Raises the usual validation error
+        model(**data)
+    content = {name: data[name] if name in data else field.get_default(call_default_factory=True)
+               for name, field in fields.items()}
+    return FastJSONResponse(content, **kwargs)
+
+
+def ndjson_response(items: Iterable[Any], **kwargs) -> StreamingResponse:
+    """Stream ``items`` as newline-delimited JSON, NDJSON_CHUNK_LINES lines per chunk."""
+    def lines():
+        chunk = []
+        for item in items:
+            chunk.append(dumps(item))
+            if len(chunk) >= NDJSON_CHUNK_LINES:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", **kwargs)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """``br`` or ``gzip``, whichever the client accepts with the higher q-value (``br`` on ties)."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+    wildcard = offered.get("*", 0.0)
+    candidates = [("br", 1)] if brotli is not None else []
+    candidates.append(("gzip", 0))
+    best = max(candidates, key=lambda c: (offered.get(c[0], wildcard), c[1]))
+    return best[0] if offered.get(best[0], wildcard) > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits 31: a gzip header and trailer around the deflate stream
+            self._gzip = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compressed ``data``, flushed so the client can decode it now."""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies of at least ``minimum_size`` bytes."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        encoding = negotiate_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Held until the first body chunk shows whether the response is worth compressing
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = {k.lower(): v for k, v in start["headers"]}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in headers or content_type.startswith(UNCOMPRESSED_TYPES)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                start["headers"] = [(k, v) for k, v in start["headers"] if k.lower() != b"content-length"]
+                start["headers"].append((b"content-encoding", encoding.encode()))
+                if b"vary" in headers:
+                    start["headers"] = [(k, v + b", Accept-Encoding" if k.lower() == b"vary" else v)
+                                        for k, v in start["headers"]]
+                else:
+                    start["headers"].append((b"vary", b"Accept-Encoding"))
+                if not more_body:
+                    body = compressor.finish(body)
+                    start["headers"].append((b"content-length", str(len(body)).encode()))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            if more_body:
+                data = compressor.chunk(body) if body else b""
+                if data:
+                    await send({"type": "http.response.body", "body": data, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
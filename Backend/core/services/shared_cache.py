@@ -0,0 +1,236 @@
+"""
+Caches shared by all workers of a deployment.
+
+``CACHE_BACKEND`` selects where entries live:
+
+- ``memory`` (default): a bounded LRU inside the process, enough for one worker
+- ``sqlite``: a SQLite database in WAL mode at ``CACHE_PATH``, shared by every
+  worker process on the host (``WORKERS=4 ./start_backend.sh``)
+- ``none``: no caching
+
+Entries belong to a scope (``repo:{id}`` for everything derived from one
+repository's stored analysis) or to none (content-addressed blobs, tokens).
+Each scope has a generation number kept in the backend next to the entries.
+A lookup reads the generation first and the entry under it; ``invalidate``
+increments it once a write has committed. Every worker therefore stops
+returning entries from before the write on its next lookup, and a value that
+was being loaded while the write happened is stored under the old generation,
+where it is never read. Superseded entries are left to expire (``CACHE_TTL``).
+
+Values are stored as JSON, so each hit is a fresh copy the caller may modify.
+Backend errors are logged and treated as misses.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from core.services import metrics
+from core.services.log_setup import sample
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(tempfile.gettempdir(), "vibecheck-cache.db"))
+# Seconds an entry is kept; generations make invalidation immediate, this bounds staleness
+# from writes that bypass RepoStore
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+CACHE_MEMORY_BYTES = int(os.getenv("CACHE_MEMORY_BYTES", str(256 * 1024 * 1024)))
+# Larger values are not cached
+CACHE_MAX_VALUE_BYTES = int(os.getenv("CACHE_MAX_VALUE_BYTES", str(8 * 1024 * 1024)))
+
+# Expired rows are purged from the SQLite cache after this many writes
+PURGE_EVERY = 1000
+
+
+def repo_scope(repo_id: str) -> str:
+    return f"repo:{repo_id}"
+
+
+class MemoryBackend:
+    """Process-local LRU bounded by the stored bytes."""
+
+    def __init__(self, max_bytes: int = CACHE_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._bytes -= len(self._entries.pop(key)[1])
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (time.time() + ttl, value)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._entries:
+                self._bytes -= len(self._entries.popitem(last=False)[1][1])
+
+    def generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    def bump(self, scope: str) -> int:
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            return self._generations[scope]
+
+
+class SQLiteBackend:
+    """Entries and generations in one WAL-mode SQLite file, one connection per thread."""
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries "
+                         "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL) WITHOUT ROWID")
+            conn.execute("CREATE TABLE IF NOT EXISTS generations "
+                         "(scope TEXT PRIMARY KEY, generation INTEGER NOT NULL) WITHOUT ROWID")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)", (key, value, now + ttl))
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+
+    def generation(self, scope: str) -> int:
+        row = self._conn().execute("SELECT generation FROM generations WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, scope: str) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO generations (scope, generation) VALUES (?, 1) "
+                         "ON CONFLICT(scope) DO UPDATE SET generation = generation + 1", (scope,))
+            (generation,) = conn.execute("SELECT generation FROM generations WHERE scope = ?", (scope,)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return generation
+
+
+def make_backend(name: str = CACHE_BACKEND):
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name!r} (expected 'memory', 'sqlite' or 'none')")
+
+
+class SharedCache:
+    """Named caches over one backend; ``name`` labels the hit/miss metrics."""
+
+    def __init__(self, backend, ttl: float = CACHE_TTL, max_value_bytes: int = CACHE_MAX_VALUE_BYTES):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_value_bytes = max_value_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _lookup(self, name: str, scope: Optional[str], key: str) -> Tuple[str, Any]:
+        try:
+            full_key = f"{name}:{key}"
+            if scope is not None:
+                full_key = f"{name}:{scope}#{self.backend.generation(scope)}:{key}"
+            value = self.backend.get(full_key)
+        except Exception as e:
+            logger.warning("Shared cache lookup failed: %s", e, extra=sample(100))
+            return "", None
+        metrics.record_cache(name, hit=value is not None)
+        return full_key, json.loads(value) if value is not None else None
+
+    def _store(self, full_key: str, value: Any, ttl: Optional[float]) -> None:
+        if not full_key or value is None:
+            return
+        data = json.dumps(value, separators=(",", ":"), default=str).encode()
+        if len(data) > self.max_value_bytes:
+            return
+        try:
+            self.backend.set(full_key, data, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            logger.warning("Shared cache write failed: %s", e, extra=sample(100))
+
+    def get_or_load(self, name: str, scope: Optional[str], key: str, loader: Callable[[], Any],
+                    ttl: Optional[float] = None) -> Any:
+        """The cached value, or ``loader()`` stored for next time (``None`` results are not stored)."""
+        if self.backend is None:
+            return loader()
+        full_key, value = self._lookup(name, scope, key)
+        if value is None:
+            value = loader()
+            self._store(full_key, value, ttl)
+        return value
+
+    async def get_or_load_async(self, name: str, scope: Optional[str], key: str,
+                                loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        if self.backend is None:
+            return await loader()
+        full_key, value = self._lookup(name, scope, key)
+        if value is None:
+            value = await loader()
+            self._store(full_key, value, ttl)
+        return value
+
+    def generation(self, scope: str) -> Optional[int]:
+        """The scope's current generation; ``None`` when caching is off or the backend fails."""
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.generation(scope)
+        except Exception as e:
+            logger.warning("Shared cache lookup failed: %s", e, extra=sample(100))
+            return None
+
+    def invalidate(self, scope: str) -> None:
+        """Drop every entry in ``scope`` for all workers; call after the write has committed."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.bump(scope)
+        except Exception as e:
+            logger.error("Shared cache invalidation of %s failed: %s", scope, e)
+
+
+cache = SharedCache(make_backend())
@@ -0,0 +1,96 @@
+"""
+Compact encoding for large, cold JSON documents stored in the database.
+
+Encoded values are stored in place of the document as a small JSON envelope
+``{"$encoding": "zstd+msgpack", "$data": "<base64>"}``, so they fit the same
+JSONB columns and plain documents still read back unchanged. zstd-compressed
+msgpack is used when both packages are installed; otherwise zlib-compressed
+JSON from the standard library. Decoding handles either, whatever the current
+setting, so the setting can change without rewriting stored rows.
+
+``REPO_STORAGE_ENCODING`` selects the encoding for new writes: "json" (plain
+documents, the default), "compressed" (the best available) or a specific
+encoding name.
+"""
+
+import base64
+import json
+import os
+import zlib
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # Optional: fall back to zlib-compressed JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ENCODING_KEY = "$encoding"
+DATA_KEY = "$data"
+
+ZSTD_MSGPACK = "zstd+msgpack"
+ZLIB_JSON = "zlib+json"
+
+REPO_STORAGE_ENCODING = os.getenv("REPO_STORAGE_ENCODING", "json")
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+
+class CodecError(Exception):
+    pass
+
+
+def best_encoding() -> str:
+    return ZSTD_MSGPACK if msgpack is not None and zstandard is not None else ZLIB_JSON
+
+
+def resolve_encoding(setting: Optional[str] = REPO_STORAGE_ENCODING) -> Optional[str]:
+    """The encoding for a REPO_STORAGE_ENCODING value, or None for plain JSON."""
+    if not setting or setting == "json":
+        return None
+    if setting == "compressed":
+        return best_encoding()
+    if setting == ZLIB_JSON:
+        return setting
+    if setting == ZSTD_MSGPACK:
+        if msgpack is None or zstandard is None:
+            raise CodecError("zstd+msgpack storage encoding needs the zstandard and msgpack packages")
+        return setting
+    raise CodecError(f"Unknown storage encoding: {setting}")
+
+
+def encode(value: Any, encoding: Optional[str]) -> Any:
+    """``value`` wrapped in an encoded envelope, or unchanged for plain JSON."""
+    if encoding is None:
+        return value
+    if encoding == ZSTD_MSGPACK:
+        raw = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(msgpack.packb(value, default=str))
+    elif encoding == ZLIB_JSON:
+        raw = zlib.compress(json.dumps(value, default=str, separators=(",", ":")).encode(), ZLIB_LEVEL)
+    else:
+        raise CodecError(f"Unknown storage encoding: {encoding}")
+    return {ENCODING_KEY: encoding, DATA_KEY: base64.b64encode(raw).decode("ascii")}
+
+
+def is_encoded(value: Any) -> bool:
+    return isinstance(value, dict) and ENCODING_KEY in value and DATA_KEY in value and len(value) == 2
+
+
+def decode(value: Any) -> Any:
+    """The document inside an encoded envelope; anything else is returned as it is."""
+    if not is_encoded(value):
+        return value
+    encoding = value[ENCODING_KEY]
+    raw = base64.b64decode(value[DATA_KEY])
+    if encoding == ZSTD_MSGPACK:
+        if msgpack is None or zstandard is None:
+            raise CodecError("Reading zstd+msgpack rows needs the zstandard and msgpack packages")
+        return msgpack.unpackb(zstandard.ZstdDecompressor().decompress(raw), strict_map_key=False)
+    if encoding == ZLIB_JSON:
+        return json.loads(zlib.decompress(raw))
+    raise CodecError(f"Unknown storage encoding: {encoding}")
@@ -1,12 +1,14 @@
-from supabase import create_client
-import dotenv
 import os
+import threading
 
-# Load .env file from the project root
-import sys
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-env_path = os.path.join(project_root, ".env")
-dotenv.load_dotenv(env_path)
+from core.services.env import load_env
+from core.services.metrics import instrument_client
+
+# Load .env files (Backend/.env, then the project root's)
+load_env()
+
+# Storage and database backend: "supabase" (default) or "local" (SQLite + filesystem)
+VIBECHECK_BACKEND = os.environ.get("VIBECHECK_BACKEND", "supabase").lower()
 
 # Get Supabase configuration
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
@@ -17,5 +19,48 @@ SUPABASE_ANON_KEY = os.environ.get("SUPABASE_ANON_KEY")
 if not SUPABASE_URL and SUPABASE_PROJECT_ID:
     SUPABASE_URL = f"https://{SUPABASE_PROJECT_ID}.supabase.co"
 
-# Only create client if both URL and KEY are available
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY) if SUPABASE_URL and SUPABASE_ANON_KEY else None
+if VIBECHECK_BACKEND not in ("supabase", "local"):
+    raise ValueError(f"Unknown VIBECHECK_BACKEND: {VIBECHECK_BACKEND!r} (expected 'supabase' or 'local')")
+
+
+def _create_client():
+    if VIBECHECK_BACKEND == "local":
+        # Same table/storage API, served from VIBECHECK_DATA_DIR
+        from core.services.local_backend import LocalClient
+        client = LocalClient()
+    else:
+        # supabase-py pulls in its HTTP, auth and storage clients; only loaded on first use
+        from supabase import create_client
+        client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    # Time every table query for /metrics
+    return instrument_client(client)
+
+
+class LazyClient:
+    """
+    Stands in for the database/storage client and creates it on first attribute
+    access, so importing a router does not import or connect the client. Falsy
+    when no backend is configured, like the ``None`` it replaces.
+    """
+
+    def __init__(self, factory, configured: bool):
+        self._factory = factory
+        self._configured = configured
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return self._configured
+
+    def get(self):
+        if self._client is None and self._configured:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+supabase = LazyClient(_create_client, VIBECHECK_BACKEND == "local" or bool(SUPABASE_URL and SUPABASE_ANON_KEY))
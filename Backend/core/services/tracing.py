@@ -0,0 +1,364 @@
+"""
+Lightweight request tracing.
+
+A span is opened with ``with span("name", key=value):`` or the ``@traced()``
+decorator (sync or async functions). The current span lives in a context
+variable, so tasks started with ``asyncio.create_task``/``gather`` and calls
+through ``asyncio.to_thread`` become children of the span that started them.
+A span opened with no current span starts a new trace.
+
+A trace is finished once all of its spans have ended (spans in background
+tasks can outlive the root). Finished traces are kept in ``recent_traces`` for
+``GET /debug/traces`` and handed to the configured exporters on a background
+thread:
+
+- ``TRACE_EXPORT_PATH``: append each trace as one JSON line
+- ``OTEL_EXPORTER_OTLP_ENDPOINT``: POST OTLP/HTTP JSON to ``{endpoint}/v1/traces``
+
+``critical_path`` walks a trace back from the root's end, always following
+the child that finished last, and attributes every moment of the root's
+duration to exactly one span on that path.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1").lower() not in ("0", "false", "no")
+# Finished traces kept in memory for /debug/traces
+TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", "50"))
+# Spans beyond this in one trace are counted but not recorded (per-file spans on large repos)
+MAX_SPANS_PER_TRACE = int(os.getenv("TRACE_MAX_SPANS", "5000"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "vibecheck-backend")
+
+# Offset from perf_counter to wall-clock seconds, for exported timestamps
+_WALL_OFFSET = time.time() - time.perf_counter()
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    """Spans sharing one trace id; finished when no span is open."""
+
+    def __init__(self):
+        self.trace_id = _new_id(128)
+        self.spans: List["Span"] = []
+        self.open = 0
+        self.dropped = 0
+        self.finished = False
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> Optional["Span"]:
+        return self.spans[0] if self.spans else None
+
+    def to_dict(self, spans: bool = True, critical: bool = True) -> Dict[str, Any]:
+        root = self.root
+        result = {
+            "trace_id": self.trace_id,
+            "name": root.name if root else None,
+            "duration_ms": round(root.duration * 1000, 3) if root else 0.0,
+            "span_count": len(self.spans),
+            "dropped_spans": self.dropped,
+        }
+        if critical:
+            result["critical_path"] = critical_path(self)
+        if spans:
+            result["spans"] = [s.to_dict(root.start if root else 0.0) for s in self.spans]
+        return result
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "end", "status", "error")
+
+    def __init__(self, trace: Trace, parent_id: Optional[str], name: str, attributes: Dict[str, Any],
+                 start: Optional[float] = None):
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self, origin: float = 0.0) -> Dict[str, Any]:
+        result = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+        if self.end is None:
+            result["open"] = True
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace is full."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+recent_traces: Deque[Trace] = deque(maxlen=TRACE_BUFFER)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _start(name: str, attributes: Dict[str, Any], start: Optional[float] = None) -> Optional[Span]:
+    parent = _current.get()
+    trace = parent.trace if parent is not None else Trace()
+    with trace._lock:
+        if len(trace.spans) >= MAX_SPANS_PER_TRACE:
+            trace.dropped += 1
+            return None
+        span = Span(trace, parent.span_id if parent is not None else None, name, attributes, start)
+        trace.spans.append(span)
+        trace.open += 1
+    return span
+
+
+def _finish(span: Span, end: Optional[float] = None) -> None:
+    span.end = time.perf_counter() if end is None else end
+    trace = span.trace
+    with trace._lock:
+        trace.open -= 1
+        # Spans added after the trace finished are kept but not re-exported
+        finished = trace.open == 0 and not trace.finished
+        trace.finished = trace.finished or finished
+    if finished:
+        recent_traces.append(trace)
+        _export(trace)
+
+
+class span:
+    """Context manager recording a span (a child of the current span, if any)."""
+
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self._span = _start(self.name, self.attributes) if TRACING_ENABLED else None
+        if self._span is None:
+            self._token = None
+            return _NOOP
+        self._token = _current.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._span is None:
+            return
+        if exc_type is not None:
+            self._span.status = "error"
+            self._span.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        _finish(self._span)
+
+
+def record_span(name: str, started: float, ended: float, **attributes) -> None:
+    """Record an already completed span from ``time.perf_counter`` timestamps."""
+    if not TRACING_ENABLED:
+        return
+    completed = _start(name, attributes, started)
+    if completed is not None:
+        _finish(completed, ended)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running each call of a function (sync or async) in a span."""
+
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def critical_path(trace: Trace) -> Dict[str, Any]:
+    """
+    The chain of spans that determined the root's duration.
+
+    Each step's ``self_ms`` is the part of its duration not covered by the next
+    span on the path, so the steps sum to the root's duration. ``by_name``
+    totals the same time per span name.
+    """
+    root = trace.root
+    if root is None:
+        return {"steps": [], "by_name": {}}
+    children: Dict[str, List[Span]] = {}
+    for s in trace.spans[1:]:
+        children.setdefault(s.parent_id, []).append(s)
+
+    steps: List[Dict[str, Any]] = []
+
+    def walk(node: Span, end: float, depth: int) -> None:
+        # Latest-finishing child first, then the latest one that finished before it started;
+        # children still running at that point were in parallel and are not on the path.
+        # Children outliving the parent are clipped to its end.
+        kids = sorted(children.get(node.span_id, ()), key=lambda s: min(s.start + s.duration, end), reverse=True)
+        picked = []
+        cursor = end
+        for kid in kids:
+            kid_end = min(kid.start + kid.duration, end)
+            if kid_end <= cursor and kid_end > kid.start >= node.start:
+                picked.append((kid, kid_end))
+                cursor = kid.start
+        covered = sum(kid_end - kid.start for kid, kid_end in picked)
+        steps.append({
+            "name": node.name,
+            "span_id": node.span_id,
+            "depth": depth,
+            "duration_ms": round((end - node.start) * 1000, 3),
+            "self_ms": round(max(end - node.start - covered, 0.0) * 1000, 3),
+        })
+        for kid, kid_end in reversed(picked):
+            walk(kid, kid_end, depth + 1)
+
+    walk(root, root.start + root.duration, 0)
+    by_name: Dict[str, float] = {}
+    for step in steps:
+        by_name[step["name"]] = round(by_name.get(step["name"], 0.0) + step["self_ms"], 3)
+    return {
+        "steps": steps,
+        "by_name": dict(sorted(by_name.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+
+def get_traces(limit: int = 10, spans: bool = False) -> List[Dict[str, Any]]:
+    """The most recent finished traces with their critical paths, newest first."""
+    return [trace.to_dict(spans=spans) for trace in list(recent_traces)[::-1][:limit]]
+
+
+def to_otlp(trace: Trace) -> Dict[str, Any]:
+    """A trace in the OTLP/HTTP JSON encoding."""
+
+    def value(v: Any) -> Dict[str, Any]:
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    def ns(t: float) -> str:
+        return str(int((t + _WALL_OFFSET) * 1e9))
+
+    spans = []
+    for s in trace.spans:
+        item = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": ns(s.start),
+            "endTimeUnixNano": ns(s.start + s.duration),
+            "attributes": [{"key": k, "value": value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error} if s.status == "error" else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        spans.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "vibecheck.tracing"}, "spans": spans}],
+    }]}
+
+
+class _Exporter:
+    """Ships finished traces from a daemon thread so request handling never waits on I/O."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping trace")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued traces have been exported."""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def _run(self) -> None:
+        import httpx
+
+        while True:
+            trace = self._queue.get()
+            try:
+                if TRACE_EXPORT_PATH:
+                    with open(TRACE_EXPORT_PATH, "a") as f:
+                        f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+                if OTLP_ENDPOINT:
+                    httpx.post(f"{OTLP_ENDPOINT.rstrip('/')}/v1/traces", json=to_otlp(trace), timeout=5.0)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+
+exporter = _Exporter()
+
+
+def _export(trace: Trace) -> None:
+    if TRACE_EXPORT_PATH or OTLP_ENDPOINT:
+        exporter.submit(trace)
+
@@ -0,0 +1,195 @@
+"""
+Async upload stage for the storage bucket.
+
+A pool of workers drains a bounded queue of uploads, retrying transient
+failures with jittered exponential backoff. Producers submit an upload and get
+a future back, so downloads and uploads overlap, and the bounded queue applies
+backpressure when storage is the bottleneck. Content is either bytes or the
+path of a spooled file, which is reopened for each attempt and streamed to the
+bucket. Throughput is reported in files/s and bytes/s.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import quote
+
+import httpx
+
+from core.services import tracing
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+UPLOAD_MAX_RETRIES = int(os.getenv("UPLOAD_MAX_RETRIES", "4"))
+
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class UploadResult:
+    path: str
+    size: int
+    attempts: int
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def public_url_prefix(bucket) -> str:
+    """
+    Public URL prefix of a bucket, derived from a single get_public_url call;
+    the URL of any object is then the prefix plus its quoted path.
+    """
+    probe = "__probe__"
+    url = bucket.get_public_url(probe)
+    return url[:-len(probe)] if url.endswith(probe) else url.rsplit("/", 1)[0] + "/"
+
+
+def local_public_url(prefix: str, path: str) -> str:
+    return prefix + quote(path, safe="/")
+
+
+def is_already_exists(error: Exception) -> bool:
+    message = str(error)
+    return "already exists" in message or "Duplicate" in message
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an upload error is worth retrying."""
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status", None) or getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        if status is not None and int(status) in TRANSIENT_STATUS:
+            return True
+    except (TypeError, ValueError):
+        pass
+    message = str(error).lower()
+    return any(marker in message for marker in ("timed out", "timeout", "connection reset", "temporarily unavailable"))
+
+
+class UploadPipeline:
+    """
+    Worker pool uploading to a storage bucket (``supabase.storage.from_(name)``
+    or a LocalStorageBucket).
+
+    Use as an async context manager; ``submit`` returns a future resolving to an
+    UploadResult. Objects that already exist count as uploaded.
+    """
+
+    def __init__(self, bucket, workers: int = UPLOAD_WORKERS, max_retries: int = UPLOAD_MAX_RETRIES,
+                 base_delay: float = 0.25, max_delay: float = 8.0, queue_size: Optional[int] = None):
+        self.bucket = bucket
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or self.workers * 4)
+        self._tasks: List[asyncio.Task] = []
+        # Own threads for the blocking client calls; the default executor is sized by CPU count
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._started = 0.0
+        self._finished: Optional[float] = None
+        self.files = 0
+        self.bytes = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def __aenter__(self) -> "UploadPipeline":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, path: str, content: Union[bytes, Path], content_type: str) -> "asyncio.Future[UploadResult]":
+        """Queue an upload; waits while the queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((path, content, content_type, future))
+        return future
+
+    async def close(self) -> None:
+        """Finish queued uploads and stop the workers."""
+        for _ in self._tasks:
+            await self._queue.put(None)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        self._executor.shutdown(wait=False)
+        self._finished = time.perf_counter()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job is None:
+                return
+            path, content, content_type, future = job
+            with tracing.span("storage.upload", path=path) as upload_span:
+                result = await self._upload(path, content, content_type)
+                upload_span.set("attempts", result.attempts)
+            if result.ok:
+                self.files += 1
+                self.bytes += result.size
+            else:
+                self.failures += 1
+            if not future.done():
+                future.set_result(result)
+
+    def _upload_once(self, path: str, content: Union[bytes, Path], content_type: str) -> Any:
+        file_options = {"content-type": content_type}
+        if isinstance(content, Path):
+            with open(content, "rb") as f:
+                return self.bucket.upload(path=path, file=f, file_options=file_options)
+        return self.bucket.upload(path=path, file=content, file_options=file_options)
+
+    async def _upload(self, path: str, content: Union[bytes, Path], content_type: str) -> UploadResult:
+        """Upload with retries. Never raises, so every submitted future gets a result."""
+        size = 0
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                # Inside the try: a spooled file that vanished fails this upload, not the worker
+                size = content.stat().st_size if isinstance(content, Path) else len(content)
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._upload_once, path, content, content_type
+                )
+                if isinstance(result, dict) and result.get("error"):
+                    raise RuntimeError(result["error"])
+                return UploadResult(path, size, attempt)
+            except Exception as e:
+                if is_already_exists(e):
+                    return UploadResult(path, size, attempt)
+                if attempt > self.max_retries or not is_transient(e):
+                    logger.warning("Upload of %s failed after %d attempts: %s", path, attempt, e)
+                    return UploadResult(path, size, attempt, error=str(e))
+                self.retries += 1
+                # Full jitter: sleep uniformly up to the capped exponential delay
+                await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))))
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput so far (or for the whole run once closed)."""
+        elapsed = (self._finished or time.perf_counter()) - self._started if self._started else 0.0
+        return {
+            "workers": self.workers,
+            "files": self.files,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "failures": self.failures,
+            "elapsed_s": round(elapsed, 3),
+            "files_per_s": round(self.files / elapsed, 1) if elapsed > 0 else None,
+            "bytes_per_s": round(self.bytes / elapsed) if elapsed > 0 else None,
+        }
@@ -1,7 +1,11 @@
 import os
-import logging
-from fastapi import FastAPI, HTTPException
+import time
+import asyncio
+import secrets
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.routing import compile_path
 from pydantic import BaseModel, HttpUrl
 from typing import Optional
 from core.analyzers.github_analyzer import analyze_repo, RateLimitExceeded, GitHubAPIError
@@ -9,25 +13,23 @@ from api_routes.repo_analysis import router as repo_analysis_router
 from api_routes.file_content import router as file_content_router
 from api_routes.repo_files import router as repo_files_router
 from api_routes.file_analyzer import router as file_analyzer_router
+from core.services import metrics, profiling, tracing
+from core.services.env import load_env
+from core.services.log_setup import configure_logging
+from core.services.responses import CompressionMiddleware, FastJSONResponse
 
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
-
-# Configure logging to file
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('backend.log'),
-        logging.StreamHandler()  # Also print to console
-    ]
-)
+# Load environment variables (Backend/.env, then the project root's .env)
+load_env()
+
+# Log to console and backend.log through a background queue (see core/services/log_setup.py)
+configure_logging()
 
 app = FastAPI(
     title="VibeCheck Backend",
     description="GitHub repository analysis and code quality assessment",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson rendering (see core/services/responses.py)
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -48,12 +50,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for bodies over COMPRESS_MIN_BYTES, as the client's Accept-Encoding allows
+app.add_middleware(CompressionMiddleware)
+
 # Include API routes
 app.include_router(repo_analysis_router)
 app.include_router(file_content_router)
 app.include_router(repo_files_router)
 app.include_router(file_analyzer_router)
 
+
+_route_patterns = []
+
+
+def route_template(request: Request) -> str:
+    """The matched route's path template, so metrics are labelled per route rather than per URL."""
+    if not _route_patterns:
+        # Full templates (router prefixes included) as published in the OpenAPI schema
+        for path in app.openapi()["paths"]:
+            _route_patterns.append((compile_path(path)[0], path))
+    path = request.url.path
+    for pattern, template in _route_patterns:
+        if pattern.match(path):
+            return template
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    route = route_template(request)
+    token = metrics.current_route.set(route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        # Root span of the request's trace; background work it starts joins the same trace
+        with tracing.span(f"{request.method} {route}", route=route) as request_span, \
+                profiling.profiler.track_request(route):
+            response = await call_next(request)
+            status = response.status_code
+            request_span.set("status", status)
+        return response
+    finally:
+        metrics.current_route.reset(token)
+        metrics.HTTP_LATENCY.labels(route, request.method).observe(time.perf_counter() - start)
+        metrics.HTTP_REQUESTS.labels(route, request.method, status).inc()
+
 class RateLimitResponse(BaseModel):
     has_token: bool
     token_preview: Optional[str] = None
@@ -73,6 +114,76 @@ async def debug_env():
         "has_token": bool(GITHUB_TOKEN)
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint for the whole pipeline (GitHub, files, analyzer, LLM, database, caches)."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/debug/traces")
+async def debug_traces(limit: int = 10, spans: bool = False):
+    """The last ``limit`` finished traces with critical-path breakdowns (and every span with ``spans=true``)."""
+    return {"traces": tracing.get_traces(limit, spans)}
+
+def require_admin(authorization: Optional[str] = Header(None), x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need ADMIN_TOKEN as a bearer token or X-Admin-Token; they do not exist without it."""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = x_admin_token or (authorization or "").removeprefix("Bearer ").strip()
+    if not secrets.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile(seconds: float = 10.0, route: Optional[str] = None, requests: int = 1,
+                        timeout: float = 60.0, interval_ms: float = 5.0, format: str = "collapsed",
+                        idle: bool = False):
+    """
+    Sample every thread's stack for ``seconds``, or with ``route`` (a route template such as
+    ``/api/repos/repos/{repo_id}/issues``) until ``requests`` matching requests have completed.
+    Returns collapsed stacks, or speedscope JSON with ``format=speedscope``.
+    """
+    if format not in ("collapsed", "speedscope"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+    options = {"interval": interval_ms / 1000, "include_idle": idle}
+    try:
+        if route:
+            await profiling.profiler.run_requests(route, max(requests, 1), timeout, **options)
+        else:
+            await profiling.profiler.run_window(seconds, **options)
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    summary = profiling.profiler.summary()
+    if format == "speedscope":
+        return {**profiling.profiler.speedscope(), "summary": summary}
+    headers = {f"X-Profile-{key.replace('_', '-').title()}": str(value) for key, value in summary.items()
+               if value is not None}
+    return PlainTextResponse(profiling.profiler.collapsed(), headers=headers)
+
+@app.post("/admin/memory/start", dependencies=[Depends(require_admin)])
+async def admin_memory_start(frames: int = 10):
+    """Start tracemalloc (``frames`` deep) and take the baseline snapshot."""
+    return await asyncio.to_thread(profiling.memory.start, frames)
+
+@app.get("/admin/memory/diff", dependencies=[Depends(require_admin)])
+async def admin_memory_diff(group_by: str = "lineno", top: int = 25, include: Optional[str] = None,
+                            rebase: bool = False):
+    """
+    Allocation growth since the baseline, largest first, by ``lineno`` or ``traceback``.
+    ``include`` keeps allocations with a frame in matching files (e.g. ``*code_issue_analyzer.py``);
+    ``rebase`` makes this snapshot the new baseline.
+    """
+    if group_by not in ("lineno", "traceback", "filename"):
+        raise HTTPException(status_code=400, detail="group_by must be 'lineno', 'traceback' or 'filename'")
+    try:
+        return await asyncio.to_thread(profiling.memory.diff, group_by, top, include, rebase)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/admin/memory/stop", dependencies=[Depends(require_admin)])
+async def admin_memory_stop():
+    profiling.memory.stop()
+    return {"tracing": False}
+
 @app.get("/health")
 async def health():
     return {"ok": True, "service": "VibeCheck Backend"}
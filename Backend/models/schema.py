@@ -2,8 +2,8 @@
 Database schema definitions and Pydantic models for VibeCheck.
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -94,6 +94,7 @@ class AnalyzeRequest(BaseModel):
     window_days: int = Field(3650, description="Analysis window in days")
     max_commits: int = Field(500, description="Maximum commits to analyze")
     download_zipball: bool = Field(True, description="Whether to download and extract files")
+    backend: Literal["api", "git"] = Field("api", description="Commit source: GitHub REST API or a local git clone")
 
 
 class AnalyzeWithStorageRequest(BaseModel):
@@ -102,6 +103,8 @@ class AnalyzeWithStorageRequest(BaseModel):
     window_days: int = Field(3650, description="Analysis window in days")
     max_commits: int = Field(500, description="Maximum commits to analyze")
     download_zipball: bool = Field(True, description="Whether to download and extract files")
+    review_files: bool = Field(False, description="Whether to run the per-file LLM review on stored files")
+    backend: Literal["api", "git"] = Field("api", description="Commit and file source: GitHub REST API or a local git clone")
 
 
 class UserRequest(BaseModel):
@@ -112,6 +115,7 @@ class UserRequest(BaseModel):
 
 class AnalysisResponse(BaseModel):
     repo: str = Field(..., description="Repository name")
+    backend: Optional[str] = Field(None, description="Backend used for the commit analysis")
     limits: Optional[Dict[str, Any]] = Field(None, description="Analysis limits")
     languages: Optional[Dict[str, Any]] = Field(None, description="Language analysis")
     team: Optional[Dict[str, Any]] = Field(None, description="Team analysis")
@@ -121,6 +125,7 @@ class AnalysisResponse(BaseModel):
     stored_in_db: bool = Field(False, description="Whether stored in database")
     files_stored: bool = Field(False, description="Whether files were stored")
     file_count: Optional[int] = Field(None, description="Number of files stored")
+    file_review: Optional[Dict[str, Any]] = Field(None, description="Per-file review statistics")
     warning: Optional[str] = Field(None, description="Warning message")
     error: Optional[str] = Field(None, description="Error message")
     suggestion: Optional[str] = Field(None, description="Suggestion for error resolution")
@@ -130,3 +135,38 @@ class PaginatedResponse(BaseModel):
     count: int = Field(..., description="Number of items returned")
     limit: int = Field(..., description="Maximum items per page")
     offset: int = Field(..., description="Number of items skipped")
+
+
+# LLM scoring response models
+class ScoreEntry(BaseModel):
+    title: str = Field(..., description="Score dimension title")
+    score: float = Field(..., ge=0, le=100, description="Score for this dimension")
+    color: Optional[str] = Field(None, description="CSS color for the dimension")
+    description: Optional[str] = Field(None, description="Short description of the dimension")
+
+
+class RadarPoint(BaseModel):
+    category: str = Field(..., description="Radar chart category")
+    score: float = Field(..., ge=0, le=100, description="Score for this category")
+    fullMark: float = Field(100, description="Maximum value of the axis")
+
+
+class FileScore(BaseModel):
+    name: str = Field(..., description="File name")
+    path: str = Field("", description="File path")
+    ai_percentage: Optional[float] = Field(None, ge=0, le=100, description="Estimated AI-generated percentage")
+    quality: Optional[float] = Field(None, ge=0, le=100, description="Quality score for the file")
+    flags: List[str] = Field(default_factory=list, description="Notable flags for the file")
+
+
+class ScoringResult(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    overall_score: float = Field(..., ge=0, le=100, description="Overall repository score")
+    ai_percentage: Optional[float] = Field(None, ge=0, le=100, description="Estimated AI-generated percentage")
+    previous_score: Optional[float] = Field(None, description="Previous score for comparison")
+    scores: List[ScoreEntry] = Field(..., description="Per-dimension scores")
+    radar_data: List[RadarPoint] = Field(..., description="Radar chart data points")
+    files: List[FileScore] = Field(default_factory=list, description="Per-file scoring")
+    analysis: Optional[str] = Field(None, description="Detailed analysis text")
+    recommendations: List[str] = Field(default_factory=list, description="Recommendations")
@@ -1,7 +1,11 @@
 import { Card } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { ChevronDown, ChevronUp, Code2, FileText } from "lucide-react";
-import { useState } from "react";
+import { useEffect, useState } from "react";
+
+const API_BASE = "http://localhost:8000";
+const PAGE_SIZE = 50;
+const SEVERITIES = ['error', 'warning', 'info'] as const;
 
 interface Issue {
   file: string;
@@ -16,12 +20,58 @@ interface Issue {
 interface CodeIssuesProps {
   issues: Issue[];
   category: string;
+  // When set, issues are fetched from the server a page at a time instead of using `issues`
+  repoId?: string;
+}
+
+interface IssuePage {
+  issues: Issue[];
+  next_cursor: string | null;
+  total: number;
 }
 
-export function CodeIssues({ issues, category }: CodeIssuesProps) {
+export function CodeIssues({ issues, category, repoId }: CodeIssuesProps) {
   const [isExpanded, setIsExpanded] = useState(false);
-  
-  if (!issues || issues.length === 0) {
+  const [severity, setSeverity] = useState<string | null>(null);
+  const [pagedIssues, setPagedIssues] = useState<Issue[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [total, setTotal] = useState<number | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+  const [shownCount, setShownCount] = useState(PAGE_SIZE);
+
+  const loadPage = async (cursor: string | null) => {
+    if (!repoId) return;
+    setIsLoading(true);
+    try {
+      const params = new URLSearchParams({ category: category.toLowerCase(), limit: String(PAGE_SIZE) });
+      if (severity) params.set('severity', severity);
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`${API_BASE}/api/repos/repos/${repoId}/issues/page?${params}`);
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      const page: IssuePage = await response.json();
+      setPagedIssues((previous) => (cursor ? [...previous, ...page.issues] : page.issues));
+      setNextCursor(page.next_cursor);
+      setTotal(page.total);
+    } catch (error) {
+      console.warn('Could not load issues page:', error);
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    if (repoId && isExpanded) {
+      loadPage(null);
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [repoId, category, severity, isExpanded]);
+
+  const localIssues = (issues || []).filter((issue) => !severity || issue.severity === severity);
+  const shownIssues = repoId ? pagedIssues : localIssues.slice(0, shownCount);
+  const issueCount = repoId ? (total ?? issues?.length ?? 0) : localIssues.length;
+  const hasMore = repoId ? nextCursor !== null : shownCount < localIssues.length;
+
+  if (!repoId && (!issues || issues.length === 0)) {
     return null;
   }
 
@@ -55,14 +105,28 @@ export function CodeIssues({ issues, category }: CodeIssuesProps) {
       >
         <div className="flex items-center gap-2">
           {isExpanded ? <ChevronUp className="h-4 w-4" /> : <ChevronDown className="h-4 w-4" />}
-          <span className="font-semibold">{category} Issues ({issues.length})</span>
+          <span className="font-semibold">{category} Issues ({issueCount})</span>
         </div>
-        <Badge variant="outline">{issues.length} issues found</Badge>
+        <Badge variant="outline">{issueCount} issues found</Badge>
       </div>
 
       {isExpanded && (
         <div className="mt-4 space-y-3">
-          {issues.map((issue, index) => (
+          <div className="flex gap-2">
+            {[null, ...SEVERITIES].map((value) => (
+              <button
+                key={value ?? 'all'}
+                onClick={() => {
+                  setSeverity(value);
+                  setShownCount(PAGE_SIZE);
+                }}
+                className={`px-2 py-1 text-xs rounded-md ${severity === value ? 'bg-primary/20 text-primary' : 'bg-muted/30'}`}
+              >
+                {value ? getSeverityLabel(value) : 'All'}
+              </button>
+            ))}
+          </div>
+          {shownIssues.map((issue, index) => (
             <div key={index} className="border-l-4 border-muted/50 pl-4 py-2 hover:bg-muted/30 rounded-r">
               <div className="flex items-start justify-between mb-2">
                 <div className="flex items-center gap-2">
@@ -95,6 +159,15 @@ export function CodeIssues({ issues, category }: CodeIssuesProps) {
               )}
             </div>
           ))}
+          {hasMore && (
+            <button
+              onClick={() => (repoId ? loadPage(nextCursor) : setShownCount(shownCount + PAGE_SIZE))}
+              disabled={isLoading}
+              className="w-full py-2 text-sm text-primary hover:bg-primary/10 rounded-md transition-colors"
+            >
+              {isLoading ? 'Loading...' : `Load more (${shownIssues.length} of ${issueCount})`}
+            </button>
+          )}
         </div>
       )}
     </Card>
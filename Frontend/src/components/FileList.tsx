@@ -2,9 +2,12 @@ import { Card } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { FileCode, Eye } from "lucide-react";
 import { FileViewer } from "@/components/FileViewer";
-import { useState } from "react";
+import { useCallback, useEffect, useMemo, useState } from "react";
 import { apiService } from "@/lib/api";
 
+const API_BASE = "http://localhost:8000";
+const PAGE_SIZE = 50;
+
 interface FileItem {
   name: string;
   path: string;
@@ -20,9 +23,56 @@ interface FileListProps {
   repoId?: string;
 }
 
+interface FilePage {
+  files: FileItem[];
+  next_cursor: string | null;
+  total: number;
+}
+
 export function FileList({ files, repoId }: FileListProps) {
   const [selectedFile, setSelectedFile] = useState<any>(null);
   const [isLoadingFile, setIsLoadingFile] = useState(false);
+  // With a repository, files are fetched a page at a time (lowest score first) and filtered server-side
+  const [pagedFiles, setPagedFiles] = useState<FileItem[] | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [total, setTotal] = useState<number | null>(null);
+  const [pathPrefix, setPathPrefix] = useState("");
+  const [isLoadingPage, setIsLoadingPage] = useState(false);
+
+  // Issue flags merged in by the caller, keyed by path
+  const flagsByPath = useMemo(
+    () => new Map(files.map((file) => [file.path, file.flags || file.issues || []])),
+    [files]
+  );
+
+  const loadPage = useCallback(async (cursor: string | null) => {
+    if (!repoId) return;
+    setIsLoadingPage(true);
+    try {
+      const params = new URLSearchParams({ sort: "score", limit: String(PAGE_SIZE) });
+      if (pathPrefix) params.set("path_prefix", pathPrefix);
+      if (cursor) params.set("cursor", cursor);
+      const response = await fetch(`${API_BASE}/api/repos/${repoId}/files/page?${params}`);
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      const page: FilePage = await response.json();
+      const pageFiles = page.files.map((file) => ({ ...file, issues: flagsByPath.get(file.path) || file.issues }));
+      setPagedFiles((previous) => (cursor && previous ? [...previous, ...pageFiles] : pageFiles));
+      setNextCursor(page.next_cursor);
+      setTotal(page.total);
+    } catch (error) {
+      // Fall back to the files passed in
+      console.warn("Could not load file page:", error);
+      setPagedFiles(null);
+    } finally {
+      setIsLoadingPage(false);
+    }
+  }, [repoId, pathPrefix, flagsByPath]);
+
+  useEffect(() => {
+    loadPage(null);
+  }, [loadPage]);
+
+  const shownFiles = pagedFiles ?? files;
   const getAIColor = (percentage: number) => {
     if (percentage >= 80) return "text-destructive";
     if (percentage >= 50) return "text-warning";
@@ -91,10 +141,18 @@ export function FileList({ files, repoId }: FileListProps) {
     <Card className="p-6 border-border/50">
       <div className="flex items-center justify-between mb-6">
         <h3 className="font-semibold text-lg">File Analysis</h3>
-        <Badge variant="outline">{files.length} files</Badge>
+        <Badge variant="outline">{total ?? files.length} files</Badge>
       </div>
+      {repoId && (
+        <input
+          value={pathPrefix}
+          onChange={(e) => setPathPrefix(e.target.value)}
+          placeholder="Filter by path prefix, e.g. src/"
+          className="mb-4 w-full rounded-md border border-input bg-background px-3 py-2 text-sm"
+        />
+      )}
       <div className="max-h-96 overflow-y-auto space-y-4 pr-2">
-        {files.map((file, index) => (
+        {shownFiles.map((file, index) => (
           <div
             key={index}
             className="flex items-center justify-between p-4 rounded-lg bg-muted/30 hover:bg-muted/50 transition-colors"
@@ -154,6 +212,15 @@ export function FileList({ files, repoId }: FileListProps) {
             </div>
           </div>
         ))}
+        {pagedFiles && nextCursor && (
+          <button
+            onClick={() => loadPage(nextCursor)}
+            disabled={isLoadingPage}
+            className="w-full py-2 text-sm text-primary hover:bg-primary/10 rounded-md transition-colors"
+          >
+            {isLoadingPage ? "Loading..." : `Load more (${pagedFiles.length} of ${total})`}
+          </button>
+        )}
       </div>
 
       {/* File Viewer Modal */}
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API process.
+
+Two measurements, each in fresh interpreters:
+
+- import: ``python -X importtime -c "import main"`` from Backend/. Reports
+  the total, the slowest top-level packages by self time and main's slowest
+  direct imports by cumulative time, and which of the lazily loaded client
+  packages (openai, supabase, jwt, numpy) were imported anyway.
+- first /health: starts ``uvicorn main:app`` and polls ``GET /health`` until
+  it answers, timing from process start to the first 200.
+
+Exits 1 when the median time to first /health exceeds --target-ms or a lazy
+package is imported at startup.
+
+Usage: python benchmarks/bench_cold_start.py [--runs 5] [--target-ms 1000] [--top 15] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND = os.path.join(ROOT, 'Backend')
+
+# Packages that must only be imported on first use (see core/services/supabase.py, chatgpt.py)
+LAZY_PACKAGES = ("openai", "supabase", "jwt", "numpy")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def backend_env() -> dict:
+    env = dict(os.environ)
+    # Keep runs from appending to backend.log
+    env["LOG_FILE"] = ""
+    return env
+
+
+def import_profile(top: int) -> dict:
+    """One ``-X importtime`` run of ``import main``."""
+    script = f"import sys, main; print(','.join(m for m in {LAZY_PACKAGES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=BACKEND, env=backend_env(),
+                            capture_output=True, text=True, check=True)
+    by_package: dict = {}
+    direct = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), len(match[3]), match[4]
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+        if name == "main":
+            total_us = cumulative_us
+        elif indent == 3:
+            # Children of main are indented one level below it
+            direct.append((name, cumulative_us))
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "top_packages_self_ms": {name: round(us / 1000, 1) for name, us in
+                                 sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]},
+        "main_imports_cumulative_ms": {name: round(us / 1000, 1) for name, us in
+                                       sorted(direct, key=lambda item: item[1], reverse=True)[:top]},
+        "lazy_packages_loaded": loaded,
+    }
+
+
+def first_health(timeout: float = 30.0) -> float:
+    """Milliseconds from starting uvicorn to the first 200 from /health."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=backend_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"/health did not answer within {timeout} s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1000.0, help="budget for the median time to first /health")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    profiles = [import_profile(args.top) for _ in range(args.runs)]
+    # The breakdown of the median run; totals over all runs
+    profiles.sort(key=lambda p: p["total_ms"])
+    imports = dict(profiles[len(profiles) // 2])
+    imports["total_ms_runs"] = [p["total_ms"] for p in profiles]
+
+    health = [round(first_health(), 1) for _ in range(args.runs)]
+    report = {
+        "python": sys.version.split()[0],
+        "import": imports,
+        "first_health_ms": {
+            "median": round(statistics.median(health), 1),
+            "min": min(health),
+            "max": max(health),
+            "runs": health,
+            "target": args.target_ms,
+        },
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = False
+    if report["first_health_ms"]["median"] > args.target_ms:
+        print(f"first /health took {report['first_health_ms']['median']} ms (target {args.target_ms} ms)",
+              file=sys.stderr)
+        failed = True
+    if imports["lazy_packages_loaded"]:
+        print(f"imported at startup: {', '.join(imports['lazy_packages_loaded'])}", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
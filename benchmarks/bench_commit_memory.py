@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory of materializing every commit detail before aggregating
+against folding details into CommitAggregator as they arrive.
+
+Commit details are served by an httpx.MockTransport with large patches, and
+peak Python allocations are measured with tracemalloc. Both pipelines collect
+cyclic garbage every GC_EVERY commits, so the peak reflects what they hold
+rather than when the collector last ran a full pass.
+
+The streaming state is constant apart from the compartmentalization values kept
+for the exact median, 8 bytes per commit. The benchmark asserts that the
+streaming peak grows by at most STREAMING_BYTES_PER_COMMIT between the smallest
+size that fills a whole aggregator chunk and the largest size, which leaves
+room for array over-allocation and the sorted copy the median takes.
+
+Usage: python benchmarks/bench_commit_memory.py [--sizes 250,1000,4000] [--patch-kb 16]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.analyzers.commit_metrics import CommitAggregator, compute_commit_metrics
+from core.analyzers.github_analyzer import iter_commit_details
+
+GC_EVERY = 50
+STREAMING_BYTES_PER_COMMIT = 24
+
+
+def mock_transport(patch_kb: int) -> httpx.MockTransport:
+    patch = "+" + "x" * 79 + "\n"
+    patch = patch * (patch_kb * 1024 // len(patch))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sha = request.url.path.rsplit("/", 1)[-1]
+        n = int(sha, 16)
+        files = [
+            {"filename": f"pkg{(n + i) % 7}/mod{i}.py", "additions": (n * (i + 3)) % 300, "deletions": (n * (i + 5)) % 90, "patch": patch}
+            for i in range(1 + n % 4)
+        ]
+        detail = {
+            "sha": sha,
+            "commit": {"author": {"email": f"dev{n % 13}@example.com"}, "message": "change"},
+            "author": {"login": f"dev{n % 13}"},
+            "stats": {"additions": sum(f["additions"] for f in files), "deletions": sum(f["deletions"] for f in files)},
+            "files": files,
+        }
+        return httpx.Response(200, content=json.dumps(detail).encode(), headers={"content-type": "application/json"})
+
+    return httpx.MockTransport(handler)
+
+
+async def details(client: httpx.AsyncClient, commits):
+    count = 0
+    async for detail in iter_commit_details(client, "o", "r", commits, request_delay=0, batch_delay=0):
+        count += 1
+        if count % GC_EVERY == 0:
+            gc.collect()
+        yield detail
+
+
+async def materialized(client: httpx.AsyncClient, commits):
+    return compute_commit_metrics([d async for d in details(client, commits)])
+
+
+async def streaming(client: httpx.AsyncClient, commits):
+    aggregator = CommitAggregator()
+    async for detail in details(client, commits):
+        aggregator.add(detail)
+    return aggregator.result()
+
+
+def measure(pipeline, commit_count: int, patch_kb: int):
+    commits = [{"sha": f"{i:040x}"} for i in range(commit_count)]
+
+    async def run():
+        async with httpx.AsyncClient(transport=mock_transport(patch_kb)) as client:
+            return await pipeline(client, commits)
+
+    tracemalloc.start()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = asyncio.run(run())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="250,1000,4000")
+    parser.add_argument("--patch-kb", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'commits':>8} {'materialized_mb':>16} {'streaming_mb':>13}")
+    peaks = {}
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        expected, peak_materialized = measure(materialized, size, args.patch_kb)
+        result, peak_streaming = measure(streaming, size, args.patch_kb)
+        assert result == expected, "streaming aggregation changed the result"
+        peaks[size] = peak_streaming
+        print(f"{size:>8} {peak_materialized / 2**20:>16.1f} {peak_streaming / 2**20:>13.1f}")
+
+    # Below one chunk the column buffer itself is still growing
+    full = [size for size in peaks if size >= CommitAggregator().chunk_size]
+    smallest, largest = min(full, default=0), max(full, default=0)
+    if largest > smallest:
+        per_commit = (peaks[largest] - peaks[smallest]) / (largest - smallest)
+        print(f"streaming peak growth: {per_commit:.1f} bytes/commit (bound {STREAMING_BYTES_PER_COMMIT})")
+        assert per_commit <= STREAMING_BYTES_PER_COMMIT, "streaming memory grows faster than its stated bound"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Check the vectorized commit metrics against the per-commit Python loops on a
+synthetic corpus of commit details and report the speedup.
+
+Every corpus entry must produce exactly equal output (floats compared with ==).
+
+Usage: python benchmarks/bench_commit_metrics.py [--sizes 500,5000,50000] [--seeds 20]
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.analyzers.commit_metrics import (
+    EXT_LANGUAGE_MAP,
+    CommitAggregator,
+    CommitColumns,
+    author_language_totals,
+    author_net_lines,
+    commit_compartmentalization,
+    compute_commit_metrics
+)
+
+EXTENSIONS = list(EXT_LANGUAGE_MAP) + ["md", "json", "yml", "lock", "PY", "Tsx", ""]
+
+
+def gini(values: List[float]) -> float:
+    arr = sorted([v for v in values if v > 0])
+    n = len(arr)
+    if n == 0:
+        return 0.0
+    s = sum(arr)
+    if s == 0:
+        return 0.0
+    cum = 0.0
+    weighted = 0.0
+    for v in arr:
+        cum += v
+        weighted += cum
+    return (n + 1 - 2 * (weighted / s)) / n
+
+
+def top_dir(path: str) -> str:
+    i = path.find("/")
+    return "(root)" if i == -1 else path[:i]
+
+
+def compartmentalization(files: List[Dict[str, Any]]) -> float:
+    # files: [{filename, additions, deletions}]
+    if not files or len(files) == 1:
+        return 1.0
+    by_dir: Dict[str, int] = {}
+    for f in files:
+        w = (int(f.get("additions", 0)) + int(f.get("deletions", 0))) or 1
+        d = top_dir(f["filename"]) if isinstance(f.get("filename"), str) else "(root)"
+        by_dir[d] = by_dir.get(d, 0) + w
+    vals = list(by_dir.values())
+    total = sum(vals) or 1
+    probs = [v / total for v in vals]
+    if len(probs) <= 1:
+        return 1.0
+    # Float sums are explicit left-to-right loops: builtin sum() compensates from Python 3.12
+    H = 0.0
+    for p in probs:
+        if p > 0:
+            H -= p * math.log(p)
+    return 1 - (H / math.log(len(probs)))
+
+
+def reference_metrics(details: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The original analyze_repo aggregation loop, the reference the vectorized metrics must match."""
+    author_net: Dict[str, int] = {}
+    ci_values: List[float] = []
+    per_author_lang: Dict[str, Dict[str, int]] = {}
+
+    for d in details:
+        commit_obj = d.get("commit") or {}
+        author_login = (d.get("author") or {}).get("login")
+        author = author_login or (commit_obj.get("author") or {}).get("email") or "unknown"
+
+        stats = d.get("stats") or {}
+        adds = int(stats.get("additions", 0))
+        dels = int(stats.get("deletions", 0))
+        author_net[author] = author_net.get(author, 0) + (adds - dels)
+
+        files = d.get("files") or []
+        if files:
+            ci_values.append(compartmentalization(files))
+        lang_bucket = per_author_lang.get(author, {})
+        for f in files:
+            filename = f.get("filename", "")
+            ext = filename.split(".")[-1].lower() if "." in filename else ""
+            lang = EXT_LANGUAGE_MAP.get(ext, "Other")
+            weight = (int(f.get("additions", 0)) + int(f.get("deletions", 0))) or 1
+            lang_bucket[lang] = lang_bucket.get(lang, 0) + weight
+        per_author_lang[author] = lang_bucket
+
+    totals = [max(0, v) for v in author_net.values()]
+    top3_share = (sum(sorted(totals, reverse=True)[:3]) / (sum(totals) or 1)) if totals else 0.0
+    median_ci = statistics.median(ci_values) if ci_values else 1.0
+    ci_total = 0.0
+    for v in ci_values:
+        ci_total += v
+    mean_ci = (ci_total / len(ci_values)) if ci_values else 1.0
+
+    return {
+        "team": {
+            "giniContribution": gini(totals),
+            "topContributorsShare": top3_share,
+            "contributions": [{"author": k, "netLines": v} for k, v in author_net.items()],
+            "perAuthorLanguage": [{"author": a, "languages": l} for a, l in per_author_lang.items()],
+        },
+        "commits": {
+            "count": len(details),
+            "medianCompartmentalization": median_ci,
+            "meanCompartmentalization": mean_ci,
+        },
+    }
+
+
+def synthetic_details(commit_count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Commit details shaped like GitHub's GET /repos/{owner}/{repo}/commits/{sha}."""
+    rng = random.Random(seed)
+    authors = [f"dev{i}" for i in range(rng.randint(1, 60))]
+    dirs = [f"pkg{i}" for i in range(rng.randint(1, 40))]
+    paths = []
+    for i in range(rng.randint(20, 3000)):
+        depth = rng.choice([0, 1, 1, 2, 3])
+        ext = rng.choice(EXTENSIONS)
+        name = f"file{i}" + (f".{ext}" if ext else "")
+        paths.append("/".join([rng.choice(dirs)] + [f"d{rng.randint(0, 9)}" for _ in range(depth - 1)] + [name]) if depth else name)
+
+    details = []
+    for _ in range(commit_count):
+        roll = rng.random()
+        if roll < 0.05:
+            files = []
+        elif roll < 0.3:
+            files = [rng.choice(paths)]
+        else:
+            files = rng.sample(paths, min(len(paths), int(rng.paretovariate(1.2))))
+        file_entries = []
+        for path in files:
+            entry = {"filename": path, "additions": rng.choice([0, rng.randint(0, 400)]), "deletions": rng.choice([0, rng.randint(0, 200)])}
+            if rng.random() < 0.01:
+                del entry["filename"]
+            file_entries.append(entry)
+        author = rng.choice(authors)
+        detail = {
+            "commit": {"author": {"email": f"{author}@example.com"}},
+            "author": {"login": author} if rng.random() < 0.8 else None,
+            "stats": {"additions": sum(f["additions"] for f in file_entries), "deletions": sum(f["deletions"] for f in file_entries)},
+            "files": file_entries,
+        }
+        if rng.random() < 0.02:
+            detail["commit"] = {}
+        details.append(detail)
+    return details
+
+
+def timed(fn, details, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(details)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="500,5000,50000")
+    parser.add_argument("--seeds", type=int, default=20)
+    args = parser.parse_args()
+
+    checked = 0
+    for seed in range(args.seeds):
+        for size in (0, 1, 2, 37, 250):
+            details = synthetic_details(size, seed)
+            expected = reference_metrics(details)
+            assert compute_commit_metrics(details) == expected, f"mismatch (seed={seed}, size={size})"
+            # Folding in small chunks must not change the result
+            aggregator = CommitAggregator(chunk_size=7)
+            for d in details:
+                aggregator.add(d)
+            assert aggregator.result() == expected, f"chunked mismatch (seed={seed}, size={size})"
+            checked += 1
+    print(f"corpus: {checked} commit sets match exactly")
+
+    print(f"{'commits':>8} {'files':>8} {'python_ms':>10} {'numpy_ms':>9} {'flatten_ms':>10} {'kernels_ms':>10} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        details = synthetic_details(size, seed=size)
+        assert compute_commit_metrics(details) == reference_metrics(details), f"mismatch (size={size})"
+        files = sum(len(d["files"]) for d in details)
+        python_s = timed(reference_metrics, details)
+        numpy_s = timed(compute_commit_metrics, details)
+        columns = CommitColumns()
+        flatten_s = timed(lambda ds: [columns.clear(), *map(columns.add, ds)], details)
+        kernels_s = timed(lambda c: (author_net_lines(c), commit_compartmentalization(c), author_language_totals(c)), columns)
+        print(f"{size:>8} {files:>8} {python_s * 1000:>10.1f} {numpy_s * 1000:>9.1f} {flatten_s * 1000:>10.1f} "
+              f"{kernels_s * 1000:>10.1f} {python_s / numpy_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Compare the previous ingestion loop (crawl order, batches of 10 under
+Semaphore(2), 0.1s per file and 2s between batches, whole files in memory) with
+the size-aware scheduler (source files first, smallest first, a byte budget on
+in-flight content, large files spooled to disk). Downloads are simulated at a
+fixed per-connection bandwidth; uploads go through the upload pipeline into the
+filesystem storage stand-in.
+
+Usage: python benchmarks/bench_download_scheduler.py [--small 100] [--large 4] [--large-mb 40] [--bandwidth-mb 100]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.services.download_scheduler import (
+    CHUNK_SIZE,
+    PRIORITY_SOURCE,
+    ByteBudget,
+    blob_priority,
+    order_blobs,
+    run_ordered,
+    spool
+)
+from core.services.local_storage import LocalStorageBucket
+from core.services.upload_pipeline import UploadPipeline
+
+
+def make_listing(small: int, large: int, large_mb: int, seed: int = 0):
+    """Crawl-ordered entries: source and docs with a few large assets among them."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(small):
+        ext = rng.choice([".py", ".ts", ".js", ".md", ".json"])
+        entries.append({"path": f"pkg{i % 7}/file{i}{ext}", "size": rng.randint(2_000, 40_000)})
+    for i in range(large):
+        entries.insert(rng.randrange(len(entries) + 1), {"path": f"assets/data{i}.csv", "size": large_mb * 1024 * 1024})
+    return {f"{i:040x}": [entry] for i, entry in enumerate(entries)}
+
+
+class Source:
+    """Serves file content at ``bandwidth`` bytes/s per connection."""
+
+    def __init__(self, bandwidth: float):
+        self.bandwidth = bandwidth
+
+    async def stream(self, size: int):
+        sent = 0
+        while sent < size:
+            n = min(CHUNK_SIZE, size - sent)
+            await asyncio.sleep(n / self.bandwidth)
+            sent += n
+            yield b"a" * n
+
+    async def read(self, size: int) -> bytes:
+        return b"".join([chunk async for chunk in self.stream(size)])
+
+
+class Timeline:
+    def __init__(self, blobs):
+        self.start = time.perf_counter()
+        self.source = {sha for sha, infos in blobs.items() if blob_priority(infos)[0] == PRIORITY_SOURCE}
+        self.first = None
+        self.all = None
+        self.done = 0
+
+    def stored(self, sha: str) -> None:
+        if sha in self.source:
+            elapsed = time.perf_counter() - self.start
+            self.first = self.first or elapsed
+            self.done += 1
+            if self.done == len(self.source):
+                self.all = elapsed
+
+
+async def legacy(blobs, source: Source, bucket, batch_delay: float, file_delay: float):
+    timeline = Timeline(blobs)
+    semaphore = asyncio.Semaphore(2)
+
+    async def process(uploads, sha, infos):
+        async with semaphore:
+            content = await source.read(infos[0]["size"])
+            await asyncio.sleep(file_delay)
+            future = await uploads.submit(f"blobs/{sha[:2]}/{sha}", content, "text/plain")
+            future.add_done_callback(lambda f: timeline.stored(sha))
+
+    pending = list(blobs.items())
+    async with UploadPipeline(bucket) as uploads:
+        for i in range(0, len(pending), 10):
+            await asyncio.gather(*[process(uploads, sha, infos) for sha, infos in pending[i:i + 10]])
+            if i + 10 < len(pending):
+                await asyncio.sleep(batch_delay)
+    return timeline
+
+
+async def scheduled(blobs, source: Source, bucket, concurrency: int, budget_bytes: int):
+    timeline = Timeline(blobs)
+    budget = ByteBudget(budget_bytes)
+    ordered = order_blobs(blobs)
+
+    def uploaded(sha, reserved, content, future):
+        content.close()
+        budget.release(reserved)
+        timeline.stored(sha)
+
+    async def process(uploads, item):
+        sha, infos = item
+        reserved = await budget.acquire(infos[0]["size"])
+        content = await spool(source.stream(infos[0]["size"]))
+        future = await uploads.submit(f"blobs/{sha[:2]}/{sha}", content.data, "text/plain")
+        future.add_done_callback(lambda f: uploaded(sha, reserved, content, f))
+
+    async with UploadPipeline(bucket) as uploads:
+        await run_ordered(ordered, lambda item: process(uploads, item), concurrency)
+    return timeline
+
+
+def measure(label, coro_fn):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    timeline = asyncio.run(coro_fn())
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<12} {timeline.first:>10.2f} {timeline.all:>10.2f} {total:>9.2f} {peak / 1e6:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--small", type=int, default=100)
+    parser.add_argument("--large", type=int, default=4)
+    parser.add_argument("--large-mb", type=int, default=40)
+    parser.add_argument("--bandwidth-mb", type=float, default=100.0, help="per-connection MB/s")
+    parser.add_argument("--batch-delay", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--budget-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    blobs = make_listing(args.small, args.large, args.large_mb)
+    source = Source(args.bandwidth_mb * 1e6)
+    total_mb = sum(infos[0]["size"] for infos in blobs.values()) / 1e6
+    print(f"{len(blobs)} files, {total_mb:.0f} MB, {args.bandwidth_mb:.0f} MB/s per connection")
+    print(f"{'loop':<12} {'first_src_s':>10} {'all_src_s':>10} {'total_s':>9} {'peak_MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        measure("legacy", lambda: legacy(
+            blobs, source, LocalStorageBucket(os.path.join(tmp, "legacy"), "repo-files"), args.batch_delay, 0.1
+        ))
+        measure("scheduled", lambda: scheduled(
+            blobs, source, LocalStorageBucket(os.path.join(tmp, "scheduled"), "repo-files"),
+            args.concurrency, args.budget_mb * 1024 * 1024
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark against local stand-ins: a mock GitHub (and OpenAI)
+server started from mock_github.py, and the SQLite + filesystem backend for
+the database and storage. Nothing touches a live service.
+
+Stages, each against the same synthetic repository:
+
+- analyze_repo            commit and language analysis over the REST API
+- analyze_and_store_repo  analysis, file download and storage, repository row
+- issues                  GET /api/repos/repos/{id}/issues
+- scoring                 GET /api/repos/{id}/scoring
+
+For every stage the report has the wall time, GitHub requests by endpoint,
+the process's peak RSS so far, a throughput figure, the critical path of the
+stage's slowest trace (time per span name) and the number of spans the mock's
+OTLP collector received, as JSON on stdout (or in --output) for regression
+tracking.
+
+Usage: python benchmarks/bench_e2e.py [--commits 200] [--files 500] [--depth 3] [--file-size 4096]
+       [--latency 0.02] [--rate-limit 5000] [--rate-window 3600] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Backend'))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+@contextlib.contextmanager
+def mock_server(args, port: int):
+    """Run mock_github.py in a subprocess until the block exits."""
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_github.py"),
+        "--port", str(port), "--commits", str(args.commits), "--files", str(args.files),
+        "--depth", str(args.depth), "--file-size", str(args.file_size), "--latency", str(args.latency),
+        "--rate-limit", str(args.rate_limit), "--rate-window", str(args.rate_window),
+    ]
+    process = subprocess.Popen(command)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/_stats", timeout=1.0)
+                break
+            except httpx.TransportError:
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("mock GitHub server did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+class Stage:
+    """Times a block and records the mock's request counts, the process's peak RSS and the traces."""
+
+    def __init__(self, mock_url: str, name: str):
+        self.mock_url = mock_url
+        self.name = name
+        self.result = {}
+
+    def __enter__(self):
+        from core.services import tracing
+
+        httpx.post(f"{self.mock_url}/_reset")
+        self.seen = {trace.trace_id for trace in tracing.recent_traces}
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        from core.services import tracing
+
+        wall = time.perf_counter() - self.start
+        counts = httpx.get(f"{self.mock_url}/_stats").json()
+        traces = [trace for trace in tracing.recent_traces if trace.trace_id not in self.seen]
+        tracing.exporter.flush()
+        self.result = {
+            "wall_s": round(wall, 3),
+            "requests": counts["total"],
+            "requests_by_endpoint": counts["requests"],
+            "peak_rss_mb": peak_rss_mb(),
+            **self.result,
+        }
+        if traces:
+            slowest = max(traces, key=lambda trace: trace.root.duration)
+            by_name = tracing.critical_path(slowest)["by_name"]
+            self.result["critical_path_ms"] = dict(list(by_name.items())[:8])
+            self.result["spans_exported"] = httpx.get(f"{self.mock_url}/_traces").json()["span_count"]
+        if exc_type is not None:
+            self.result["error"] = f"{exc_type.__name__}: {exc}"
+        return False
+
+    def throughput(self, count: float, unit: str) -> None:
+        self.result["throughput"] = {unit: round(count / max(time.perf_counter() - self.start, 1e-9), 2)}
+
+
+def run(args, mock_url: str, data_dir: str):
+    os.environ.update({
+        "GITHUB_API_URL": mock_url,
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "OPENAI_API_KEY": "mock",
+        "OTEL_EXPORTER_OTLP_ENDPOINT": mock_url,
+        "VIBECHECK_BACKEND": "local",
+        "VIBECHECK_DATA_DIR": data_dir,
+        # Empty values keep credentials in .env from being loaded
+        "GITHUB_TOKEN": "",
+        "GITHUB_APP_ID": "",
+    })
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api_routes.repo_analysis import router as repo_analysis_router
+    from core.analyzers.github_analyzer import analyze_and_store_repo, analyze_repo
+
+    app = FastAPI()
+    app.include_router(repo_analysis_router)
+    http = TestClient(app)
+    repo_url = "https://github.com/octo/synthetic"
+    stages = {}
+
+    # The analyzer prints progress to stdout, which carries the report
+    with contextlib.redirect_stdout(sys.stderr if args.verbose else open(os.devnull, "w")):
+        with Stage(mock_url, "analyze_repo") as stage:
+            analysis = asyncio.run(analyze_repo(repo_url, args.window_days, args.max_commits))
+            stage.result["commits"] = (analysis.get("commits") or {}).get("count", 0)
+            stage.throughput(stage.result["commits"], "commits_per_s")
+            if "error" in analysis:
+                stage.result["error"] = analysis["error"]
+        stages["analyze_repo"] = stage.result
+
+        with Stage(mock_url, "analyze_and_store_repo") as stage:
+            stored = asyncio.run(analyze_and_store_repo(repo_url, "bench-user", args.window_days, args.max_commits))
+            file_count = stored.get("file_count", 0)
+            uploads = (stored.get("file_storage") or {}).get("uploads") or {}
+            stage.result.update(files=file_count, bytes_uploaded=uploads.get("bytes", 0),
+                                stored_in_db=stored.get("stored_in_db", False))
+            stage.throughput(file_count, "files_per_s")
+            for key in ("error", "warning"):
+                if key in stored:
+                    stage.result[key] = stored[key]
+        stages["analyze_and_store_repo"] = stage.result
+        repo_id = stored.get("repo_id")
+
+        if repo_id:
+            with Stage(mock_url, "issues") as stage:
+                response = http.get(f"/api/repos/repos/{repo_id}/issues")
+                body = response.json()
+                stage.result.update(status=response.status_code, total_issues=body.get("total_issues", 0))
+                stage.throughput(file_count, "files_per_s")
+            stages["issues"] = stage.result
+
+            with Stage(mock_url, "scoring") as stage:
+                response = http.get(f"/api/repos/{repo_id}/scoring")
+                body = response.json()
+                stage.result.update(status=response.status_code, overall_score=body.get("overall_score"),
+                                    fallback=body.get("usage") is None)
+                stage.throughput(1, "requests_per_s")
+            stages["scoring"] = stage.result
+
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--file-size", type=int, default=4096, help="mean file size in bytes")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every mock request")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="API requests per window")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="rate limit window in seconds")
+    parser.add_argument("--max-commits", type=int, default=500)
+    parser.add_argument("--window-days", type=int, default=3650)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="show the backend's output on stderr")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as data_dir, mock_server(args, free_port()) as mock_url:
+        stages = run(args, mock_url, data_dir)
+
+    report = {
+        "benchmark": "e2e",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")},
+        "stages": stages,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Measure per-file review throughput offline with the stub provider.
+
+The stub sleeps for --latency seconds per request, so the numbers show how
+batching and the concurrency cap amortise request latency.
+
+Usage: python benchmarks/bench_file_review.py [--files 500] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.services.file_review import FileReviewInput, ReviewCache, StubReviewProvider, review_files
+
+
+def synthetic_files(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        lines = int(rng.lognormvariate(3.5, 1.0)) + 1
+        body = "\n".join(f"    total += item_{j} * {rng.randint(1, 99)}" for j in range(lines))
+        files.append(FileReviewInput.from_content(f"src/f{i}.py", f"def f{i}(items):\n    total = 0\n{body}\n    return total\n", 4000))
+    return files
+
+
+async def run(files, latency: float, batch_tokens: int, concurrency: int):
+    provider = StubReviewProvider(latency=latency)
+    result = await review_files(files, provider, max_batch_tokens=batch_tokens, concurrency=concurrency, cache=ReviewCache())
+    return result["stats"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    files = synthetic_files(args.files)
+    print(f"{args.files} files, {sum(f.tokens for f in files)} tokens, {args.latency}s per request")
+    print(f"{'batch_tokens':>12} {'concurrency':>11} {'batches':>8} {'elapsed_s':>9} {'files/s':>8}")
+    for batch_tokens, concurrency in [(1, 1), (1, 8), (6000, 1), (6000, 4), (6000, 8), (12000, 8)]:
+        stats = asyncio.run(run(files, args.latency, batch_tokens, concurrency))
+        print(f"{batch_tokens:>12} {concurrency:>11} {stats['batches']:>8} {stats['elapsed_s']:>9} {stats['files_per_s']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Per-rule timing for CodeIssueAnalyzer, with stored baselines as a regression
+gate for rule changes.
+
+Each rule is run on its own over a corpus of real-world files (a fixed set of
+standard library modules and the frontend's TypeScript) and synthetic
+Python/JS files dense in the patterns the rules report. For every rule the
+report gives ns per line (best of --repeat), the peak bytes allocated while
+it runs per line (tracemalloc), and the number of issues it reported.
+
+Timings are normalised by a fixed pure-Python calibration loop so baselines
+recorded on one machine can be checked on another. --check compares against
+benchmarks/baselines/issue_rules.json and exits 1 when a rule is slower or
+allocates more than the tolerance allows; --update-baseline rewrites it.
+
+Usage: python benchmarks/bench_issue_rules.py [--repeat 5] [--check] [--update-baseline] [--tolerance 0.3]
+"""
+
+import argparse
+import ast
+import gc
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import sysconfig
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'Backend'))
+
+from core.analyzers.code_issue_analyzer import CodeIssueAnalyzer, Lines
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "issue_rules.json")
+
+STDLIB_MODULES = [
+    "argparse.py", "ast.py", "inspect.py", "typing.py", "pathlib.py", "dataclasses.py",
+    "json/decoder.py", "asyncio/base_events.py", "email/message.py", "logging/__init__.py",
+]
+
+# Allocation figures are deterministic up to small interpreter noise
+ALLOC_SLACK_BYTES_PER_LINE = 2.0
+
+
+def synthetic_python(index: int, functions: int = 60) -> str:
+    rng = random.Random(index)
+    out = ['"""Synthetic module."""', "import os", "", ""]
+    for f in range(functions):
+        args = ", ".join(f"arg{a}" for a in range(rng.randint(1, 4)))
+        out.append(f"def function_{f}({args}):{' ' if rng.random() < 0.2 else ''}")
+        if rng.random() < 0.5:
+            out.append(f'    """Function {f}."""')
+        for b in range(rng.randint(2, 12)):
+            kind = rng.random()
+            if kind < 0.15:
+                out.append(f"    if arg0 and value_{b} or arg0 > {b}:")
+                out.append(f"        value_{b} = os.system('echo {b}')")
+            elif kind < 0.25:
+                out.append(f"    password = \"secret{b}\"   ")
+            elif kind < 0.35:
+                out.append(f"    result = eval(arg0)  # {'x' * rng.randint(60, 140)}")
+            else:
+                out.append(f"    value_{b} = arg0 + {b}")
+        out.append("    return arg0")
+        out.extend([""] * rng.choice([1, 2, 3]))
+        if rng.random() < 0.2:
+            # Duplicate of the previous function body under a new name
+            out.append(f"def function_{f}_copy({args}):")
+            out.append("    return arg0")
+            out.append("")
+    return "\n".join(out)
+
+
+def synthetic_javascript(index: int, blocks: int = 120) -> str:
+    rng = random.Random(1000 + index)
+    out = []
+    for b in range(blocks):
+        out.append(f"export function handler{b}(event) {{{' ' if rng.random() < 0.2 else ''}")
+        if rng.random() < 0.3:
+            out.append(f"  console.log('handler{b}', event);")
+        out.append(f"  const value = event.items.map((item) => item.id * {b}).filter(Boolean);{' ' * rng.randint(0, 1)}")
+        if rng.random() < 0.2:
+            out.append("  // " + "long comment " * rng.randint(10, 14))
+        out.append("  return value;")
+        out.append("}")
+        out.extend([""] * rng.choice([1, 1, 2]))
+    return "\n".join(out)
+
+
+def load_corpus():
+    """(label, path, text) for every file in the corpus."""
+    corpus = []
+    stdlib = sysconfig.get_paths()["stdlib"]
+    for module in STDLIB_MODULES:
+        path = os.path.join(stdlib, module)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                corpus.append(("real", f"stdlib/{module}", f.read()))
+    for path in sorted(glob.glob(os.path.join(ROOT, "Frontend", "src", "**", "*.ts*"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            corpus.append(("real", os.path.relpath(path, ROOT), f.read()))
+    for i in range(8):
+        corpus.append(("synthetic", f"synthetic/module_{i}.py", synthetic_python(i)))
+        corpus.append(("synthetic", f"synthetic/handlers_{i}.js", synthetic_javascript(i)))
+    return corpus
+
+
+def indexed(data) -> Lines:
+    lines = Lines(data)
+    lines.spans()
+    return lines
+
+
+def prepare(corpus):
+    """Per-file inputs for the rules: split lines, parsed AST, and Lines over the text and ASCII bytes."""
+    python, javascript = [], []
+    for _, path, text in corpus:
+        lines = text.split("\n")
+        if path.endswith(".py"):
+            python.append({"path": path, "text": text, "lines": lines, "tree": ast.parse(text),
+                           "text_lines": indexed(text)})
+        else:
+            data = text.encode()
+            ascii_data = data if data.isascii() else None
+            javascript.append({"path": path, "text": text, "lines": lines, "text_lines": indexed(text),
+                               "data": ascii_data,
+                               "ascii_lines": indexed(ascii_data) if ascii_data is not None else None})
+    return python, javascript
+
+
+def rules(analyzer: CodeIssueAnalyzer):
+    """name -> (file group, function of one prepared file)."""
+    a = analyzer
+    return {
+        "py.split": ("python", lambda f: f["text"].split("\n")),
+        "py.parse": ("python", lambda f: ast.parse(f["text"])),
+        "py.missing_type_hints": ("python", lambda f: a._check_missing_type_hints(f["tree"], f["lines"], f["path"])),
+        "py.complex_functions": ("python", lambda f: a._check_complex_functions(f["tree"], f["lines"], f["path"])),
+        "py.missing_docstrings": ("python", lambda f: a._check_missing_docstrings(f["tree"], f["lines"], f["path"])),
+        "py.lines": ("python", lambda f: Lines(f["text"]).spans()),
+        "py.long_lines": ("python", lambda f: a._check_long_lines(f["text_lines"], f["path"])),
+        "py.duplicate_code": ("python", lambda f: a._check_duplicate_code(f["tree"], f["lines"], f["path"])),
+        "py.security": ("python", lambda f: a._check_security_issues(f["tree"], f["lines"], f["path"])),
+        "py.style": ("python", lambda f: a._check_style_issues(f["text_lines"], f["path"])),
+        "js.lines": ("javascript", lambda f: Lines(f["text"]).spans()),
+        "js.console": ("javascript", lambda f: a._check_console_statements(f["text_lines"], f["path"])),
+        "js.long_lines": ("javascript", lambda f: a._check_long_lines(f["text_lines"], f["path"])),
+        "js.style": ("javascript", lambda f: a._check_style_issues(f["text_lines"], f["path"])),
+        "bytes.lines": ("ascii", lambda f: Lines(f["data"]).spans()),
+        "bytes.console": ("ascii", lambda f: a._check_console_statements(f["ascii_lines"], f["path"])),
+        "bytes.long_lines": ("ascii", lambda f: a._check_long_lines(f["ascii_lines"], f["path"])),
+        "bytes.style": ("ascii", lambda f: a._check_style_issues(f["ascii_lines"], f["path"])),
+    }
+
+
+def calibrate(repeat: int) -> float:
+    """Nanoseconds for a fixed mix of string and list work, best of ``repeat``."""
+    words = [f"word{i} " * (i % 7) for i in range(20_000)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        total = 0
+        for word in words:
+            if word and word[-1] == " ":
+                total += len(word.strip())
+        "\n".join(words).split("\n")
+        best = min(best, time.perf_counter_ns() - start)
+    return best
+
+
+def measure(groups, repeat: int):
+    analyzer = CodeIssueAnalyzer()
+    results = {}
+    for name, (group, run) in rules(analyzer).items():
+        files = groups[group]
+        lines = sum(len(f["lines"]) for f in files)
+
+        # Collections triggered by earlier allocations would land on whichever rule runs next
+        best = float("inf")
+        issues = 0
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                elapsed = 0
+                issues = 0
+                for f in files:
+                    analyzer.issues = []
+                    start = time.perf_counter_ns()
+                    run(f)
+                    elapsed += time.perf_counter_ns() - start
+                    issues += len(analyzer.issues)
+                best = min(best, elapsed)
+        finally:
+            gc.enable()
+
+        allocated = 0
+        tracemalloc.start()
+        for f in files:
+            analyzer.issues = []
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            run(f)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        analyzer.issues = []
+
+        results[name] = {
+            "files": len(files),
+            "lines": lines,
+            "ns_per_line": round(best / max(lines, 1), 2),
+            "alloc_bytes_per_line": round(allocated / max(lines, 1), 2),
+            "issues": issues,
+        }
+    return results
+
+
+def check(results, calibration: float, baseline, tolerance: float) -> bool:
+    """Compare against the baseline; True when no rule regressed."""
+    scale = baseline["calibration_ns"] / calibration
+    ok = True
+    print(f"\n{'rule':<24} {'base_ns':>9} {'now_ns':>9} {'change':>8} {'base_B':>8} {'now_B':>8}  status")
+    for name, result in results.items():
+        base = baseline["rules"].get(name)
+        if base is None:
+            print(f"{name:<24} {'':>9} {result['ns_per_line'] * scale:>9.1f} {'':>8} {'':>8} "
+                  f"{result['alloc_bytes_per_line']:>8.1f}  new")
+            continue
+        now_ns = result["ns_per_line"] * scale
+        change = now_ns / base["ns_per_line"] - 1 if base["ns_per_line"] else 0.0
+        status = []
+        if change > tolerance:
+            status.append("slower")
+        if result["alloc_bytes_per_line"] > base["alloc_bytes_per_line"] * (1 + tolerance) + ALLOC_SLACK_BYTES_PER_LINE:
+            status.append("allocates more")
+        if result["issues"] != base["issues"]:
+            status.append(f"issues {base['issues']} -> {result['issues']}")
+        # A change in reported issues is shown but only cost regressions fail the check
+        if "slower" in status or "allocates more" in status:
+            ok = False
+        print(f"{name:<24} {base['ns_per_line']:>9.1f} {now_ns:>9.1f} {change:>+7.0%} "
+              f"{base['alloc_bytes_per_line']:>8.1f} {result['alloc_bytes_per_line']:>8.1f}  "
+              f"{', '.join(status) or 'ok'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="compare against the stored baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative slowdown")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    python, javascript = prepare(corpus)
+    groups = {
+        "python": python,
+        "javascript": javascript,
+        "ascii": [f for f in javascript if f["data"] is not None],
+    }
+    real = sum(1 for label, _, _ in corpus if label == "real")
+    print(f"corpus: {real} real-world and {len(corpus) - real} synthetic files, "
+          f"{sum(len(f['lines']) for f in python)} Python and {sum(len(f['lines']) for f in javascript)} JS/TS lines")
+
+    calibration = calibrate(args.repeat)
+    results = measure(groups, args.repeat)
+    calibration = min(calibration, calibrate(args.repeat))
+
+    print(f"{'rule':<24} {'files':>6} {'lines':>8} {'ns/line':>9} {'alloc B/line':>13} {'issues':>7}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['files']:>6} {result['lines']:>8} {result['ns_per_line']:>9.1f} "
+              f"{result['alloc_bytes_per_line']:>13.1f} {result['issues']:>7}")
+
+    exit_code = 0
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --update-baseline first")
+            exit_code = 1
+        else:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if baseline.get("python") != platform.python_version():
+                print(f"\nBaseline recorded on Python {baseline.get('python')}; the standard library corpus may differ")
+            if not check(results, calibration, baseline, args.tolerance):
+                print("\nRule regression against the baseline")
+                exit_code = 1
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "calibration_ns": calibration,
+                "rules": results,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {os.path.relpath(args.baseline)}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
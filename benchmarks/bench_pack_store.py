@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Compare the two ways the issues route reads a snapshot on the local backend:
+one storage download per file (analyze_repository_files_from_supabase), and
+the memory-mapped pack record_snapshot writes (analyze_repository_files).
+Results are checked for equality on a synthetic corpus with CRLF, non-ASCII
+and invalid UTF-8 files.
+
+Usage: python benchmarks/bench_pack_store.py [--files 20000] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import builtins
+import contextlib
+import gc
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+PY = '''import os
+
+
+def load(path, mode):
+    if path and mode:
+        for line in open(path):
+            if line.startswith("#") or not line.strip():
+                continue
+    return eval(mode)
+'''
+JS = '''export function render(items) {
+  console.log("render", items.length);
+  return items.map(item => `<li class="item">${item.title} - ${item.description} - ${item.author} - ${item.created_at}</li>`).join("");
+}
+
+
+'''
+MD = "# Notes  \n\nSome text with unicode — “quotes” and ünïcödé.\n　\n\n\n"
+
+# Issue-free lines making up most of a real file
+CLEAN = {
+    "py": "".join(f"\nCONSTANT_{i} = compute_value(SOURCE, index={i}, scale=2.5)\n" for i in range(60)),
+    "js": "".join(f"  const value{i} = compute(input, {{ index: {i}, scale: 2.5 }});\n" for i in range(120)),
+    "md": "".join(f"Paragraph {i} of the guide explains one step of the setup in plain words.\n" for i in range(120)),
+    "json": "".join(f'{{"id": {i}, "name": "item {i}", "tags": ["a", "b"]}}\n' for i in range(120)),
+}
+
+
+def make_corpus(count: int, seed: int = 0):
+    """{relative_path: content} for a synthetic repository."""
+    rng = random.Random(seed)
+    variants = [
+        ("py", PY.encode()),
+        ("py", PY.replace("\n", "\r\n").encode()),
+        ("js", JS.encode()),
+        ("ts", JS.replace("\n", "\r\n").encode()),
+        ("js", JS.encode() + b"// bad bytes \xff\xfe  \n\x1c\n\n"),
+        ("md", MD.encode()),
+        ("md", MD.replace("\n", "\r").encode("utf-8") + b"\xe2\x80\r\n"),
+        ("json", b'{"key": "' + b"x" * 200 + b'"}\n'),
+    ]
+    files = {}
+    for i in range(count):
+        ext, content = variants[i % len(variants)]
+        filler = CLEAN["js" if ext == "ts" else ext].encode()
+        if b"\r" in content:
+            filler = filler.replace(b"\n", b"\r\n")
+        files[f"pkg{i % 97}/mod{i}.{ext}"] = (filler + content) * rng.randint(1, 3)
+    return files
+
+
+def record_snapshot(store, snapshot_id: str, files):
+    """Store the files as blobs and record the snapshot, as an analysis does; returns its file metadata."""
+    from core.services.blob_store import BlobStore, blob_storage_path, git_blob_sha
+
+    shas = {path: git_blob_sha(content) for path, content in files.items()}
+    store.acquire(shas.values())
+    for path, content in files.items():
+        try:
+            store.storage().upload(blob_storage_path(shas[path]), content)
+        except Exception as e:
+            if "already exists" not in str(e):
+                raise
+    store.register([BlobStore.blob_row(sha, 0, "text/plain") for sha in set(shas.values())])
+    store.record_snapshot(snapshot_id, "bench", "user", "main", shas)
+    return [{"relative_path": path, "storage_path": blob_storage_path(sha),
+             "file_extension": os.path.splitext(path)[1]} for path, sha in shas.items()]
+
+
+@contextlib.contextmanager
+def count_opens():
+    counter = {"opens": 0}
+    real_open = builtins.open
+
+    def counting_open(*args, **kwargs):
+        counter["opens"] += 1
+        return real_open(*args, **kwargs)
+
+    builtins.open = counting_open
+    try:
+        yield counter
+    finally:
+        builtins.open = real_open
+
+
+def measure(fn, repeat: int = 3):
+    """Best-of-``repeat`` time, open() calls, and tracemalloc peak of one more run."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        with count_opens() as counter:
+            start = time.perf_counter()
+            result = fn()
+            seconds = min(seconds, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, counter["opens"], peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["VIBECHECK_BACKEND"] = "local"
+        os.environ["VIBECHECK_DATA_DIR"] = tmp
+
+        from core.analyzers.code_issue_analyzer import analyze_repository_files
+        from core.analyzers.supabase_file_analyzer import analyze_repository_files_from_supabase
+        from core.services.blob_store import BlobStore
+        from core.services.pack_store import is_pack
+
+        store = BlobStore()
+        snapshot_id = "repos/user/bench/main_1"
+        metadata = record_snapshot(store, snapshot_id, make_corpus(args.files))
+        packed = store.pack_path(snapshot_id)
+        assert is_pack(packed)
+        print(f"{args.files} files, pack of {os.path.getsize(packed) / 1e6:.1f} MB")
+
+        # Python files are decoded for the AST either way; the rest run the line rules on the bytes
+        subsets = [
+            ("all files", metadata),
+            ("non-Python files", [m for m in metadata if m["file_extension"] != ".py"]),
+        ]
+        for label, subset in subsets:
+            runs = [
+                ("storage, per file", lambda: asyncio.run(analyze_repository_files_from_supabase(subset, snapshot_id))),
+                ("pack, mmap", lambda: analyze_repository_files(subset, packed)),
+            ]
+            print(f"\n{label} ({len(subset)})")
+            print(f"{'source':<20} {'seconds':>8} {'opens':>7} {'peak_MB':>8} {'issues':>7}")
+            expected = None
+            for name, fn in runs:
+                result, seconds, opens, peak = measure(fn, args.repeat)
+                if expected is None:
+                    expected = result
+                assert result == expected, f"{name}: issues differ from the storage read"
+                print(f"{name:<20} {seconds:>8.2f} {opens:>7} {peak / 1e6:>8.1f} {result['total_issues']:>7}")
+
+
+if __name__ == "__main__":
+    main()
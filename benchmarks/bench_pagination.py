@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compare sequential commit-list pagination with the Link-header paginator
+against a local mock of the GitHub commits endpoint with artificial latency.
+
+Usage: python benchmarks/bench_pagination.py [--latency 0.15] [--total 5000]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.analyzers.github_analyzer import RateBudget, get_commits, make_github_request
+
+OWNER, REPO = "octo", "mono"
+
+
+def mock_transport(total: int, latency: float) -> httpx.MockTransport:
+    """Serves /repos/{owner}/{repo}/commits with GitHub-style Link and rate limit headers."""
+    state = {"remaining": 5000}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        per_page = int(request.url.params.get("per_page", 30))
+        page = int(request.url.params.get("page", 1))
+        start = (page - 1) * per_page
+        items = [{"sha": f"{i:040x}"} for i in range(start, min(total, start + per_page))]
+        last = max(1, -(-total // per_page))
+        base = str(request.url.copy_remove_param("page"))
+        links = [f'<{base}&page={last}>; rel="last"']
+        if page < last:
+            links.insert(0, f'<{base}&page={page + 1}>; rel="next"')
+        state["remaining"] -= 1
+        headers = {
+            "Link": ", ".join(links),
+            "X-RateLimit-Remaining": str(state["remaining"]),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+            "X-RateLimit-Limit": "5000",
+        }
+        return httpx.Response(200, json=items, headers=headers)
+
+    return httpx.MockTransport(handler)
+
+
+async def sequential_commits(client: httpx.AsyncClient, max_commits: int):
+    """The previous get_commits loop: one page at a time with a 0.1s pause."""
+    commits = []
+    page = 1
+    per_page = min(100, max_commits)
+    while len(commits) < max_commits:
+        url = f"https://api.github.com/repos/{OWNER}/{REPO}/commits"
+        response = await make_github_request(client, url, {"since": "2000-01-01T00:00:00Z", "per_page": per_page, "page": page})
+        batch = response.json()
+        if not batch:
+            break
+        commits.extend(batch)
+        if len(batch) < per_page:
+            break
+        page += 1
+        await asyncio.sleep(0.1)
+    return commits[:max_commits]
+
+
+async def paginated_commits(client: httpx.AsyncClient, max_commits: int):
+    return await get_commits(client, OWNER, REPO, "2000-01-01T00:00:00Z", max_commits, budget=RateBudget())
+
+
+def run(fetch, total: int, max_commits: int, latency: float):
+    async def go():
+        async with httpx.AsyncClient(transport=mock_transport(total, latency)) as client:
+            start = time.perf_counter()
+            commits = await fetch(client, max_commits)
+            return commits, time.perf_counter() - start
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return asyncio.run(go())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--total", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{args.total} commits upstream, {args.latency * 1000:.0f} ms per request")
+    print(f"{'max_commits':>11} {'pages':>6} {'sequential_s':>13} {'parallel_s':>11} {'speedup':>8}")
+    for max_commits in (50, 500, 2000, 10000):
+        expected, sequential_s = run(sequential_commits, args.total, max_commits, args.latency)
+        commits, parallel_s = run(paginated_commits, args.total, max_commits, args.latency)
+        assert commits == expected, "paginator returned different commits"
+        pages = -(-len(commits) // min(100, max_commits))
+        print(f"{max_commits:>11} {pages:>6} {sequential_s:>13.2f} {parallel_s:>11.2f} {sequential_s / parallel_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Response time and size of paged issue listings as the repository grows.
+
+For each --sizes issue count, serves a synthetic issues result (shaped like
+GET /api/repos/repos/{id}/issues, see bench_responses.py) through the real
+issues routes and reports, with the shared cache in memory:
+
+- full: the whole listing, GET /repos/{id}/issues
+- build: the first paged request, which builds the repository's index
+- first / deep: a page from the start, and one reached by following --hops cursors
+- filtered: severity=error, extension=.py
+- prefix: path_prefix=src/pkg7/ (cost follows the matches under the prefix)
+
+Usage: python benchmarks/bench_paging.py [--sizes 1000,10000,100000] [--limit 50] [--hops 10] [--repeat 20]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from bench_responses import make_issues
+
+
+def timed(http, url: str, params: dict, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = http.get(url, params=params)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return statistics.median(timings) * 1000, len(response.content), response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated issue counts")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--hops", type=int, default=10, help="cursors followed for the deep page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    os.environ["CACHE_BACKEND"] = "memory"
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import api_routes.repo_analysis
+
+    results = {}
+
+    async def load_issues(repo_id):
+        return results[repo_id]
+
+    # Serve the synthetic results instead of analyzing stored files
+    api_routes.repo_analysis.load_issues = load_issues
+    app = FastAPI()
+    app.include_router(api_routes.repo_analysis.router)
+    http = TestClient(app)
+
+    print(f"limit {args.limit}, median of {args.repeat}; ms / KB")
+    columns = ["full", "build", "first", "deep", "filtered", "prefix"]
+    print(f"{'issues':>8}" + "".join(f" {name + '_ms':>12} {name + '_KB':>11}" for name in columns))
+    for size in [int(n) for n in args.sizes.split(",")]:
+        repo_id = f"bench-{size}"
+        results[repo_id] = make_issues(size)
+        page_url = f"/api/repos/repos/{repo_id}/issues/page"
+        cells = {}
+
+        cells["full"] = timed(http, f"/api/repos/repos/{repo_id}/issues", {}, max(1, args.repeat // 10))[:2]
+        cells["build"] = timed(http, page_url, {"limit": args.limit}, 1)[:2]
+        ms, size_bytes, body = timed(http, page_url, {"limit": args.limit}, args.repeat)
+        cells["first"] = (ms, size_bytes)
+        for _ in range(args.hops - 1):
+            body = http.get(page_url, params={"limit": args.limit, "cursor": body["next_cursor"]}).json()
+        cells["deep"] = timed(http, page_url, {"limit": args.limit, "cursor": body["next_cursor"]}, args.repeat)[:2]
+        cells["filtered"] = timed(http, page_url, {"limit": args.limit, "severity": "error", "extension": ".py"},
+                                  args.repeat)[:2]
+        cells["prefix"] = timed(http, page_url, {"limit": args.limit, "path_prefix": "src/pkg7/"}, args.repeat)[:2]
+        print(f"{size:>8}" + "".join(f" {cells[name][0]:>12.2f} {cells[name][1] / 1000:>11.1f}" for name in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark the token-budgeted scoring prompt builder on synthetic repositories
+of increasing size. Reports build time, prompt tokens and files sampled.
+
+Usage: python benchmarks/bench_prompt_builder.py [--budget 3000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.services.prompt_builder import build_scoring_prompt, count_tokens
+
+EXTENSIONS = ['.py', '.ts', '.tsx', '.js', '.go', '.md', '.json', '.yml', '.css', '.txt']
+
+
+def synthetic_repo(file_count: int, seed: int = 0):
+    """Build analysis data, file metadata and issue counts for a fake repository."""
+    rng = random.Random(seed)
+    file_metadata = []
+    issue_counts = {}
+    for i in range(file_count):
+        ext = rng.choice(EXTENSIONS)
+        depth = rng.randint(0, 5)
+        path = "/".join(f"dir{rng.randint(0, 30)}" for _ in range(depth)) + f"/file_{i}{ext}"
+        path = path.lstrip("/")
+        file_metadata.append({
+            "relative_path": path,
+            "file_extension": ext,
+            "size_bytes": int(rng.lognormvariate(8, 1.5)),
+        })
+        if rng.random() < 0.2:
+            issue_counts[path] = rng.randint(1, 40)
+
+    contributors = [{"author": f"dev{i}", "netLines": rng.randint(-500, 20000)} for i in range(max(3, file_count // 50))]
+    analysis_data = {
+        "repo": f"synthetic/repo-{file_count}",
+        "languages": {"Python": rng.randint(1, 10**6), "TypeScript": rng.randint(1, 10**6), "Go": rng.randint(1, 10**5)},
+        "team": {"giniContribution": 0.42, "topContributorsShare": 0.7, "contributions": contributors},
+        "commits": {"count": file_count * 3, "medianCompartmentalization": 0.73, "meanCompartmentalization": 0.69},
+    }
+    return analysis_data, file_metadata, issue_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--sizes", default="100,1000,10000,50000")
+    args = parser.parse_args()
+
+    print(f"{'files':>8} {'build_ms':>9} {'tokens':>7} {'budget':>7} {'sampled':>8} {'chars':>7}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        analysis_data, file_metadata, issue_counts = synthetic_repo(size)
+        start = time.perf_counter()
+        build = build_scoring_prompt(analysis_data, file_metadata, issue_counts, token_budget=args.budget)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert build.prompt_tokens == count_tokens(build.prompt)
+        assert build.prompt_tokens <= args.budget, "prompt exceeded token budget"
+        print(f"{size:>8} {elapsed_ms:>9.1f} {build.prompt_tokens:>7} {args.budget:>7} "
+              f"{len(build.files_included):>8} {len(build.prompt):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Serialization time and bytes on the wire for large JSON responses.
+
+Builds an issues result shaped like GET /api/repos/repos/{id}/issues with
+--issues issues (code snippets included) and an analysis shaped like
+POST /api/repos/analyze's, then compares:
+
+- serialization alone: FastAPI's default path (``jsonable_encoder`` then
+  ``JSONResponse.render``) against ``FastJSONResponse`` (orjson when installed)
+- through an app with CompressionMiddleware, per Accept-Encoding: the bytes on
+  the wire and the request latency for the old dict return, the
+  FastJSONResponse return, and the NDJSON stream; and the analysis response
+  validated through ``AnalysisResponse`` against ``model_response``
+- the time until the NDJSON stream's first chunk is ready
+
+Usage: python benchmarks/bench_responses.py [--issues 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+CATEGORIES = ["quality", "security", "style", "originality"]
+SEVERITIES = ["error", "warning", "info"]
+
+
+def make_issues(count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    issues = {category: [] for category in CATEGORIES}
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        path = f"src/pkg{i % 40}/module_{i % 900}.py"
+        line = rng.randint(1, 800)
+        issues[category].append({
+            "file": os.path.basename(path),
+            "path": path,
+            "line": line,
+            "issue": f"Function 'handler_{i}' is too complex (cyclomatic complexity {rng.randint(11, 40)})",
+            "issue_type": rng.choice(["complexity", "hardcoded_secret", "long_line", "missing_docstring"]),
+            "severity": rng.choice(SEVERITIES),
+            "category": category,
+            "codeSnippet": "\n".join(f"{line + k:>4} |     value_{k} = request.get('field_{k}') or default_{k}"
+                                     for k in range(-2, 3)),
+            "suggestion": "Split the function into smaller helpers with a single responsibility each.",
+        })
+    return {
+        "total_issues": count,
+        "issues": issues,
+        "summary": {category: {"total": len(items),
+                               "errors": sum(1 for i in items if i["severity"] == "error"),
+                               "warnings": sum(1 for i in items if i["severity"] == "warning"),
+                               "info": sum(1 for i in items if i["severity"] == "info")}
+                    for category, items in issues.items()},
+    }
+
+
+def make_analysis(commits: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        "repo": "octo/bench",
+        "languages": {"Python": 812345, "TypeScript": 402311},
+        "team": {"contributors": [{"login": f"dev{i}", "commits": rng.randint(1, 400)} for i in range(300)]},
+        "commits": {"count": commits, "items": [
+            {"sha": f"{rng.getrandbits(160):040x}", "author": f"dev{rng.randrange(300)}",
+             "message": "Refactor the request handlers and add tests", "additions": rng.randint(0, 500),
+             "deletions": rng.randint(0, 500), "files": [f"src/module_{rng.randrange(900)}.py" for _ in range(4)]}
+            for _ in range(commits)]},
+        "file_storage": {"base_path": "repos/octo/bench/main", "file_count": 900},
+        "stored_in_db": True,
+        "files_stored": True,
+        "file_count": 900,
+    }
+
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def wire(http, url: str, encoding: str, repeat: int) -> dict:
+    """Bytes received before decompression and the request latency."""
+    sizes, totals = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with http.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+            assert response.status_code == 200, response.status_code
+            sizes.append(sum(len(chunk) for chunk in response.iter_raw()))
+        totals.append(time.perf_counter() - start)
+    return {"bytes": sizes[0], "ms": round(statistics.median(totals) * 1000, 2)}
+
+
+async def first_chunk(response) -> None:
+    async for _ in response.body_iterator:
+        break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--issues", type=int, default=10_000)
+    parser.add_argument("--commits", type=int, default=5_000, help="commits in the synthetic analysis")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from fastapi import FastAPI
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+
+    from api_routes.repo_analysis import issue_lines
+    from core.services import responses
+    from core.services.responses import CompressionMiddleware, FastJSONResponse, model_response, ndjson_response
+    from models.schema import AnalysisResponse
+
+    issues = make_issues(args.issues)
+    analysis = make_analysis(args.commits)
+    print(f"{args.issues} issues, median of {args.repeat}; orjson: {responses.orjson is not None}, "
+          f"brotli: {responses.brotli is not None}")
+
+    default_ms = median_ms(lambda: JSONResponse(jsonable_encoder(issues)), args.repeat)
+    fast_ms = median_ms(lambda: FastJSONResponse(issues), args.repeat)
+    print(f"\nserialization: default {default_ms} ms, fast {fast_ms} ms ({default_ms / fast_ms:.1f}x), "
+          f"{len(FastJSONResponse(issues).body) / 1e6:.2f} MB")
+    first_ms = median_ms(lambda: asyncio.run(first_chunk(ndjson_response(issue_lines(issues)))), args.repeat)
+    print(f"ndjson: first chunk after {first_ms} ms")
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/issues/default")
+    async def issues_default():
+        return issues
+
+    @app.get("/issues/fast")
+    async def issues_fast():
+        return FastJSONResponse(issues)
+
+    @app.get("/issues/ndjson")
+    async def issues_ndjson():
+        return ndjson_response(issue_lines(issues))
+
+    @app.get("/analysis/validated", response_model=AnalysisResponse)
+    async def analysis_validated():
+        return AnalysisResponse(**analysis)
+
+    @app.get("/analysis/fast", response_model=AnalysisResponse)
+    async def analysis_fast():
+        return model_response(AnalysisResponse, analysis)
+
+    http = TestClient(app)
+    encodings = ["identity", "gzip"] + (["br"] if responses.brotli is not None else [])
+    print(f"\n{'endpoint':<20} {'encoding':<9} {'wire_MB':>8} {'ms':>9}")
+    for url in ["/issues/default", "/issues/fast", "/issues/ndjson", "/analysis/validated", "/analysis/fast"]:
+        for encoding in encodings:
+            result = wire(http, url, encoding, args.repeat)
+            print(f"{url:<20} {encoding:<9} {result['bytes'] / 1e6:>8.3f} {result['ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
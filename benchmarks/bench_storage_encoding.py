@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Compare repository row encodings on synthetic large repositories: per-file
+arrays inline in the row (the original layout), chunked plain JSON, and the
+compressed storage encodings (zlib+json always, zstd+msgpack when installed).
+Reports the bytes stored, and for the main read endpoints the bytes returned by
+the database and the latency through the API on the local backend, with the
+database's egress simulated at a fixed bandwidth.
+
+Usage: python benchmarks/bench_storage_encoding.py [--files 10000] [--repeat 5] [--egress-mb 50]
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+
+def make_analysis(files: int, seed: int = 0):
+    """An analysis result and per-file arrays shaped like analyze_and_store_repo's."""
+    rng = random.Random(seed)
+    file_metadata = []
+    file_analysis = []
+    for i in range(files):
+        sha = f"{rng.getrandbits(160):040x}"
+        path = f"src/pkg{i % 50}/module_{i}.py"
+        file_metadata.append({
+            "relative_path": path,
+            "storage_path": f"blobs/{sha[:2]}/{sha}",
+            "public_url": f"https://example.supabase.co/storage/v1/object/public/repo-files/blobs/{sha[:2]}/{sha}",
+            "size_bytes": rng.randint(100, 40_000),
+            "file_extension": ".py",
+            "content_type": "text/x-python",
+            "blob_sha": sha,
+        })
+        file_analysis.append({
+            "path": path,
+            "issues": [
+                {"line": rng.randint(1, 400), "type": rng.choice(["style", "complexity", "security"]),
+                 "message": rng.choice(["Line too long", "Function too complex", "Use of eval"])}
+                for _ in range(rng.randint(0, 4))
+            ],
+            "metrics": {"lines": rng.randint(10, 400), "functions": rng.randint(0, 30)},
+        })
+    skipped = [{"path": f"node_modules/pkg{i}/index.js", "reason": "vendored"} for i in range(files // 4)]
+    analysis = {
+        "repo": "octo/mono",
+        "languages": {"Python": 12_345_678, "TypeScript": 234_567},
+        "team": {"contributors": [{"login": f"user{i}", "commits": rng.randint(1, 300)} for i in range(60)]},
+        "commits": {"by_week": [{"week": w, "count": rng.randint(0, 50)} for w in range(520)], "total": 5000},
+        "file_storage": {"base_path": "repos/u/octo/mono/main", "file_count": files,
+                         "skipped_files": skipped, "skipped_count": len(skipped)},
+    }
+    arrays = {"file_metadata": file_metadata, "file_analysis": file_analysis, "skipped_files": skipped}
+    return analysis, arrays
+
+
+class CountingClient:
+    """Passes queries through to ``client``, counting the bytes they return and
+    sleeping for their transfer time at ``bandwidth`` bytes/s."""
+
+    def __init__(self, client, bandwidth: float):
+        self.client = client
+        self.bandwidth = bandwidth
+        self.bytes_read = 0
+
+    def table(self, name):
+        return CountingQuery(self, self.client.table(name))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class CountingQuery:
+    def __init__(self, owner: CountingClient, query):
+        self.owner = owner
+        self.query = query
+
+    def __getattr__(self, name):
+        attr = getattr(self.query, name)
+
+        def call(*args, **kwargs):
+            return CountingQuery(self.owner, attr(*args, **kwargs))
+        return call
+
+    def execute(self):
+        from core.services.repo_store import payload_size
+
+        result = self.query.execute()
+        size = payload_size(result.data)
+        self.owner.bytes_read += size
+        time.sleep(size / self.owner.bandwidth)
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--egress-mb", type=float, default=50.0, help="database egress MB/s")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["VIBECHECK_BACKEND"] = "local"
+    os.environ["VIBECHECK_DATA_DIR"] = tmp.name
+    # Measure the database reads, not the shared cache in front of them
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import api_routes.file_content
+    import core.services.supabase
+    from api_routes.repo_analysis import router as repo_analysis_router
+    from core.services.repo_store import ANALYSIS_COLUMNS, RepoStore, compact_analysis, payload_size
+    from core.services.storage_codec import ZLIB_JSON, ZSTD_MSGPACK, best_encoding
+
+    local = core.services.supabase.supabase
+    counting = CountingClient(local, args.egress_mb * 1e6)
+    core.services.supabase.supabase = counting
+    api_routes.file_content.supabase = counting
+
+    app = FastAPI()
+    app.include_router(repo_analysis_router)
+    app.include_router(api_routes.file_content.router)
+    http = TestClient(app)
+
+    analysis, arrays = make_analysis(args.files)
+    base = {"user_id": "u", "owner": "octo", "name": "mono", "score_issues": {"Quality": []}}
+
+    variants = [("inline", None), ("json", "json"), (ZLIB_JSON, ZLIB_JSON)]
+    if best_encoding() == ZSTD_MSGPACK:
+        variants.append((ZSTD_MSGPACK, ZSTD_MSGPACK))
+    else:
+        print("zstandard/msgpack not installed: zstd+msgpack skipped")
+
+    endpoints = [
+        ("repo", "/api/repos/repos/{id}"),
+        ("files", "/api/repos/repos/{id}/files?limit=100"),
+        ("file_list", "/api/files/repos/{id}/files"),
+    ]
+    print(f"{args.files} files, {args.egress_mb:.0f} MB/s egress, median of {args.repeat}")
+    print(f"{'layout':<14} {'stored_MB':>10} {'save_s':>7}" + "".join(
+        f" {name + '_MB':>14} {name + '_ms':>14}" for name, _ in endpoints))
+
+    for label, encoding in variants:
+        full_name = f"octo/mono-{label}"
+        start = time.perf_counter()
+        if encoding is None:
+            # Previous layout: one row with every document inline
+            repo_id = f"repo-{label}"
+            row = dict(base, id=repo_id, full_name=full_name, raw_analysis=analysis,
+                       file_metadata=arrays["file_metadata"], file_analysis=arrays["file_analysis"],
+                       **{column: analysis[key] for key, column in ANALYSIS_COLUMNS.items()})
+            local.table("repos").insert(row).execute()
+            stored = payload_size(row)
+        else:
+            store = RepoStore(local, encoding=encoding)
+            repo_id = store.resolve_repo_id(full_name)
+            stats = store.save_repo(repo_id, dict(base, full_name=full_name), analysis, arrays)
+            stored = stats["bytes_written"]
+            assert compact_analysis(analysis) == compact_analysis(store.load_repo(repo_id)["raw_analysis"])
+        save_s = time.perf_counter() - start
+
+        cells = [f"{label:<14} {stored / 1e6:>10.2f} {save_s:>7.2f}"]
+        for name, path in endpoints:
+            url = path.format(id=repo_id)
+            timings = []
+            for _ in range(args.repeat):
+                counting.bytes_read = 0
+                start = time.perf_counter()
+                response = http.get(url)
+                timings.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+            cells.append(f" {counting.bytes_read / 1e6:>14.2f} {statistics.median(timings) * 1000:>14.0f}")
+        print("".join(cells))
+
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
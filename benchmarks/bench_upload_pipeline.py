@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare the previous one-at-a-time storage uploads with the async upload
+pipeline, against the filesystem storage stand-in with artificial per-request
+latency and injected transient failures (HTTP 503).
+
+Usage: python benchmarks/bench_upload_pipeline.py [--files 200] [--size 8192] [--latency 0.03] [--failure-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Backend'))
+
+from core.services.local_storage import LocalStorageBucket, LocalStorageError
+from core.services.upload_pipeline import UploadPipeline, local_public_url, public_url_prefix
+
+
+class FlakyBucket(LocalStorageBucket):
+    """Fails a fraction of uploads with a 503 before touching the disk."""
+
+    def __init__(self, root: str, bucket: str, latency: float, failure_rate: float, seed: int = 0):
+        super().__init__(root, bucket, latency=latency)
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def upload(self, path, file, file_options=None):
+        with self._lock:
+            fail = self._random.random() < self.failure_rate
+        if fail:
+            self._wait()
+            raise LocalStorageError("Service Unavailable", 503)
+        return super().upload(path, file, file_options)
+
+
+def make_files(count: int, size: int):
+    return [(f"blobs/{i % 256:02x}/{i:040x}", os.urandom(size)) for i in range(count)]
+
+
+async def legacy_upload(bucket, files, sleeps: bool):
+    """
+    The previous process_file loop: batches of 10 under Semaphore(2), a blocking
+    upload on the event loop, a get_public_url call and a 0.2s pause per file,
+    and 2s between batches. Failed uploads are not retried.
+    """
+    semaphore = asyncio.Semaphore(2)
+    uploaded = 0
+
+    async def process(path, content):
+        nonlocal uploaded
+        async with semaphore:
+            try:
+                bucket.upload(path=path, file=content, file_options={"content-type": "text/plain"})
+                bucket.get_public_url(path)
+                uploaded += 1
+            except LocalStorageError:
+                pass
+            if sleeps:
+                await asyncio.sleep(0.2)
+
+    for i in range(0, len(files), 10):
+        await asyncio.gather(*[process(path, content) for path, content in files[i:i + 10]])
+        if sleeps and i + 10 < len(files):
+            await asyncio.sleep(2)
+    return uploaded
+
+
+async def pipeline_upload(bucket, files, workers: int):
+    prefix = public_url_prefix(bucket)
+    async with UploadPipeline(bucket, workers=workers, base_delay=0.05, max_delay=1.0) as uploads:
+        futures = [await uploads.submit(path, content, "text/plain") for path, content in files]
+    results = [f.result() for f in futures]
+    urls = [local_public_url(prefix, r.path) for r in results if r.ok]
+    return len(urls), uploads.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size", type=int, default=8192)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    files = make_files(args.files, args.size)
+    total_mb = args.files * args.size / 1e6
+    print(f"{args.files} files x {args.size} bytes, {args.latency * 1000:.0f} ms per request, "
+          f"{args.failure_rate:.0%} transient failures")
+    print(f"{'mode':<22} {'uploaded':>9} {'retries':>8} {'seconds':>8} {'files/s':>8} {'MB/s':>7}")
+
+    def row(mode, uploaded, retries, seconds):
+        print(f"{mode:<22} {uploaded:>9} {retries:>8} {seconds:>8.2f} {uploaded / seconds:>8.1f} "
+              f"{total_mb * uploaded / args.files / seconds:>7.2f}")
+
+    for sleeps in (True, False):
+        with tempfile.TemporaryDirectory() as root:
+            bucket = FlakyBucket(root, "repo-files", args.latency, args.failure_rate)
+            start = time.perf_counter()
+            uploaded = asyncio.run(legacy_upload(bucket, files, sleeps))
+            row("legacy" if sleeps else "legacy (no sleeps)", uploaded, 0, time.perf_counter() - start)
+
+    for workers in (1, 4, 8, 16):
+        with tempfile.TemporaryDirectory() as root:
+            bucket = FlakyBucket(root, "repo-files", args.latency, args.failure_rate)
+            uploaded, stats = asyncio.run(pipeline_upload(bucket, files, workers))
+            assert stats["failures"] == 0 and uploaded == args.files, stats
+            row(f"pipeline workers={workers}", uploaded, stats["retries"], stats["elapsed_s"])
+
+
+if __name__ == "__main__":
+    main()
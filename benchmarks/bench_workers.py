@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Read throughput of the API with 1..N uvicorn workers sharing one cache.
+
+Seeds the local backend (SQLite + filesystem, see core/services/local_backend.py)
+with a synthetic repository, then for each worker count starts
+``uvicorn main:app --workers N`` twice: with ``CACHE_BACKEND=sqlite`` (every
+worker reads and fills the same WAL database) and with ``CACHE_BACKEND=none``.
+Client processes request the read endpoints round-robin over keep-alive
+connections for a fixed time, and the requests/s and latency percentiles are
+reported per run.
+
+After each cached run the harness re-saves the repository through RepoStore,
+which invalidates the repository's cache scope, and checks that every
+response from then on, from whichever worker, reflects the new file list.
+
+Throughput can only scale up to the host's cores; the report includes the
+CPU count.
+
+Usage: python benchmarks/bench_workers.py [--workers 1,2,4] [--files 300] [--seconds 10] [--clients 8] [--output report.json]
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BACKEND = os.path.join(ROOT, 'Backend')
+sys.path.append(BACKEND)
+
+REPO = "octo/bench"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_source(rng: random.Random, i: int) -> str:
+    lines = [f"import os\n\n\ndef handler_{i}(request):"]
+    for j in range(rng.randint(20, 120)):
+        lines.append(f"    value_{j} = request.get('field_{j}') or os.environ.get('KEY_{j}', '')  # TODO tidy")
+    lines.append("    return locals()\n")
+    return "\n".join(lines)
+
+
+def upload_files(files: int) -> list:
+    """Upload ``files`` synthetic sources; their file_metadata entries."""
+    from core.services.supabase import supabase
+
+    rng = random.Random(0)
+    bucket = supabase.storage.from_("repo-files")
+    file_metadata = []
+    for i in range(files):
+        content = make_source(rng, i).encode()
+        sha = hashlib.sha1(content).hexdigest()
+        storage_path = f"blobs/{sha[:2]}/{sha}"
+        bucket.upload(storage_path, content)
+        file_metadata.append({
+            "relative_path": f"src/pkg{i % 20}/module_{i}.py",
+            "name": f"module_{i}.py",
+            "storage_path": storage_path,
+            "size_bytes": len(content),
+            "file_extension": ".py",
+        })
+    return file_metadata
+
+
+def save(file_metadata: list) -> dict:
+    """Store the benchmark repository with these files, as a new analysis would."""
+    from core.services.repo_store import RepoStore
+
+    base_path = f"repos/{REPO}/main"
+    store = RepoStore()
+    repo_id = store.resolve_repo_id(REPO)
+    store.save_repo(repo_id, {"full_name": REPO, "user_id": "bench", "owner": "octo", "name": "bench",
+                              "file_storage_base_path": base_path, "score_issues": {"Quality": []}},
+                    {"file_storage": {"base_path": base_path}},
+                    {"file_metadata": file_metadata, "file_analysis": []})
+    return {"repo_id": repo_id, "paths": [f["relative_path"] for f in file_metadata]}
+
+
+def endpoints(repo: dict) -> list:
+    repo_id = repo["repo_id"]
+    paths = [f"/api/files/repos/{repo_id}/file/{path}" for path in repo["paths"][:50]]
+    return [
+        f"/api/repos/repos/{repo_id}",
+        f"/api/repos/{repo_id}/files/list",
+        f"/api/files/repos/{repo_id}/files",
+        f"/api/repos/repos/{repo_id}/issues",
+    ] + paths
+
+
+def client_loop(port: int, urls: list, seconds: float, offset: int, results) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    i = offset
+    while time.perf_counter() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", url)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    results.put((latencies, errors))
+
+
+def drive(port: int, urls: list, seconds: float, clients: int) -> dict:
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=client_loop, args=(port, urls, seconds, i * 7, results))
+                 for i in range(clients)]
+    for process in processes:
+        process.start()
+    latencies, errors = [], 0
+    for _ in processes:
+        lat, err = results.get()
+        latencies.extend(lat)
+        errors += err
+    for process in processes:
+        process.join()
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": pick(0.5),
+        "p99_ms": pick(0.99),
+    }
+
+
+def get_json(port: int, path: str):
+    # A new connection each time, so the kernel hands it to any worker
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=60) as response:
+        return json.loads(response.read())
+
+
+def start_server(workers: int, env: dict, timeout: float = 60.0):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            get_json(port, "/health")
+            # Give the remaining workers time to finish importing
+            time.sleep(0.5 * workers)
+            return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("server did not start")
+
+
+def check_invalidation(port: int, workers: int, file_metadata: list, repo: dict) -> dict:
+    """Re-save the repository with one file fewer; no worker may serve the old list afterwards."""
+    before = {get_json(port, f"/api/files/repos/{repo['repo_id']}/files")["count"] for _ in range(4 * workers)}
+    save(file_metadata[:-1])
+    stale = 0
+    checks = 20 * workers
+    for _ in range(checks):
+        if get_json(port, f"/api/files/repos/{repo['repo_id']}/files")["count"] != len(file_metadata) - 1:
+            stale += 1
+        if get_json(port, f"/api/repos/{repo['repo_id']}/files/list")["count"] != len(file_metadata) - 1:
+            stale += 1
+    save(file_metadata)
+    return {"counts_before": sorted(before), "checks": 2 * checks, "stale": stale}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per run")
+    parser.add_argument("--clients", type=int, default=8, help="load generator processes")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    cache_path = os.path.join(tmp.name, "cache.db")
+    os.environ.update({
+        "VIBECHECK_BACKEND": "local",
+        "VIBECHECK_DATA_DIR": tmp.name,
+        # The harness writes through the same cache the workers read
+        "CACHE_BACKEND": "sqlite",
+        "CACHE_PATH": cache_path,
+        # Keep runs from appending to backend.log
+        "LOG_FILE": "",
+        "LOG_LEVEL": "WARNING",
+    })
+    file_metadata = upload_files(args.files)
+    repo = save(file_metadata)
+    urls = endpoints(repo)
+
+    runs = []
+    for workers in [int(n) for n in args.workers.split(",")]:
+        for backend in ("sqlite", "none"):
+            env = dict(os.environ, CACHE_BACKEND=backend)
+            process, port = start_server(workers, env)
+            try:
+                # Warm up: fill the cache and each worker's lazily created clients
+                drive(port, urls, min(2.0, args.seconds), args.clients)
+                run = {"workers": workers, "cache": backend, **drive(port, urls, args.seconds, args.clients)}
+                if backend != "none":
+                    run["invalidation"] = check_invalidation(port, workers, file_metadata, repo)
+            finally:
+                process.terminate()
+                process.wait()
+            print(json.dumps(run), file=sys.stderr)
+            runs.append(run)
+
+    baseline = {run["cache"]: run["rps"] for run in runs if run["workers"] == runs[0]["workers"]}
+    for run in runs:
+        run["speedup"] = round(run["rps"] / baseline[run["cache"]], 2) if baseline.get(run["cache"]) else None
+    report = {
+        "cpus": os.cpu_count(),
+        "files": args.files,
+        "endpoints": len(urls),
+        "clients": args.clients,
+        "seconds": args.seconds,
+        "runs": runs,
+    }
+    tmp.cleanup()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    stale = sum(run.get("invalidation", {}).get("stale", 0) for run in runs)
+    sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Local mock of the GitHub REST endpoints the analyzer uses, serving one
+synthetic repository, plus an OpenAI-compatible streaming chat completions
+endpoint for the scoring step.
+
+The repository is generated deterministically from the command line: number
+of commits and files, directory depth, mean file size. Every request can be
+delayed by a fixed latency, and a rate limit can be enforced with GitHub's
+X-RateLimit-* headers and 403 responses. ``GET /_stats`` returns request counts
+by endpoint and ``POST /_reset`` clears them and the rate limit window.
+
+It also stands in for an OpenTelemetry collector: ``POST /v1/traces`` accepts
+OTLP/HTTP JSON and ``GET /_traces`` returns the spans received so far.
+
+Point the backend at it with GITHUB_API_URL=http://127.0.0.1:{port} and
+OPENAI_BASE_URL=http://127.0.0.1:{port}/v1 (see bench_e2e.py).
+
+Usage: python benchmarks/mock_github.py [--port 8765] [--commits 200] [--files 500] [--depth 3]
+       [--file-size 4096] [--latency 0.02] [--rate-limit 5000] [--rate-window 3600]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+OWNER, REPO = "octo", "synthetic"
+
+EXTENSIONS = [".py", ".py", ".ts", ".js", ".md", ".json"]
+AUTHORS = [f"dev{i}" for i in range(12)]
+
+# Lines the code issue analyzers flag, mixed into generated source
+FLAGGED_LINES = [
+    "    result = eval(expression)",
+    "    except:",
+    "    password = \"hunter2\"",
+    "from helpers import *",
+]
+
+
+def git_blob_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class SyntheticRepo:
+    """A deterministic repository: a file tree and a commit history touching it."""
+
+    def __init__(self, commits: int, files: int, depth: int, file_size: int, seed: int = 0):
+        self.seed = seed
+        self.file_size = file_size
+        rng = random.Random(seed)
+        self.paths: List[str] = []
+        for i in range(files):
+            parts = [f"mod{(i // 4 ** level) % 4}" for level in range(depth)]
+            self.paths.append("/".join(["src", *parts, f"file{i}{EXTENSIONS[i % len(EXTENSIONS)]}"]))
+        self.sizes = {path: max(64, int(file_size * rng.uniform(0.5, 1.5))) for path in self.paths}
+        self._content: Dict[str, bytes] = {}
+        self._sha: Dict[str, str] = {}
+
+        now = int(time.time())
+        self.commits: List[Dict[str, Any]] = []
+        for i in range(commits):
+            touched = rng.sample(self.paths, min(len(self.paths), rng.randint(1, 6)))
+            self.commits.append({
+                "sha": hashlib.sha1(f"{seed}-commit-{i}".encode()).hexdigest(),
+                "author": AUTHORS[rng.randrange(len(AUTHORS))],
+                "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - i * 3600)),
+                "files": [(path, rng.randint(1, 80), rng.randint(0, 40)) for path in touched],
+            })
+        self._commits_by_sha = {c["sha"]: c for c in self.commits}
+
+    def content(self, path: str) -> bytes:
+        if path not in self._content:
+            rng = random.Random(f"{self.seed}:{path}")
+            lines = []
+            size = 0
+            while size < self.sizes[path]:
+                if rng.random() < 0.03:
+                    line = rng.choice(FLAGGED_LINES)
+                else:
+                    line = f"def handler_{rng.randrange(10 ** 6)}(value):  # {'x' * rng.randint(0, 60)}"
+                lines.append(line)
+                size += len(line) + 1
+            self._content[path] = "\n".join(lines).encode()[:self.sizes[path]]
+        return self._content[path]
+
+    def sha(self, path: str) -> str:
+        if path not in self._sha:
+            self._sha[path] = git_blob_sha(self.content(path))
+        return self._sha[path]
+
+    def listing(self, directory: str) -> Optional[List[Dict[str, str]]]:
+        """Direct children of ``directory`` ("" for the root), or None if it does not exist."""
+        prefix = f"{directory}/" if directory else ""
+        files, dirs = [], set()
+        for path in self.paths:
+            if not path.startswith(prefix):
+                continue
+            rest = path[len(prefix):]
+            if "/" in rest:
+                dirs.add(prefix + rest.split("/", 1)[0])
+            else:
+                files.append(path)
+        if not files and not dirs:
+            return None
+        return [{"type": "dir", "path": d} for d in sorted(dirs)] + [{"type": "file", "path": f} for f in files]
+
+    def languages(self) -> Dict[str, int]:
+        names = {".py": "Python", ".ts": "TypeScript", ".js": "JavaScript"}
+        totals: Counter = Counter()
+        for path in self.paths:
+            ext = path[path.rfind("."):]
+            if ext in names:
+                totals[names[ext]] += self.sizes[path]
+        return dict(totals)
+
+    def commit_detail(self, sha: str) -> Optional[Dict[str, Any]]:
+        commit = self._commits_by_sha.get(sha)
+        if commit is None:
+            return None
+        files = [
+            {"filename": path, "status": "modified", "additions": adds, "deletions": dels,
+             "changes": adds + dels, "patch": "@@ -1 +1 @@\n-old\n+new"}
+            for path, adds, dels in commit["files"]
+        ]
+        additions = sum(f["additions"] for f in files)
+        deletions = sum(f["deletions"] for f in files)
+        return {
+            "sha": sha,
+            "author": {"login": commit["author"]},
+            "commit": {
+                "author": {"name": commit["author"], "email": f"{commit['author']}@example.com", "date": commit["date"]},
+                "message": f"Change {sha[:7]}",
+            },
+            "stats": {"additions": additions, "deletions": deletions, "total": additions + deletions},
+            "files": files,
+        }
+
+
+SCORING = {
+    "overall_score": 72,
+    "ai_percentage": 20,
+    "scores": [
+        {"title": title, "score": score, "color": "#4caf50", "description": f"{title} score"}
+        for title, score in [("Quality", 70), ("Security", 75), ("Style", 80), ("Originality", 65), ("Git Hygiene", 70)]
+    ],
+    "radar_data": [{"category": c, "score": s, "fullMark": 100} for c, s in [("Quality", 70), ("Security", 75), ("Style", 80)]],
+    "files": [],
+    "analysis": "Synthetic scoring from the mock server.",
+    "recommendations": ["Add tests"],
+}
+
+
+def create_app(repo: SyntheticRepo, latency: float = 0.0, rate_limit: int = 5000,
+               rate_window: float = 3600.0) -> FastAPI:
+    app = FastAPI()
+    stats: Counter = Counter()
+    window = {"start": time.time(), "used": 0}
+    spans: List[Dict[str, Any]] = []
+
+    def rate_headers() -> Dict[str, str]:
+        reset = int(window["start"] + rate_window) + 1
+        return {
+            "X-RateLimit-Limit": str(rate_limit),
+            "X-RateLimit-Remaining": str(max(0, rate_limit - window["used"])),
+            "X-RateLimit-Reset": str(reset),
+        }
+
+    async def github(kind: str, body: Any = None, status: int = 200, headers: Optional[Dict[str, str]] = None):
+        """Count, delay and rate limit one API request."""
+        stats[kind] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if time.time() >= window["start"] + rate_window:
+            window["start"], window["used"] = time.time(), 0
+        if window["used"] >= rate_limit:
+            stats["rate_limited"] += 1
+            return JSONResponse({"message": "API rate limit exceeded"}, status_code=403, headers=rate_headers())
+        window["used"] += 1
+        return JSONResponse(body, status_code=status, headers={**rate_headers(), **(headers or {})})
+
+    def not_found():
+        return {"message": "Not Found"}
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {"requests": dict(stats), "total": sum(v for k, v in stats.items() if k != "rate_limited")}
+
+    @app.get("/_traces")
+    async def get_traces():
+        return {"span_count": len(spans), "spans": spans}
+
+    @app.post("/_reset")
+    async def reset():
+        stats.clear()
+        spans.clear()
+        window["start"], window["used"] = time.time(), 0
+        return {"ok": True}
+
+    @app.get("/repos/{owner}/{name}")
+    async def repo_info(owner: str, name: str):
+        return await github("repo", {
+            "name": name, "full_name": f"{owner}/{name}", "description": "Synthetic benchmark repository",
+            "html_url": f"https://github.com/{owner}/{name}", "clone_url": f"https://github.com/{owner}/{name}.git",
+            "default_branch": "main", "language": "Python", "stargazers_count": 0, "forks_count": 0,
+            "size": sum(repo.sizes.values()) // 1024,
+        })
+
+    @app.get("/repos/{owner}/{name}/languages")
+    async def languages(owner: str, name: str):
+        return await github("languages", repo.languages())
+
+    @app.get("/repos/{owner}/{name}/commits")
+    async def commits(request: Request, owner: str, name: str):
+        per_page = min(100, int(request.query_params.get("per_page", 30)))
+        page = int(request.query_params.get("page", 1))
+        items = [{"sha": c["sha"]} for c in repo.commits[(page - 1) * per_page:page * per_page]]
+        last = max(1, -(-len(repo.commits) // per_page))
+        base = str(request.url.remove_query_params("page"))
+        links = [f'<{base}&page={last}>; rel="last"']
+        if page < last:
+            links.insert(0, f'<{base}&page={page + 1}>; rel="next"')
+        return await github("commits", items, headers={"Link": ", ".join(links)})
+
+    @app.get("/repos/{owner}/{name}/commits/{sha}")
+    async def commit(owner: str, name: str, sha: str):
+        detail = repo.commit_detail(sha)
+        return await github("commit", detail or not_found(), 200 if detail else 404)
+
+    @app.get("/repos/{owner}/{name}/contents")
+    @app.get("/repos/{owner}/{name}/contents/{path:path}")
+    async def contents(request: Request, owner: str, name: str, path: str = ""):
+        entries = repo.listing(path.strip("/"))
+        if entries is None:
+            return await github("contents", not_found(), 404)
+        base = str(request.base_url).rstrip("/")
+        items = []
+        for entry in entries:
+            item = {"type": entry["type"], "path": entry["path"], "name": entry["path"].rsplit("/", 1)[-1]}
+            if entry["type"] == "file":
+                item.update(sha=repo.sha(entry["path"]), size=repo.sizes[entry["path"]],
+                            download_url=f"{base}/raw/{owner}/{name}/main/{entry['path']}")
+            items.append(item)
+        return await github("contents", items)
+
+    @app.get("/raw/{owner}/{name}/{ref}/{path:path}")
+    async def raw(owner: str, name: str, ref: str, path: str):
+        # raw.githubusercontent.com is not rate limited
+        stats["raw"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if path not in repo.sizes:
+            return PlainTextResponse("404: Not Found", status_code=404)
+        return Response(repo.content(path), media_type="text/plain")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats["chat"] += 1
+        body = await request.json()
+        text = json.dumps(SCORING)
+        pieces = [text[i:i + 40] for i in range(0, len(text), 40)]
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None, usage: Optional[Dict[str, int]] = None):
+            payload = {
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            if latency:
+                await asyncio.sleep(latency)
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in pieces:
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+            yield chunk({}, usage={"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4,
+                                   "total_tokens": prompt_tokens + len(text) // 4})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/traces")
+    async def otlp_traces(request: Request):
+        body = await request.json()
+        for resource_spans in body.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                spans.extend(scope_spans.get("spans", []))
+        return {"partialSuccess": {}}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--file-size", type=int, default=4096, help="mean file size in bytes")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="API requests per window")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="rate limit window in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    repo = SyntheticRepo(args.commits, args.files, args.depth, args.file_size, args.seed)
+    app = create_app(repo, args.latency, args.rate_limit, args.rate_window)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
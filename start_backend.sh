@@ -5,5 +5,13 @@ cd /Users/dhirennarne/Desktop/VibeCheck-Code-Reviewer-And-Grader
 source venv/bin/activate
 cd Backend
 
+# WORKERS>1 runs that many processes sharing one cache database (see core/services/shared_cache.py)
+WORKERS=${WORKERS:-1}
+
 echo "Starting backend server..."
-uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+if [ "$WORKERS" -gt 1 ]; then
+    export CACHE_BACKEND=${CACHE_BACKEND:-sqlite}
+    uvicorn main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
+else
+    uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+fi
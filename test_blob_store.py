@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Tests for blob reference counting under concurrent analyses and garbage collections.
+
+Two analyses run in threads against one LocalClient. Every database and
+storage call waits for its turn in a schedule, so each run replays one exact
+interleaving of the two record/GC sequences.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.blob_store import BlobStore, blob_storage_path, git_blob_sha
+from core.services.local_backend import LocalClient
+
+STEPPED_CALLS = ("execute", "upload", "remove")
+
+
+class Schedule:
+    """Grants database and storage calls one at a time, in the order of ``turns``."""
+
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.running = set()
+        self.busy = False
+        self.cond = threading.Condition()
+
+    def _next(self):
+        while self.turns and self.turns[0] not in self.running:
+            self.turns.pop(0)
+        return self.turns[0] if self.turns else None
+
+    def begin(self, name):
+        with self.cond:
+            self.cond.wait_for(lambda: not self.busy and self._next() in (name, None))
+            self.busy = True
+
+    def end(self):
+        with self.cond:
+            self.busy = False
+            if self.turns:
+                self.turns.pop(0)
+            self.cond.notify_all()
+
+    def run(self, processes):
+        errors = []
+
+        def target(name, process):
+            try:
+                process()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                with self.cond:
+                    self.running.discard(name)
+                    self.cond.notify_all()
+
+        self.running.update(processes)
+        threads = [threading.Thread(target=target, args=item) for item in processes.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+
+class Stepped:
+    """Proxy that runs the calls in STEPPED_CALLS as scheduled steps of one process."""
+
+    def __init__(self, target, schedule, name):
+        self._target = target
+        self._schedule = schedule
+        self._name = name
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if isinstance(value, str):
+            return value
+        if not callable(value):
+            return Stepped(value, self._schedule, self._name)
+
+        def call(*args, **kwargs):
+            if attr not in STEPPED_CALLS:
+                result = value(*args, **kwargs)
+                return Stepped(result, self._schedule, self._name) if result is not None else None
+            self._schedule.begin(self._name)
+            try:
+                return value(*args, **kwargs)
+            finally:
+                self._schedule.end()
+
+        return call
+
+
+def analyze(store, repo_id, snapshot_id, files):
+    """The blob steps of an analysis, in extract_and_store_files_contents_api's order."""
+    shas = {path: git_blob_sha(content) for path, content in files.items()}
+    contents = {shas[path]: content for path, content in files.items()}
+    acquired = store.acquire(contents)
+    held = list(acquired)
+    stored = {sha for sha, is_stored in acquired.items() if is_stored}
+    rows = []
+    for sha, content in contents.items():
+        if sha in stored:
+            continue
+        if sha not in acquired:
+            late = store.acquire([sha])
+            if sha not in late:
+                continue
+            held.append(sha)
+            if late[sha]:
+                stored.add(sha)
+                continue
+        try:
+            store.storage().upload(blob_storage_path(sha), content, {"content-type": "text/plain"})
+        except Exception as e:
+            if "already exists" not in str(e):
+                raise
+        rows.append(BlobStore.blob_row(sha, len(content), "text/plain"))
+        stored.add(sha)
+    store.register(rows)
+    manifest = {path: sha for path, sha in shas.items() if sha in stored}
+    store.record_snapshot(snapshot_id, repo_id, "user", "main", manifest)
+    unused = Counter(held)
+    unused.subtract(set(manifest.values()))
+    store.release(list(unused.elements()))
+    store.collect_garbage(repo_id, keep=1)
+
+
+def assert_consistent(client, store):
+    """Every blob a snapshot references is stored and counted once per snapshot; nothing else is kept."""
+    snapshots = client.table("repo_snapshots").select("manifest").execute().data
+    expected = Counter(sha for s in snapshots for sha in set(s["manifest"].values()))
+    rows = {r["sha"]: r for r in client.table("blobs").select("*").execute().data}
+    assert {sha: r["ref_count"] for sha, r in rows.items()} == dict(expected), (rows, expected)
+    for sha in expected:
+        assert rows[sha]["stored"] is True
+        assert store.storage().download(blob_storage_path(sha))
+
+
+def run_interleaving(turns):
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = BlobStore(client)
+        # Repository a holds x and y, repository b holds y
+        analyze(store, "a", "a1", {"x.py": b"x", "y.py": b"y"})
+        analyze(store, "b", "b1", {"y.py": b"y"})
+
+        # Each new snapshot reuses a blob the other repository's collection releases
+        schedule = Schedule(turns)
+        stepped_a = BlobStore(Stepped(client, schedule, "a"))
+        stepped_b = BlobStore(Stepped(client, schedule, "b"))
+        schedule.run({
+            "a": lambda: analyze(stepped_a, "a", "a2", {"y.py": b"y", "z.py": b"z"}),
+            "b": lambda: analyze(stepped_b, "b", "b2", {"x.py": b"x", "w.py": b"w"}),
+        })
+        assert_consistent(client, store)
+        return {s["id"]: s["manifest"] for s in client.table("repo_snapshots").select("*").execute().data}
+
+
+def test_sequential_runs_keep_counts():
+    """Run one after the other, each repository keeps its newest snapshot and nothing else."""
+    snapshots = run_interleaving("a" * 100 + "b" * 100)
+    assert snapshots == {"a2": {"y.py": git_blob_sha(b"y"), "z.py": git_blob_sha(b"z")},
+                         "b2": {"x.py": git_blob_sha(b"x"), "w.py": git_blob_sha(b"w")}}
+
+
+def test_interleaved_record_and_gc_never_drop_referenced_blobs():
+    """In every sampled interleaving, recorded snapshots only reference stored, counted blobs."""
+    rng = random.Random(0)
+    for _ in range(150):
+        run_interleaving(rng.choice("ab") for _ in range(80))
+    # Strict alternation and one collection landing inside the other's analysis
+    run_interleaving("ab" * 40)
+    run_interleaving("b" * 8 + "a" * 20 + "b" * 40)
+
+
+def test_release_counts_each_occurrence():
+    """A blob in two expired snapshots loses both references in one collection."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = BlobStore(client)
+        sha = git_blob_sha(b"a")
+        for snapshot_id, created_at in [("old1", "2020-01-01"), ("old2", "2021-01-01"), ("new", "2022-01-01")]:
+            assert sha in store.acquire([sha])
+            store.record_snapshot(snapshot_id, "r", "user", "main", {"a.py": sha})
+            client.table("repo_snapshots").update({"created_at": created_at}).eq("id", snapshot_id).execute()
+        store.storage().upload(blob_storage_path(sha), b"a")
+        store.register([BlobStore.blob_row(sha, 1, "text/plain")])
+
+        assert store.collect_garbage("r", keep=1) == {"snapshots_removed": 2, "blobs_removed": 0}
+        assert client.table("blobs").select("ref_count").execute().data == [{"ref_count": 1}]
+        # A second collection of the same snapshots releases nothing
+        assert store.collect_garbage("r", keep=1) == {"snapshots_removed": 0, "blobs_removed": 0}
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_sequential_runs_keep_counts,
+        test_interleaved_record_and_gc_never_drop_referenced_blobs,
+        test_release_counts_each_occurrence,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL BLOB STORE TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
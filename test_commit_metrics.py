@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized commit metrics against the original per-commit Python loops.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), 'benchmarks'))
+
+from bench_commit_metrics import reference_metrics, synthetic_details
+from core.analyzers.commit_metrics import CommitAggregator, compute_commit_metrics
+
+
+def commit(author, files, login=True):
+    return {
+        "commit": {"author": {"email": f"{author}@example.com"}},
+        "author": {"login": author} if login else None,
+        "stats": {"additions": sum(f.get("additions", 0) for f in files),
+                  "deletions": sum(f.get("deletions", 0) for f in files)},
+        "files": files,
+    }
+
+
+def aggregate(details, chunk_size):
+    aggregator = CommitAggregator(chunk_size=chunk_size)
+    for d in details:
+        aggregator.add(d)
+    return aggregator.result()
+
+
+def assert_matches(details):
+    expected = reference_metrics(details)
+    assert compute_commit_metrics(details) == expected
+    for chunk_size in (1, 2, 7):
+        assert aggregate(details, chunk_size) == expected, f"chunk_size={chunk_size}"
+
+
+def test_empty_history():
+    assert_matches([])
+
+
+def test_empty_commits():
+    assert_matches([commit("alice", []), commit("bob", []), {"commit": {}, "stats": {}, "files": None}])
+    assert_matches([commit("alice", []), commit("alice", [{"filename": "src/app.py", "additions": 3}])])
+
+
+def test_root_files():
+    details = [
+        commit("alice", [{"filename": "README.md", "additions": 4}, {"filename": "setup.py", "deletions": 2}]),
+        commit("bob", [{"filename": "Makefile"}, {"filename": "src/main.go", "additions": 10}]),
+        # A file without a name counts as a root file
+        commit("alice", [{"additions": 1}, {"filename": "lib/util.rs", "additions": 1}]),
+        commit("carol", [{"filename": ".gitignore", "additions": 1}]),
+    ]
+    assert_matches(details)
+
+
+def test_single_author():
+    details = [
+        commit("alice", [{"filename": f"pkg{i % 3}/mod{i}.py", "additions": i, "deletions": i % 4}
+                         for i in range(n)])
+        for n in range(12)
+    ]
+    assert_matches(details)
+    team = compute_commit_metrics(details)["team"]
+    assert team["giniContribution"] == 0.0
+    assert team["topContributorsShare"] == 1.0
+
+
+def test_synthetic_corpus():
+    for seed in range(10):
+        for size in (1, 2, 37, 250):
+            assert_matches(synthetic_details(size, seed))
+
+
+def main():
+    tests = [
+        test_empty_history,
+        test_empty_commits,
+        test_root_files,
+        test_single_author,
+        test_synthetic_corpus,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL COMMIT METRICS TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for file classification before download and before upload.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.analyzers.file_classifier import (
+    GitAttributes, classify_content, classify_path, sniff_encoding, virtualenv_roots,
+)
+
+
+def test_path_rules_match_components_and_suffixes():
+    """Directory rules match whole components; compound suffixes like .min.js are recognized."""
+    assert classify_path("src/environment/config.ts") is None
+    assert classify_path("env/lib/python3.12/site-packages/six.py") == "pattern_match"
+    assert classify_path("venv/bin/python") == "pattern_match"
+    assert classify_path("tools/.venv/lib/site.py") == "pattern_match"
+    assert classify_path(".envrc") is None
+    assert classify_path("deploy/.env.production") == "pattern_match"
+    assert classify_path("static/js/app.min.js") == "minified"
+    assert classify_path("static/js/app.js.map") == "generated"
+    assert classify_path("web/package-lock.json") == "generated"
+    assert classify_path("web/node_modules/react/index.js") == "vendored"
+    assert classify_path("img/logo.PNG") == "binary_file"
+    assert classify_path("big.csv", size=200 * 1024 * 1024) == "file_too_large"
+    assert classify_path("src/main.py", size=1200) is None
+
+
+def test_virtualenvs_skipped_only_at_their_roots():
+    """env/ and venv/ below the root are packages unless the listing shows a virtualenv inside."""
+    assert classify_path("src/env/config.py") is None
+    assert classify_path("api/venv/settings.py") is None
+
+    listing = [
+        "src/env/config.py",
+        "services/api/env/pyvenv.cfg",
+        "services/api/env/lib/python3.12/site-packages/six.py",
+        "tools/py/bin/activate",
+        "tools/py/bin/pip",
+    ]
+    virtualenvs = virtualenv_roots(listing)
+    assert virtualenvs == {"services/api/env", "tools/py"}
+    assert classify_path("src/env/config.py", virtualenvs=virtualenvs) is None
+    assert classify_path("services/api/env/lib/python3.12/site-packages/six.py",
+                         virtualenvs=virtualenvs) == "pattern_match"
+    assert classify_path("tools/py/bin/pip", virtualenvs=virtualenvs) == "pattern_match"
+    assert classify_path("tools/pyproject.toml", virtualenvs=virtualenvs) is None
+
+
+def test_gitattributes_linguist_overrides():
+    """linguist-generated / linguist-vendored follow git's pattern and precedence rules."""
+    attributes = GitAttributes()
+    attributes.add(".gitattributes", "\n".join([
+        "# comment",
+        "*.gen.ts linguist-generated",
+        "/dist/** linguist-vendored=true",
+        "vendor/** -linguist-vendored",
+        "docs/ linguist-generated",
+    ]))
+    attributes.add("packages/api/.gitattributes", "schema.ts linguist-generated\n*.gen.ts -linguist-generated\n")
+
+    assert classify_path("src/types.gen.ts", attributes=attributes) == "generated"
+    assert classify_path("dist/bundle/app.js", attributes=attributes) == "vendored"
+    assert classify_path("src/dist/app.js", attributes=attributes) is None
+    # Unsetting linguist-vendored keeps a directory the built-in rules would skip
+    assert classify_path("vendor/lib/util.go", attributes=attributes) is None
+    # Directory patterns do not apply in git
+    assert classify_path("docs/guide.md", attributes=attributes) is None
+    # The deeper file overrides the root one and only applies below its directory
+    assert classify_path("packages/api/src/schema.ts", attributes=attributes) == "generated"
+    assert classify_path("packages/api/client.gen.ts", attributes=attributes) is None
+    assert classify_path("packages/web/schema.ts", attributes=attributes) is None
+
+
+def test_content_sniffing():
+    """NUL bytes mean binary; long average lines mean minified; headers mark generated code."""
+    assert sniff_encoding(b"plain text\n") == "utf-8"
+    assert sniff_encoding("café".encode() * 300) == "utf-8"
+    assert sniff_encoding("﻿bom".encode()) == "utf-8-sig"
+    assert sniff_encoding(b"caf\xe9 latin-1\n") == "unknown"
+    assert sniff_encoding("text".encode("utf-16")) is None
+
+    assert classify_content("data.txt", b"abc\0def") == "binary_content"
+    bundle = b"!function(e){" + b"var a=1,b=2;" * 400 + b"}();\n"
+    assert classify_content("static/app.js", bundle) == "minified"
+    assert classify_content("notes.txt", bundle) is None
+    assert classify_content("api/client.go", b"// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n") == "generated"
+    assert classify_content("src/app.py", b"import os\n\nprint(os.getcwd())\n") is None
+
+    attributes = GitAttributes()
+    attributes.add(".gitattributes", "static/*.js -linguist-generated\n")
+    assert classify_content("static/app.js", bundle, attributes) is None
+
+
+def test_generated_headers_need_an_explicit_marker_in_a_comment():
+    """Generator markers count inside comments; prose that mentions generation does not."""
+    generated = {
+        "api/types.ts": b"// @generated by scripts/codegen.ts\nexport type Id = string;\n",
+        "app/migrations/0002_auto.py": b"# Generated by Django 4.2 on 2024-05-01 10:00\n\nfrom django.db import migrations\n",
+        "gen/schema.sql": b"-- This file was auto-generated from schema.yaml\nCREATE TABLE t (id int);\n",
+        "web/icons.js": b"/*\n * This file is generated. Edit icons.yaml instead.\n */\nexport default {};\n",
+        "lib/parser.py": b"#!/usr/bin/env python\n# Code generated by ply; DO NOT EDIT.\nimport re\n",
+    }
+    for path, content in generated.items():
+        assert classify_content(path, content) == "generated", path
+
+    handwritten = {
+        "src/report.py": b'"""Render summaries generated by the nightly job."""\nimport os\n',
+        "src/routes.py": b"# Keys are auto-generated from the request path\n",
+        "src/docs.py": b'"""\nThis file is generated on demand by the docs command.\n"""\n',
+        "src/ids.go": b"// Code generated IDs are random; callers may edit them\npackage ids\n",
+        "README.md": b"Do not edit the generated files by hand; see @generated markers.\n",
+    }
+    for path, content in handwritten.items():
+        assert classify_content(path, content) is None, path
+
+    attributes = GitAttributes()
+    attributes.add(".gitattributes", "static/*.js -linguist-generated\n")
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_path_rules_match_components_and_suffixes,
+        test_virtualenvs_skipped_only_at_their_roots,
+        test_gitattributes_linguist_overrides,
+        test_content_sniffing,
+        test_generated_headers_need_an_explicit_marker_in_a_comment,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL FILE CLASSIFIER TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the batched per-file review pipeline.
+Uses the stub review provider, so no network or API key is needed.
+"""
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.file_review import (
+    FileReviewInput,
+    ReviewCache,
+    ReviewProvider,
+    StubReviewProvider,
+    apply_reviews_to_metadata,
+    pack_batches,
+    review_files
+)
+
+
+def make_files(count: int, lines: int = 20):
+    return [
+        FileReviewInput.from_content(
+            f"src/module_{i}.py",
+            "\n".join(f"def handler_{i}_{j}(value):\n    return value * {j}" for j in range(lines))
+        )
+        for i in range(count)
+    ]
+
+
+def test_batches_respect_token_limit():
+    """Small files share a batch and no batch exceeds the token limit."""
+    files = make_files(50)
+    batches = pack_batches(files, max_batch_tokens=2000)
+
+    assert sum(len(b) for b in batches) == len(files)
+    assert len(batches) < len(files), "small files should be packed together"
+    for batch in batches:
+        if len(batch) > 1:
+            assert sum(f.tokens + 8 for f in batch) <= 2000
+
+
+def test_concurrency_cap_and_cache():
+    """Batches run under the concurrency cap and reviews are cached by content hash."""
+    files = make_files(40)
+    provider = StubReviewProvider(latency=0.01)
+    cache = ReviewCache()
+
+    first = asyncio.run(review_files(files, provider, max_batch_tokens=1000, concurrency=3, cache=cache))
+    assert first["stats"]["reviewed"] == len(files)
+    assert provider.max_in_flight <= 3
+    calls_after_first = provider.calls
+
+    second = asyncio.run(review_files(files, provider, max_batch_tokens=1000, concurrency=3, cache=cache))
+    assert provider.calls == calls_after_first, "cached files must not be sent again"
+    assert second["stats"]["cache_hits"] == len(files)
+
+
+def test_duplicate_content_reviewed_once():
+    """Identical content at different paths is reviewed once."""
+    content = "def shared():\n    return 1\n"
+    files = [FileReviewInput.from_content(f"pkg{i}/util.py", content) for i in range(5)]
+    provider = StubReviewProvider()
+
+    run = asyncio.run(review_files(files, provider, cache=ReviewCache()))
+    assert provider.calls == 1
+    assert len(run["reviews"]) == 5
+
+
+def test_reviews_written_to_metadata():
+    """Review fields are written back onto matching file metadata entries."""
+    files = make_files(3)
+    run = asyncio.run(review_files(files, StubReviewProvider(), cache=ReviewCache()))
+    file_metadata = [{"relative_path": f.path} for f in files] + [{"relative_path": "README.md"}]
+
+    updated = apply_reviews_to_metadata(file_metadata, run["reviews"])
+    assert updated == 3
+    for entry in file_metadata[:3]:
+        assert 0 <= entry["ai_percentage"] <= 100
+        assert 0 <= entry["originality"] <= 100
+        assert 0 <= entry["llm_quality"] <= 100
+    assert "ai_percentage" not in file_metadata[3]
+
+
+def test_provider_without_review_batch_cannot_be_created():
+    class Incomplete(ReviewProvider):
+        name = "incomplete"
+
+    try:
+        Incomplete()
+    except TypeError:
+        return
+    raise AssertionError("provider without review_batch was created")
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_batches_respect_token_limit,
+        test_concurrency_cap_and_cache,
+        test_duplicate_content_reviewed_once,
+        test_reviews_written_to_metadata,
+        test_provider_without_review_batch_cannot_be_created,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL FILE REVIEW TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
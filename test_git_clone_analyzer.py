@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the local git clone analysis backend.
+Builds a small bare repository fixture with git, so no network is needed.
+"""
+
+import asyncio
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+import core.analyzers.git_clone_analyzer as git_clone_analyzer
+from core.analyzers.git_clone_analyzer import GitClone, GitCloneError, analyze_clone, auth_env, cloned_repo
+
+OLD_DATE = "2015-01-01T12:00:00Z"
+NEW_DATE = "2024-06-01T12:00:00Z"
+WINDOW_START = "2020-01-01T00:00:00Z"
+
+
+def git(cwd: str, *args: str, date: str = NEW_DATE, email: str = "alice@example.com") -> str:
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": email.split("@")[0], "GIT_AUTHOR_EMAIL": email, "GIT_AUTHOR_DATE": date,
+        "GIT_COMMITTER_NAME": "ci", "GIT_COMMITTER_EMAIL": "ci@example.com", "GIT_COMMITTER_DATE": date,
+    }
+    return subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout
+
+
+def write(root: str, path: str, content) -> None:
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+
+
+def make_fixture(tmp: str) -> str:
+    """
+    A bare repo with one old commit outside the analysis window and four in it:
+
+      old    alice   src/app.py +3
+      new 1  bob     src/app.py +2 -1, docs/guide.md +4       (noreply email -> login "bob")
+      new 2  alice   web/main.ts +5, assets/logo.png (binary)
+      new 3  carol   "src/my file.py" +1 on a branch, merged by alice
+      merge  alice   first-parent diff: "src/my file.py" +1
+    """
+    work = os.path.join(tmp, "work")
+    bare = os.path.join(tmp, "fixture.git")
+    os.makedirs(work)
+    git(work, "init", "-q", "-b", "main")
+
+    write(work, "src/app.py", "a = 1\nb = 2\nc = 3\n")
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "old", date=OLD_DATE)
+
+    bob = "12345+bob@users.noreply.github.com"
+    write(work, "src/app.py", "a = 1\nb = 20\nc = 3\nd = 4\n")
+    write(work, "docs/guide.md", "# Guide\n\none\ntwo\n")
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "bob", email=bob, date="2024-06-02T12:00:00Z")
+
+    write(work, "web/main.ts", "".join(f"export const v{i} = {i};\n" for i in range(5)))
+    write(work, "assets/logo.png", bytes(range(256)) * 4)
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "web", date="2024-06-03T12:00:00Z")
+
+    git(work, "checkout", "-q", "-b", "feature")
+    write(work, "src/my file.py", "x = 1\n")
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "carol", email="carol@example.com", date="2024-06-04T12:00:00Z")
+    git(work, "checkout", "-q", "main")
+    git(work, "merge", "-q", "--no-ff", "-m", "merge", "feature", date="2024-06-05T12:00:00Z")
+
+    subprocess.run(["git", "clone", "-q", "--bare", work, bare], check=True, capture_output=True)
+    return bare
+
+
+async def collect(clone: GitClone, since=None):
+    return [d async for d in clone.iter_commit_details(since=since)]
+
+
+def test_numstat_streams_commit_details():
+    """Numstat output is parsed into REST-shaped commit details, newest first."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = make_fixture(tmp)
+
+        async def run():
+            async with cloned_repo("o", "r", url=f"file://{bare}") as clone:
+                return await collect(clone)
+
+        details = asyncio.run(run())
+        assert len(details) == 5
+        merge, carol, web, bob, old = details
+        assert bob["author"] == {"login": "bob"}
+        assert bob["stats"] == {"additions": 6, "deletions": 1}
+        assert web["author"] is None and web["commit"]["author"]["email"] == "alice@example.com"
+        assert {"filename": "assets/logo.png", "additions": 0, "deletions": 0} in web["files"]
+        assert carol["files"] == [{"filename": "src/my file.py", "additions": 1, "deletions": 0}]
+        # Merges are diffed against their first parent, like the REST commit endpoint
+        assert merge["files"] == carol["files"]
+        assert old["stats"]["additions"] == 3
+
+
+def test_shallow_window_analysis():
+    """A date-limited clone analyzes only the window, with real diffs for the oldest commit in it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = make_fixture(tmp)
+
+        async def run():
+            async with cloned_repo("o", "r", since=WINDOW_START, url=f"file://{bare}") as clone:
+                return await analyze_clone(clone, "o", "r", WINDOW_START, max_commits=500)
+
+        result = asyncio.run(run())
+        assert result["backend"] == "git"
+        assert result["commits"]["count"] == 4
+        contributions = {c["author"]: c["netLines"] for c in result["team"]["contributions"]}
+        # bob's commit diffs against the old commit instead of looking like a full-tree add
+        assert contributions == {"alice@example.com": 6, "bob": 5, "carol@example.com": 1}
+        languages = {e["author"]: e["languages"] for e in result["team"]["perAuthorLanguage"]}
+        assert languages["bob"] == {"Python": 3, "Other": 4}
+        assert languages["alice@example.com"] == {"TypeScript": 5, "Other": 1, "Python": 1}
+        assert set(result["languages"]) == {"Python", "TypeScript"}
+
+
+def test_clone_as_file_source():
+    """ls-tree lists regular files and cat-file returns their exact bytes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = make_fixture(tmp)
+
+        async def run():
+            async with cloned_repo("o", "r", url=f"file://{bare}") as clone:
+                files = await clone.list_files()
+                contents = {f["path"]: await clone.read_blob(f["sha"]) for f in files}
+                return files, contents
+
+        files, contents = asyncio.run(run())
+        assert sorted(f["path"] for f in files) == ["assets/logo.png", "docs/guide.md", "src/app.py", "src/my file.py", "web/main.ts"]
+        assert contents["assets/logo.png"] == bytes(range(256)) * 4
+        assert contents["src/app.py"] == b"a = 1\nb = 20\nc = 3\nd = 4\n"
+        assert all(f["size"] == len(contents[f["path"]]) for f in files)
+
+
+def test_clone_size_cap():
+    """Clones that grow past the size cap are aborted."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = make_fixture(tmp)
+
+        async def run():
+            await GitClone.clone(f"file://{bare}", os.path.join(tmp, "capped.git"), max_bytes=1)
+
+        try:
+            asyncio.run(run())
+        except GitCloneError as e:
+            assert "size cap" in str(e)
+        else:
+            raise AssertionError("clone should have exceeded the size cap")
+
+
+def test_token_stays_out_of_argv_and_config():
+    """The token reaches git only through the environment, never the command line or the clone's config."""
+    token = "ghs_secret123"
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = make_fixture(tmp)
+        argvs, envs, token_threads = [], [], []
+        real_exec = asyncio.create_subprocess_exec
+
+        async def recording_exec(*args, **kwargs):
+            argvs.append(args)
+            envs.append(kwargs.get("env") or {})
+            return await real_exec(*args, **kwargs)
+
+        saved = git_clone_analyzer.clone_token, git_clone_analyzer.clone_url, asyncio.create_subprocess_exec
+        git_clone_analyzer.clone_token = lambda: token_threads.append(threading.current_thread()) or token
+        git_clone_analyzer.clone_url = lambda owner, repo: f"file://{bare}"
+        asyncio.create_subprocess_exec = recording_exec
+        try:
+            async def run():
+                async with cloned_repo("o", "r", since=WINDOW_START) as clone:
+                    await collect(clone)
+                    with open(os.path.join(clone.path, "config")) as f:
+                        return f.read()
+
+            config = asyncio.run(run())
+        finally:
+            git_clone_analyzer.clone_token, git_clone_analyzer.clone_url, asyncio.create_subprocess_exec = saved
+
+        # The token request runs off the event loop's thread
+        assert token_threads and threading.main_thread() not in token_threads
+        encoded = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        assert argvs[0][:2] == ("git", "clone")
+        assert not any(token in arg or encoded in arg for argv in argvs for arg in argv)
+        assert token not in config and encoded not in config
+        assert envs[0]["GIT_CONFIG_VALUE_0"] == f"Authorization: Basic {encoded}"
+        # git picks the header up for github.com and for nothing else
+        header = subprocess.run(["git", "config", "--get-urlmatch", "http.extraheader", "https://github.com/o/r.git"],
+                                env=auth_env(token), capture_output=True, text=True).stdout.strip()
+        assert header == f"Authorization: Basic {encoded}"
+        other = subprocess.run(["git", "config", "--get-urlmatch", "http.extraheader", "https://example.com/o/r.git"],
+                               env=auth_env(token), capture_output=True, text=True).stdout.strip()
+        assert other == ""
+        assert auth_env(None) is git_clone_analyzer.GIT_ENV
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_numstat_streams_commit_details,
+        test_shallow_window_analysis,
+        test_clone_as_file_source,
+        test_clone_size_cap,
+        test_token_stays_out_of_argv_and_config,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL GIT CLONE ANALYZER TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent pagination of GitHub list endpoints under the shared rate budget.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.analyzers.github_analyzer import GITHUB_API_URL, GitHubAPIError, RateBudget, fetch_paginated
+
+URL = f"{GITHUB_API_URL}/repos/o/r/commits"
+
+
+class FakeGitHub:
+    """A paginated list endpoint served through httpx.MockTransport."""
+
+    def __init__(self, total: int, link: bool = True, fail_page: int = 0, remaining: int = 4000):
+        self.total = total
+        self.link = link
+        self.fail_page = fail_page
+        self.remaining = remaining
+        self.requested = []
+        self.completed = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        per_page = int(request.url.params["per_page"])
+        self.requested.append(page)
+        headers = {"X-RateLimit-Remaining": str(self.remaining - len(self.requested)), "X-RateLimit-Reset": "0"}
+        if page == self.fail_page:
+            return httpx.Response(500, headers=headers, json={"message": "Server Error"})
+        # Later pages answer first, so completion order is the reverse of page order
+        await asyncio.sleep(0.002 * (20 - page))
+        last_page = max(1, -(-self.total // per_page))
+        if self.link and page < last_page:
+            headers["Link"] = (f'<{URL}?per_page={per_page}&page={page + 1}>; rel="next", '
+                               f'<{URL}?per_page={per_page}&page={last_page}>; rel="last"')
+        items = [{"sha": f"{i:040x}"} for i in range((page - 1) * per_page, min(page * per_page, self.total))]
+        self.completed.append(page)
+        return httpx.Response(200, headers=headers, json=items)
+
+    def fetch(self, budget=None, **kwargs):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(self.handler)) as client:
+                return await fetch_paginated(client, URL, {"since": "2024-01-01T00:00:00Z"}, budget=budget, **kwargs)
+        return asyncio.run(run())
+
+
+def shas(start: int, stop: int):
+    return [f"{i:040x}" for i in range(start, stop)]
+
+
+def test_link_header_pages_are_fetched_concurrently_in_page_order():
+    """The rel="last" link sets the page count; pages finish in reverse but are returned in order."""
+    github = FakeGitHub(total=950)
+    budget = RateBudget(max_concurrency=4)
+    items = github.fetch(budget=budget)
+    assert [item["sha"] for item in items] == shas(0, 950)
+    assert sorted(github.requested) == list(range(1, 11)) and github.requested[0] == 1
+    assert github.completed[1:] != sorted(github.completed[1:])
+    assert budget.requests == 10
+    assert budget.remaining == 4000 - 10
+
+    github = FakeGitHub(total=950)
+    items = github.fetch(max_items=250)
+    assert [item["sha"] for item in items] == shas(0, 250)
+    assert sorted(github.requested) == [1, 2, 3]
+
+
+def test_no_link_header_means_a_single_page():
+    """Without a Link header only the first page is requested."""
+    github = FakeGitHub(total=100, link=False)
+    items = github.fetch()
+    assert [item["sha"] for item in items] == shas(0, 100)
+    assert github.requested == [1]
+
+    github = FakeGitHub(total=30)
+    assert len(github.fetch()) == 30 and github.requested == [1]
+
+
+def test_failed_page_fails_the_listing_and_stops_the_others():
+    """A page failing mid-gather raises, and the pages still in flight are cancelled and release the budget."""
+    github = FakeGitHub(total=1500, fail_page=4)
+    budget = RateBudget(max_concurrency=6)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(github.handler)) as client:
+            try:
+                await fetch_paginated(client, URL, budget=budget)
+            except GitHubAPIError as e:
+                assert "500" in str(e)
+            else:
+                raise AssertionError("a failed page was not reported")
+            # Nothing is left holding the budget or requesting pages once the error is raised
+            assert budget._semaphore._value == 6
+            requested = list(github.requested)
+            await asyncio.sleep(0.1)
+            assert github.requested == requested
+
+    asyncio.run(run())
+    # Pages 2-7 were in flight when page 4 failed; none of them finished
+    assert github.completed == [1]
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_link_header_pages_are_fetched_concurrently_in_page_order,
+        test_no_link_header_means_a_single_page,
+        test_failed_page_fails_the_listing_and_stops_the_others,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL GITHUB PAGINATION TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental JSON extraction and validation of streamed LLM responses,
+and for the server-sent events of the scoring stream endpoint.
+"""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.json_stream import IncrementalJSONParser, JSONStreamError, StreamingModelValidator
+from models.schema import ScoringResult
+
+DOCUMENT = (
+    '{"overall_score": 72.5, "name": "a \\"quoted\\" {brace}, [bracket]",'
+    ' "path": "C:\\\\src\\\\", "accent": "caf\\u00e9", "emoji": "\\ud83d\\ude00",'
+    ' "scores": [{"title": "Quality", "score": 70}, {"title": "Style, \\"tabs\\"", "score": 81}],'
+    ' "nested": {"a": [1, 2, {"b": null}]}, "flag": true}'
+)
+
+
+def feed_all(parser, chunks):
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    return members
+
+
+def test_members_survive_every_chunk_boundary():
+    """Splitting inside strings, escapes and \\u sequences gives the same members as json.loads."""
+    expected = json.loads(DOCUMENT)
+    for i in range(len(DOCUMENT) + 1):
+        for j in range(i, len(DOCUMENT) + 1, 7):
+            parser = IncrementalJSONParser()
+            members = feed_all(parser, [DOCUMENT[:i], DOCUMENT[i:j], DOCUMENT[j:]])
+            assert parser.done and not parser.failed, (i, j, parser.error)
+            assert members == list(expected.items()), (i, j)
+            assert parser.result == expected
+
+    parser = IncrementalJSONParser()
+    members = feed_all(parser, DOCUMENT)
+    assert parser.done and members == list(expected.items())
+    assert parser.result["accent"] == "café" and parser.result["emoji"] == "\U0001F600"
+
+
+def test_members_are_emitted_as_soon_as_they_complete():
+    """A member is emitted at the comma that ends it; text after the object is ignored."""
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"overall_score": 80, "scores": [') == [("overall_score", 80)]
+    assert parser.feed('{"title": "Quality", "score": 80}') == []
+    assert parser.feed(']}\n```\nHope this helps!') == [("scores", [{"title": "Quality", "score": 80}])]
+    assert parser.done
+    assert parser.feed('{"late": 1}') == [] and "late" not in parser.result
+
+
+def test_preamble_before_the_object_is_skipped():
+    """Prose and markdown fences before the first brace are skipped, up to max_preamble characters."""
+    parser = IncrementalJSONParser()
+    members = feed_all(parser, ["Here is the scoring", " you asked for:\n```json\n", '{"overall_score"', ": 64}\n```"])
+    assert parser.done and members == [("overall_score", 64)]
+
+    parser = IncrementalJSONParser(max_preamble=20)
+    feed_all(parser, ["I cannot score this ", "repository, sorry."])
+    assert parser.failed and not parser.done
+    assert parser.feed('{"overall_score": 1}') == []
+
+
+def test_malformed_objects_fail_like_json_loads():
+    """Trailing or repeated commas and broken members fail the stream, wherever the chunks split."""
+    for text in ['{"a": 1,}', '{"a": 1, }', '{,}', '{"a": 1,, "b": 2}', '{"a": [1,], "b": 2}', '{"a" 1}']:
+        try:
+            json.loads(text)
+        except json.JSONDecodeError:
+            pass
+        else:
+            raise AssertionError(f"json.loads accepted {text!r}")
+        for i in range(len(text) + 1):
+            parser = IncrementalJSONParser()
+            feed_all(parser, [text[:i], text[i:]])
+            assert parser.failed and not parser.done, (text, i)
+
+    parser = IncrementalJSONParser()
+    feed_all(parser, ['{', '}'])
+    assert parser.done and parser.result == {}
+
+
+def test_validator_reports_missing_and_invalid_fields():
+    """Invalid optional members are dropped, invalid or missing required members raise."""
+    validator = StreamingModelValidator(ScoringResult)
+    assert validator.validate_member("overall_score", 71)
+    assert not validator.validate_member("ai_percentage", 140)
+    assert "ai_percentage" in validator.invalid and "ai_percentage" not in validator.valid
+    assert validator.validate_member("summary", "kept as an extra field")
+    assert validator.missing == ["radar_data", "scores"]
+    try:
+        validator.finalize()
+    except JSONStreamError as e:
+        assert "radar_data" in str(e) and "scores" in str(e)
+    else:
+        raise AssertionError("finalize accepted a result without its required fields")
+
+    assert validator.validate_member("scores", [{"title": "Quality", "score": 70}])
+    assert validator.validate_member("radar_data", [{"category": "Quality", "score": 70}])
+    result = validator.finalize()
+    assert result.overall_score == 71 and result.ai_percentage is None
+    assert result.model_dump()["summary"] == "kept as an extra field"
+
+    try:
+        StreamingModelValidator(ScoringResult).validate_member("overall_score", "high")
+    except JSONStreamError as e:
+        assert "overall_score" in str(e)
+    else:
+        raise AssertionError("an invalid required field did not stop the stream")
+
+
+class FakeCompletion:
+    """An OpenAI streaming completion that yields fixed text deltas."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.closed = False
+
+    def __iter__(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    def close(self):
+        self.closed = True
+
+
+def parse_events(body: str):
+    """Split a text/event-stream body into (event, data) pairs, checking the framing."""
+    assert body.endswith("\n\n")
+    events = []
+    for frame in body[:-2].split("\n\n"):
+        lines = frame.split("\n")
+        assert len(lines) == 2 and lines[0].startswith("event: ") and lines[1].startswith("data: "), frame
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+def test_scoring_stream_sse_framing():
+    """Each validated field is one event/data frame, followed by a single result frame."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import api_routes.repo_analysis
+    from core.services import chatgpt
+
+    repo_data = {"raw_analysis": {"repository": {"name": "r"}}, "file_metadata": [], "file_analysis": [], "score_issues": {}}
+    completions = []
+
+    def open_scoring_stream(prompt):
+        completions.append(FakeCompletion(deltas))
+        return completions[-1], "gpt-4o-mini"
+
+    saved = (api_routes.repo_analysis.get_repo_for_scoring, chatgpt.open_scoring_stream, os.environ.get("OPENAI_API_KEY"))
+    api_routes.repo_analysis.get_repo_for_scoring = lambda repo_id: repo_data
+    chatgpt.open_scoring_stream = open_scoring_stream
+    os.environ["OPENAI_API_KEY"] = "test"
+    try:
+        app = FastAPI()
+        app.include_router(api_routes.repo_analysis.router)
+        http = TestClient(app)
+
+        deltas = ['Sure:\n```json\n{"overall_score": 8', '1, "ai_percentage": 250, "scores": [{"title": "Qu',
+                  'ality", "score": 80}], "radar_data": [{"category": "Quality", "score": 80}]', '}\n```', ' trailing']
+        response = http.get("/api/repos/r1/scoring/stream")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["cache-control"] == "no-cache"
+        events = parse_events(response.text)
+        assert [name for name, _ in events] == ["field", "field", "field", "result"]
+        assert [data["field"] for _, data in events[:3]] == ["overall_score", "scores", "radar_data"]
+        result = events[-1][1]
+        assert result["overall_score"] == 81 and result["ai_percentage"] is None
+        assert "fallback" not in result and result["file_analysis"] == []
+        assert completions[-1].closed
+
+        # An invalid required field stops the stream and falls back to the default scoring
+        deltas = ['{"overall_score": "excellent", "scores": []}']
+        events = parse_events(http.get("/api/repos/r1/scoring/stream").text)
+        assert [name for name, _ in events] == ["result"]
+        assert events[0][1]["fallback"] is True
+    finally:
+        api_routes.repo_analysis.get_repo_for_scoring, chatgpt.open_scoring_stream, key = saved
+        if key is None:
+            os.environ.pop("OPENAI_API_KEY", None)
+        else:
+            os.environ["OPENAI_API_KEY"] = key
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_members_survive_every_chunk_boundary,
+        test_members_are_emitted_as_soon_as_they_complete,
+        test_preamble_before_the_object_is_skipped,
+        test_malformed_objects_fail_like_json_loads,
+        test_validator_reports_missing_and_invalid_fields,
+        test_scoring_stream_sse_framing,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL JSON STREAM TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the self-hosted SQLite + filesystem backend (VIBECHECK_BACKEND=local).
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.blob_store import BlobStore
+from core.services.local_backend import LocalClient
+from core.services.supabase import LazyClient
+from core.services.upload_pipeline import UploadPipeline
+
+
+def test_query_builder_matches_postgrest():
+    """Upserts merge on the conflict column; filters, order and range behave like PostgREST."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = LocalClient(tmp)
+        first = db.table("users").upsert({"email": "a@example.com", "name": "A"}, on_conflict="email").execute().data[0]
+        second = db.table("users").upsert({"email": "a@example.com", "name": "B"}, on_conflict="email").execute().data[0]
+        assert first["id"] == second["id"] and second["name"] == "B"
+
+        for i in range(5):
+            db.table("repos").insert({"full_name": f"o/r{i}", "user_id": first["id"], "analysis_date": f"2024-0{i + 1}"}).execute()
+        page = db.table("repos").select("full_name").eq("user_id", first["id"]).order("analysis_date", desc=True).range(1, 2).execute().data
+        assert page == [{"full_name": "o/r3"}, {"full_name": "o/r2"}]
+
+        db.table("repos").update({"stars": 3}).in_("full_name", ["o/r0", "o/r1"]).execute()
+        assert sorted(r["full_name"] for r in db.table("repos").select("*").eq("stars", 3).execute().data) == ["o/r0", "o/r1"]
+        assert len(db.table("repos").delete().eq("full_name", "o/r4").execute().data) == 1
+        assert db.table("repos").select("*").in_("full_name", []).execute().data == []
+
+        # Data persists across clients on the same directory
+        assert len(LocalClient(tmp).table("repos").select("id").execute().data) == 4
+
+
+def test_blob_store_on_local_backend():
+    """Uploads through the pipeline land on disk and the blob tables count references."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = BlobStore(client)
+        content = b"print('hi')\n"
+        sha = "f" * 40
+
+        async def upload():
+            async with UploadPipeline(store.storage(), workers=2) as uploads:
+                future = await uploads.submit(f"blobs/ff/{sha}", content, "text/x-python")
+            return future.result()
+
+        assert store.acquire([sha]) == {sha: False}
+        assert asyncio.run(upload()).ok
+        store.register([BlobStore.blob_row(sha, len(content), "text/x-python")])
+        store.record_snapshot("snap0", "repo", "user", "main", {"a.py": sha})
+        for n in (1, 2):
+            assert store.acquire([sha]) == {sha: True}
+            store.record_snapshot(f"snap{n}", "repo", "user", "main", {"a.py": sha})
+        assert store.storage().download(f"blobs/ff/{sha}") == content
+        assert store.public_url(sha).endswith(f"/repo-files/blobs/ff/{sha}")
+
+        assert store.collect_garbage("repo", keep=1) == {"snapshots_removed": 2, "blobs_removed": 0}
+        assert client.table("blobs").select("ref_count").execute().data == [{"ref_count": 1}]
+
+
+def test_lazy_client_is_created_on_first_use():
+    with tempfile.TemporaryDirectory() as tmp:
+        created = []
+
+        def factory():
+            created.append(LocalClient(tmp))
+            return created[-1]
+
+        client = LazyClient(factory, configured=True)
+        assert client and not created
+        client.table("repos").insert({"id": "r1", "full_name": "o/r"}).execute()
+        assert client.table("repos").select("id").execute().data == [{"id": "r1"}]
+        assert len(created) == 1 and client.get() is created[0]
+
+    unconfigured = LazyClient(factory, configured=False)
+    assert not unconfigured and unconfigured.get() is None
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_query_builder_matches_postgrest,
+        test_blob_store_on_local_backend,
+        test_lazy_client_is_created_on_first_use,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL LOCAL BACKEND TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the queued logging setup: sampling, non-blocking enqueue, per-logger levels and JSON output.
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.log_setup import (
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    configure_logging,
+    parse_levels,
+    sample,
+    stop_logging,
+)
+from core.services.tracing import span
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_sampling_keeps_every_nth_record_per_call_site():
+    logger = logging.getLogger("test_logging.sampling")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = ListHandler()
+    handler.addFilter(SamplingFilter())
+    logger.addHandler(handler)
+    for i in range(250):
+        logger.debug("file %d", i, extra=sample(100))
+    logger.debug("unsampled")
+
+    messages = [r.getMessage() for r in handler.records]
+    assert messages == ["file 0", "file 100", "file 200", "unsampled"]
+    assert [getattr(r, "suppressed", None) for r in handler.records] == [0, 99, 99, None]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("test_logging.queue")
+    logger.propagate = False
+    logger.addHandler(handler)
+    items = ["a"]
+    logger.warning("items: %s", items)
+    items.append("b")
+    for _ in range(3):
+        logger.warning("more")
+
+    assert handler.dropped == 2
+    first = handler.queue.get_nowait()
+    assert first.getMessage() == "items: ['a']" and first.args is None
+
+
+def test_parse_levels():
+    assert parse_levels("a.b=DEBUG, c=warning,broken,d=NOPE") == {"a.b": logging.DEBUG, "c": logging.WARNING}
+    assert parse_levels(None) == {}
+
+
+def test_configure_logging_json_with_levels_and_trace_ids():
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        try:
+            configure_logging(level="WARNING", levels="test_logging.verbose=DEBUG", fmt="json", log_file=path)
+            with span("request") as request:
+                logging.getLogger("test_logging.verbose").debug("stored %d files", 3, extra={"repo": "o/r"})
+            logging.getLogger("test_logging.quiet").info("dropped by the root level")
+        finally:
+            stop_logging()
+            for handler in root.handlers[:]:
+                root.removeHandler(handler)
+            for handler in saved[0]:
+                root.addHandler(handler)
+            root.setLevel(saved[1])
+            logging.getLogger("test_logging.verbose").setLevel(logging.NOTSET)
+        with open(path) as f:
+            lines = [json.loads(line) for line in f]
+
+    assert len(lines) == 1
+    entry = lines[0]
+    assert entry["msg"] == "stored 3 files" and entry["level"] == "DEBUG" and entry["repo"] == "o/r"
+    assert entry["trace_id"] == request.trace.trace_id and entry["span_id"] == request.span_id
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_sampling_keeps_every_nth_record_per_call_site,
+        test_full_queue_drops_instead_of_blocking,
+        test_parse_levels,
+        test_configure_logging_json_with_levels_and_trace_ids,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL LOGGING TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
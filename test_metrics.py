@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process metrics registry and its Prometheus text output.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.local_backend import LocalClient
+from core.services.metrics import Counter, Gauge, Histogram, Registry, current_route, instrument_client
+from core.services import metrics
+
+
+def test_render_counters_and_gauges():
+    """Samples are grouped under HELP/TYPE lines with escaped label values."""
+    registry = Registry()
+    requests = Counter("app_requests_total", "Requests", ["route"], registry=registry)
+    remaining = Gauge("app_remaining", "Remaining", registry=registry)
+    requests.labels("/a").inc()
+    requests.labels("/a").inc(2)
+    requests.labels('say "hi"').inc()
+    remaining.set(42)
+
+    text = registry.render()
+    assert "# TYPE app_requests_total counter" in text
+    assert 'app_requests_total{route="/a"} 3' in text
+    assert 'app_requests_total{route="say \\"hi\\""} 1' in text
+    assert "# TYPE app_remaining gauge\napp_remaining 42\n" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = Histogram("app_seconds", "Latency", ["op"], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("get").observe(value)
+
+    text = registry.render()
+    assert 'app_seconds_bucket{op="get",le="0.1"} 2' in text
+    assert 'app_seconds_bucket{op="get",le="1"} 3' in text
+    assert 'app_seconds_bucket{op="get",le="+Inf"} 4' in text
+    assert 'app_seconds_count{op="get"} 4' in text
+    assert 'app_seconds_sum{op="get"} 3.65' in text
+
+
+def test_label_count_is_checked():
+    registry = Registry()
+    requests = Counter("app_requests_total", "Requests", ["route", "method"], registry=registry)
+    try:
+        requests.labels("/a")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError for a missing label")
+
+
+def test_db_queries_are_timed_by_table_operation_and_route():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = instrument_client(LocalClient(tmp))
+        token = current_route.set("/api/things/{id}")
+        try:
+            client.table("repos").insert({"id": "r1", "full_name": "o/r"}).execute()
+            rows = client.table("repos").select("id").eq("id", "r1").execute().data
+        finally:
+            current_route.reset(token)
+        assert rows == [{"id": "r1"}]
+
+    insert = metrics.DB_LATENCY.labels("repos", "insert", "/api/things/{id}")
+    select = metrics.DB_LATENCY.labels("repos", "select", "/api/things/{id}")
+    assert sum(insert.counts) == 1 and sum(select.counts) == 1
+    assert instrument_client(None) is None
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_render_counters_and_gauges,
+        test_histogram_buckets_are_cumulative,
+        test_label_count_is_checked,
+        test_db_queries_are_timed_by_table_operation_and_route,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL METRICS TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
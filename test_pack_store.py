@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped snapshot packs and the bytes code analyzer.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.analyzers import supabase_file_analyzer
+from core.analyzers.code_issue_analyzer import CodeIssueAnalyzer, analyze_repository_files
+from core.services.blob_store import BlobStore, blob_storage_path, git_blob_sha
+from core.services.local_backend import LocalClient
+from core.services.pack_store import PackStore, is_pack, write_pack
+
+TRICKY = {
+    "a.js": b"console.log(1);  \n\n\n" + b"x" * 130 + b"\n \x1c\n\t\n",
+    "b.ts": b"let a = 1;\r\n\r\n\r\nconsole.error(a); \r\n",
+    "c.md": "café 　\n\n　\n".encode() + b"\xff \n",
+    "d.txt": b"\r\xff\nend ",
+    "e.py": b"def f(x):\r\n    return eval(x)\r\n",
+    "f.md": "naïve  \n\n\n".encode(),
+    "empty.txt": b"",
+}
+
+
+def test_pack_round_trip():
+    """Packed files come back byte for byte as views into the mapping."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pack_path = write_pack(os.path.join(tmp, "snap"), TRICKY.items())
+        with PackStore(pack_path) as pack:
+            assert len(pack) == len(TRICKY) and pack.paths() == list(TRICKY)
+            for path, content in TRICKY.items():
+                view = pack.get(path)
+                assert isinstance(view, memoryview) and bytes(view) == content
+                view.release()
+            assert pack.get("missing.txt") is None and "a.js" in pack
+
+
+def test_bytes_analyzer_matches_text_mode():
+    """analyze_file_bytes on bytes or a pack view reports what analyze_file reports on the text-mode read."""
+    analyzer = CodeIssueAnalyzer()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_pack(os.path.join(tmp, "snap"), TRICKY.items())
+        with PackStore(os.path.join(tmp, "snap.pack")) as pack:
+            for path, content in TRICKY.items():
+                full = os.path.join(tmp, path)
+                with open(full, "wb") as f:
+                    f.write(content)
+                with open(full, "r", encoding="utf-8", errors="ignore") as f:
+                    expected = [i.to_dict() for i in analyzer.analyze_file(full, f.read())]
+                assert [i.to_dict() for i in analyzer.analyze_file_bytes(full, content)] == expected, path
+                view = pack.get(path)
+                assert [i.to_dict() for i in analyzer.analyze_file_bytes(full, view)] == expected, path
+                view.release()
+
+
+def record(store, snapshot_id, files):
+    shas = {path: git_blob_sha(content) for path, content in files.items()}
+    store.acquire(shas.values())
+    for path, content in files.items():
+        try:
+            store.storage().upload(blob_storage_path(shas[path]), content)
+        except Exception as e:
+            if "already exists" not in str(e):
+                raise
+    store.register([BlobStore.blob_row(sha, 0, "text/plain") for sha in set(shas.values())])
+    store.record_snapshot(snapshot_id, "r", "user", "main", shas)
+
+
+def test_snapshot_pack_matches_storage_analysis():
+    """A recorded snapshot's pack gives the issues the per-blob storage analysis gives."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = BlobStore(client)
+        snapshot_id = "repos/user/r/main_1"
+        record(store, snapshot_id, TRICKY)
+        pack_path = store.pack_path(snapshot_id)
+        assert is_pack(pack_path) and pack_path.startswith(client.packs_dir)
+        with PackStore(pack_path) as pack:
+            # Invalid UTF-8 files are left out, as the storage analysis skips them
+            assert sorted(pack.paths()) == sorted(set(TRICKY) - {"c.md", "d.txt"})
+
+        metadata = [{"relative_path": path, "storage_path": blob_storage_path(git_blob_sha(content))}
+                    for path, content in TRICKY.items()]
+        previous = supabase_file_analyzer.supabase
+        supabase_file_analyzer.supabase = client
+        try:
+            expected = asyncio.run(supabase_file_analyzer.analyze_repository_files_from_supabase(metadata, snapshot_id))
+        finally:
+            supabase_file_analyzer.supabase = previous
+        assert analyze_repository_files(metadata, pack_path) == expected
+        assert expected["total_issues"] > 0
+
+
+def test_packs_follow_snapshot_lifetime():
+    """Garbage collection removes the packs of the snapshots it drops; ids outside the pack directory get none."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = BlobStore(client)
+        record(store, "repos/user/r/main_1", {"a.py": b"a = 1\n"})
+        client.table("repo_snapshots").update({"created_at": "2020-01-01"}).eq("id", "repos/user/r/main_1").execute()
+        record(store, "repos/user/r/main_2", {"a.py": b"a = 2\n"})
+        assert store.collect_garbage("r", keep=1)["snapshots_removed"] == 1
+        assert not os.path.exists(store.pack_path("repos/user/r/main_1"))
+        assert not os.path.exists(store.pack_path("repos/user/r/main_1")[:-len(".pack")] + ".idx")
+        assert is_pack(store.pack_path("repos/user/r/main_2"))
+        assert store.pack_path("../escape") is None
+        assert BlobStore(object()).pack_path("repos/user/r/main_2") is None
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_pack_round_trip,
+        test_bytes_analyzer_matches_text_mode,
+        test_snapshot_pack_matches_storage_analysis,
+        test_packs_follow_snapshot_lifetime,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL PACK STORE TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
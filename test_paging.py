@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for cursor pagination: index pages, filters, cursors and rebuilding after writes.
+"""
+
+import os
+import random
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.paging import IndexCache, SortedIndex, decode_cursor, encode_cursor
+from core.services.shared_cache import MemoryBackend, SharedCache, repo_scope
+
+CATEGORIES = ["quality", "security", "style"]
+SEVERITIES = ["error", "warning", "info"]
+RANK = {"error": 0, "warning": 1, "info": 2}
+
+
+def make_issues(count: int):
+    rng = random.Random(1)
+    return [{"path": f"src/{rng.choice(['api', 'core', 'ui'])}/m{rng.randrange(30)}.{rng.choice(['py', 'ts'])}",
+             "line": rng.randrange(5), "category": rng.choice(CATEGORIES), "severity": rng.choice(SEVERITIES)}
+            for _ in range(count)]
+
+
+def make_index(issues):
+    return SortedIndex(issues, key=lambda i: (RANK[i["severity"]], i["path"], i["line"]),
+                       bucket=lambda i: (i["category"], i["severity"]), path=lambda i: i["path"])
+
+
+def all_pages(index, match, limit, path_prefix=None):
+    items, cursor, totals = [], None, set()
+    while True:
+        page, next_key, total = index.page(match, limit, after=decode_cursor(cursor) if cursor else None,
+                                           path_prefix=path_prefix)
+        assert len(page) <= limit
+        items.extend(page)
+        totals.add(total)
+        if next_key is None:
+            return items, totals
+        cursor = encode_cursor(next_key)
+
+
+def test_pages_cover_the_sorted_filtered_items_once():
+    issues = make_issues(500)
+    index = make_index(issues)
+    order = lambda i: (RANK[i["severity"]], i["path"], i["line"])
+
+    items, totals = all_pages(index, lambda b: True, 7)
+    assert [id(i) for i in items] == [id(i) for i in sorted(issues, key=order)] and totals == {500}
+
+    match = lambda b: b[0] in ("security", "style") and b[1] != "info"
+    expected = sorted((i for i in issues if i["category"] in ("security", "style") and i["severity"] != "info"),
+                      key=order)
+    items, totals = all_pages(index, match, 13)
+    assert [id(i) for i in items] == [id(i) for i in expected] and totals == {len(expected)}
+
+    expected = sorted((i for i in expected if i["path"].startswith("src/core/")), key=order)
+    items, totals = all_pages(index, match, 4, path_prefix="src/core/")
+    assert [id(i) for i in items] == [id(i) for i in expected] and totals == {len(expected)}
+
+
+def test_invalid_cursors_are_rejected():
+    index = make_index(make_issues(10))
+    for cursor in ["not-base64!", encode_cursor({"a": 1}), encode_cursor(["x", "y"])]:
+        try:
+            index.page(lambda b: True, 5, after=decode_cursor(cursor))
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {cursor}")
+
+
+def test_index_cache_rebuilds_after_invalidation():
+    cache = SharedCache(MemoryBackend())
+    indexes = IndexCache(cache)
+    builds = []
+    build = lambda: builds.append(1) or make_index([])
+    first = indexes.get_or_build("issues", "r1", build)
+    assert indexes.get_or_build("issues", "r1", build) is first and len(builds) == 1
+    cache.invalidate(repo_scope("r1"))
+    assert indexes.get_or_build("issues", "r1", build) is not first and len(builds) == 2
+
+    # Without a shared cache nothing is kept
+    uncached = IndexCache(SharedCache(None))
+    uncached.get_or_build("issues", "r1", build)
+    uncached.get_or_build("issues", "r1", build)
+    assert len(builds) == 4
+
+
+def test_files_page_endpoint():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import api_routes.repo_files
+    from core.services.local_backend import LocalClient
+    from core.services.repo_store import RepoStore
+
+    tmp = tempfile.TemporaryDirectory()
+    client = LocalClient(tmp.name)
+    saved = api_routes.repo_files.supabase
+    api_routes.repo_files.supabase = client
+    try:
+        store = RepoStore(client)
+        repo_id = store.resolve_repo_id("o/paged")
+        files = [{"relative_path": f"src/{'a' if i % 2 else 'b'}/f{i}.{'py' if i % 3 else 'ts'}"} for i in range(25)]
+        issues = [{"file_path": f["relative_path"], "severity": "error"} for f in files[:5]]
+        store.save_repo(repo_id, {"full_name": "o/paged", "score_issues": {"Quality": issues}}, {},
+                        {"file_metadata": files, "file_analysis": []})
+
+        app = FastAPI()
+        app.include_router(api_routes.repo_files.router)
+        http = TestClient(app)
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, "extension": ".py", "sort": "score"}
+            if cursor:
+                params["cursor"] = cursor
+            body = http.get(f"/api/repos/{repo_id}/files/page", params=params).json()
+            seen.extend(body["files"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        assert body["total"] == len(seen) == sum(1 for f in files if f["relative_path"].endswith(".py"))
+        scores = [f["score"] for f in seen]
+        assert scores == sorted(scores) and scores[0] < 100
+
+        body = http.get(f"/api/repos/{repo_id}/files/page", params={"path_prefix": "src/a/", "sort": "path"}).json()
+        assert [f["path"] for f in body["files"]] == sorted(f["relative_path"] for f in files
+                                                           if f["relative_path"].startswith("src/a/"))
+        assert http.get(f"/api/repos/{repo_id}/files/page", params={"cursor": "bogus"}).status_code == 400
+        assert http.get(f"/api/repos/{repo_id}/files/page", params={"sort": "size"}).status_code == 400
+    finally:
+        api_routes.repo_files.supabase = saved
+        tmp.cleanup()
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_pages_cover_the_sorted_filtered_items_once,
+        test_invalid_cursors_are_rejected,
+        test_index_cache_rebuilds_after_invalidation,
+        test_files_page_endpoint,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL PAGING TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-demand sampling profiler and tracemalloc diffs.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.profiling import MemoryTracker, ProfilerBusy, SamplingProfiler
+
+
+def spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_window_profile_formats():
+    """A busy thread shows up in both collapsed stacks and speedscope JSON."""
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        asyncio.run(profiler.run_window(0.2, interval=0.002))
+    finally:
+        stop.set()
+        worker.join()
+
+    collapsed = profiler.collapsed()
+    spinner = [line for line in collapsed.splitlines() if line.startswith("spinner;")]
+    assert spinner and all("spin (test_profiling.py:" in line for line in spinner)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+    profile = profiler.speedscope()
+    frames = profile["shared"]["frames"]
+    spinner_profile = next(p for p in profile["profiles"] if p["name"] == "spinner")
+    assert len(spinner_profile["samples"]) == len(spinner_profile["weights"])
+    assert any(frames[i]["name"] == "spin" for sample in spinner_profile["samples"] for i in sample)
+    assert profiler.summary()["samples"] > 0
+
+
+def test_request_mode_samples_only_matching_requests():
+    profiler = SamplingProfiler()
+
+    async def run():
+        async def requests():
+            await asyncio.sleep(0.05)
+            with profiler.track_request("/other"):
+                await asyncio.sleep(0.05)
+            for _ in range(2):
+                with profiler.track_request("/api/things/{id}"):
+                    await asyncio.sleep(0.02)
+
+        task = asyncio.create_task(requests())
+        await profiler.run_requests("/api/things/{id}", 2, timeout=5.0, interval=0.002)
+        await task
+        assert profiler.requests_done == 2 and profiler.in_flight == 0
+        assert profiler.summary()["route"] == "/api/things/{id}"
+        try:
+            profiler.start()
+            profiler.start()
+        except ProfilerBusy:
+            pass
+        else:
+            raise AssertionError("expected ProfilerBusy for a second session")
+        finally:
+            profiler.stop()
+
+    asyncio.run(run())
+
+
+def test_memory_diff_reports_growth():
+    tracker = MemoryTracker()
+    tracker.start(frames=5)
+    try:
+        retained = [bytearray(1024) for _ in range(500)]
+        diff = tracker.diff(top=5, include="*test_profiling.py")
+    finally:
+        tracker.stop()
+    assert diff["total_diff_bytes"] >= 500 * 1024
+    assert "test_profiling.py" in diff["top"][0]["location"] and diff["top"][0]["count_diff"] >= 500
+    assert len(retained) == 500
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_window_profile_formats,
+        test_request_mode_samples_only_matching_requests,
+        test_memory_diff_reports_growth,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL PROFILING TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
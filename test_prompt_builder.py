@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for token-budgeted scoring prompt assembly.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.prompt_builder import build_scoring_prompt, count_tokens, sample_files
+
+EXTENSIONS = ['.py', '.ts', '.go', '.md', '.json', '.css', '.yaml', '.rs']
+
+
+def make_repo(file_count: int):
+    """Analysis data and file metadata for a repository with long, varied paths."""
+    files = []
+    for i in range(file_count):
+        ext = EXTENSIONS[i % len(EXTENSIONS)]
+        depth = "/".join(f"module_{(i * 7 + d) % 31}_{'nested' * (d % 3)}" for d in range(1 + i % 6))
+        files.append({"relative_path": f"src/{depth}/file_{i}{ext}", "file_extension": ext, "size_bytes": (i * 7919) % 250_000})
+    issue_counts = {f["relative_path"]: (i * 13) % 9 for i, f in enumerate(files) if i % 4 == 0}
+    analysis = {
+        "repo": "octo/large-repo",
+        "languages": {"Python": 500_000, "TypeScript": 300_000, "Go": 120_000, "Rust": 4_000},
+        "team": {
+            "contributions": [{"author": f"dev{i}", "netLines": 1000 - i * 37} for i in range(20)],
+            "giniContribution": 0.41,
+            "topContributorsShare": 0.66,
+        },
+        "commits": {"count": 4321, "medianCompartmentalization": 0.5, "meanCompartmentalization": 0.47},
+    }
+    return analysis, files, issue_counts
+
+
+def test_prompt_never_exceeds_the_budget():
+    """However many files there are, the built prompt fits the budget and only lists files it sampled."""
+    analysis, files, issue_counts = make_repo(20_000)
+    # Header, metric tables and response format, with no room left for files
+    fixed = build_scoring_prompt(analysis, files, issue_counts, token_budget=1).prompt_tokens
+    for budget in (fixed + 10, fixed + 50, 1500, 3000, 8000):
+        build = build_scoring_prompt(analysis, files, issue_counts, token_budget=budget)
+        assert build.prompt_tokens == count_tokens(build.prompt)
+        assert build.prompt_tokens <= budget, (budget, build.prompt_tokens)
+        assert build.files_total == len(files)
+        assert len(build.files_included) == len(set(build.files_included)) < len(files)
+        for path in build.files_included:
+            assert f"\n{path}|" in build.prompt
+        if budget >= 1500:
+            assert build.files_included
+            # The files section fills the budget instead of stopping early
+            assert build.prompt_tokens >= 0.95 * budget, (budget, build.prompt_tokens)
+
+
+def test_file_sampling_is_deterministic():
+    """The same repository gives the same sample and prompt; another repository name reseeds it."""
+    analysis, files, issue_counts = make_repo(2_000)
+    first = build_scoring_prompt(analysis, files, issue_counts, token_budget=2500)
+    second = build_scoring_prompt(analysis, [dict(f) for f in files], dict(issue_counts), token_budget=2500)
+    assert first.prompt == second.prompt and first.files_included == second.files_included
+
+    order = [f["relative_path"] for f in sample_files(files, issue_counts, seed="octo/large-repo")]
+    assert order == [f["relative_path"] for f in sample_files(files, issue_counts, seed="octo/large-repo")]
+    assert order != [f["relative_path"] for f in sample_files(files, issue_counts, seed="octo/other-repo")]
+    assert sorted(order) == sorted(f["relative_path"] for f in files)
+
+    # The seed does not depend on str hash randomization, so other processes agree
+    script = (
+        "import json, sys; sys.path.append('Backend'); sys.path.append('.');"
+        "from test_prompt_builder import make_repo;"
+        "from core.services.prompt_builder import build_scoring_prompt;"
+        "analysis, files, issue_counts = make_repo(2000);"
+        "print(json.dumps(build_scoring_prompt(analysis, files, issue_counts, token_budget=2500).files_included))"
+    )
+    for hash_seed in ("1", "2"):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "PYTHONHASHSEED": hash_seed}, capture_output=True, text=True, check=True,
+        ).stdout
+        assert json.loads(output) == first.files_included
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_prompt_never_exceeds_the_budget,
+        test_file_sampling_is_deterministic,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL PROMPT BUILDER TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the repository persistence layer (compact repos row plus chunked per-file arrays).
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.local_backend import LocalClient
+from core.services.repo_store import CHUNKS_TABLE, RepoStore
+from core.services.storage_codec import ZLIB_JSON, best_encoding, decode, encode, is_encoded
+
+ANALYSIS = {
+    "repo": "o/r",
+    "languages": {"Python": 1200},
+    "team": {"contributors": 2},
+    "commits": {"total": 40},
+    "file_storage": {"base_path": "repos/u/r/main_1", "skipped_files": [{"path": "a.png", "reason": "binary_file"}]},
+}
+
+
+def make_arrays(count: int):
+    return {
+        "file_metadata": [{"relative_path": f"src/f{i}.py", "size_bytes": i} for i in range(count)],
+        "file_analysis": [{"path": f"src/f{i}.py", "issues": []} for i in range(count)],
+        "skipped_files": ANALYSIS["file_storage"]["skipped_files"],
+    }
+
+
+def test_save_and_load_round_trip():
+    """The row is written once, arrays are chunked, and load_repo restores the previous shape."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = RepoStore(client, chunk_items=7)
+        repo_id = store.resolve_repo_id("o/r")
+        arrays = make_arrays(20)
+        stats = store.save_repo(repo_id, {"full_name": "o/r", "user_id": "u"}, ANALYSIS, arrays)
+        assert stats["chunk_rows"] == 3 + 3 + 1 and stats["bytes_written"] == stats["row_bytes"] + stats["chunk_bytes"]
+
+        # No sub-document is stored twice
+        raw = client.table("repos").select("*").eq("id", repo_id).execute().data[0]
+        assert "team" not in raw["raw_analysis"] and "skipped_files" not in raw["raw_analysis"]["file_storage"]
+        assert raw["file_metadata"] == [] and raw["team_data"] == ANALYSIS["team"]
+
+        repo = store.load_repo(repo_id)
+        assert repo["file_metadata"] == arrays["file_metadata"] and repo["file_analysis"] == arrays["file_analysis"]
+        assert repo["raw_analysis"] == ANALYSIS
+
+        # Only the requested fields are read
+        partial = store.load_repo(repo_id, ["file_metadata"])
+        assert partial["file_metadata"] == arrays["file_metadata"] and "file_analysis" not in partial
+
+        listed = store.list_repos(user_id="u")
+        assert [r["id"] for r in listed] == [repo_id] and "file_metadata" not in listed[0]
+        assert listed[0]["raw_analysis"]["languages"] == ANALYSIS["languages"]
+
+
+def test_reanalysis_and_field_update_replace_chunks():
+    """A new analysis and a file_metadata update swap in new chunks and drop the old ones."""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        store = RepoStore(client, chunk_items=5)
+        repo_id = store.resolve_repo_id("o/r")
+        store.save_repo(repo_id, {"full_name": "o/r"}, ANALYSIS, make_arrays(12))
+        assert store.resolve_repo_id("o/r") == repo_id
+
+        store.save_repo(repo_id, {"full_name": "o/r"}, ANALYSIS, make_arrays(3))
+        assert len(store.load_repo(repo_id)["file_metadata"]) == 3
+        assert len(client.table(CHUNKS_TABLE).select("id").eq("repo_id", repo_id).execute().data) == 3
+
+        reviewed = [dict(f, ai_percentage=10) for f in make_arrays(3)["file_metadata"]]
+        store.update_field(repo_id, "file_metadata", reviewed)
+        repo = store.load_repo(repo_id)
+        assert repo["file_metadata"] == reviewed and len(repo["file_analysis"]) == 3
+
+        # Rows written inline by earlier versions are read as they are
+        client.table("repos").insert({"id": "legacy", "full_name": "o/old", "file_metadata": [{"relative_path": "x.py"}]}).execute()
+        assert store.load_repo("legacy", ["file_metadata"])["file_metadata"] == [{"relative_path": "x.py"}]
+        store.update_field("legacy", "file_metadata", [])
+        assert store.load_repo("legacy")["file_metadata"] == []
+
+
+def test_compressed_encoding_round_trip():
+    """Compressed rows read back in the same shape, and plain rows still read under the setting."""
+    document = {"files": [{"path": f"src/f{i}.py", "issues": []} for i in range(50)], "n": 1}
+    for encoding in {ZLIB_JSON, best_encoding()}:
+        envelope = encode(document, encoding)
+        assert is_encoded(envelope) and decode(envelope) == document
+    assert decode(document) == document and encode(document, None) is document
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalClient(tmp)
+        plain = RepoStore(client, chunk_items=100)
+        plain_id = plain.resolve_repo_id("o/plain")
+        plain_stats = plain.save_repo(plain_id, {"full_name": "o/plain"}, ANALYSIS, make_arrays(200))
+
+        store = RepoStore(client, chunk_items=100, encoding="compressed")
+        repo_id = store.resolve_repo_id("o/r")
+        arrays = make_arrays(200)
+        stats = store.save_repo(repo_id, {"full_name": "o/r", "user_id": "u"}, ANALYSIS, arrays)
+        assert stats["bytes_written"] < plain_stats["bytes_written"] / 2
+
+        raw = client.table("repos").select("raw_analysis").eq("id", repo_id).execute().data[0]
+        assert is_encoded(raw["raw_analysis"])
+        repo = store.load_repo(repo_id)
+        assert repo["file_metadata"] == arrays["file_metadata"] and repo["raw_analysis"] == ANALYSIS
+        assert store.list_repos(user_id="u")[0]["raw_analysis"]["languages"] == ANALYSIS["languages"]
+
+        store.update_field(repo_id, "file_metadata", arrays["file_metadata"][:3])
+        assert store.load_repo(repo_id, ["file_metadata"])["file_metadata"] == arrays["file_metadata"][:3]
+        assert store.load_repo(plain_id, ["file_analysis"])["file_analysis"] == arrays["file_analysis"]
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_save_and_load_round_trip,
+        test_reanalysis_and_field_update_replace_chunks,
+        test_compressed_encoding_round_trip,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL REPO STORE TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
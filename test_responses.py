@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the fast response path: JSON rendering, Accept-Encoding negotiation, compression and NDJSON.
+"""
+
+import gzip
+import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from core.services import responses
+from core.services.responses import (
+    CompressionMiddleware,
+    FastJSONResponse,
+    model_response,
+    ndjson_response,
+    negotiate_encoding,
+)
+from models.schema import AnalysisResponse
+
+LARGE = {"issues": [{"line": i, "issue": "Line too long", "codeSnippet": "x = 1" * 20} for i in range(200)]}
+
+
+def make_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/small")
+    async def small():
+        return FastJSONResponse({"ok": True})
+
+    @app.get("/large")
+    async def large():
+        return FastJSONResponse(LARGE)
+
+    @app.get("/ndjson")
+    async def lines():
+        return ndjson_response({"n": i} for i in range(1200))
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 100), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_render_matches_json():
+    content = {"a": [1, 2.5, None, "é"], "when": datetime(2024, 1, 2, 3, 4, 5), 3: {"x"}}
+    decoded = json.loads(FastJSONResponse(content).body)
+    assert decoded["a"] == [1, 2.5, None, "é"] and decoded["3"] == ["x"]
+    assert decoded["when"].startswith("2024-01-02T03:04:05")
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0, *;q=0") is None
+    expected_br = "br" if responses.brotli is not None else "gzip"
+    assert negotiate_encoding("gzip, deflate, br") == expected_br
+    assert negotiate_encoding("br;q=0.5, gzip;q=0.9") == "gzip"
+
+
+def test_compression_by_size_threshold():
+    http = make_client()
+    small = http.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.json() == {"ok": True}
+
+    with http.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip" and response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert json.loads(gzip.decompress(raw)) == LARGE
+
+    plain = http.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.json() == LARGE
+
+
+def test_streams_are_compressed_per_chunk_except_events():
+    http = make_client()
+    with http.stream("GET", "/ndjson", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-encoding"] == "gzip" and "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert [json.loads(line)["n"] for line in lines] == list(range(1200))
+
+    events = http.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in events.headers and events.text.count("data: 1") == 100
+
+
+def test_model_response_fills_defaults_without_revalidating():
+    body = json.loads(model_response(AnalysisResponse, {"repo": "o/r", "commits": {"count": 2}, "extra": 1}).body)
+    assert body == AnalysisResponse(repo="o/r", commits={"count": 2}).model_dump()
+    try:
+        model_response(AnalysisResponse, {"commits": {}})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("missing required field accepted")
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_render_matches_json,
+        test_negotiate_encoding,
+        test_compression_by_size_threshold,
+        test_streams_are_compressed_per_chunk_except_events,
+        test_model_response_fills_defaults_without_revalidating,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL RESPONSE TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
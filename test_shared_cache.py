@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared cache: loading, size limits, and generation-based invalidation across workers.
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services.local_backend import LocalClient
+from core.services.repo_store import RepoStore
+from core.services.shared_cache import MemoryBackend, SQLiteBackend, SharedCache, repo_scope
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_get_or_load_caches_copies():
+    for backend in (MemoryBackend(), SQLiteBackend(os.path.join(tempfile.mkdtemp(), "cache.db"))):
+        cache = SharedCache(backend)
+        load = Loader({"files": [1, 2]})
+        first = cache.get_or_load("files", repo_scope("r1"), "all", load)
+        first["files"].append(3)
+        assert cache.get_or_load("files", repo_scope("r1"), "all", load) == {"files": [1, 2]}
+        assert load.calls == 1
+        # Other keys and scopes are separate entries
+        cache.get_or_load("files", repo_scope("r2"), "all", load)
+        cache.get_or_load("files", None, "all", load)
+        assert load.calls == 3
+
+
+def test_none_and_oversized_values_are_not_stored():
+    cache = SharedCache(MemoryBackend(), max_value_bytes=100)
+    missing, large = Loader(None), Loader("x" * 200)
+    for _ in range(2):
+        cache.get_or_load("row", None, "missing", missing)
+        cache.get_or_load("row", None, "large", large)
+    assert missing.calls == 2 and large.calls == 2
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_bytes=10)
+    backend.set("a", b"1234", 60)
+    backend.set("b", b"1234", 60)
+    backend.get("a")
+    backend.set("c", b"1234", 60)
+    assert backend.get("b") is None and backend.get("a") == b"1234" and backend.get("c") == b"1234"
+
+
+def test_invalidation_reaches_every_worker():
+    """Two backends on one file stand in for two worker processes."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        worker_a, worker_b = SharedCache(SQLiteBackend(path)), SharedCache(SQLiteBackend(path))
+        scope = repo_scope("r1")
+        assert worker_a.get_or_load("files", scope, "all", Loader("v1")) == "v1"
+        assert worker_b.get_or_load("files", scope, "all", Loader("v2")) == "v1"
+
+        # A load that started before the write finishes after it: stored under the old generation
+        stale_key, _ = worker_b._lookup("files", scope, "all")
+        worker_a.invalidate(scope)
+        worker_b._store(stale_key, "stale", None)
+
+        assert worker_b.get_or_load("files", scope, "all", Loader("v2")) == "v2"
+        assert worker_a.get_or_load("files", scope, "all", Loader("v3")) == "v2"
+
+
+def test_repo_store_writes_invalidate_cached_reads():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RepoStore(LocalClient(tmp), cache=SharedCache(MemoryBackend()))
+        repo_id = store.resolve_repo_id("o/r")
+        files = [{"relative_path": f"f{i}.py"} for i in range(3)]
+        store.save_repo(repo_id, {"full_name": "o/r"}, {}, {"file_metadata": files})
+        assert len(store.load_repo(repo_id, ["file_metadata"])["file_metadata"]) == 3
+
+        store.update_field(repo_id, "file_metadata", files[:2])
+        assert len(store.load_repo(repo_id, ["file_metadata"])["file_metadata"]) == 2
+        store.save_repo(repo_id, {"full_name": "o/r"}, {}, {"file_metadata": files[:1]})
+        assert len(store.load_repo(repo_id, ["file_metadata"])["file_metadata"]) == 1
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_get_or_load_caches_copies,
+        test_none_and_oversized_values_are_not_stored,
+        test_memory_backend_evicts_least_recently_used,
+        test_invalidation_reaches_every_worker,
+        test_repo_store_writes_invalidate_cached_reads,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL SHARED CACHE TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
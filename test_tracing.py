@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for span tracing: context propagation through asyncio, critical paths and OTLP export shape.
+"""
+
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+from core.services import tracing
+from core.services.tracing import critical_path, recent_traces, span, to_otlp, traced
+
+
+def latest_trace(name: str) -> tracing.Trace:
+    return next(trace for trace in reversed(recent_traces) if trace.root.name == name)
+
+
+def test_spans_propagate_through_tasks_and_threads():
+    """Children started with gather and to_thread share the trace and point at their parent."""
+
+    @traced("child")
+    async def child(delay: float):
+        await asyncio.sleep(delay)
+
+    def blocking():
+        with span("in_thread"):
+            time.sleep(0.01)
+
+    async def run():
+        with span("root") as root:
+            await asyncio.gather(child(0.01), child(0.03))
+            await asyncio.to_thread(blocking)
+            return root
+
+    root = asyncio.run(run())
+    trace = latest_trace("root")
+    assert trace.finished and trace.open == 0
+    names = [s.name for s in trace.spans]
+    assert names.count("child") == 2 and "in_thread" in names
+    assert all(s.parent_id == root.span_id for s in trace.spans[1:])
+    assert len({s.trace.trace_id for s in trace.spans}) == 1
+
+
+def test_critical_path_follows_last_finishing_child():
+    async def run():
+        with span("request"):
+            async def work(name: str, delay: float):
+                with span(name):
+                    await asyncio.sleep(delay)
+            await asyncio.gather(work("fast", 0.01), work("slow", 0.05))
+            with span("write"):
+                time.sleep(0.01)
+
+    asyncio.run(run())
+    trace = latest_trace("request")
+    path = critical_path(trace)
+    names = [step["name"] for step in path["steps"]]
+    assert names == ["request", "slow", "write"]
+    total = sum(step["self_ms"] for step in path["steps"])
+    assert abs(total - trace.root.duration * 1000) < 0.01
+    assert "fast" not in path["by_name"]
+
+
+def test_errors_and_span_cap():
+    try:
+        with span("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    failing = latest_trace("failing").root
+    assert failing.status == "error" and failing.error == "ValueError: boom"
+
+    limit = tracing.MAX_SPANS_PER_TRACE
+    tracing.MAX_SPANS_PER_TRACE = 3
+    try:
+        with span("capped"):
+            for _ in range(5):
+                with span("step") as step:
+                    step.set("ignored", True)
+    finally:
+        tracing.MAX_SPANS_PER_TRACE = limit
+    capped = latest_trace("capped")
+    assert len(capped.spans) == 3 and capped.dropped == 3
+
+
+def test_otlp_encoding():
+    with span("export", repo="o/r", files=3):
+        tracing.record_span("llm.completion", time.perf_counter() - 0.01, time.perf_counter(), model="m")
+    payload = to_otlp(latest_trace("export"))
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [s["name"] for s in spans] == ["export", "llm.completion"]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"] and len(spans[0]["traceId"]) == 32
+    assert {"key": "files", "value": {"intValue": "3"}} in spans[0]["attributes"]
+    assert int(spans[0]["endTimeUnixNano"]) >= int(spans[1]["endTimeUnixNano"]) > int(spans[1]["startTimeUnixNano"])
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_spans_propagate_through_tasks_and_threads,
+        test_critical_path_follows_last_finishing_child,
+        test_errors_and_span_cap,
+        test_otlp_encoding,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL TRACING TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
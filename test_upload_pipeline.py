@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for the upload pipeline's retries, error classification and stats.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'Backend'))
+
+import httpx
+
+from core.services.download_scheduler import ByteBudget
+from core.services.local_storage import LocalStorageError
+from core.services.upload_pipeline import UploadPipeline, is_already_exists, is_transient
+
+
+class FakeBucket:
+    """Fails each path's first uploads with the given errors, then stores it."""
+
+    def __init__(self, errors=None):
+        self.errors = {path: list(queue) for path, queue in (errors or {}).items()}
+        self.calls = {}
+        self.stored = {}
+
+    def upload(self, path, file, file_options=None):
+        self.calls[path] = self.calls.get(path, 0) + 1
+        queue = self.errors.get(path)
+        if queue:
+            error = queue.pop(0)
+            if isinstance(error, dict):
+                return error
+            raise error
+        self.stored[path] = file if isinstance(file, bytes) else file.read()
+        return {"path": path}
+
+
+def upload_all(bucket, jobs, max_retries=3):
+    async def run():
+        async with UploadPipeline(bucket, workers=2, max_retries=max_retries, base_delay=0) as uploads:
+            futures = [await uploads.submit(path, content, "text/plain") for path, content in jobs]
+        return [f.result() for f in futures], uploads.stats()
+
+    return asyncio.run(asyncio.wait_for(run(), 10))
+
+
+def test_transient_errors_are_retried():
+    """Transient errors are retried until the upload succeeds, each retry counted once."""
+    bucket = FakeBucket({
+        "a": [httpx.ConnectTimeout("connect timed out"), LocalStorageError("Service Unavailable", 503)],
+        "b": [ConnectionResetError("connection reset by peer")],
+    })
+    (a, b, c), stats = upload_all(bucket, [("a", b"aa"), ("b", b"b"), ("c", b"ccc")])
+    assert (a.ok, a.attempts, a.size) == (True, 3, 2)
+    assert (b.ok, b.attempts) == (True, 2)
+    assert (c.ok, c.attempts) == (True, 1)
+    assert bucket.calls == {"a": 3, "b": 2, "c": 1}
+    assert (stats["files"], stats["bytes"], stats["retries"], stats["failures"]) == (3, 6, 3, 0)
+
+
+def test_permanent_errors_fail_without_retry():
+    """A non-transient error, raised or returned in the response, fails on the first attempt."""
+    bucket = FakeBucket({
+        "denied": [LocalStorageError("new row violates row-level security policy", 403)],
+        "invalid": [{"error": "Invalid key"}],
+    })
+    (denied, invalid, ok), stats = upload_all(bucket, [("denied", b"x"), ("invalid", b"y"), ("ok", b"z")])
+    assert (denied.ok, denied.attempts) == (False, 1) and "row-level security" in denied.error
+    assert (invalid.ok, invalid.attempts, invalid.error) == (False, 1, "Invalid key")
+    assert ok.ok
+    assert bucket.calls == {"denied": 1, "invalid": 1, "ok": 1}
+    assert (stats["files"], stats["retries"], stats["failures"]) == (1, 0, 2)
+
+
+def test_retries_are_capped():
+    """A path that keeps failing transiently gives up after max_retries retries."""
+    bucket = FakeBucket({"flaky": [TimeoutError("read timed out")] * 10})
+    (result,), stats = upload_all(bucket, [("flaky", b"data")], max_retries=2)
+    assert (result.ok, result.attempts) == (False, 3)
+    assert bucket.calls == {"flaky": 3}
+    assert (stats["files"], stats["retries"], stats["failures"]) == (0, 2, 1)
+
+
+def test_already_exists_counts_as_uploaded():
+    """An object uploaded by someone else first, even after a retry, is a success."""
+    bucket = FakeBucket({
+        "dup": [LocalStorageError("The resource already exists", 409)],
+        "raced": [httpx.ReadTimeout("timed out"), {"error": "Duplicate"}],
+    })
+    (dup, raced), stats = upload_all(bucket, [("dup", b"abc"), ("raced", b"de")])
+    assert (dup.ok, dup.attempts, dup.size) == (True, 1, 3)
+    assert (raced.ok, raced.attempts) == (True, 2)
+    assert "dup" not in bucket.stored
+    assert (stats["files"], stats["bytes"], stats["retries"], stats["failures"]) == (2, 5, 1, 0)
+
+
+def test_missing_spooled_file_resolves_its_future():
+    """A spooled file that is gone fails its upload; the worker keeps going and the budget is released."""
+    with tempfile.TemporaryDirectory() as tmp:
+        spooled = Path(tmp) / "spooled"
+        spooled.write_bytes(b"spooled bytes")
+        missing = Path(tmp) / "missing"
+
+        async def run():
+            budget = ByteBudget(100)
+            bucket = FakeBucket()
+            async with UploadPipeline(bucket, workers=1, base_delay=0) as uploads:
+                futures = []
+                for path, content in [("missing", missing), ("spooled", spooled), ("bytes", b"ok")]:
+                    reserved = await budget.acquire(10)
+                    future = await uploads.submit(path, content, "text/plain")
+                    future.add_done_callback(lambda _, reserved=reserved: budget.release(reserved))
+                    futures.append(future)
+            return [f.result() for f in futures], budget.available, bucket.stored, uploads.stats()
+
+        (lost, spooled_result, plain), available, stored, stats = asyncio.run(asyncio.wait_for(run(), 10))
+        assert not lost.ok and lost.attempts == 1
+        assert spooled_result.ok and spooled_result.size == len(b"spooled bytes") and plain.ok
+        assert stored == {"spooled": b"spooled bytes", "bytes": b"ok"}
+        assert available == 100
+        assert (stats["files"], stats["failures"]) == (2, 1)
+
+
+def test_error_classification():
+    assert is_transient(httpx.ConnectError("refused"))
+    assert is_transient(LocalStorageError("Too Many Requests", 429))
+    assert is_transient(RuntimeError("upstream request timeout"))
+    assert not is_transient(LocalStorageError("Object not found", 404))
+    assert not is_transient(RuntimeError("Invalid key"))
+    assert not is_transient(FileNotFoundError("spooled file missing"))
+    assert is_already_exists(LocalStorageError("The resource already exists", 409))
+    assert is_already_exists(RuntimeError("Duplicate"))
+    assert not is_already_exists(RuntimeError("Bucket not found"))
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_transient_errors_are_retried,
+        test_permanent_errors_fail_without_retry,
+        test_retries_are_capped,
+        test_already_exists_counts_as_uploaded,
+        test_missing_spooled_file_resolves_its_future,
+        test_error_classification,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print("\n🎉 ALL UPLOAD PIPELINE TESTS PASSED!")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())